@@ -0,0 +1,56 @@
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.zkscript.bilinear_pairings.bls12_381.final_exponentiation import (
+    final_exponentiation as bls12_381_final_exponentiation,
+)
+from src.zkscript.bilinear_pairings.bls12_381.parameters import exp_miller_loop as bls12_381_exp_miller_loop
+from src.zkscript.bilinear_pairings.mnt4_753.final_exponentiation import (
+    final_exponentiation as mnt4_753_final_exponentiation,
+)
+from src.zkscript.bilinear_pairings.mnt4_753.parameters import exp_miller_loop as mnt4_753_exp_miller_loop
+from src.zkscript.util.addition_chains import addition_chain_operations, search_addition_chain
+from src.zkscript.util.utility_scripts import pick
+
+CURVES = {
+    "bls12_381": (bls12_381_final_exponentiation, bls12_381_exp_miller_loop),
+    "mnt4_753": (mnt4_753_final_exponentiation, mnt4_753_exp_miller_loop),
+}
+
+
+def operation_costs(final_exponentiation):
+    """Return the sizes of the squaring, of the multiplication (picking one operand) and of the cyclotomic inverse."""
+    n_elements = final_exponentiation.EXTENSION_DEGREE
+    arguments = {"take_modulo": True, "check_constant": False, "clean_constant": False, "is_constant_reused": False}
+    square = final_exponentiation.square(**arguments)
+    mul = pick(position=2 * n_elements - 1, n_elements=n_elements) + final_exponentiation.mul(**arguments)
+    inverse = final_exponentiation.cyclotomic_inverse(take_modulo=False, check_constant=False, clean_constant=False)
+    return tuple(len(script.raw_serialize()) for script in (square, mul, inverse))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Search the addition chains for the exponent of the hard part of the final exponentiation."
+    )
+    parser.add_argument("--curves", nargs="+", choices=list(CURVES), default=list(CURVES))
+    parser.add_argument("--max-width", type=int, default=8, help="largest window width considered by the search")
+    args = parser.parse_args()
+
+    for curve in args.curves:
+        final_exponentiation, exp_e = CURVES[curve]
+        e = sum(digit * 2**i for i, digit in enumerate(exp_e))
+        chain = search_addition_chain(abs(e), *operation_costs(final_exponentiation), max_width=args.max_width)
+        n_squares, n_muls, n_inverses = addition_chain_operations(chain)
+        print(f"# {curve}: {n_squares} squarings, {n_muls} multiplications, {n_inverses} inversions")
+        print("# Addition chain for abs(u), computed by benchmarks/addition_chains.py")
+        print("exp_miller_loop_chain = [")
+        for step in chain:
+            print(f"    {step},")
+        print("]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+from tx_engine import Context, Script
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.zkscript.bilinear_pairings.bls12_381 import fields as bls12_381_fields
+from src.zkscript.bilinear_pairings.bls12_381.bls12_381 import bls12_381 as bls12_381_pairing
+from src.zkscript.bilinear_pairings.bls12_381.final_exponentiation import (
+    final_exponentiation as bls12_381_final_exponentiation,
+)
+from src.zkscript.bilinear_pairings.bls12_381.line_functions import line_functions as bls12_381_line_functions
+from src.zkscript.bilinear_pairings.mnt4_753 import fields as mnt4_753_fields
+from src.zkscript.bilinear_pairings.mnt4_753.final_exponentiation import (
+    final_exponentiation as mnt4_753_final_exponentiation,
+)
+from src.zkscript.bilinear_pairings.mnt4_753.line_functions import line_functions as mnt4_753_line_functions
+from src.zkscript.bilinear_pairings.mnt4_753.mnt4_753 import mnt4_753 as mnt4_753_pairing
+from src.zkscript.elliptic_curves.ec_operations_fq import EllipticCurveFq
+from src.zkscript.elliptic_curves.ec_operations_fq_unrolled import EllipticCurveFqUnrolled
+from src.zkscript.groth16.bls12_381.bls12_381 import bls12_381 as bls12_381_groth16
+from src.zkscript.groth16.mnt4_753.mnt4_753 import mnt4_753 as mnt4_753_groth16
+from src.zkscript.util.fragment_cache import FRAGMENT_CACHE
+from src.zkscript.util.script_statistics import METRICS, compare_statistics, script_statistics
+from src.zkscript.util.utility_scripts import nums_to_script
+
+# Modulo threshold (in bits) used for the components whose reductions are planned
+MODULO_THRESHOLD = 200 * 8
+
+CURVES = {
+    "bls12_381": {
+        "fields": {
+            "Fq2": bls12_381_fields.fq2_script,
+            "Fq4": bls12_381_fields.fq4_script,
+            "Fq6": bls12_381_fields.fq6_script,
+            "Fq12": bls12_381_fields.fq12_script,
+            "Fq12Cubic": bls12_381_fields.fq12cubic_script,
+        },
+        "line_functions": bls12_381_line_functions,
+        "pairing": bls12_381_pairing,
+        "final_exponentiation": bls12_381_final_exponentiation,
+        "groth16": bls12_381_groth16,
+    },
+    "mnt4_753": {
+        "fields": {
+            "Fq2": mnt4_753_fields.fq2_script,
+            "Fq4": mnt4_753_fields.fq4_script,
+        },
+        "line_functions": mnt4_753_line_functions,
+        "pairing": mnt4_753_pairing,
+        "final_exponentiation": mnt4_753_final_exponentiation,
+        "groth16": mnt4_753_groth16,
+    },
+}
+
+# Number of coordinates of the elements of the field extensions
+EXTENSION_DEGREES = {"Fq2": 2, "Fq4": 4, "Fq6": 6, "Fq12": 12, "Fq12Cubic": 12}
+
+
+def karatsuba_fields(curve: str) -> dict:
+    """Return the field extensions of `curve` (except Fq12Cubic) built with the Karatsuba multiplication strategy."""
+    fields = CURVES[curve]["fields"]
+    fq2 = fields["Fq2"]
+    q = fq2.MODULUS
+    out = {"Fq2": type(fq2)(q=q, non_residue=fq2.NON_RESIDUE, mul_strategy="karatsuba")}
+    out["Fq4"] = type(fields["Fq4"])(
+        q=q, base_field=out["Fq2"], gammas_frobenius=fields["Fq4"].GAMMAS_FROBENIUS, mul_strategy="karatsuba"
+    )
+    if "Fq6" in fields:
+        out["Fq6"] = type(fields["Fq6"])(q=q, base_field=out["Fq2"], mul_strategy="karatsuba")
+    if "Fq12" in fields:
+        out["Fq12"] = type(fields["Fq12"])(
+            q=q,
+            fq2=out["Fq2"],
+            fq6=out["Fq6"],
+            gammas_frobenius=fields["Fq12"].GAMMAS_FROBENIUS,
+            mul_strategy="karatsuba",
+        )
+    return out
+
+
+def unlocking_scripts(curve: str) -> dict[str, Script]:
+    """Return the unlocking scripts of the components of `curve` whose execution is timed, as name -> script.
+
+    The field multiplications are executed on pseudo-random (but reproducible) elements.
+    """
+    rng = random.Random(0)
+    q = CURVES[curve]["pairing"].MODULUS
+    out = {}
+    for name in CURVES[curve]["fields"]:
+        unlocking_script = nums_to_script([q] + [rng.randrange(q) for _ in range(2 * EXTENSION_DEGREES[name])])
+        out[f"{name}.mul"] = unlocking_script
+        out[f"{name}.mul_karatsuba"] = unlocking_script
+    return out
+
+
+def execution_time(script: Script, repeat: int) -> float:
+    """Return the time (in seconds) taken by the interpreter to execute `script` (minimum over `repeat` runs)."""
+    elapsed = float("inf")
+    for _ in range(repeat):
+        context = Context(script=script)
+        start = time.perf_counter()
+        if not context.evaluate():
+            msg = "The script failed to execute."
+            raise RuntimeError(msg)
+        elapsed = min(elapsed, time.perf_counter() - start)
+    return elapsed
+
+
+def components(curve: str) -> dict:
+    """Return the components to benchmark for `curve`, as name -> function generating the script."""
+    config = CURVES[curve]
+    pairing = config["pairing"]
+    groth16 = config["groth16"]
+    q = pairing.MODULUS
+    flags = {"check_constant": True, "clean_constant": True}
+    fragment_flags = {**flags, "is_constant_reused": False}
+    # The verifiers are generated with dummy constants: their statistics do not depend on the values (as long as the
+    # lines of minus_gamma and minus_delta are well defined)
+    vk = {
+        "alpha_beta": [q - 5 - i for i in range(pairing.N_ELEMENTS_MILLER_OUTPUT)],
+        "minus_gamma": [q - 7 - i for i in range(pairing.N_POINTS_TWIST)],
+        "minus_delta": [q - 11 - i for i in range(pairing.N_POINTS_TWIST)],
+        "gamma_abc": [[q - 13 - i, q - 17 - i] for i in range(3)],
+    }
+
+    out = {}
+    for name, field in config["fields"].items():
+        out[f"{name}.mul"] = lambda field=field: field.mul(take_modulo=True, **fragment_flags)
+    for name, field in karatsuba_fields(curve).items():
+        out[f"{name}.mul_karatsuba"] = lambda field=field: field.mul(take_modulo=True, **fragment_flags)
+    for name, field in config["fields"].items():
+        if hasattr(field, "cyclotomic_square"):
+            out[f"{name}.square"] = lambda field=field: field.square(take_modulo=True, **fragment_flags)
+            out[f"{name}.cyclotomic_square"] = lambda field=field: field.cyclotomic_square(
+                take_modulo=True, **fragment_flags
+            )
+    out["line_evaluation"] = lambda: config["line_functions"].line_evaluation(take_modulo=True, **fragment_flags)
+    out["miller_loop"] = lambda: pairing.miller_loop(modulo_threshold=MODULO_THRESHOLD, **flags)
+    out["triple_miller_loop"] = lambda: pairing.triple_miller_loop(modulo_threshold=MODULO_THRESHOLD, **flags)
+    for n_pairs in (3, 4):
+        out[f"multi_miller_loop_{n_pairs}"] = lambda n_pairs=n_pairs: pairing.multi_miller_loop(
+            n_pairs=n_pairs, modulo_threshold=MODULO_THRESHOLD, **flags
+        )
+    out["triple_miller_loop_with_fixed_qs"] = lambda: pairing.triple_miller_loop_with_fixed_qs(
+        modulo_threshold=MODULO_THRESHOLD, point_q2=vk["minus_gamma"], point_q3=vk["minus_delta"], **flags
+    )
+    out["easy_exponentiation_with_inverse_check"] = lambda: config[
+        "final_exponentiation"
+    ].easy_exponentiation_with_inverse_check(take_modulo=True, **fragment_flags)
+    out["hard_exponentiation"] = lambda: config["final_exponentiation"].hard_exponentiation(
+        take_modulo=True, modulo_threshold=MODULO_THRESHOLD, **flags
+    )
+    out["unrolled_multiplication"] = lambda: EllipticCurveFqUnrolled(
+        q=q, ec_over_fq=EllipticCurveFq(q=q, curve_a=groth16.curve_a)
+    ).unrolled_multiplication(max_multiplier=groth16.r, modulo_threshold=MODULO_THRESHOLD, **flags)
+    out["unrolled_naf_multiplication"] = lambda: EllipticCurveFqUnrolled(
+        q=q, ec_over_fq=EllipticCurveFq(q=q, curve_a=groth16.curve_a)
+    ).unrolled_naf_multiplication(max_multiplier=groth16.r, modulo_threshold=MODULO_THRESHOLD, **flags)
+    out["groth16_verifier"] = lambda: groth16.groth16_verifier(modulo_threshold=MODULO_THRESHOLD, **vk, **flags)
+    out["groth16_verifier_precomputed_lines"] = lambda: groth16.groth16_verifier(
+        modulo_threshold=MODULO_THRESHOLD, precompute_lines=True, **vk, **flags
+    )
+    out["groth16_verifier_multi_scalar_multiplication"] = lambda: groth16.groth16_verifier(
+        modulo_threshold=MODULO_THRESHOLD, multi_scalar_multiplication=True, **vk, **flags
+    )
+    out["groth16_verifier_fixed_base_comb_4"] = lambda: groth16.groth16_verifier(
+        modulo_threshold=MODULO_THRESHOLD, multi_scalar_multiplication=True, comb_width=4, **vk, **flags
+    )
+    if groth16.glv_beta is not None:
+        out["groth16_verifier_glv"] = lambda: groth16.groth16_verifier(
+            modulo_threshold=MODULO_THRESHOLD, glv=True, **vk, **flags
+        )
+    out["multi_pairing_with_residue_witness_4"] = lambda: pairing.multi_pairing_with_residue_witness(
+        n_pairs=4, modulo_threshold=MODULO_THRESHOLD, **flags
+    )
+    out["groth16_verifier_with_residue_witness"] = lambda: groth16.groth16_verifier_with_residue_witness(
+        modulo_threshold=MODULO_THRESHOLD,
+        alpha=vk["gamma_abc"][0],
+        minus_beta=[q - 19 - i for i in range(pairing.N_POINTS_TWIST)],
+        minus_gamma=vk["minus_gamma"],
+        minus_delta=vk["minus_delta"],
+        gamma_abc=vk["gamma_abc"],
+        **flags,
+    )
+    for k in (2, 4):
+        out[f"batch_groth16_verifier_{k}"] = lambda k=k: groth16.batch_groth16_verifier(
+            k=k, modulo_threshold=MODULO_THRESHOLD, **vk, **flags
+        )
+    return out
+
+
+def run(curves: list[str], only: list[str] | None = None, repeat: int = 3) -> dict[str, dict[str, float]]:
+    """Generate the scripts of the components of `curves` and return their statistics.
+
+    The fragment cache is cleared before every generation, so that the generation time is the one of a cold start.
+    The generation time reported is the minimum over `repeat` generations. The components with an unlocking script
+    (see `unlocking_scripts`) are also executed, and the minimum execution time over `repeat` runs is reported.
+    """
+    results = {}
+    for curve in curves:
+        unlocking = unlocking_scripts(curve)
+        for name, generate in components(curve).items():
+            if only is not None and name not in only:
+                continue
+            elapsed = float("inf")
+            for _ in range(repeat):
+                FRAGMENT_CACHE.clear()
+                start = time.perf_counter()
+                script = generate()
+                elapsed = min(elapsed, time.perf_counter() - start)
+            results[f"{curve}/{name}"] = {"generation_time": round(elapsed, 6), **script_statistics(script)}
+            if name in unlocking:
+                results[f"{curve}/{name}"]["execution_time"] = round(
+                    execution_time(unlocking[name] + script, repeat), 6
+                )
+            print(f"{curve}/{name}: {results[f'{curve}/{name}']}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the size, the generation time and the execution time of the scripts."
+    )
+    parser.add_argument("--curves", nargs="+", choices=list(CURVES), default=list(CURVES))
+    parser.add_argument("--only", nargs="+", help="the components to benchmark, e.g., miller_loop Fq2.mul")
+    parser.add_argument("--repeat", type=int, default=3, help="number of generations (and executions) timed")
+    parser.add_argument("--output", type=Path, default=Path("benchmark.json"), help="where to save the results")
+    parser.add_argument("--baseline", type=Path, help="the results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.0, help="relative increase of the script metrics allowed")
+    parser.add_argument(
+        "--time-tolerance", type=float, default=0.5, help="relative increase of the generation time allowed"
+    )
+    parser.add_argument(
+        "--time-resolution", type=float, default=0.01, help="absolute increase (in s) of the generation time allowed"
+    )
+    args = parser.parse_args()
+
+    results = run(args.curves, args.only, args.repeat)
+    args.output.write_text(json.dumps(results, indent=4) + "\n")
+
+    if args.baseline is None:
+        return
+    baseline = json.loads(args.baseline.read_text())
+    regressions = compare_statistics(results, baseline, args.tolerance, METRICS)
+    regressions += compare_statistics(
+        results, baseline, args.time_tolerance, ["generation_time", "execution_time"], args.time_resolution
+    )
+    for regression in regressions:
+        print(f"Regression: {regression}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,11 @@
 # Build pairing model for BLS12_381
 
 from tx_engine import Script
+from tx_engine.engine.op_codes import (
+    OP_0,
+    OP_FROMALTSTACK,
+    OP_TOALTSTACK,
+)
 
 from src.zkscript.bilinear_pairings.bls12_381.fields import fq2_script
 from src.zkscript.bilinear_pairings.bls12_381.final_exponentiation import final_exponentiation
@@ -13,6 +18,7 @@ from src.zkscript.bilinear_pairings.bls12_381.parameters import (
     N_ELEMENTS_MILLER_OUTPUT,
     N_POINTS_CURVE,
     N_POINTS_TWIST,
+    NON_RESIDUE_FQ,
     exp_miller_loop,
     q,
     twisted_a,
@@ -25,11 +31,9 @@ twisted_curve_operations = EllipticCurveFq2(q=q, curve_a=twisted_a, fq2=fq2_scri
 
 def pad_eval_times_eval_to_miller_output() -> Script:
     out = Script()
-    out += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK")
-    out += Script.parse_string("OP_0 OP_0")
-    out += Script.parse_string(
-        "OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK"
-    )
+    out += Script([OP_TOALTSTACK] * 6)
+    out += Script([OP_0, OP_0])
+    out += Script([OP_FROMALTSTACK] * 6)
 
     return out
 
@@ -47,6 +51,7 @@ bls12_381 = PairingModel(
     point_addition_twisted_curve=twisted_curve_operations.point_addition,
     point_negation_twisted_curve=twisted_curve_operations.point_negation,
     line_eval=line_functions.line_evaluation,
+    line_eval_fixed_q=line_functions.line_evaluation_fixed_q,
     line_eval_times_eval=miller_output_ops.line_eval_times_eval,
     line_eval_times_eval_times_eval=miller_output_ops.line_eval_times_eval_times_eval,
     line_eval_times_eval_times_eval_times_eval=miller_output_ops.line_eval_times_eval_times_eval_times_eval,
@@ -62,4 +67,8 @@ bls12_381 = PairingModel(
     cyclotomic_inverse=final_exponentiation.cyclotomic_inverse,
     easy_exponentiation_with_inverse_check=final_exponentiation.easy_exponentiation_with_inverse_check,
     hard_exponentiation=final_exponentiation.hard_exponentiation,
+    residue_witness_check=final_exponentiation.residue_witness_check,
+    n_elements_scaling_factor=6,
+    twisted_a=twisted_a,
+    non_residue_fq=NON_RESIDUE_FQ,
 )
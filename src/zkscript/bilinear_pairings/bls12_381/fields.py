@@ -2,6 +2,9 @@
 from types import MethodType
 
 from tx_engine import Script
+from tx_engine.engine.op_codes import (
+    OP_2ROT,
+)
 
 from src.zkscript.bilinear_pairings.bls12_381.parameters import GAMMAS, NON_RESIDUE_FQ, q
 from src.zkscript.fields.fq2 import Fq2 as Fq2ScriptModel
@@ -54,7 +57,7 @@ def to_quadratic(self) -> Script:
     out += roll(position=11, n_elements=2)
 
     # After this, the stack is b c d f a e
-    out += Script.parse_string("OP_2ROT")
+    out += Script([OP_2ROT])
 
     # After this, the stack is b c f a e d
     out += roll(position=7, n_elements=2)
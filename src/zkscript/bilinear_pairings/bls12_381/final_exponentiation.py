@@ -1,10 +1,21 @@
 # Final exponentiation for MNT4_753
 
 from tx_engine import Script
+from tx_engine.engine.op_codes import (
+    OP_0,
+    OP_1,
+    OP_1SUB,
+    OP_DEPTH,
+    OP_EQUALVERIFY,
+    OP_FROMALTSTACK,
+    OP_PICK,
+    OP_TOALTSTACK,
+)
 
 from src.zkscript.bilinear_pairings.bls12_381.fields import fq12_script, fq12cubic_script
 from src.zkscript.bilinear_pairings.bls12_381.parameters import exp_miller_loop
 from src.zkscript.bilinear_pairings.model.cyclotomic_exponentiation import CyclotomicExponentiation
+from src.zkscript.util.script_builder import ScriptBuilder
 from src.zkscript.util.utility_scripts import nums_to_script, pick, roll
 
 
@@ -13,7 +24,7 @@ class FinalExponentiation(CyclotomicExponentiation):
         self.MODULUS = fq12.MODULUS
         self.FQ12 = fq12
         self.cyclotomic_inverse = fq12.conjugate
-        self.square = fq12.square
+        self.square = fq12.cyclotomic_square
         self.mul = fq12.mul
         self.EXTENSION_DEGREE = 12
 
@@ -38,11 +49,7 @@ class FinalExponentiation(CyclotomicExponentiation):
         fq12 = self.FQ12
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
@@ -52,8 +59,8 @@ class FinalExponentiation(CyclotomicExponentiation):
         check_f_inverse += fq12.mul(
             take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
         )  # Multiply
-        check_f_inverse += Script.parse_string(" ".join(["OP_0", "OP_EQUALVERIFY"] * 11))
-        check_f_inverse += Script.parse_string("OP_1 OP_EQUALVERIFY")
+        check_f_inverse += Script([OP_0, OP_EQUALVERIFY] * 11)
+        check_f_inverse += Script([OP_1, OP_EQUALVERIFY])
 
         # After this, the stack is: Inverse(f_quadratic) Conjugate(f_quadratic)
         # Conjugate f_quadratic
@@ -98,19 +105,16 @@ class FinalExponentiation(CyclotomicExponentiation):
         # Fq12 implementation
         fq12 = self.FQ12
 
+        out = ScriptBuilder()
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
-        else:
-            out = Script()
+            out += Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
 
         # Step 1
         # After this, the stack is g t0
         out += pick(position=11, n_elements=12)
-        out += fq12.square(take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False)
+        out += fq12.cyclotomic_square(
+            take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
+        )
 
         # Step 2
         # After this, the stack is g t0 t1
@@ -121,6 +125,7 @@ class FinalExponentiation(CyclotomicExponentiation):
             modulo_threshold=modulo_threshold,
             check_constant=False,
             clean_constant=False,
+            pick_on_demand=True,
         )  # Compute t1
 
         # Step 3
@@ -132,6 +137,7 @@ class FinalExponentiation(CyclotomicExponentiation):
             modulo_threshold=modulo_threshold,
             check_constant=False,
             clean_constant=False,
+            pick_on_demand=True,
         )  # Compute t2
 
         # Step 4
@@ -162,6 +168,7 @@ class FinalExponentiation(CyclotomicExponentiation):
             modulo_threshold=modulo_threshold,
             check_constant=False,
             clean_constant=False,
+            pick_on_demand=True,
         )  # Compute t2
 
         # Step 9
@@ -173,6 +180,7 @@ class FinalExponentiation(CyclotomicExponentiation):
             modulo_threshold=modulo_threshold,
             check_constant=False,
             clean_constant=False,
+            pick_on_demand=True,
         )  # Compute t3
 
         # Step 10
@@ -213,6 +221,7 @@ class FinalExponentiation(CyclotomicExponentiation):
             modulo_threshold=modulo_threshold,
             check_constant=False,
             clean_constant=False,
+            pick_on_demand=True,
         )  # Compute t3^u
 
         # Step 17
@@ -240,6 +249,62 @@ class FinalExponentiation(CyclotomicExponentiation):
             take_modulo=take_modulo, check_constant=False, clean_constant=clean_constant, is_constant_reused=False
         )
 
+        return out.to_script()
+
+    def residue_witness_check(
+        self,
+        take_modulo: bool,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        is_constant_reused: bool | None = None,
+    ) -> Script:
+        """Check the residue witness c in place of the final exponentiation.
+
+        Input:
+            - w Inverse(c) f
+        Output:
+            - f_quadratic * w * Inverse(c_quadratic)^q
+        Assumption on data:
+            - w is an element of Fq6, embedded in Fq12 as (w, 0)
+            - Inverse(c) and f are passed as elements of Fq12Cubic and c_quadratic, f_quadratic are their Fq12 versions
+
+        If f = miller * c^u (see multi_miller_loop), the output is 1 if and only if miller * w = c^(q-u). As w is in
+        Fq6, w^((q^12-1)/r) = 1, so that this implies miller^((q^12-1)/r) = 1.
+        """
+        # Fq12 implementation
+        fq12 = self.FQ12
+        # Fq6 implementation
+        fq6 = fq12.FQ6
+
+        if check_constant:
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
+        else:
+            out = Script()
+
+        # After this, the stack is: w f_quadratic Inverse(c_quadratic)^q
+        out += fq12cubic_script.to_quadratic()
+        out += roll(position=23, n_elements=12)  # Roll Inverse(c)
+        out += fq12cubic_script.to_quadratic()
+        out += fq12.frobenius_odd(n=1, take_modulo=False, check_constant=False, clean_constant=False)
+
+        # After this, the stack is: w a b, where (a,b) = f_quadratic * Inverse(c_quadratic)^q
+        out += fq12.mul(take_modulo=False, check_constant=False, clean_constant=False)
+
+        # After this, the stack is: w a, altstack = [b * w]
+        out += pick(position=17, n_elements=6)  # Pick w
+        out += roll(position=11, n_elements=6)  # Roll b
+        out += fq6.mul(take_modulo=take_modulo, check_constant=False, clean_constant=False, is_constant_reused=False)
+        out += Script([OP_TOALTSTACK] * 6)
+
+        # After this, the stack is: (a * w, b * w)
+        out += fq6.mul(
+            take_modulo=take_modulo,
+            check_constant=False,
+            clean_constant=clean_constant,
+            is_constant_reused=is_constant_reused,
+        )
+        out += Script([OP_FROMALTSTACK] * 6)
+
         return out
 
 
@@ -1,17 +1,34 @@
 from tx_engine import Script
+from tx_engine.engine.op_codes import (
+    OP_1SUB,
+    OP_2ROT,
+    OP_2SWAP,
+    OP_DEPTH,
+    OP_DUP,
+    OP_EQUALVERIFY,
+    OP_FROMALTSTACK,
+    OP_MUL,
+    OP_NEGATE,
+    OP_PICK,
+    OP_ROT,
+    OP_SWAP,
+    OP_TOALTSTACK,
+)
 
 # Fq2 Script implementation
 from src.zkscript.bilinear_pairings.bls12_381.fields import fq2_script
-from src.zkscript.util.utility_scripts import nums_to_script, pick
+from src.zkscript.util.fragment_cache import FragmentCacheable, cached_fragment
+from src.zkscript.util.utility_scripts import nums_to_script, pick, reduce_n
 
 
-class LineFunctions:
+class LineFunctions(FragmentCacheable):
     """Line evaluation for BLS12_381."""
 
     def __init__(self, fq2):
         self.MODULUS = fq2.MODULUS
         self.FQ2 = fq2
 
+    @cached_fragment
     def line_evaluation(
         self,
         take_modulo: bool,
@@ -42,37 +59,33 @@ class LineFunctions:
         fq2 = self.FQ2
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         # Compute third component -----------------------------------------------------
 
         # After this, the stack is: lambda xQ yQ yP, altstack = [-lambda*xP]
-        third_component = Script.parse_string("OP_SWAP OP_NEGATE")  # Roll xP and negate
+        third_component = Script([OP_SWAP, OP_NEGATE])  # Roll xP and negate
         third_component += pick(position=7, n_elements=2)  # Pick lambda
-        third_component += Script.parse_string("OP_ROT")  # Roll -xP
+        third_component += Script([OP_ROT])  # Roll -xP
         third_component += fq2.scalar_mul(take_modulo=False, check_constant=False, clean_constant=False)
-        third_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        third_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # -----------------------------------------------------------------------------
 
         # Compute second component ----------------------------------------------------
 
         # After this, the stack is: lambda xQ yQ, altstack = [third_component, yP]
-        second_component = Script.parse_string("OP_TOALTSTACK")
+        second_component = Script([OP_TOALTSTACK])
         # -----------------------------------------------------------------------------
 
         # Compute first component ----------------------------------------------------
 
         # After this, the stack is: -yQ + lambda*xQ, altsack = [third_component, yP]
-        first_component = Script.parse_string("OP_2ROT OP_2ROT")  # Roll lambda and xQ
+        first_component = Script([OP_2ROT, OP_2ROT])  # Roll lambda and xQ
         first_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
-        first_component += Script.parse_string("OP_2SWAP")  # Roll yQ
+        first_component += Script([OP_2SWAP])  # Roll yQ
         if take_modulo:
             first_component += fq2.subtract(
                 take_modulo=take_modulo, check_constant=False, clean_constant=clean_constant, is_constant_reused=True
@@ -86,17 +99,71 @@ class LineFunctions:
 
         if take_modulo:
             # Batched modulo operations: pull from altstack, rotate, mod out, repeat
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+            out += reduce_n(3, is_constant_reused=is_constant_reused, is_constant_fetched=True)
+        else:
+            out += Script([OP_FROMALTSTACK, OP_FROMALTSTACK, OP_FROMALTSTACK])
+
+        return out
+
+    def line_evaluation_fixed_q(
+        self,
+        gradient: list[int],
+        point_q: list[int],
+        take_modulo: bool,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        is_constant_reused: bool | None = None,
+    ) -> Script:
+        """Evaluate the line through T and Q at P, where the line is fixed and hard-coded in the script.
+
+        Inputs:
+            - Stack: q .. P
+            - Altstack: []
+        Output:
+            - ev_(l_(T,Q)(P))
+        Assumption on data:
+            - gradient is the gradient through T and Q
+            - point_q = (x2,y2) is an affine point in E'(F_q^2) on the line
+            - P = (xP,yP) is passed as an affine point in E(F_q)
+        Variables:
+            - If take_modulo is set to True, the outputs are returned as constants in Z_q.
+        REMARK:
+            - The output is the same as the one of line_evaluation with lambda = gradient and Q = point_q, but the
+            first component -yQ + lambda*xQ is a constant, so only -lambda*xP is computed in the script.
+        """
+        q = self.MODULUS
+        non_residue = self.FQ2.NON_RESIDUE
+
+        if check_constant:
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
+        else:
+            out = Script()
+
+        first_component = [
+            (gradient[0] * point_q[0] + non_residue * gradient[1] * point_q[1] - point_q[2]) % q,
+            (gradient[0] * point_q[1] + gradient[1] * point_q[0] - point_q[3]) % q,
+        ]
+
+        # After this, the stack is: yP, altstack = [-lambda*xP]
+        out += Script([OP_SWAP, OP_DUP])
+        out += nums_to_script([-gradient[1] % q]) + Script([OP_MUL, OP_TOALTSTACK])
+        out += nums_to_script([-gradient[0] % q]) + Script([OP_MUL, OP_TOALTSTACK])
+
+        # After this, the stack is: -yQ + lambda*xQ yP, altstack = [-lambda*xP]
+        out += nums_to_script(first_component) + Script([OP_ROT])
+
+        if take_modulo:
+            if clean_constant is None and is_constant_reused is None:
+                msg = (
+                    f"If take_modulo is set, both clean_constant: {clean_constant} "
+                    f"and is_constant_reused: {is_constant_reused} must be set."
+                )
+                raise ValueError(msg)
+
+            # Batched modulo operations: mod out, pull from altstack, rotate, repeat
+            out += reduce_n(3, clean_constant, is_constant_reused)
         else:
-            out += Script.parse_string("OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK")
+            out += Script([OP_FROMALTSTACK, OP_FROMALTSTACK])
 
         return out
 
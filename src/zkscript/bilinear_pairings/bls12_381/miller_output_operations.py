@@ -1,12 +1,32 @@
 # Operations between Miller output (of type Fq4) and line evaluations
 
 from tx_engine import Script
+from tx_engine.engine.op_codes import (
+    OP_1SUB,
+    OP_2DUP,
+    OP_2OVER,
+    OP_2ROT,
+    OP_2SWAP,
+    OP_ADD,
+    OP_DEPTH,
+    OP_EQUALVERIFY,
+    OP_FROMALTSTACK,
+    OP_MOD,
+    OP_MUL,
+    OP_OVER,
+    OP_PICK,
+    OP_ROLL,
+    OP_ROT,
+    OP_TOALTSTACK,
+    OP_TUCK,
+)
 
 from src.zkscript.bilinear_pairings.bls12_381.fields import fq2_script, fq4_script
 
 # Fq2 Script implementation
 from src.zkscript.fields.fq12_3_over_2_over_2 import Fq12Cubic as Fq12CubicScriptModel
-from src.zkscript.util.utility_scripts import nums_to_script, pick, roll
+from src.zkscript.util.fragment_cache import cached_fragment
+from src.zkscript.util.utility_scripts import nums_to_script, pick, reduce_n, roll
 
 
 class MillerOutputOperations(Fq12CubicScriptModel):
@@ -16,6 +36,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
     Output of product of two line evaluations are somewhat sparse elements in Fq12Cubic
     """
 
+    @cached_fragment
     def line_eval_times_eval(
         self,
         take_modulo: bool,
@@ -42,11 +63,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         fq2 = self.FQ2
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
@@ -58,18 +75,18 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         compute_fifth_component += fq2.scalar_mul(take_modulo=False, check_constant=False, clean_constant=False)
 
         # After this, the stack is: a1 b1 c1 a2 b2 c2, altstack = [b2*c1 + b1*c2]
-        compute_fifth_component += Script.parse_string("OP_2OVER")  # Pick c2
+        compute_fifth_component += Script([OP_2OVER])  # Pick c2
         compute_fifth_component += pick(position=11, n_elements=1)  # Pick b1
         compute_fifth_component += fq2.scalar_mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_fifth_component += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_fifth_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_fifth_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of fifth component --------------------------------------------------
 
         # Computation of fourth component --------------------------------------------------------
 
         # After this, the stack is: a1 b1 c1 a2 b2 c2 (a1*c2), altstack = [fifthComponent]
-        compute_fourth_component = Script.parse_string("OP_2DUP")  # Pick c2
+        compute_fourth_component = Script([OP_2DUP])  # Pick c2
         compute_fourth_component += pick(position=11, n_elements=2)  # Pick a1
         compute_fourth_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
 
@@ -78,7 +95,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         compute_fourth_component += pick(position=8, n_elements=2)  # Pick a2
         compute_fourth_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_fourth_component += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_fourth_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_fourth_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of fourth component -------------------------------------------------
 
@@ -88,7 +105,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         # altstack = [fifthComponent, fourthComponent, c1*c2]
         compute_third_component = roll(position=6, n_elements=2)  # Roll c1
         compute_third_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_third_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_third_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of third component --------------------------------------------------
 
@@ -106,7 +123,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         compute_second_component += pick(position=7, n_elements=1)  # Pick b1
         compute_second_component += fq2.scalar_mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_second_component += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_second_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_second_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of second component -------------------------------------------------
 
@@ -115,25 +132,22 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         # After this, the stack is: (a1*a2 + (b2*b1*xi)),
         # altstack = [fifthComponent, fourthComponent, thirdComponent, secondComponent]
         compute_first_component = roll(position=3, n_elements=1)  # Roll b1
-        compute_first_component += Script.parse_string("OP_MUL OP_TOALTSTACK")
+        compute_first_component += Script([OP_MUL, OP_TOALTSTACK])
         compute_first_component += fq2.mul(
             take_modulo=False, check_constant=False, clean_constant=False
         )  # Compute a1*a2
         # After this, the stack is: (a1*a2 + (b2*b1*xi))_0,
         # altstack = [fifthComponent, fourthComponent, thirdComponent, secondComponent, (a1*a2 + (b2*b1*xi))_1]
-        compute_first_component += Script.parse_string("OP_FROMALTSTACK OP_TUCK OP_ADD OP_TOALTSTACK OP_ADD")
+        compute_first_component += Script([OP_FROMALTSTACK, OP_TUCK, OP_ADD, OP_TOALTSTACK, OP_ADD])
         if take_modulo:
-            if clean_constant:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL")
-            else:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
+            fetch_q = Script([OP_DEPTH, OP_1SUB, OP_ROLL]) if clean_constant else Script([OP_DEPTH, OP_1SUB, OP_PICK])
 
             compute_first_component += fetch_q
-            compute_first_component += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            compute_first_component += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            compute_first_component += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
+            compute_first_component += Script([OP_TUCK, OP_MOD, OP_OVER, OP_ADD, OP_OVER, OP_MOD])
+            compute_first_component += Script([OP_FROMALTSTACK, OP_ROT])
+            compute_first_component += Script([OP_TUCK, OP_MOD, OP_OVER, OP_ADD, OP_OVER, OP_MOD])
         else:
-            compute_first_component += Script.parse_string("OP_FROMALTSTACK")
+            compute_first_component += Script([OP_FROMALTSTACK])
 
         # End of computation of first component --------------------------------------------------
 
@@ -147,33 +161,13 @@ class MillerOutputOperations(Fq12CubicScriptModel):
 
         if take_modulo:
             # Batched modulo operations: pull from altstack, rotate, mod out, repeat
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+            out += reduce_n(8, is_constant_reused=is_constant_reused, is_constant_fetched=True)
         else:
-            out += Script.parse_string(
-                "OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK \
-                    OP_FROMALTSTACK OP_FROMALTSTACK"
-            )
+            out += Script([OP_FROMALTSTACK] * 8)
 
         return out
 
+    @cached_fragment
     def miller_loop_output_times_eval(
         self,
         take_modulo: bool,
@@ -201,11 +195,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         fq2 = self.FQ2
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
@@ -213,7 +203,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
 
         # After this, the stack is: a1 b1 c1 d1 e1 f1 a2 b2 c2 (b1*c2)
         compute_sixth_component = pick(position=14, n_elements=2)  # Pick b1
-        compute_sixth_component += Script.parse_string("OP_2OVER")  # Pick c2
+        compute_sixth_component += Script([OP_2OVER])  # Pick c2
         compute_sixth_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
 
         # After this, the stack is: a1 b1 c1 d1 e1 f1 a2 b2 c2 (b1*c2) (e2*b1)
@@ -226,7 +216,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         compute_sixth_component += pick(position=10, n_elements=2)  # Pick a2
         compute_sixth_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_sixth_component += fq2.add_three(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_sixth_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_sixth_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of sixth component -------------------------------------------------
 
@@ -234,7 +224,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
 
         # After this, the stack is: a1 b1 c1 d1 e1 f1 a2 b2 c2 (a1*c2), altstack = [sixthComponent]
         compute_fifth_component = pick(position=16, n_elements=2)  # Pick a1
-        compute_fifth_component += Script.parse_string("OP_2OVER")  # Pick c2
+        compute_fifth_component += Script([OP_2OVER])  # Pick c2
         compute_fifth_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
 
         # After this, the stack is: a1 b1 c1 d1 e1 f1 a2 b2 c2 (a1*c2) (a2*e1), altstack = [sixthComponent]
@@ -249,7 +239,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         compute_fifth_component += fq2.scalar_mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_fifth_component += fq2.mul_by_non_residue(take_modulo=False, check_constant=False, clean_constant=False)
         compute_fifth_component += fq2.add_three(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_fifth_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_fifth_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of fifth component -------------------------------------------------
 
@@ -273,7 +263,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         compute_fourth_component += pick(position=7, n_elements=2)  # Pick c2
         compute_fourth_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_fourth_component += fq2.add_three(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_fourth_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_fourth_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of fourth component ------------------------------------------------
 
@@ -299,7 +289,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         compute_third_component += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
         compute_third_component += fq2.mul_by_non_residue(take_modulo=False, check_constant=False, clean_constant=False)
         compute_third_component += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_third_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_third_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of third component -------------------------------------------------
 
@@ -323,7 +313,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         compute_second_component += pick(position=7, n_elements=2)  # Pick c2
         compute_second_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_second_component += fq2.add_three(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_second_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_second_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of second component ------------------------------------------------
 
@@ -344,7 +334,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
 
         # After this, the stack is: [a1*a2 + [(c1*c2) + (b1*b2)]*xi],
         # altstack = [sixthComponent, fifthComponent, fourthComponent, thirdComponent, secondComponent]
-        compute_first_component += Script.parse_string("OP_2ROT OP_2ROT")  # Roll a1 and a2
+        compute_first_component += Script([OP_2ROT, OP_2ROT])  # Roll a1 and a2
         compute_first_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         if take_modulo:
             compute_first_component += fq2.add(
@@ -366,37 +356,13 @@ class MillerOutputOperations(Fq12CubicScriptModel):
 
         if take_modulo:
             # Batched modulo operations: pull from altstack, rotate, mod out, repeat
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+            out += reduce_n(10, is_constant_reused=is_constant_reused, is_constant_fetched=True)
         else:
-            out += Script.parse_string(
-                "OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK \
-                    OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK"
-            )
+            out += Script([OP_FROMALTSTACK] * 10)
 
         return out
 
+    @cached_fragment
     def line_eval_times_eval_times_eval(
         self,
         take_modulo: bool,
@@ -424,11 +390,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         fq2 = self.FQ2
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
@@ -436,7 +398,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
 
         # After this, the stack is: a1 b1 c1 a2 b2 c2 d2 e2 (a1*e2)
         compute_sixth_component = pick(position=14, n_elements=2)  # Pick a1
-        compute_sixth_component += Script.parse_string("OP_2OVER")  # Pick e2
+        compute_sixth_component += Script([OP_2OVER])  # Pick e2
         compute_sixth_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
 
         # After this, the stack is: a1 b1 c1 a2 b2 c2 d2 e2 (a1*e2) (d2*b1)
@@ -449,7 +411,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         compute_sixth_component += pick(position=13, n_elements=2)  # Pick b2
         compute_sixth_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_sixth_component += fq2.add_three(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_sixth_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_sixth_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of sixth component -------------------------------------------------
 
@@ -461,7 +423,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         compute_fifth_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
 
         # After this, the stack is: a1 b1 c1 a2 b2 c2 d2 e2 (a1*d2) (b1*e2*xi), altstack = [sixthComponent]
-        compute_fifth_component += Script.parse_string("OP_2OVER")  # Pick e2
+        compute_fifth_component += Script([OP_2OVER])  # Pick e2
         compute_fifth_component += pick(position=16, n_elements=1)  # Pick b1
         compute_fifth_component += fq2.scalar_mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_fifth_component += fq2.mul_by_non_residue(take_modulo=False, check_constant=False, clean_constant=False)
@@ -471,7 +433,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         compute_fifth_component += pick(position=15, n_elements=2)  # Pick a2
         compute_fifth_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_fifth_component += fq2.add_three(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_fifth_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_fifth_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of fifth component -------------------------------------------------
 
@@ -487,7 +449,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         compute_fourth_component += roll(position=7, n_elements=2)  # Roll d2
         compute_fourth_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_fourth_component += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_fourth_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_fourth_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of fourth component ------------------------------------------------
 
@@ -495,18 +457,18 @@ class MillerOutputOperations(Fq12CubicScriptModel):
 
         # After this, the stack is: a1 b1 c1 a2 b2 c2 e2 (b1*c2),
         # altstack = [sixthComponent, fifthComponent, fourthComponent]
-        compute_third_component = Script.parse_string("OP_2OVER")  # Pick c2
+        compute_third_component = Script([OP_2OVER])  # Pick c2
         compute_third_component += pick(position=12, n_elements=1)  # Pick b1
         compute_third_component += fq2.scalar_mul(take_modulo=False, check_constant=False, clean_constant=False)
 
         # After this, the stack is: a1 b1 c1 a2 b2 c2,
         # altstack = [sixthComponent, fifthComponent, fourthComponent, ((b1*c2) + (c1*e2)) * xi]
-        compute_third_component += Script.parse_string("OP_2SWAP")  # Roll e2
+        compute_third_component += Script([OP_2SWAP])  # Roll e2
         compute_third_component += pick(position=11, n_elements=2)  # Pick c1
         compute_third_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_third_component += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
         compute_third_component += fq2.mul_by_non_residue(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_third_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_third_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of third component -------------------------------------------------
 
@@ -524,7 +486,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         compute_second_component += pick(position=12, n_elements=1)  # Pick b1
         compute_second_component += fq2.scalar_mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_second_component += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_second_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_second_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of second component ------------------------------------------------
 
@@ -537,7 +499,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
 
         # After this, the stack is: a1 a2 [(c1*c2) + (b1*b2)]*xi,
         # altstack = [sixthComponent, fifthComponent, fourthComponent, thirdComponent, secondComponent]
-        compute_first_component += Script.parse_string("OP_2SWAP")  # Roll b2
+        compute_first_component += Script([OP_2SWAP])  # Roll b2
         compute_first_component += roll(position=6, n_elements=1)  # Roll b1
         compute_first_component += fq2.scalar_mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_first_component += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
@@ -545,7 +507,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
 
         # After this, the stack is: [a1*a2 + [(c1*c2) + (b1*b2)]*xi],
         # altstack = [sixthComponent, fifthComponent, fourthComponent, thirdComponent, secondComponent]
-        compute_first_component += Script.parse_string("OP_2ROT OP_2ROT")  # Roll a1 and a2
+        compute_first_component += Script([OP_2ROT, OP_2ROT])  # Roll a1 and a2
         compute_first_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         if take_modulo:
             compute_first_component += fq2.add(
@@ -567,37 +529,13 @@ class MillerOutputOperations(Fq12CubicScriptModel):
 
         if take_modulo:
             # Batched modulo operations: pull from altstack, rotate, mod out, repeat
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+            out += reduce_n(10, is_constant_reused=is_constant_reused, is_constant_fetched=True)
         else:
-            out += Script.parse_string(
-                "OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK \
-                    OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK"
-            )
+            out += Script([OP_FROMALTSTACK] * 10)
 
         return out
 
+    @cached_fragment
     def line_eval_times_eval_times_eval_times_eval(
         self,
         take_modulo: bool,
@@ -623,11 +561,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         fq2 = self.FQ2
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
@@ -657,7 +591,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         compute_sixth_component += fq2.add_three(
             take_modulo=False, check_constant=False, clean_constant=False
         ) + fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_sixth_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_sixth_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of sixth component ----------------------------------------------
 
@@ -672,7 +606,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         compute_fifth_component += pick(position=15, n_elements=2)  # Pick d1
         compute_fifth_component += pick(position=13, n_elements=2)  # Pick a2
         compute_fifth_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_fifth_component += Script.parse_string("OP_2SWAP")
+        compute_fifth_component += Script([OP_2SWAP])
 
         # After this, the stack is: a1 b1 c1 d1 e1 a2 b2 c2 d2 e2 (d1*a2) (c1*c2) (e1*b2), altstack = [sixthComponent]
         compute_fifth_component += pick(position=15, n_elements=2)  # Pick e1
@@ -696,7 +630,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         # After this, the stack is: a1 b1 c1 d1 e1 a2 b2 c2 d2 e2,
         # altstack = [sixthComponent, (d1*a2) + (((c1*c2) + (e1*b2) + (b1*e2)) * xi) + (a1*d2)]
         compute_fifth_component += fq2.add_three(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_fifth_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_fifth_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of fifth component ---------------------------------------------
 
@@ -732,7 +666,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         # altstack = [sixthComponent, fifthComponent, (c1*a2) + (d1*d2) + (e1*e2*xi) + (a1*c2)]
         compute_fourth_component += fq2.add_three(take_modulo=False, check_constant=False, clean_constant=False)
         compute_fourth_component += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_fourth_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_fourth_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of fourth component --------------------------------------------
 
@@ -767,7 +701,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         compute_third_component += fq2.add_three(take_modulo=False, check_constant=False, clean_constant=False)
         compute_third_component += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
         compute_third_component += fq2.mul_by_non_residue(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_third_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_third_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of third component ---------------------------------------------
 
@@ -803,7 +737,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         # After this, the stack is: a1 b1 c1 d1 a2 b2 c2 d2,
         # altstack = [sixthComponent, fifthComponent, fourthComponent, thirdComponent, ((c1*e2) + (c2*e1))*xi + (a1*b2)]
         compute_second_component += fq2.add_three(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_second_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_second_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of second component --------------------------------------------
 
@@ -817,12 +751,12 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         # After this, the stack is: a1 b1 a2 b2 (c1*d2) (d1*c2),
         # altstack = [sixthComponent, fifthComponent, fourthComponent, thirdComponent, secondComponent]
         compute_first_component += roll(position=9, n_elements=2)  # Roll d1
-        compute_first_component += Script.parse_string("OP_2ROT")  # Roll c2
+        compute_first_component += Script([OP_2ROT])  # Roll c2
         compute_first_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
 
         # After this, the stack is: a1 a2 (c1*d2) (d1*c2) (b1*b2),
         # altstack = [sixthComponent, fifthComponent, fourthComponent, thirdComponent, secondComponent]
-        compute_first_component += Script.parse_string("OP_2ROT")  # Roll b2
+        compute_first_component += Script([OP_2ROT])  # Roll b2
         compute_first_component += roll(position=9, n_elements=2)  # Roll b1
         compute_first_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
 
@@ -833,7 +767,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
 
         # After this, the stack is: (a1*a2) + ( (c1*d2) + (d1*c2) + (b1*b2) )*xi,
         # altstack = [sixthComponent, fifthComponent, fourthComponent, thirdComponent, secondComponent]
-        compute_first_component += Script.parse_string("OP_2ROT OP_2ROT")  # Roll a1 and a2
+        compute_first_component += Script([OP_2ROT, OP_2ROT])  # Roll a1 and a2
         compute_first_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         if take_modulo:
             compute_first_component += fq2.add(
@@ -855,37 +789,13 @@ class MillerOutputOperations(Fq12CubicScriptModel):
 
         if take_modulo:
             # Batched modulo operations: pull from altstack, rotate, mod out, repeat
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+            out += reduce_n(10, is_constant_reused=is_constant_reused, is_constant_fetched=True)
         else:
-            out += Script.parse_string(
-                "OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK \
-                    OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK"
-            )
+            out += Script([OP_FROMALTSTACK] * 10)
 
         return out
 
+    @cached_fragment
     def line_eval_times_eval_times_eval_times_eval_times_eval_times_eval(
         self,
         take_modulo: bool,
@@ -912,11 +822,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         fq2 = self.FQ2
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
@@ -951,7 +857,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         # altstack = [(d1*b2) + (e1*a2) + (a1*e2) + (b1*e2) + (c1*c2)]
         compute_sixth_component += fq2.add_three(take_modulo=False, check_constant=False, clean_constant=False)
         compute_sixth_component += fq2.add_three(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_sixth_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_sixth_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of sixth component ----------------------------------------------
 
@@ -990,7 +896,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         # After this, the stack is: a1 b1 c1 d1 e1 a2 b2 c2 d2 e2 f2,
         # altstack = [sixthComponent, (d1*a2) + ( (e1*b2) + (b1*f2) + (c1*d2) )*xi + (a1*e2)]
         compute_fifth_component += fq2.add_three(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_fifth_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_fifth_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of fifth component ---------------------------------------------
 
@@ -1033,7 +939,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         # altstack = [sixthComponent, fifthComponent, (d1*e2) + (e1*f2*xi) + (a1*d2) + (b1*c2) + (c1*a2)]
         compute_fourth_component += fq2.add_three(take_modulo=False, check_constant=False, clean_constant=False)
         compute_fourth_component += fq2.add_three(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_fourth_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_fourth_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of fourth component --------------------------------------------
 
@@ -1042,7 +948,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         # After this, the stack is: a1 b1 c1 d1 e1 a2 b2 c2 d2 e2 f2 (d1*f2),
         # altstack = [sixthComponent, fifthComponent, fourthComponent]
         compute_third_component = pick(position=15, n_elements=2)  # Pick d1
-        compute_third_component += Script.parse_string("OP_2OVER")  # Pick f2
+        compute_third_component += Script([OP_2OVER])  # Pick f2
         compute_third_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
 
         # After this, the stack is: a1 b1 c1 d1 e1 a2 b2 c2 d2 e2 f2 (d1*f2) (e1*e2),
@@ -1077,7 +983,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         # altstack = [sixthComponent, fifthComponent, fourthComponent, ( (d1*f2) + (e1*e2) + (b1*d2) + (c1*b2) )*xi +
         # (a1*c2)]
         compute_third_component += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_third_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_third_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of third component ---------------------------------------------
 
@@ -1097,7 +1003,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
 
         # After this, the stack is: a1 b1 c1 d1 e1 a2 b2 c2 d2 e2 (d1*c2) ( (e1*d2) + (c1*f2) )*xi,
         # altstack = [sixthComponent, fifthComponent, fourthComponent, thirdComponent]
-        compute_second_component += Script.parse_string("OP_2ROT")  # Roll f2
+        compute_second_component += Script([OP_2ROT])  # Roll f2
         compute_second_component += pick(position=21, n_elements=2)  # Pick c1
         compute_second_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_second_component += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
@@ -1122,7 +1028,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         # (d1*c2) + ( (e1*d2) + (c1*f2) )*xi + (a1*b2) + (b1*a2)]
         compute_second_component += fq2.add_three(take_modulo=False, check_constant=False, clean_constant=False)
         compute_second_component += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_second_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_second_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of second component --------------------------------------------
 
@@ -1136,19 +1042,19 @@ class MillerOutputOperations(Fq12CubicScriptModel):
         # After this, the stack is: a1 b1 e1 a2 b2 c2 (e2*c1) (d1*d2),
         # altstack = [sixthComponent, fifthComponent, fourthComponent, thirdComponent, secondComponent]
         compute_first_component += roll(position=13, n_elements=2)  # Roll d1
-        compute_first_component += Script.parse_string("OP_2ROT")  # Roll d2
+        compute_first_component += Script([OP_2ROT])  # Roll d2
         compute_first_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
 
         # After this, the stack is: a1 b1 a2 b2 ( (e2*c1) + (d1*d2) + (e1*c2) ),
         # altstack = [sixthComponent, fifthComponent, fourthComponent, thirdComponent, secondComponent]
-        compute_first_component += Script.parse_string("OP_2ROT")  # Roll c2
+        compute_first_component += Script([OP_2ROT])  # Roll c2
         compute_first_component += roll(position=11, n_elements=2)  # Roll e1
         compute_first_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_first_component += fq2.add_three(take_modulo=False, check_constant=False, clean_constant=False)
 
         # After this, the stack is: a1 a2 ( (b1*b2) + (e2*c1) + (d1*d2) + (e1*c2) )*xi,
         # altstack = [sixthComponent, fifthComponent, fourthComponent, thirdComponent, secondComponent]
-        compute_first_component += Script.parse_string("OP_2SWAP")  # Roll b2
+        compute_first_component += Script([OP_2SWAP])  # Roll b2
         compute_first_component += roll(position=7, n_elements=2)  # Roll b1
         compute_first_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_first_component += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
@@ -1156,7 +1062,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
 
         # After this, the stack is: (a1*a2) + ( (b1*b2) + (e2*c1) + (d1*d2) + (e1*c2) )*xi,
         # altstack = [sixthComponent, fifthComponent, fourthComponent, thirdComponent, secondComponent]
-        compute_first_component += Script.parse_string("OP_2ROT OP_2ROT")  # Roll a1 and a2
+        compute_first_component += Script([OP_2ROT, OP_2ROT])  # Roll a1 and a2
         compute_first_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         if take_modulo:
             compute_first_component += fq2.add(
@@ -1178,37 +1084,13 @@ class MillerOutputOperations(Fq12CubicScriptModel):
 
         if take_modulo:
             # Batched modulo operations: pull from altstack, rotate, mod out, repeat
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+            out += reduce_n(10, is_constant_reused=is_constant_reused, is_constant_fetched=True)
         else:
-            out += Script.parse_string(
-                "OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK \
-                    OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK"
-            )
+            out += Script([OP_FROMALTSTACK] * 10)
 
         return out
 
+    @cached_fragment
     def miller_loop_output_square(
         self,
         take_modulo: bool,
@@ -1224,6 +1106,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
             is_constant_reused=is_constant_reused,
         )
 
+    @cached_fragment
     def miller_loop_output_mul(
         self,
         take_modulo: bool,
@@ -1239,6 +1122,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
             is_constant_reused=is_constant_reused,
         )
 
+    @cached_fragment
     def line_eval_times_eval_times_miller_loop_output(
         self,
         take_modulo: bool,
@@ -1253,6 +1137,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
             is_constant_reused=is_constant_reused,
         )
 
+    @cached_fragment
     def miller_loop_output_times_eval_times_eval_times_eval(
         self,
         take_modulo: bool,
@@ -1268,6 +1153,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
             is_constant_reused=is_constant_reused,
         )
 
+    @cached_fragment
     def miller_loop_output_times_eval_times_eval_times_eval_times_eval(
         self,
         take_modulo: bool,
@@ -1283,6 +1169,7 @@ class MillerOutputOperations(Fq12CubicScriptModel):
             is_constant_reused=is_constant_reused,
         )
 
+    @cached_fragment
     def miller_loop_output_times_eval_times_eval_times_eval_times_eval_times_eval_times_eval(
         self,
         take_modulo: bool,
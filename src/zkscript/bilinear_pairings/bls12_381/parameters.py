@@ -12,6 +12,11 @@ q = (u - 1) ** 2 * (u**4 - u**2 + 1) // 3 + u
 # r-torsion = q - t + 1
 r = u**4 - u**2 + 1
 
+# GLV endomorphism of G1: (x,y) -> (GLV_BETA * x, y) is the multiplication by GLV_LAMBDA
+# GLV_LAMBDA^2 + GLV_LAMBDA + 1 = r
+GLV_LAMBDA = u**2 - 1
+GLV_BETA = 0x1A0111EA397FE699EC02408663D4DE85AA0D857D89759AD4897D29650FB85F9B409427EB4F49FFFD8BFD00000000AAAC
+
 # Curve coefficients
 a = 0
 twisted_a = [0, 0]
@@ -1,11 +1,21 @@
 # Final exponentiation for MNT4_753
 
 from tx_engine import Script
+from tx_engine.engine.op_codes import (
+    OP_0,
+    OP_1,
+    OP_1SUB,
+    OP_DEPTH,
+    OP_EQUALVERIFY,
+    OP_FROMALTSTACK,
+    OP_PICK,
+    OP_TOALTSTACK,
+)
 
 from src.zkscript.bilinear_pairings.mnt4_753.fields import fq2_script, fq4_script
-from src.zkscript.bilinear_pairings.mnt4_753.parameters import exp_miller_loop
+from src.zkscript.bilinear_pairings.mnt4_753.parameters import exp_miller_loop, exp_miller_loop_chain
 from src.zkscript.bilinear_pairings.model.cyclotomic_exponentiation import CyclotomicExponentiation
-from src.zkscript.util.utility_scripts import nums_to_script, pick
+from src.zkscript.util.utility_scripts import nums_to_script, pick, roll
 
 
 class FinalExponentiation(CyclotomicExponentiation):
@@ -13,7 +23,7 @@ class FinalExponentiation(CyclotomicExponentiation):
         self.MODULUS = fq4.MODULUS
         self.FQ4 = fq4
         self.cyclotomic_inverse = fq2.negate
-        self.square = fq4.square
+        self.square = fq4.cyclotomic_square
         self.mul = fq4.mul
         self.EXTENSION_DEGREE = 4
 
@@ -37,11 +47,7 @@ class FinalExponentiation(CyclotomicExponentiation):
         fq4 = self.FQ4
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
@@ -51,8 +57,8 @@ class FinalExponentiation(CyclotomicExponentiation):
         check_f_inverse += fq4.mul(
             take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
         )  # Multiply
-        check_f_inverse += Script.parse_string(" ".join(["OP_0", "OP_EQUALVERIFY"] * 3))
-        check_f_inverse += Script.parse_string("OP_1 OP_EQUALVERIFY")
+        check_f_inverse += Script([OP_0, OP_EQUALVERIFY] * 3)
+        check_f_inverse += Script([OP_1, OP_EQUALVERIFY])
 
         # After this, the stack is: Inverse(f) Conjugate(f)
         easy_exponentiation = fq4.frobenius_even(
@@ -89,18 +95,14 @@ class FinalExponentiation(CyclotomicExponentiation):
         fq4 = self.FQ4
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         # After this, the stack is: g, altstack = [g^q]
         out += pick(position=3, n_elements=4)
         out += fq4.frobenius_odd(n=1, take_modulo=False, check_constant=False, clean_constant=False)
-        out += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK")
+        out += Script([OP_TOALTSTACK] * 4)
 
         # After this, the stack is: g g^u, altstack = [g^q]
         out += pick(position=3, n_elements=4)
@@ -110,10 +112,11 @@ class FinalExponentiation(CyclotomicExponentiation):
             modulo_threshold=modulo_threshold,
             check_constant=False,
             clean_constant=False,
+            chain=exp_miller_loop_chain,
         )
 
         # After this, the stack is: g^[q + u + 1]
-        out += Script.parse_string("OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK")
+        out += Script([OP_FROMALTSTACK] * 4)
         out += fq4.mul(take_modulo=False, check_constant=False, clean_constant=False, is_constant_reused=False)
         out += fq4.mul(
             take_modulo=take_modulo, check_constant=False, clean_constant=clean_constant, is_constant_reused=False
@@ -121,5 +124,51 @@ class FinalExponentiation(CyclotomicExponentiation):
 
         return out
 
+    def residue_witness_check(
+        self,
+        take_modulo: bool,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        is_constant_reused: bool | None = None,
+    ) -> Script:
+        """Check the residue witness c in place of the final exponentiation.
+
+        Input:
+            - c Inverse(c) f
+        Output:
+            - f * Inverse(c)^q
+        Assumption of data:
+            - c, Inverse(c) and f are passed as couples of elements in Fq2
+
+        If f = miller * c^u (see multi_miller_loop), the output is 1 if and only if miller = c^(q-u), which implies
+        miller^((q^4-1)/r) = 1. No scaling factor is needed, as gcd(q-u, q^4-1) = r.
+        """
+        # Fq4 implementation
+        fq4 = self.FQ4
+
+        if check_constant:
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
+        else:
+            out = Script()
+
+        # After this, the stack is: Inverse(c) f
+        out += roll(position=11, n_elements=4)  # Roll c
+        out += pick(position=11, n_elements=4)  # Pick Inverse(c)
+        out += fq4.mul(take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False)
+        out += Script([OP_0, OP_EQUALVERIFY] * 3)
+        out += Script([OP_1, OP_EQUALVERIFY])
+
+        # After this, the stack is: f * Inverse(c)^q
+        out += roll(position=7, n_elements=4)  # Roll Inverse(c)
+        out += fq4.frobenius_odd(n=1, take_modulo=False, check_constant=False, clean_constant=False)
+        out += fq4.mul(
+            take_modulo=take_modulo,
+            check_constant=False,
+            clean_constant=clean_constant,
+            is_constant_reused=is_constant_reused,
+        )
+
+        return out
+
 
 final_exponentiation = FinalExponentiation(fq2=fq2_script, fq4=fq4_script)
@@ -1,17 +1,35 @@
 from tx_engine import Script
+from tx_engine.engine.op_codes import (
+    OP_1SUB,
+    OP_2ROT,
+    OP_2SWAP,
+    OP_ADD,
+    OP_DEPTH,
+    OP_DUP,
+    OP_EQUALVERIFY,
+    OP_FROMALTSTACK,
+    OP_MUL,
+    OP_PICK,
+    OP_ROT,
+    OP_SUB,
+    OP_SWAP,
+    OP_TOALTSTACK,
+)
 
 # Fq2 Script implementation
 from src.zkscript.bilinear_pairings.mnt4_753.fields import fq2_script
-from src.zkscript.util.utility_scripts import nums_to_script
+from src.zkscript.util.fragment_cache import FragmentCacheable, cached_fragment
+from src.zkscript.util.utility_scripts import nums_to_script, reduce_n
 
 
-class LineFunctions:
+class LineFunctions(FragmentCacheable):
     """Line evaluation for MNT4_753."""
 
     def __init__(self, fq2):
         self.MODULUS = fq2.MODULUS
         self.FQ2 = fq2
 
+    @cached_fragment
     def line_evaluation(
         self,
         take_modulo: bool,
@@ -42,11 +60,7 @@ class LineFunctions:
         fq2 = self.FQ2
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
@@ -55,53 +69,110 @@ class LineFunctions:
         # Second component ---------
 
         # After this, the stack is: lambda Q xP, altstack = [yP]
-        second_component = Script.parse_string("OP_TOALTSTACK")
+        second_component = Script([OP_TOALTSTACK])
 
         # First component ----------
 
         # After this, the stack is: lambda yQ (xQ - xP*u)
-        first_component = Script.parse_string("OP_TOALTSTACK")
-        first_component += Script.parse_string("OP_2SWAP OP_FROMALTSTACK OP_SUB")
+        first_component = Script([OP_TOALTSTACK])
+        first_component += Script([OP_2SWAP, OP_FROMALTSTACK, OP_SUB])
         # After this, the stack is yQ lambda * (xQ - xP*u)
-        first_component += Script.parse_string("OP_2ROT")
+        first_component += Script([OP_2ROT])
         first_component += fq2.mul(
             take_modulo=False, check_constant=False, clean_constant=False, is_constant_reused=False
         )
         # After this, the stack is: (-yQ + lambda * (xQ - xP*u))_0, altstack = [yP, (-yQ + lambda * (xQ - xP*u))_1]
-        first_component += Script.parse_string("OP_ROT OP_SUB OP_TOALTSTACK")
-        first_component += Script.parse_string("OP_SWAP OP_SUB")
+        first_component += Script([OP_ROT, OP_SUB, OP_TOALTSTACK])
+        first_component += Script([OP_SWAP, OP_SUB])
 
         # --------------------------
 
         out += second_component + first_component
 
         if take_modulo:
-            batched_modulo = Script()
-
             if clean_constant is None and is_constant_reused is None:
-                raise ValueError(
-                    f"If take_modulo is set, both clean_constant: {clean_constant} \
-                        and is_constant_reused: {is_constant_reused} must be set."
+                msg = (
+                    f"If take_modulo is set, both clean_constant: {clean_constant} "
+                    f"and is_constant_reused: {is_constant_reused} must be set."
                 )
+                raise ValueError(msg)
+
+            out += reduce_n(3, clean_constant, is_constant_reused)
+        else:
+            out += Script([OP_FROMALTSTACK, OP_FROMALTSTACK])
+
+        return out
+
+    def line_evaluation_fixed_q(
+        self,
+        gradient: list[int],
+        point_q: list[int],
+        take_modulo: bool,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        is_constant_reused: bool | None = None,
+    ) -> Script:
+        """Evaluate the line through T and Q at P, where the line is fixed and hard-coded in the script.
+
+        Inputs:
+            - Stack: q .. P
+            - Altstack: []
+        Output:
+            - ev_(l_(T,Q)(P))
+        Assumption on data:
+            - gradient is the gradient through T and Q
+            - point_q = (x2,y2) is an affine point in E'(F_q^2) on the line
+            - P = (xP,yP) is passed as an affine point in E(F_q)
+        Variables:
+            - If take_modulo is set to True, the outputs are returned as constants in Z_q.
+        REMARK:
+            - The output is the same as the one of line_evaluation with lambda = gradient and Q = point_q. Writing
+            -yQ + lambda * (xQ - xP*u) = (-yQ + lambda * xQ) - xP * (lambda * u), both -yQ + lambda * xQ and
+            lambda * u are constants, so only two multiplications by xP are computed in the script.
+        """
+        q = self.MODULUS
+        non_residue = self.FQ2.NON_RESIDUE
+
+        if check_constant:
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
+        else:
+            out = Script()
+
+        constant = [
+            (gradient[0] * point_q[0] + non_residue * gradient[1] * point_q[1] - point_q[2]) % q,
+            (gradient[0] * point_q[1] + gradient[1] * point_q[0] - point_q[3]) % q,
+        ]
+        # -lambda * u
+        minus_gradient_times_u = [-non_residue * gradient[1] % q, -gradient[0] % q]
+
+        # Second component ---------
 
-            if clean_constant:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL")
-            else:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
+        # After this, the stack is: xP, altstack = [yP]
+        second_component = Script([OP_TOALTSTACK])
 
-            batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_ROT")
+        # First component ----------
+
+        # After this, the stack is: (-yQ + lambda * (xQ - xP*u))_0, altstack = [yP, (-yQ + lambda * (xQ - xP*u))_1]
+        first_component = Script([OP_DUP]) + nums_to_script([minus_gradient_times_u[1]]) + Script([OP_MUL])
+        first_component += nums_to_script([constant[1]]) + Script([OP_ADD, OP_TOALTSTACK])
+        first_component += nums_to_script([minus_gradient_times_u[0]]) + Script([OP_MUL])
+        first_component += nums_to_script([constant[0]]) + Script([OP_ADD])
+
+        # --------------------------
 
-            if is_constant_reused:
-                batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+        out += second_component + first_component
+
+        if take_modulo:
+            if clean_constant is None and is_constant_reused is None:
+                msg = (
+                    f"If take_modulo is set, both clean_constant: {clean_constant} "
+                    f"and is_constant_reused: {is_constant_reused} must be set."
+                )
+                raise ValueError(msg)
 
-            out += fetch_q + batched_modulo
+            out += reduce_n(3, clean_constant, is_constant_reused)
         else:
-            out += Script.parse_string("OP_FROMALTSTACK OP_FROMALTSTACK")
+            out += Script([OP_FROMALTSTACK, OP_FROMALTSTACK])
 
         return out
 
@@ -1,12 +1,31 @@
 # Operations between Miller output (of type Fq4) and line evaluations
 
 from tx_engine import Script
+from tx_engine.engine.op_codes import (
+    OP_1SUB,
+    OP_2OVER,
+    OP_2ROT,
+    OP_13,
+    OP_ADD,
+    OP_DEPTH,
+    OP_DUP,
+    OP_EQUALVERIFY,
+    OP_FROMALTSTACK,
+    OP_MUL,
+    OP_OVER,
+    OP_PICK,
+    OP_ROT,
+    OP_SWAP,
+    OP_TOALTSTACK,
+)
 
 from src.zkscript.bilinear_pairings.mnt4_753.fields import fq4_script
 
 # Fq2 Script implementation
 from src.zkscript.fields.fq4 import Fq4 as Fq4ScriptModel
-from src.zkscript.util.utility_scripts import nums_to_script, pick, roll
+from src.zkscript.util.bit_growth import is_positive_output, keeps_positive
+from src.zkscript.util.fragment_cache import cached_fragment
+from src.zkscript.util.utility_scripts import nums_to_script, pick, reduce_n, roll
 
 
 class MillerOutputOperations(Fq4ScriptModel):
@@ -16,12 +35,20 @@ class MillerOutputOperations(Fq4ScriptModel):
     where F_q^4 = F_q^2[s] / (s^2 - u) = F_q[u,s] / (s^2 -  u, u^2 - 13)
     """
 
+    def _is_mul_by_eval_positive(self) -> bool:
+        """Whether the output of the multiplications by a line evaluation is non-negative whenever their inputs are."""
+        fq2 = self.BASE_FIELD
+        return is_positive_output(fq2.mul) and is_positive_output(fq2.mul_by_non_residue)
+
+    @cached_fragment
+    @keeps_positive(True)
     def line_eval_times_eval(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         """Multiplication of two line evaluations in Fq4.
 
@@ -35,25 +62,22 @@ class MillerOutputOperations(Fq4ScriptModel):
         Variables:
             - If take_modulo is set to True, then the coordinates of the result are in Z_q; otherwise, the coordinates
             are not taken modulo q.
+            - is_input_positive: see `zkscript.util.bit_growth.keeps_positive`.
         """
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         # Computation of fourth component --------------------------------------------------------
 
         # After this, the stack is: a1 b1 c1 a2 b2 c2, altstack = [(a2*c1) + (a1*c2)]
-        compute_fourth_component = Script.parse_string("OP_2OVER")  # Pick a2 and c1
-        compute_fourth_component += Script.parse_string("OP_MUL")
-        compute_fourth_component += Script.parse_string("OP_OVER")  # Pick c2
+        compute_fourth_component = Script([OP_2OVER])  # Pick a2 and c1
+        compute_fourth_component += Script([OP_MUL])
+        compute_fourth_component += Script([OP_OVER])  # Pick c2
         compute_fourth_component += pick(position=7, n_elements=1)  # Pick a1
-        compute_fourth_component += Script.parse_string("OP_MUL OP_ADD")
-        compute_fourth_component += Script.parse_string("OP_TOALTSTACK")
+        compute_fourth_component += Script([OP_MUL, OP_ADD])
+        compute_fourth_component += Script([OP_TOALTSTACK])
 
         # End of computation of fourth component -------------------------------------------------
 
@@ -61,14 +85,14 @@ class MillerOutputOperations(Fq4ScriptModel):
 
         # After this, the stack is: # After this, the stack is: a1 b1 c1 a2 b2 c2,
         # altstack = [fourthComponent, 12*(b1*c2 + c1*b2)]
-        compute_third_component = Script.parse_string("OP_OVER")  # Pick b2
+        compute_third_component = Script([OP_OVER])  # Pick b2
         compute_third_component += pick(position=4, n_elements=1)  # Pick c1
-        compute_third_component += Script.parse_string("OP_MUL")
-        compute_third_component += Script.parse_string("OP_OVER")  # Pick c2
+        compute_third_component += Script([OP_MUL])
+        compute_third_component += Script([OP_OVER])  # Pick c2
         compute_third_component += pick(position=6, n_elements=1)  # Pick b1
-        compute_third_component += Script.parse_string("OP_MUL")
-        compute_third_component += Script.parse_string("OP_ADD OP_13 OP_MUL")
-        compute_third_component += Script.parse_string("OP_TOALTSTACK")
+        compute_third_component += Script([OP_MUL])
+        compute_third_component += Script([OP_ADD, OP_13, OP_MUL])
+        compute_third_component += Script([OP_TOALTSTACK])
 
         # End of computation of third component --------------------------------------------------
 
@@ -76,16 +100,16 @@ class MillerOutputOperations(Fq4ScriptModel):
 
         # After this, the stack is: # After this, the stack is: a1 b1 a2 b2,
         # altstack = [fourthComponent, thirdComponent, a1*b2 = b1*a2 + c1*c2*13]
-        compute_second_component = Script.parse_string("OP_OVER")  # Pick b2
+        compute_second_component = Script([OP_OVER])  # Pick b2
         compute_second_component += pick(position=6, n_elements=1)  # Pick a1
-        compute_second_component += Script.parse_string("OP_MUL")
-        compute_second_component += Script.parse_string("OP_SWAP")  # Roll c2
+        compute_second_component += Script([OP_MUL])
+        compute_second_component += Script([OP_SWAP])  # Roll c2
         compute_second_component += roll(position=4, n_elements=1)  # Roll c1
-        compute_second_component += Script.parse_string("OP_MUL OP_13 OP_MUL")
+        compute_second_component += Script([OP_MUL, OP_13, OP_MUL])
         compute_second_component += pick(position=3, n_elements=1)  # Pick a2
         compute_second_component += pick(position=5, n_elements=1)  # Pick b1
-        compute_second_component += Script.parse_string("OP_MUL OP_ADD OP_ADD")
-        compute_second_component += Script.parse_string("OP_TOALTSTACK")
+        compute_second_component += Script([OP_MUL, OP_ADD, OP_ADD])
+        compute_second_component += Script([OP_TOALTSTACK])
 
         # End of computation of second component -------------------------------------------------
 
@@ -93,45 +117,32 @@ class MillerOutputOperations(Fq4ScriptModel):
 
         # After this, the stack is: # After this, the stack is: a1*a2 + b1*b2*13,
         # altstack = [fourthComponent, thirdComponent, secondComponent]
-        compute_first_component = Script.parse_string("OP_ROT")  # Roll b1
-        compute_first_component += Script.parse_string("OP_MUL OP_13 OP_MUL")
-        compute_first_component += Script.parse_string("OP_ROT OP_ROT")
-        compute_first_component += Script.parse_string("OP_MUL OP_ADD")  # Roll a1 and a2
+        compute_first_component = Script([OP_ROT])  # Roll b1
+        compute_first_component += Script([OP_MUL, OP_13, OP_MUL])
+        compute_first_component += Script([OP_ROT, OP_ROT])
+        compute_first_component += Script([OP_MUL, OP_ADD])  # Roll a1 and a2
 
         # End of computation of first component --------------------------------------------------
 
         out += compute_fourth_component + compute_third_component + compute_second_component + compute_first_component
 
         if take_modulo:
-            if clean_constant:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL")
-            else:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-
             # Batched modulo operations: pull from altstack, rotate, mod out, repeat
-            batched_modulo = Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
-
-            out += fetch_q + batched_modulo
+            out += reduce_n(4, clean_constant, is_constant_reused, is_positive=is_input_positive)
         else:
-            out += Script.parse_string("OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK")
+            out += Script([OP_FROMALTSTACK, OP_FROMALTSTACK, OP_FROMALTSTACK])
 
         return out
 
+    @cached_fragment
+    @keeps_positive(_is_mul_by_eval_positive)
     def miller_loop_output_times_eval(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         """Multiplication of element in Fq4 times a line evaluation.
 
@@ -145,19 +156,19 @@ class MillerOutputOperations(Fq4ScriptModel):
         Variables:
             - If take_modulo is set to True, then the coordinates of the result are in Z_q; otherwise, the coordinates
             are not taken modulo q.
+            - is_input_positive: see `zkscript.util.bit_growth.keeps_positive`. The result is non-negative only if the
+            multiplications of the base field keep values non-negative.
         """
         # Fq2 implementation
         fq2 = self.BASE_FIELD
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
+        is_positive = is_input_positive and self._is_mul_by_eval_positive()
+
         # The stack at the beginning is: a1 b1 a2 b2 with:
         # 	- a1,b1,a2 in Fq2
         # 	- b2 in Fq
@@ -165,9 +176,9 @@ class MillerOutputOperations(Fq4ScriptModel):
         # Computation of second component --------------------------------------------------------
 
         # After this, the stack is: a1 b1 a2 b2 (a1*b2*u), altstack = []
-        compute_second_component = Script.parse_string("OP_DUP")  # Duplicate b2
+        compute_second_component = Script([OP_DUP])  # Duplicate b2
         compute_second_component += pick(position=7, n_elements=2)  # Pick a1
-        compute_second_component += Script.parse_string("OP_ROT")  # Roll b2
+        compute_second_component += Script([OP_ROT])  # Roll b2
         compute_second_component += fq2.scalar_mul(
             take_modulo=False, check_constant=False, clean_constant=False, is_constant_reused=False
         )
@@ -184,26 +195,30 @@ class MillerOutputOperations(Fq4ScriptModel):
         compute_second_component += fq2.add(
             take_modulo=False, check_constant=False, clean_constant=False, is_constant_reused=False
         )
-        compute_second_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_second_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of second component -------------------------------------------------
 
         # Computation of first component ---------------------------------------------------------
 
         # After this, the stack is: # After this, the stack is: a1*a2 + b1*b2*13, altstack = [secondComponent]
-        compute_first_component = Script.parse_string("OP_13 OP_MUL")  # b2*13
+        compute_first_component = Script([OP_13, OP_MUL])  # b2*13
         compute_first_component += roll(position=4, n_elements=2)  # Roll b1
-        compute_first_component += Script.parse_string("OP_ROT")
+        compute_first_component += Script([OP_ROT])
         compute_first_component += fq2.scalar_mul(
             take_modulo=False, check_constant=False, clean_constant=False, is_constant_reused=False
         )
-        compute_first_component += Script.parse_string("OP_2ROT OP_2ROT")
+        compute_first_component += Script([OP_2ROT, OP_2ROT])
         compute_first_component += fq2.mul(
             take_modulo=False, check_constant=False, clean_constant=False, is_constant_reused=False
         )
         if take_modulo:
             compute_first_component += fq2.add(
-                take_modulo=True, check_constant=False, clean_constant=clean_constant, is_constant_reused=True
+                take_modulo=True,
+                check_constant=False,
+                clean_constant=clean_constant,
+                is_constant_reused=True,
+                is_input_positive=is_positive,
             )
         else:
             compute_first_component += fq2.add(
@@ -216,26 +231,21 @@ class MillerOutputOperations(Fq4ScriptModel):
 
         if take_modulo:
             # Batched modulo operations: pull from altstack, rotate, mod out, repeat
-            batched_modulo = Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
-
-            out += batched_modulo
+            out += reduce_n(2, is_constant_reused=is_constant_reused, is_positive=is_positive, is_constant_fetched=True)
         else:
-            out += Script.parse_string("OP_FROMALTSTACK OP_FROMALTSTACK")
+            out += Script([OP_FROMALTSTACK, OP_FROMALTSTACK])
 
         return out
 
+    @cached_fragment
+    @keeps_positive(_is_mul_by_eval_positive)
     def line_eval_times_eval_times_eval(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         """Multiplication of line evaluation with product of two line evaluations (i.e., an element of Fq4).
 
@@ -249,19 +259,19 @@ class MillerOutputOperations(Fq4ScriptModel):
         Variables:
             - If take_modulo is set to True, then the coordinates of the result are in Z_q; otherwise, the coordinates
             are not taken modulo q.
+            - is_input_positive: see `zkscript.util.bit_growth.keeps_positive`. The result is non-negative only if the
+            multiplications of the base field keep values non-negative.
         """
         # Fq2 implementation
         fq2 = self.BASE_FIELD
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
+        is_positive = is_input_positive and self._is_mul_by_eval_positive()
+
         # The stack at the beginning is: a1 b1 a2 b2 with:
         # 	- a1,a2,b2 in Fq2
         # 	- b1 in Fq
@@ -269,7 +279,7 @@ class MillerOutputOperations(Fq4ScriptModel):
         # Computation of second component --------------------------------------------------------
 
         # After this, the stack is: a1 b1 a2 b2 (a2*b1*u), altstack = []
-        compute_second_component = Script.parse_string("OP_2OVER")  # Duplicate a2
+        compute_second_component = Script([OP_2OVER])  # Duplicate a2
         compute_second_component += pick(position=6, n_elements=1)  # Pick b1
         compute_second_component += fq2.scalar_mul(
             take_modulo=False, check_constant=False, clean_constant=False, is_constant_reused=False
@@ -279,7 +289,7 @@ class MillerOutputOperations(Fq4ScriptModel):
         )
 
         # After this, the stack is: a1 b1 a2 b2, altstack = [(a1*b2) + u*b1*a2]
-        compute_second_component += Script.parse_string("OP_2OVER")  # Duplicate b2
+        compute_second_component += Script([OP_2OVER])  # Duplicate b2
         compute_second_component += pick(position=10, n_elements=2)  # Pick a1
         compute_second_component += fq2.mul(
             take_modulo=False, check_constant=False, clean_constant=False, is_constant_reused=False
@@ -287,7 +297,7 @@ class MillerOutputOperations(Fq4ScriptModel):
         compute_second_component += fq2.add(
             take_modulo=False, check_constant=False, clean_constant=False, is_constant_reused=False
         )
-        compute_second_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_second_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of second component -------------------------------------------------
 
@@ -295,17 +305,21 @@ class MillerOutputOperations(Fq4ScriptModel):
 
         # After this, the stack is: # After this, the stack is: a1*a2 + b1*b2*13, altstack = [secondComponent]
         compute_first_component = roll(position=4, n_elements=1)  # Roll b1
-        compute_first_component += Script.parse_string("OP_13 OP_MUL")  # Compute b1*13
+        compute_first_component += Script([OP_13, OP_MUL])  # Compute b1*13
         compute_first_component += fq2.scalar_mul(
             take_modulo=False, check_constant=False, clean_constant=False, is_constant_reused=False
         )
-        compute_first_component += Script.parse_string("OP_2ROT OP_2ROT")
+        compute_first_component += Script([OP_2ROT, OP_2ROT])
         compute_first_component += fq2.mul(
             take_modulo=False, check_constant=False, clean_constant=False, is_constant_reused=False
         )
         if take_modulo:
             compute_first_component += fq2.add(
-                take_modulo=True, check_constant=False, clean_constant=clean_constant, is_constant_reused=True
+                take_modulo=True,
+                check_constant=False,
+                clean_constant=clean_constant,
+                is_constant_reused=True,
+                is_input_positive=is_positive,
             )
         else:
             compute_first_component += fq2.add(
@@ -318,26 +332,21 @@ class MillerOutputOperations(Fq4ScriptModel):
 
         if take_modulo:
             # Batched modulo operations: pull from altstack, rotate, mod out, repeat
-            batched_modulo = Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
-
-            out += batched_modulo
+            out += reduce_n(2, is_constant_reused=is_constant_reused, is_positive=is_positive, is_constant_fetched=True)
         else:
-            out += Script.parse_string("OP_FROMALTSTACK OP_FROMALTSTACK")
+            out += Script([OP_FROMALTSTACK, OP_FROMALTSTACK])
 
         return out
 
+    @cached_fragment
+    @keeps_positive(Fq4ScriptModel.is_mul_positive)
     def line_eval_times_eval_times_eval_times_eval(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         return MillerOutputOperations.mul(
             self,
@@ -345,14 +354,18 @@ class MillerOutputOperations(Fq4ScriptModel):
             check_constant=check_constant,
             clean_constant=clean_constant,
             is_constant_reused=is_constant_reused,
+            is_input_positive=is_input_positive,
         )
 
+    @cached_fragment
+    @keeps_positive(Fq4ScriptModel.is_mul_positive)
     def line_eval_times_eval_times_eval_times_eval_times_eval_times_eval(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         return MillerOutputOperations.mul(
             self,
@@ -360,14 +373,18 @@ class MillerOutputOperations(Fq4ScriptModel):
             check_constant=check_constant,
             clean_constant=clean_constant,
             is_constant_reused=is_constant_reused,
+            is_input_positive=is_input_positive,
         )
 
+    @cached_fragment
+    @keeps_positive(Fq4ScriptModel.is_mul_positive)
     def line_eval_times_eval_times_miller_loop_output(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         return MillerOutputOperations.mul(
             self,
@@ -375,14 +392,18 @@ class MillerOutputOperations(Fq4ScriptModel):
             check_constant=check_constant,
             clean_constant=clean_constant,
             is_constant_reused=is_constant_reused,
+            is_input_positive=is_input_positive,
         )
 
+    @cached_fragment
+    @keeps_positive(Fq4ScriptModel.is_square_positive)
     def miller_loop_output_square(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         return MillerOutputOperations.square(
             self,
@@ -390,14 +411,18 @@ class MillerOutputOperations(Fq4ScriptModel):
             check_constant=check_constant,
             clean_constant=clean_constant,
             is_constant_reused=is_constant_reused,
+            is_input_positive=is_input_positive,
         )
 
+    @cached_fragment
+    @keeps_positive(Fq4ScriptModel.is_mul_positive)
     def miller_loop_output_mul(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         return MillerOutputOperations.mul(
             self,
@@ -405,14 +430,18 @@ class MillerOutputOperations(Fq4ScriptModel):
             check_constant=check_constant,
             clean_constant=clean_constant,
             is_constant_reused=is_constant_reused,
+            is_input_positive=is_input_positive,
         )
 
+    @cached_fragment
+    @keeps_positive(Fq4ScriptModel.is_mul_positive)
     def miller_loop_output_times_eval_times_eval_times_eval(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         return MillerOutputOperations.mul(
             self,
@@ -420,14 +449,18 @@ class MillerOutputOperations(Fq4ScriptModel):
             check_constant=check_constant,
             clean_constant=clean_constant,
             is_constant_reused=is_constant_reused,
+            is_input_positive=is_input_positive,
         )
 
+    @cached_fragment
+    @keeps_positive(Fq4ScriptModel.is_mul_positive)
     def miller_loop_output_times_eval_times_eval_times_eval_times_eval(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         return MillerOutputOperations.mul(
             self,
@@ -435,14 +468,18 @@ class MillerOutputOperations(Fq4ScriptModel):
             check_constant=check_constant,
             clean_constant=clean_constant,
             is_constant_reused=is_constant_reused,
+            is_input_positive=is_input_positive,
         )
 
+    @cached_fragment
+    @keeps_positive(Fq4ScriptModel.is_mul_positive)
     def miller_loop_output_times_eval_times_eval_times_eval_times_eval_times_eval_times_eval(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         return MillerOutputOperations.mul(
             self,
@@ -450,6 +487,7 @@ class MillerOutputOperations(Fq4ScriptModel):
             check_constant=check_constant,
             clean_constant=clean_constant,
             is_constant_reused=is_constant_reused,
+            is_input_positive=is_input_positive,
         )
 
 
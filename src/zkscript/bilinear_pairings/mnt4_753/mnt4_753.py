@@ -13,6 +13,7 @@ from src.zkscript.bilinear_pairings.mnt4_753.parameters import (
     N_ELEMENTS_MILLER_OUTPUT,
     N_POINTS_CURVE,
     N_POINTS_TWIST,
+    NON_RESIDUE_FQ,
     exp_miller_loop,
     q,
     twisted_a,
@@ -35,6 +36,7 @@ mnt4_753 = PairingModel(
     point_addition_twisted_curve=twisted_curve_operations.point_addition,
     point_negation_twisted_curve=twisted_curve_operations.point_negation,
     line_eval=line_functions.line_evaluation,
+    line_eval_fixed_q=line_functions.line_evaluation_fixed_q,
     line_eval_times_eval=miller_output_ops.line_eval_times_eval,
     line_eval_times_eval_times_eval=miller_output_ops.line_eval_times_eval_times_eval,
     line_eval_times_eval_times_eval_times_eval=miller_output_ops.line_eval_times_eval_times_eval_times_eval,
@@ -50,4 +52,8 @@ mnt4_753 = PairingModel(
     cyclotomic_inverse=final_exponentiation.cyclotomic_inverse,
     easy_exponentiation_with_inverse_check=final_exponentiation.easy_exponentiation_with_inverse_check,
     hard_exponentiation=final_exponentiation.hard_exponentiation,
+    residue_witness_check=final_exponentiation.residue_witness_check,
+    n_elements_scaling_factor=0,
+    twisted_a=twisted_a,
+    non_residue_fq=NON_RESIDUE_FQ,
 )
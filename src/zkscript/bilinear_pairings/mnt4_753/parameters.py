@@ -385,6 +385,444 @@ minus_exp_miller_loop = [
 ][::-1]
 exp_miller_loop = [-el for el in minus_exp_miller_loop]
 
+# Addition chain for abs(u), computed by benchmarks/addition_chains.py
+exp_miller_loop_chain = [
+    (0, 0, 1),
+    (0, 1, 1),
+    (0, 2, 1),
+    (2, 3, 1),
+    (2, 4, 1),
+    (2, 5, 1),
+    (1, 6, 1),
+    (3, 7, 1),
+    (5, 8, 1),
+    (5, 9, 1),
+    (7, 8, 1),
+    (10, 11, 1),
+    (1, 12, 1),
+    (13, 13, 1),
+    (14, 8, 1),
+    (15, 15, 1),
+    (16, 16, 1),
+    (17, 17, 1),
+    (18, 18, 1),
+    (19, 19, 1),
+    (20, 10, 1),
+    (21, 21, 1),
+    (22, 22, 1),
+    (23, 23, 1),
+    (24, 24, 1),
+    (25, 25, 1),
+    (26, 26, 1),
+    (27, 27, 1),
+    (28, 28, 1),
+    (29, 13, 1),
+    (30, 30, 1),
+    (31, 31, 1),
+    (32, 32, 1),
+    (33, 33, 1),
+    (34, 34, 1),
+    (35, 35, 1),
+    (36, 36, 1),
+    (37, 7, 1),
+    (38, 38, 1),
+    (39, 39, 1),
+    (40, 40, 1),
+    (41, 41, 1),
+    (42, 42, 1),
+    (43, 43, 1),
+    (44, 44, 1),
+    (45, 10, -1),
+    (46, 46, 1),
+    (47, 47, 1),
+    (48, 48, 1),
+    (49, 49, 1),
+    (50, 50, 1),
+    (51, 51, 1),
+    (52, 52, 1),
+    (53, 53, 1),
+    (54, 54, 1),
+    (55, 6, 1),
+    (56, 56, 1),
+    (57, 57, 1),
+    (58, 58, 1),
+    (59, 0, 1),
+    (60, 60, 1),
+    (61, 61, 1),
+    (62, 62, 1),
+    (63, 63, 1),
+    (64, 64, 1),
+    (65, 65, 1),
+    (66, 66, 1),
+    (67, 67, 1),
+    (68, 68, 1),
+    (69, 69, 1),
+    (70, 70, 1),
+    (71, 71, 1),
+    (72, 72, 1),
+    (73, 73, 1),
+    (74, 10, -1),
+    (75, 75, 1),
+    (76, 76, 1),
+    (77, 77, 1),
+    (78, 78, 1),
+    (79, 79, 1),
+    (80, 80, 1),
+    (81, 81, 1),
+    (82, 12, -1),
+    (83, 83, 1),
+    (84, 84, 1),
+    (85, 85, 1),
+    (86, 86, 1),
+    (87, 87, 1),
+    (88, 88, 1),
+    (89, 89, 1),
+    (90, 6, -1),
+    (91, 91, 1),
+    (92, 92, 1),
+    (93, 93, 1),
+    (94, 94, 1),
+    (95, 95, 1),
+    (96, 96, 1),
+    (97, 2, -1),
+    (98, 98, 1),
+    (99, 99, 1),
+    (100, 100, 1),
+    (101, 101, 1),
+    (102, 102, 1),
+    (103, 103, 1),
+    (104, 104, 1),
+    (105, 105, 1),
+    (106, 106, 1),
+    (107, 107, 1),
+    (108, 12, -1),
+    (109, 109, 1),
+    (110, 110, 1),
+    (111, 111, 1),
+    (112, 112, 1),
+    (113, 10, 1),
+    (114, 114, 1),
+    (115, 115, 1),
+    (116, 116, 1),
+    (117, 117, 1),
+    (118, 118, 1),
+    (119, 119, 1),
+    (120, 9, 1),
+    (121, 121, 1),
+    (122, 122, 1),
+    (123, 123, 1),
+    (124, 124, 1),
+    (125, 125, 1),
+    (126, 126, 1),
+    (127, 127, 1),
+    (128, 128, 1),
+    (129, 129, 1),
+    (130, 13, -1),
+    (131, 131, 1),
+    (132, 132, 1),
+    (133, 133, 1),
+    (134, 134, 1),
+    (135, 135, 1),
+    (136, 136, 1),
+    (137, 137, 1),
+    (138, 138, 1),
+    (139, 139, 1),
+    (140, 140, 1),
+    (141, 141, 1),
+    (142, 142, 1),
+    (143, 143, 1),
+    (144, 144, 1),
+    (145, 6, -1),
+    (146, 146, 1),
+    (147, 147, 1),
+    (148, 148, 1),
+    (149, 149, 1),
+    (150, 150, 1),
+    (151, 151, 1),
+    (152, 9, -1),
+    (153, 153, 1),
+    (154, 154, 1),
+    (155, 155, 1),
+    (156, 156, 1),
+    (157, 157, 1),
+    (158, 158, 1),
+    (159, 159, 1),
+    (160, 160, 1),
+    (161, 161, 1),
+    (162, 162, 1),
+    (163, 10, 1),
+    (164, 164, 1),
+    (165, 165, 1),
+    (166, 166, 1),
+    (167, 8, 1),
+    (168, 168, 1),
+    (169, 169, 1),
+    (170, 170, 1),
+    (171, 171, 1),
+    (172, 172, 1),
+    (173, 173, 1),
+    (174, 174, 1),
+    (175, 175, 1),
+    (176, 176, 1),
+    (177, 13, 1),
+    (178, 178, 1),
+    (179, 179, 1),
+    (180, 180, 1),
+    (181, 181, 1),
+    (182, 13, -1),
+    (183, 183, 1),
+    (184, 184, 1),
+    (185, 185, 1),
+    (186, 186, 1),
+    (187, 7, 1),
+    (188, 188, 1),
+    (189, 189, 1),
+    (190, 190, 1),
+    (191, 191, 1),
+    (192, 192, 1),
+    (193, 193, 1),
+    (194, 194, 1),
+    (195, 195, 1),
+    (196, 196, 1),
+    (197, 10, 1),
+    (198, 198, 1),
+    (199, 199, 1),
+    (200, 200, 1),
+    (201, 201, 1),
+    (202, 202, 1),
+    (203, 203, 1),
+    (204, 204, 1),
+    (205, 6, -1),
+    (206, 206, 1),
+    (207, 207, 1),
+    (208, 208, 1),
+    (209, 209, 1),
+    (210, 210, 1),
+    (211, 211, 1),
+    (212, 212, 1),
+    (213, 213, 1),
+    (214, 214, 1),
+    (215, 215, 1),
+    (216, 216, 1),
+    (217, 217, 1),
+    (218, 218, 1),
+    (219, 219, 1),
+    (220, 7, 1),
+    (221, 221, 1),
+    (222, 222, 1),
+    (223, 223, 1),
+    (224, 224, 1),
+    (225, 225, 1),
+    (226, 8, -1),
+    (227, 227, 1),
+    (228, 228, 1),
+    (229, 229, 1),
+    (230, 230, 1),
+    (231, 231, 1),
+    (232, 232, 1),
+    (233, 233, 1),
+    (234, 234, 1),
+    (235, 235, 1),
+    (236, 236, 1),
+    (237, 12, -1),
+    (238, 238, 1),
+    (239, 239, 1),
+    (240, 240, 1),
+    (241, 241, 1),
+    (242, 242, 1),
+    (243, 243, 1),
+    (244, 244, 1),
+    (245, 245, 1),
+    (246, 246, 1),
+    (247, 247, 1),
+    (248, 12, 1),
+    (249, 249, 1),
+    (250, 250, 1),
+    (251, 251, 1),
+    (252, 13, 1),
+    (253, 253, 1),
+    (254, 254, 1),
+    (255, 255, 1),
+    (256, 256, 1),
+    (257, 257, 1),
+    (258, 12, 1),
+    (259, 259, 1),
+    (260, 260, 1),
+    (261, 261, 1),
+    (262, 262, 1),
+    (263, 263, 1),
+    (264, 264, 1),
+    (265, 265, 1),
+    (266, 266, 1),
+    (267, 7, 1),
+    (268, 268, 1),
+    (269, 269, 1),
+    (270, 270, 1),
+    (271, 271, 1),
+    (272, 272, 1),
+    (273, 273, 1),
+    (274, 274, 1),
+    (275, 275, 1),
+    (276, 6, 1),
+    (277, 277, 1),
+    (278, 278, 1),
+    (279, 279, 1),
+    (280, 280, 1),
+    (281, 281, 1),
+    (282, 282, 1),
+    (283, 283, 1),
+    (284, 13, -1),
+    (285, 285, 1),
+    (286, 286, 1),
+    (287, 287, 1),
+    (288, 288, 1),
+    (289, 289, 1),
+    (290, 290, 1),
+    (291, 7, -1),
+    (292, 292, 1),
+    (293, 293, 1),
+    (294, 294, 1),
+    (295, 295, 1),
+    (296, 296, 1),
+    (297, 13, 1),
+    (298, 298, 1),
+    (299, 299, 1),
+    (300, 300, 1),
+    (301, 301, 1),
+    (302, 302, 1),
+    (303, 303, 1),
+    (304, 304, 1),
+    (305, 305, 1),
+    (306, 306, 1),
+    (307, 307, 1),
+    (308, 6, 1),
+    (309, 309, 1),
+    (310, 310, 1),
+    (311, 311, 1),
+    (312, 312, 1),
+    (313, 313, 1),
+    (314, 314, 1),
+    (315, 315, 1),
+    (316, 316, 1),
+    (317, 8, 1),
+    (318, 318, 1),
+    (319, 319, 1),
+    (320, 320, 1),
+    (321, 321, 1),
+    (322, 322, 1),
+    (323, 323, 1),
+    (324, 324, 1),
+    (325, 325, 1),
+    (326, 326, 1),
+    (327, 10, 1),
+    (328, 328, 1),
+    (329, 329, 1),
+    (330, 330, 1),
+    (331, 331, 1),
+    (332, 332, 1),
+    (333, 333, 1),
+    (334, 334, 1),
+    (335, 335, 1),
+    (336, 6, 1),
+    (337, 337, 1),
+    (338, 338, 1),
+    (339, 339, 1),
+    (340, 12, 1),
+    (341, 341, 1),
+    (342, 342, 1),
+    (343, 343, 1),
+    (344, 344, 1),
+    (345, 345, 1),
+    (346, 346, 1),
+    (347, 347, 1),
+    (348, 348, 1),
+    (349, 349, 1),
+    (350, 350, 1),
+    (351, 10, 1),
+    (352, 352, 1),
+    (353, 353, 1),
+    (354, 354, 1),
+    (355, 6, 1),
+    (356, 356, 1),
+    (357, 0, 1),
+    (358, 358, 1),
+    (359, 359, 1),
+    (360, 360, 1),
+    (361, 361, 1),
+    (362, 362, 1),
+    (363, 363, 1),
+    (364, 364, 1),
+    (365, 365, 1),
+    (366, 366, 1),
+    (367, 6, 1),
+    (368, 368, 1),
+    (369, 369, 1),
+    (370, 370, 1),
+    (371, 371, 1),
+    (372, 372, 1),
+    (373, 13, 1),
+    (374, 374, 1),
+    (375, 375, 1),
+    (376, 376, 1),
+    (377, 377, 1),
+    (378, 378, 1),
+    (379, 379, 1),
+    (380, 12, -1),
+    (381, 381, 1),
+    (382, 382, 1),
+    (383, 383, 1),
+    (384, 384, 1),
+    (385, 385, 1),
+    (386, 386, 1),
+    (387, 387, 1),
+    (388, 388, 1),
+    (389, 8, 1),
+    (390, 390, 1),
+    (391, 391, 1),
+    (392, 392, 1),
+    (393, 393, 1),
+    (394, 394, 1),
+    (395, 395, 1),
+    (396, 0, 1),
+    (397, 397, 1),
+    (398, 398, 1),
+    (399, 399, 1),
+    (400, 400, 1),
+    (401, 401, 1),
+    (402, 402, 1),
+    (403, 403, 1),
+    (404, 404, 1),
+    (405, 405, 1),
+    (406, 6, 1),
+    (407, 407, 1),
+    (408, 408, 1),
+    (409, 409, 1),
+    (410, 410, 1),
+    (411, 6, 1),
+    (412, 412, 1),
+    (413, 413, 1),
+    (414, 414, 1),
+    (415, 415, 1),
+    (416, 416, 1),
+    (417, 417, 1),
+    (418, 2, 1),
+    (419, 419, 1),
+    (420, 420, 1),
+    (421, 421, 1),
+    (422, 422, 1),
+    (423, 423, 1),
+    (424, 424, 1),
+    (425, 425, 1),
+    (426, 426, 1),
+    (427, 427, 1),
+    (428, 428, 1),
+    (429, 429, 1),
+    (430, 430, 1),
+    (431, 431, 1),
+    (432, 432, 1),
+    (433, 433, 1),
+]
+
 # Modulus
 q = u**2 + u + 1
 
@@ -1,8 +1,50 @@
 from math import ceil, log2
 
 from tx_engine import Script
+from tx_engine.engine.op_codes import (
+    OP_1SUB,
+    OP_2DROP,
+    OP_DEPTH,
+    OP_EQUALVERIFY,
+    OP_FROMALTSTACK,
+    OP_PICK,
+    OP_TOALTSTACK,
+)
 
-from src.zkscript.util.utility_scripts import nums_to_script, pick
+from src.zkscript.elliptic_curves.ec_operations_fq_unrolled import wnaf
+from src.zkscript.util.addition_chains import Step, addition_chain_value
+from src.zkscript.util.script_builder import ScriptBuilder
+from src.zkscript.util.utility_scripts import nums_to_script, pick, roll
+
+# Width of the signed binary digits, the smallest width of sliding_window_digits (no odd power is precomputed)
+MIN_WINDOW_WIDTH = 2
+
+
+def sliding_window_digits(exp_e: list[int], max_width: int = 8) -> tuple[int, list[int]]:
+    """Recode the exponent of `cyclotomic_exponentiation` for the sliding-window exponentiation.
+
+    Args:
+        exp_e (list[int]): The signed binary digits of e, little endian, with exp_e[-1] != 0.
+        max_width (int): The largest width considered.
+
+    Returns:
+        (width, digits) such that |e| = sum_i digits[i] 2^i, where every non-zero digit is odd with
+        |digits[i]| < 2^(width-1), so that f^|e| is computed from the odd powers f, f^3, .., f^(2^(width-1) - 1). The
+        candidates are the digits of exp_e (with width 2) and the width-w NAF of |e| (see wnaf) for
+        2 <= w <= max_width. The one returned minimises the number of squarings and multiplications, counting the
+        2^(width-2) operations needed to compute the odd powers if width > 2.
+
+    """
+    e = sum(digit * 2**i for i, digit in enumerate(exp_e))
+    candidates = [(MIN_WINDOW_WIDTH, [digit if e > 0 else -digit for digit in exp_e])]
+    candidates += [(width, wnaf(abs(e), width)) for width in range(MIN_WINDOW_WIDTH, max_width + 1)]
+
+    def n_operations(candidate: tuple[int, list[int]]) -> int:
+        width, digits = candidate
+        table = 2 ** (width - 2) if width > MIN_WINDOW_WIDTH else 0
+        return table + len(digits) - 1 + sum(digit != 0 for digit in digits) - 1
+
+    return min(candidates, key=n_operations)
 
 
 class CyclotomicExponentiation:
@@ -25,6 +67,9 @@ class CyclotomicExponentiation:
         modulo_threshold: int,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
+        sliding_window: bool = False,
+        chain: list[Step] | None = None,
+        pick_on_demand: bool = False,
     ) -> Script:
         """Compute exponetiation f^e for f in the cyclotomic subgroup.
 
@@ -43,6 +88,17 @@ class CyclotomicExponentiation:
         Variables:
             - If take_modulo is set to True, then the coordinates of the result are in Z_q; otherwise, the coordinates
             are not taken modulo q.
+            - If sliding_window and pick_on_demand are set to False, a copy of f or Inverse(f) is prepared on the
+            stack for every non-zero digit of exp_e.
+            - If pick_on_demand is set to True, a single copy of f and of Inverse(f) (if they are needed) is kept on
+            the stack below the running value: it is picked from its depth for every non-zero digit, and rolled (or
+            used in place) for the last one.
+            - If sliding_window is set to True, e is recoded with sliding_window_digits: the odd powers
+            f, f^3, .., f^(2^(w-1) - 1) are computed once and kept on the stack below the running value, and for every
+            non-zero digit d the power f^|d| is picked from its depth (and inverted if d < 0).
+            - If chain is not None, f^|e| is computed with addition_chain_exponentiation, where chain is an addition
+            chain for |e| (see src.zkscript.util.addition_chains).
+            - At most one of sliding_window, chain and pick_on_demand can be set.
         """
         # Bit size of q
         q = self.MODULUS
@@ -56,82 +112,149 @@ class CyclotomicExponentiation:
 
         # --------------------------------------------------------------------------------------------------------------
 
+        out = ScriptBuilder()
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([q])
-                + Script.parse_string("OP_EQUALVERIFY")
+            out += Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([q]) + Script([OP_EQUALVERIFY])
+
+        if sum([sliding_window, chain is not None, pick_on_demand]) > 1:
+            msg = "At most one of sliding_window, chain and pick_on_demand can be set"
+            raise ValueError(msg)
+
+        if chain is not None:
+            e = sum(digit * 2**i for i, digit in enumerate(exp_e))
+            if addition_chain_value(chain) != abs(e):
+                msg = "The addition chain must compute abs(e)"
+                raise ValueError(msg)
+            # After this, the stack is: g, where g = f if e > 0 and g = Inverse(f) otherwise
+            if e < 0:
+                out += cyclotomic_inverse(take_modulo=False, check_constant=False, clean_constant=False)
+            out += self.addition_chain_exponentiation(
+                chain=chain, take_modulo=take_modulo, modulo_threshold=modulo_threshold, clean_constant=clean_constant
             )
-        else:
-            out = Script()
-
-        # Prepare the stack with the copies of f and Inverse(f) needed
-
-        # ever seen f?
-        ever_seen_f = False
-        # ever seen Inverse(f)?
-        ever_seen_inverse = False
-        # prev = 1 --> last loaded was f; prev = -1 --> last loaded was Inverse(f)
-        prev = 0
-        # counter for how many copies of previous element we have loaded
-        count_prev = 0
-        # At the end of this loop, the stack is : f .. f Inverse(f) ... Inverse(f) f ... f g according to the non-zero
-        # elements in exp_e
-        for i in range(len(exp_e)):
-            if exp_e[i] == 1:
-                if prev == 1:
-                    # Duplicate f
+            return out.to_script()
+
+        if sliding_window:
+            width, digits = sliding_window_digits(exp_e)
+            # Number of entries of the table of odd powers
+            K = 2 ** (width - 2)
+
+            # After this, the stack is: g, where g = f if e > 0 and g = Inverse(f) otherwise
+            if exp_e[-1] < 0:
+                out += cyclotomic_inverse(take_modulo=False, check_constant=False, clean_constant=False)
+
+            # After this, the stack is: g g^3 .. g^(2K-1)
+            if K > 1:
+                out += pick(position=N_ELEMENTS - 1, n_elements=N_ELEMENTS)
+                out += square(take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False)
+                out += Script([OP_TOALTSTACK] * N_ELEMENTS)  # Put g^2 on the altstack
+                for i in range(1, K):
+                    out += pick(position=N_ELEMENTS - 1, n_elements=N_ELEMENTS)  # Duplicate g^(2i-1)
+                    out += Script([OP_FROMALTSTACK] * N_ELEMENTS)
+                    if i != K - 1:
+                        out += pick(position=N_ELEMENTS - 1, n_elements=N_ELEMENTS)
+                        out += Script([OP_TOALTSTACK] * N_ELEMENTS)
+                    out += mul(
+                        take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
+                    )  # Compute g^(2i+1) = g^(2i-1) * g^2
+
+            # After this, the stack is: g g^3 .. g^(2K-1) g^d, where d is the most significant digit
+            out += pick(position=N_ELEMENTS * (K - 1 - digits[-1] // 2) + N_ELEMENTS - 1, n_elements=N_ELEMENTS)
+        elif pick_on_demand:
+            digits = exp_e
+            # The non-zero digits using f and Inverse(f), apart from the most significant one, in the order in which
+            # they are used
+            uses = {sign: [i for i in range(len(exp_e) - 2, -1, -1) if exp_e[i] == sign] for sign in (1, -1)}
+
+            # After this, the stack is: kept, where kept is f, Inverse(f) or f Inverse(f)
+            if uses[-1] or exp_e[-1] == -1:
+                if uses[1] or exp_e[-1] == 1:
                     out += pick(position=N_ELEMENTS - 1, n_elements=N_ELEMENTS)
-                    count_prev += 1
-                elif prev == -1:
-                    if ever_seen_f:
+                    out += cyclotomic_inverse(take_modulo=False, check_constant=False, clean_constant=False)
+                    kept = [1, -1]
+                else:
+                    out += cyclotomic_inverse(take_modulo=False, check_constant=False, clean_constant=False)
+                    kept = [-1]
+            else:
+                kept = [1]
+
+            # After this, the stack is: kept g, where g = f if exp_e[-1] = 1 and g = Inverse(f) otherwise
+            position = N_ELEMENTS * (len(kept) - 1 - kept.index(exp_e[-1])) + N_ELEMENTS - 1
+            if uses[exp_e[-1]]:
+                out += pick(position=position, n_elements=N_ELEMENTS)
+            else:
+                if position != N_ELEMENTS - 1:
+                    out += roll(position=position, n_elements=N_ELEMENTS)
+                kept.remove(exp_e[-1])
+        else:
+            digits = exp_e
+
+            # Prepare the stack with the copies of f and Inverse(f) needed
+
+            # ever seen f?
+            ever_seen_f = False
+            # ever seen Inverse(f)?
+            ever_seen_inverse = False
+            # prev = 1 --> last loaded was f; prev = -1 --> last loaded was Inverse(f)
+            prev = 0
+            # counter for how many copies of previous element we have loaded
+            count_prev = 0
+            # At the end of this loop, the stack is : f .. f Inverse(f) ... Inverse(f) f ... f g according to the
+            # non-zero elements in exp_e
+            for i in range(len(exp_e)):
+                if exp_e[i] == 1:
+                    if prev == 1:
                         # Duplicate f
-                        out += pick(position=N_ELEMENTS + N_ELEMENTS * count_prev - 1, n_elements=N_ELEMENTS)
-                        count_prev = 1
-                        prev = 1
+                        out += pick(position=N_ELEMENTS - 1, n_elements=N_ELEMENTS)
+                        count_prev += 1
+                    elif prev == -1:
+                        if ever_seen_f:
+                            # Duplicate f
+                            out += pick(position=N_ELEMENTS + N_ELEMENTS * count_prev - 1, n_elements=N_ELEMENTS)
+                            count_prev = 1
+                            prev = 1
+                        else:
+                            # We have never seen f yet, we construct it
+                            out += pick(position=N_ELEMENTS - 1, n_elements=N_ELEMENTS)  # Duplicate Inverse(f)
+                            out += cyclotomic_inverse(take_modulo=False, check_constant=False, clean_constant=False)
+                            prev = 1
+                            count_prev = 1
+                            ever_seen_f = True
                     else:
-                        # We have never seen f yet, we construct it
-                        out += pick(position=N_ELEMENTS - 1, n_elements=N_ELEMENTS)  # Duplicate Inverse(f)
-                        out += cyclotomic_inverse(take_modulo=False, check_constant=False, clean_constant=False)
+                        # Never seen either, so we set up f
                         prev = 1
                         count_prev = 1
                         ever_seen_f = True
-                else:
-                    # Never seen either, so we set up f
-                    prev = 1
-                    count_prev = 1
-                    ever_seen_f = True
-            elif exp_e[i] == -1:
-                if prev == 1:
-                    if ever_seen_inverse:
-                        # Pick Inverse(f)
-                        out += pick(position=N_ELEMENTS + N_ELEMENTS * count_prev - 1, n_elements=4)
-                        prev = -1
-                        count_prev = 1
+                elif exp_e[i] == -1:
+                    if prev == 1:
+                        if ever_seen_inverse:
+                            # Pick Inverse(f)
+                            out += pick(position=N_ELEMENTS + N_ELEMENTS * count_prev - 1, n_elements=4)
+                            prev = -1
+                            count_prev = 1
+                        else:
+                            # We have never seen Inverse(f) yet, we construct it
+                            out += pick(position=N_ELEMENTS - 1, n_elements=N_ELEMENTS)  # Duplicate f
+                            out += cyclotomic_inverse(take_modulo=False, check_constant=False, clean_constant=False)
+                            prev = -1
+                            count_prev = 1
+                            ever_seen_inverse = True
+                    elif prev == -1:
+                        # Duplicate Inverse(f)
+                        out += pick(position=N_ELEMENTS - 1, n_elements=N_ELEMENTS)
+                        count_prev += 1
                     else:
-                        # We have never seen Inverse(f) yet, we construct it
-                        out += pick(position=N_ELEMENTS - 1, n_elements=N_ELEMENTS)  # Duplicate f
+                        # Never seen either, so we set up Inverse(f)
                         out += cyclotomic_inverse(take_modulo=False, check_constant=False, clean_constant=False)
                         prev = -1
                         count_prev = 1
                         ever_seen_inverse = True
-                elif prev == -1:
-                    # Duplicate Inverse(f)
-                    out += pick(position=N_ELEMENTS - 1, n_elements=N_ELEMENTS)
-                    count_prev += 1
                 else:
-                    # Never seen either, so we set up Inverse(f)
-                    out += cyclotomic_inverse(take_modulo=False, check_constant=False, clean_constant=False)
-                    prev = -1
-                    count_prev = 1
-                    ever_seen_inverse = True
-            else:
-                pass
+                    pass
 
         # --------------------------------------------------------------------------------------------------------------
 
         current_size = BIT_SIZE_Q
-        for i in range(len(exp_e) - 2, -1, -1):
+        for i in range(len(digits) - 2, -1, -1):
             modulo_square = False
             modulo_multiplication = False
             clean_constant_final = False
@@ -142,14 +265,14 @@ class CyclotomicExponentiation:
             I am at the beginning of an iteration of the cycle and I assume that squaring will not raise an overflow
             error.
             Then, I check:
-                - If exp_e[i] != 0:
+                - If digits[i] != 0:
                     - Is squaring + multiplication raise an overflow?
                         ---> If yes, mod after squaring (no need to mod after multiplication because squaring +
                         multiplication starting from bitSizeOfQ does not raise an overflow)
                         ---> If not, is another squaring raising an error?
                             ---> If yes, mod after multiplication
                             ---> If not, do nothing
-                - If exp_e[i] == 0:
+                - If digits[i] == 0:
                     - Is squaring twice raising an error?
                         ---> If yes, mod after squaring
                         ---> If not, do nothing
@@ -161,9 +284,9 @@ class CyclotomicExponentiation:
 
             if i == 0 and take_modulo:
                 modulo_square = True
-                if exp_e[0] != 0:
+                if digits[0] != 0:
                     modulo_multiplication = True  # Mod out after last multiplication
-            elif exp_e[i] != 0:
+            elif digits[i] != 0:
                 future_size = ceil(log2(30)) + current_size * 2  # After squaring
                 future_size = ceil(log2(30)) + future_size + BIT_SIZE_Q  # After squaring and multiplication
 
@@ -187,11 +310,27 @@ class CyclotomicExponentiation:
                 else:
                     current_size = future_size
 
-            if exp_e[i] != 0:
+            if digits[i] != 0:
                 # After this, the stack is: f Conjugate(f) g^2
                 out += square(
                     take_modulo=modulo_square, check_constant=False, clean_constant=False, is_constant_reused=False
                 )
+                if sliding_window:
+                    # Pick g^|d| from the table
+                    out += pick(position=N_ELEMENTS * (K - abs(digits[i]) // 2) + N_ELEMENTS - 1, n_elements=N_ELEMENTS)
+                    if digits[i] < 0:
+                        out += cyclotomic_inverse(take_modulo=False, check_constant=False, clean_constant=False)
+                elif pick_on_demand:
+                    # Pick f or Inverse(f), or roll it if this is its last use
+                    position = N_ELEMENTS * (len(kept) - kept.index(digits[i])) + N_ELEMENTS - 1
+                    uses[digits[i]].pop(0)
+                    if uses[digits[i]]:
+                        out += pick(position=position, n_elements=N_ELEMENTS)
+                    else:
+                        # If it is right below the running value, the multiplication uses it in place
+                        if position != 2 * N_ELEMENTS - 1:
+                            out += roll(position=position, n_elements=N_ELEMENTS)
+                        kept.remove(digits[i])
                 out += mul(
                     take_modulo=modulo_multiplication,
                     check_constant=False,
@@ -207,4 +346,121 @@ class CyclotomicExponentiation:
                     is_constant_reused=False,
                 )
 
-        return out
+        # After this, the stack is: X^e
+        if sliding_window:
+            out += Script([OP_TOALTSTACK] * N_ELEMENTS)
+            out += Script([OP_2DROP] * (N_ELEMENTS * K // 2))
+            out += Script([OP_FROMALTSTACK] * N_ELEMENTS)
+
+        return out.to_script()
+
+    def addition_chain_exponentiation(
+        self,
+        chain: list[Step],
+        take_modulo: bool,
+        modulo_threshold: int,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+    ) -> Script:
+        """Compute the exponentiation f^e for f in the cyclotomic subgroup, where e is computed by `chain`.
+
+        Input parameters:
+            - Stack: q .. X
+            - Altstack: []
+        Output:
+            - X^e
+        Assumption on data:
+            - X is passed as an element in F_{q^k}
+        Variables:
+            - chain is an addition chain for e (see src.zkscript.util.addition_chains). The powers computed by the
+            chain are kept on the stack until their last use: they are picked from their depth when they are used
+            again later, and rolled otherwise.
+            - If take_modulo is set to True, then the coordinates of the result are in Z_q; otherwise, the coordinates
+            are not taken modulo q. The powers used more than once, or not used by the following step, are always
+            reduced. The others are reduced only if the following step would otherwise exceed modulo_threshold.
+        """
+        # Bit size of q
+        q = self.MODULUS
+        BIT_SIZE_Q = ceil(log2(q))
+        # Bit growth of a multiplication in the field over which we compute the cyclotomic exponentiation
+        GROWTH = ceil(log2(30))
+
+        N_ELEMENTS = self.EXTENSION_DEGREE
+
+        if not chain:
+            msg = "The addition chain must have at least one step"
+            raise ValueError(msg)
+
+        # uses[k] is the list of the steps using f^(e_k)
+        uses = [[] for _ in range(len(chain) + 1)]
+        for step, (i, j, _) in enumerate(chain):
+            uses[i].append(step)
+            if j != i:
+                uses[j].append(step)
+
+        out = ScriptBuilder()
+        if check_constant:
+            out += Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([q]) + Script([OP_EQUALVERIFY])
+
+        # The powers on the stack, from the bottom, and their bit sizes
+        stack = [0]
+        sizes = [BIT_SIZE_Q]
+        # The steps whose output must be reduced
+        must_reduce = set()
+        for step, (i, j, sign) in enumerate(chain):
+            is_square = i == j and sign == 1
+            if i == j and not is_square:
+                msg = f"Invalid step of an addition chain: {(i, j, sign)}"
+                raise ValueError(msg)
+
+            # After this, the stack is: .. f^(e_i) f^(sign * e_j), or .. f^(e_i) if the step is a square
+            for operand in [i] if is_square else [i, j]:
+                position = N_ELEMENTS * (len(stack) - 1 - stack.index(operand)) + N_ELEMENTS - 1
+                if uses[operand][-1] == step:
+                    if position != N_ELEMENTS - 1:
+                        out += roll(position=position, n_elements=N_ELEMENTS)
+                    stack.remove(operand)
+                else:
+                    out += pick(position=position, n_elements=N_ELEMENTS)
+                stack.append(None)
+            if sign == -1:
+                out += self.cyclotomic_inverse(take_modulo=False, check_constant=False, clean_constant=False)
+
+            size = 2 * sizes[i] + GROWTH if is_square else sizes[i] + sizes[j] + GROWTH
+            if step in must_reduce or (step == len(chain) - 1 and take_modulo):
+                modulo = True
+            elif step == len(chain) - 1:
+                modulo = False
+            elif uses[step + 1] != [step + 1]:
+                modulo = True
+            else:
+                next_i, next_j, _ = chain[step + 1]
+                other = next_j if next_i == step + 1 else next_i
+                next_size = size + (size if other == step + 1 else sizes[other]) + GROWTH
+                if next_size <= modulo_threshold:
+                    modulo = False
+                elif not is_square and size <= 2 * BIT_SIZE_Q + GROWTH and other == step + 1:
+                    # As in cyclotomic_exponentiation, the product of two reduced values is only reduced after being
+                    # squared
+                    modulo = False
+                    must_reduce.add(step + 1)
+                else:
+                    modulo = True
+
+            operation = self.square if is_square else self.mul
+            out += operation(
+                take_modulo=modulo,
+                check_constant=False,
+                clean_constant=clean_constant if step == len(chain) - 1 else False,
+                is_constant_reused=False,
+            )
+
+            stack = [power for power in stack if power is not None] + [step + 1]
+            sizes.append(BIT_SIZE_Q if modulo else size)
+
+        # After this, the stack is: X^e
+        for _ in range(len(stack) - 1):
+            out += roll(position=2 * N_ELEMENTS - 1, n_elements=N_ELEMENTS)
+            out += Script([OP_2DROP] * (N_ELEMENTS // 2))
+
+        return out.to_script()
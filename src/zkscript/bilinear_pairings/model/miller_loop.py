@@ -1,15 +1,32 @@
+from collections.abc import Callable
+from functools import partial
+
 # Math
 from math import ceil, log2
 
 from tx_engine import Script
+from tx_engine.engine.op_codes import (
+    OP_1SUB,
+    OP_DEPTH,
+    OP_EQUALVERIFY,
+    OP_PICK,
+)
 
+from src.zkscript.util.bit_growth import is_positive_output, positive_input_kwargs
+from src.zkscript.util.reduction_planner import REDUCTION_COSTS, fragment_reduction_cost, plan_reductions
+from src.zkscript.util.script_builder import ScriptBuilder
+from src.zkscript.util.stack_tracker import StackTracker
 from src.zkscript.util.utility_functions import optimise_script
-from src.zkscript.util.utility_scripts import nums_to_script, pick, roll
+from src.zkscript.util.utility_scripts import nums_to_script
 
 
 class MillerLoop:
     def miller_loop(
-        self, modulo_threshold: int, check_constant: bool | None = None, clean_constant: bool | None = None
+        self,
+        modulo_threshold: int,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        reduction_cost: str = "count",
     ) -> Script:
         """NOTE: In this function we assume that P and Q are not the point at infinity.
 
@@ -30,22 +47,12 @@ class MillerLoop:
             - Carry out point evaluations
             - Carry out updates of f
             - Always mod out line evaluations
-            - Mod out point evaluation if next line evaluation overflows
-            - Mod out f if next multiplication with a line evaluation overflows
-        To estimate the size increases, we use:
-            - log2(f^2) <= log2(13*3) + 2*sizeF
-            - log2(f * lineEvaluation) <= log2(13*3) + sizeF + log2(q)
-            - log2(f * lineEvaluation * lineEvaluation) <= 2*log2(13*3) + sizeF + 2*log2(q)
-            - P + Q has its worst computation at lambda verification:
-            log2(lambda * (xP - xQ)) <= log2(q) + log2(2) + log2(max(xP,xQ)) (lambda is always assumed to be in Fq)
-            - P + Q has its worst coordinate at y:
-            log2(-y_P + (x_(P+Q) - x_P) * lambda) <= log2(max(2yP, 2 * lambda * x_(P+Q))
-                <= log2(max(2yP,4*x_(P+Q)))
-                <= log2(2*lambda*x_(P+Q))
-                <= log2(6) + log2(q) + log2(max(xP,xQ)),
-            where we used x_(P+Q) = lambda^2 - xP - xQ,
-            and log2(lambda^2 - xP - xQ) <= log2(3*max(xP,xQ))
-                <= log2(3) + log2(max(xP,xQ)) (lambda is always assumed to be in Fq)
+            - Mod out point evaluations and f according to the plan computed by miller_loop_reduction_plan, which
+            minimises the cost of the reductions (in the model reduction_cost, see REDUCTION_COSTS) while ensuring
+            that no value exceeds modulo_threshold bits
+        As the line evaluations are reduced, the inputs of the updates of f are known to be non-negative as long as
+        the operations computing f keep values non-negative (see keeps_positive), in which case f is reduced with a
+        single OP_MOD per coordinate.
         """
         q = self.MODULUS
         exp_miller_loop = self.exp_miller_loop
@@ -78,343 +85,375 @@ class MillerLoop:
         is the gradient of the line through 2T and pm Q.
         """
 
+        out = ScriptBuilder()
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([q])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
-        else:
-            out = Script()
+            out += Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([q]) + Script([OP_EQUALVERIFY])
+
+        # The slots accessed by the loop, from the bottom: the gradients (for i = 0, .., len(exp_miller_loop) - 2, the
+        # stack holds lambda_(2T pm Q) if exp_miller_loop[i] != 0, and lambda_(2T)), P and Q
+        slots = []
+        for i in range(len(exp_miller_loop) - 1):
+            if exp_miller_loop[i] != 0:
+                slots.append(("lambda_2T_pm_Q", EXTENSION_DEGREE))
+            slots.append(("lambda_2T", EXTENSION_DEGREE))
+        stack = StackTracker([*slots, ("P", N_POINTS_CURVE), ("Q", N_POINTS_TWIST)])
 
         # After this, the stack is: xP yP xQ yQ xQ -yQ xT yT
-        set_T = Script()
-        set_T += pick(position=N_POINTS_TWIST - 1, n_elements=N_POINTS_TWIST)
-        set_T += point_negation_twisted_curve(take_modulo=False, check_constant=False, clean_constant=False)
+        out += stack.pick("Q")
+        out += point_negation_twisted_curve(take_modulo=False, check_constant=False, clean_constant=False)
+        stack.apply(["Q"], [("-Q", N_POINTS_TWIST)])
         if exp_miller_loop[-1] == 1:
-            set_T += pick(position=2 * N_POINTS_TWIST - 1, n_elements=N_POINTS_TWIST)  # Pick Q
+            out += stack.pick("Q")
+            stack.rename("Q", "T")
         elif exp_miller_loop[-1] == -1:
-            set_T += pick(position=N_POINTS_TWIST - 1, n_elements=N_POINTS_TWIST)  # Pick -Q
+            out += stack.pick("-Q")
+            stack.rename("-Q", "T")
         else:
             raise ValueError("Last element of exp_miller_loop must be non-zero.")
-        out += set_T
+
+        take_modulo_F, take_modulo_T = self.miller_loop_reduction_plan(
+            modulo_threshold=modulo_threshold, reduction_cost=reduction_cost
+        )
 
         clean_final = False
-        BIT_SIZE_Q = ceil(log2(q))
-        current_size_T = BIT_SIZE_Q
-        current_size_F = BIT_SIZE_Q
+        # Whether the coordinates of f are known to be non-negative
+        is_f_positive = True
         # After this, the stack is: P Q -Q (t-1)Q miller(P,Q)
         for i in range(len(exp_miller_loop) - 2, -1, -1):
-            take_modulo_F = False
-            take_modulo_T = False
-
-            # Constants set up
             if i == 0:
                 clean_final = clean_constant
-                take_modulo_F = True
-                take_modulo_T = True
-            elif exp_miller_loop[i - 1] == 0:
-                # In this case, the next iteration will have: f <-- f^2 * lineEvaluation and T <-- 2T.
-                future_size_F = log2(13 * 3) + 2 * current_size_F + log2(13 * 3) + BIT_SIZE_Q
-                if future_size_F > modulo_threshold:
-                    take_modulo_F = True
-                    current_size_F = BIT_SIZE_Q
-                else:
-                    current_size_F = future_size_F
-
-                if current_size_T + BIT_SIZE_Q + log2(6) > modulo_threshold:
-                    take_modulo_T = True
-                    current_size_T = BIT_SIZE_Q
-                else:
-                    current_size_T = current_size_T + BIT_SIZE_Q + log2(6)
-            else:
-                # In this case, the next iteration will have:
-                # f <-- f^2 * lineEvaluation * lineEvaluation and T <-- 2T \pm Q.
-                future_size_F = log2(13 * 3) + 2 * current_size_F + 2 * log2(13 * 3) + 2 * BIT_SIZE_Q
-                if future_size_F > modulo_threshold:
-                    take_modulo_F = True
-                    current_size_F = BIT_SIZE_Q
-                else:
-                    current_size_F = future_size_F
-
-                if current_size_T + BIT_SIZE_Q + log2(6) > modulo_threshold:
-                    take_modulo_T = True
-                    current_size_T = BIT_SIZE_Q
-                else:
-                    current_size_T = current_size_T + BIT_SIZE_Q + log2(6)
+            pm_Q = "Q" if exp_miller_loop[i] == 1 else "-Q"
 
             if i == len(exp_miller_loop) - 2:
                 # First iteration, f_i is not there yet, so that stack is: lambda_(2T) P Q -Q T
+                # After this, the stack is: [lambda_(2T pm Q)] lambda_(2T) P Q -Q T 2T
+                out += stack.pick("lambda_2T")
+                out += stack.pick("T")
+                out += point_doubling_twisted_curve(
+                    take_modulo=take_modulo_F[i], check_constant=False, clean_constant=False
+                )  # Compute 2T
+                stack.apply(["lambda_2T", "T"], [("2T", N_POINTS_TWIST)])
+                # After this, the stack is: [lambda_(2T pm Q)] P Q -Q 2T lambda_2T T P
+                out += stack.roll("lambda_2T")
+                out += stack.roll("T")
+                out += stack.pick("P")
+                # After this, the stack is [lambda_(2T pm Q)] P Q -Q 2T ev_(l_(T,T))(P)
+                out += line_eval(take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False)
+                stack.apply(["lambda_2T", "T", "P"], [("ev_T", N_ELEMENTS_EVALUATION_OUTPUT)])
                 if exp_miller_loop[i] == 0:
-                    # After this, the stack is: lambda_(2T) P Q -Q T 2T
-                    stack_length_added = 0
-                    out += pick(
-                        position=(3 * N_POINTS_TWIST + N_POINTS_CURVE + EXTENSION_DEGREE) + stack_length_added - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Pick lambda_2T
-                    stack_length_added += EXTENSION_DEGREE
-                    out += pick(position=N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST)  # Pick T
-                    stack_length_added += N_POINTS_TWIST
-                    out += point_doubling_twisted_curve(
-                        take_modulo=take_modulo_F, check_constant=False, clean_constant=False
-                    )  # Compute 2T
-                    stack_length_added = N_POINTS_TWIST
-                    # After this, the stack is: P Q -Q 2T lambda_2T T P
-                    out += roll(
-                        position=(3 * N_POINTS_TWIST + N_POINTS_CURVE + EXTENSION_DEGREE) + stack_length_added - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Roll lambda_2T
-                    stack_length_added += EXTENSION_DEGREE
-                    out += roll(position=N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST)  # Roll T
-                    stack_length_added += 0
-                    out += pick(
-                        position=(3 * N_POINTS_TWIST + N_POINTS_CURVE) + stack_length_added - 1,
-                        n_elements=N_POINTS_CURVE,
-                    )  # Pick P
-                    stack_length_added += N_POINTS_CURVE
-                    # After this, the stack is P Q -Q 2T ev_(l_(T,T))(P)
-                    out += line_eval(
-                        take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
-                    )
-                    stack_length_added = N_ELEMENTS_EVALUATION_OUTPUT
                     # After this, the stack is: P Q -Q 2T ev_(l_(T,T))(P)^2
-                    out += pick(
-                        position=N_ELEMENTS_EVALUATION_OUTPUT - 1, n_elements=N_ELEMENTS_EVALUATION_OUTPUT
-                    )  # Duplicate ev_(l_(T,T))(P)
+                    out += stack.pick("ev_T")
                     out += line_eval_times_eval(
-                        take_modulo=take_modulo_F, check_constant=False, clean_constant=False, is_constant_reused=False
+                        take_modulo=take_modulo_F[i],
+                        check_constant=False,
+                        clean_constant=False,
+                        is_constant_reused=False,
+                        **positive_input_kwargs(line_eval_times_eval, True),
                     )
+                    is_f_positive = take_modulo_F[i] or is_positive_output(line_eval_times_eval)
                     # After this, the stack is: P Q -Q 2T Dense(ev_(l_(T,T))(P)^2)
                     out += pad_eval_times_eval_to_miller_output
+                    stack.apply(["ev_T", "ev_T"], [("f", N_ELEMENTS_MILLER_OUTPUT)])
+                    stack.rename("2T", "T")
                 else:
-                    # After this, the stack is: lambda_(2T pm Q) lambda_(2T) P Q -Q T 2T
-                    stack_length_added = 0
-                    out += pick(
-                        position=(3 * N_POINTS_TWIST + N_POINTS_CURVE + EXTENSION_DEGREE) + stack_length_added - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Pick lambda_2T
-                    stack_length_added += EXTENSION_DEGREE
-                    out += pick(position=N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST)  # Pick T
-                    stack_length_added += N_POINTS_TWIST
-                    out += point_doubling_twisted_curve(
-                        take_modulo=take_modulo_F, check_constant=False, clean_constant=False
-                    )  # Compute 2T
-                    stack_length_added = N_POINTS_TWIST
-                    # After this, the stack is: lambda_(2T pm Q) P Q -Q 2T lambda_2T T P
-                    out += roll(
-                        position=(3 * N_POINTS_TWIST + N_POINTS_CURVE + EXTENSION_DEGREE) + stack_length_added - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Roll lambda_2T
-                    stack_length_added += EXTENSION_DEGREE
-                    out += roll(position=N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST)  # Roll T
-                    stack_length_added += 0
-                    out += pick(
-                        position=(3 * N_POINTS_TWIST + N_POINTS_CURVE) + stack_length_added - 1,
-                        n_elements=N_POINTS_CURVE,
-                    )  # Pick P
-                    stack_length_added = N_POINTS_TWIST + EXTENSION_DEGREE + N_POINTS_CURVE
-                    # After this, the stack is lambda_(2T pm Q) P Q -Q 2T ev_(l_(T,T))(P)
-                    out += line_eval(
-                        take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
-                    )
-                    stack_length_added = N_ELEMENTS_EVALUATION_OUTPUT
                     # After this, the stack is: lambda_(2T pm Q) P Q -Q 2T, altstack = [ev_(l_(T,T))(P)]
-                    out += Script.parse_string(" ".join(["OP_TOALTSTACK"] * N_ELEMENTS_EVALUATION_OUTPUT))
-                    stack_length_added = 0
+                    out += stack.to_altstack("ev_T")
                     # After this, the stack is: lambda_(2T pm Q) P Q -Q 2T (2T \pm Q), altstack = [ev_(l_(T,T))(P)]
-                    out += pick(
-                        position=(3 * N_POINTS_TWIST + N_POINTS_CURVE + EXTENSION_DEGREE) + stack_length_added - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Pick lambda_(2T pm Q)
-                    stack_length_added += EXTENSION_DEGREE
-                    out += pick(position=N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST)  # Pick 2T
-                    stack_length_added += N_POINTS_TWIST
-                    if exp_miller_loop[i] == 1:
-                        out += pick(
-                            position=3 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST
-                        )  # Pick Q
-                        stack_length_added += N_POINTS_TWIST
-                    else:
-                        out += pick(2 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST)  # Pick -Q
-                        stack_length_added += N_POINTS_TWIST
+                    out += stack.pick("lambda_2T_pm_Q")
+                    out += stack.pick("2T")
+                    out += stack.pick(pm_Q)
                     out += point_addition_twisted_curve(
-                        take_modulo=take_modulo_T, check_constant=False, clean_constant=False
+                        take_modulo=take_modulo_T[i], check_constant=False, clean_constant=False
                     )
-                    stack_length_added = N_POINTS_TWIST
+                    stack.apply(["lambda_2T_pm_Q", "2T", pm_Q], [("2T_pm_Q", N_POINTS_TWIST)])
                     # After this, the stack is: P Q -Q (2T \pm Q) ev_(l_(2T,\pm Q))(P), altstack = [ev_(l_(T,T))(P)]
-                    out += roll(
-                        position=3 * N_POINTS_TWIST + N_POINTS_CURVE + EXTENSION_DEGREE + stack_length_added - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Roll lambda_(2T pm Q)
-                    stack_length_added += EXTENSION_DEGREE
-                    out += roll(position=N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST)  # Roll 2T
-                    stack_length_added += 0
-                    out += pick(
-                        position=3 * N_POINTS_TWIST + N_POINTS_CURVE + stack_length_added - 1, n_elements=N_POINTS_CURVE
-                    )  # Pick P
+                    out += stack.roll("lambda_2T_pm_Q")
+                    out += stack.roll("2T")
+                    out += stack.pick("P")
                     out += line_eval(
                         take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
                     )
-                    stack_length_added = N_ELEMENTS_EVALUATION_OUTPUT
+                    stack.apply(["lambda_2T_pm_Q", "2T", "P"], [("ev_2T_pm_Q", N_ELEMENTS_EVALUATION_OUTPUT)])
                     # After this, the stack is: P Q -Q (2T \pm Q) [ev_(l_(2T,\pm Q))(P) * ev_(l_(T,T))(P)]
-                    out += Script.parse_string(" ".join(["OP_FROMALTSTACK"] * N_ELEMENTS_EVALUATION_OUTPUT))
+                    out += stack.from_altstack("ev_T")
                     out += line_eval_times_eval(take_modulo=False, check_constant=False, clean_constant=False)
-                    stack_length_added = N_ELEMENTS_EVALUATION_TIMES_EVALUATION
+                    stack.apply(["ev_2T_pm_Q", "ev_T"], [("ev_times_ev", N_ELEMENTS_EVALUATION_TIMES_EVALUATION)])
                     # After this, the stack is: P Q -Q (2T \pm Q) [ev_(l_(2T,\pm Q))(P) * ev_(l_(T,T))(P)]^2
-                    # Duplicate ev_(l_(2T,\pm Q))(P) * ev_(l_(T,T))(P)
-                    out += pick(
-                        position=N_ELEMENTS_EVALUATION_TIMES_EVALUATION - 1,
-                        n_elements=N_ELEMENTS_EVALUATION_TIMES_EVALUATION,
-                    )
+                    out += stack.pick("ev_times_ev")
+                    is_ev_times_ev_positive = is_positive_output(line_eval_times_eval)
                     out += line_eval_times_eval_times_eval_times_eval(
-                        take_modulo=take_modulo_F, check_constant=False, clean_constant=False, is_constant_reused=False
+                        take_modulo=take_modulo_F[i],
+                        check_constant=False,
+                        clean_constant=False,
+                        is_constant_reused=False,
+                        **positive_input_kwargs(line_eval_times_eval_times_eval_times_eval, is_ev_times_ev_positive),
+                    )
+                    is_f_positive = take_modulo_F[i] or (
+                        is_ev_times_ev_positive and is_positive_output(line_eval_times_eval_times_eval_times_eval)
                     )
                     # After this, the stack is: P Q -Q (2T \pm Q) Dense([ev_(l_(2T,\pm Q))(P) * ev_(l_(T,T))(P)]^2)
                     out += pad_eval_times_eval_times_eval_times_eval_to_miller_output
+                    stack.apply(["ev_times_ev", "ev_times_ev"], [("f", N_ELEMENTS_MILLER_OUTPUT)])
+                    stack.rename("2T_pm_Q", "T")
             else:
                 # Only needed in this case, otherwise the squaring has already been computed
                 if i != len(exp_miller_loop) - 3:
                     # After this, the stack is: lambda_(2T) P Q -Q T f_i^2
                     out += miller_loop_output_square(take_modulo=False, check_constant=False, clean_constant=False)
+                    is_f_positive = is_f_positive and is_positive_output(miller_loop_output_square)
                 if exp_miller_loop[i] == 0:
                     # After this, the stack is: lambda_(2T) P Q -Q T f_i^2 ev_(l_(T,T))(P)
-                    stack_length_added = 0
-                    out += pick(
-                        position=N_ELEMENTS_MILLER_OUTPUT + N_POINTS_TWIST + stack_length_added - 1,
-                        n_elements=N_POINTS_TWIST,
-                    )  # Pick T
-                    stack_length_added += N_POINTS_TWIST
-                    out += pick(
-                        position=N_ELEMENTS_MILLER_OUTPUT
-                        + 3 * N_POINTS_TWIST
-                        + N_POINTS_CURVE
-                        + EXTENSION_DEGREE
-                        + stack_length_added
-                        - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Pick lambda_2T
-                    stack_length_added += EXTENSION_DEGREE
-                    out += roll(position=N_POINTS_TWIST + EXTENSION_DEGREE - 1, n_elements=N_POINTS_TWIST)  # Roll T
-                    out += pick(
-                        position=N_ELEMENTS_MILLER_OUTPUT
-                        + 3 * N_POINTS_TWIST
-                        + N_POINTS_CURVE
-                        + stack_length_added
-                        - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Pick P
+                    out += stack.pick("T")
+                    out += stack.pick("lambda_2T")
+                    out += stack.roll("T")
+                    out += stack.pick("P")
                     out += line_eval(
                         take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
                     )
-                    stack_length_added = N_ELEMENTS_EVALUATION_OUTPUT
+                    stack.apply(["lambda_2T", "T", "P"], [("ev_T", N_ELEMENTS_EVALUATION_OUTPUT)])
                     # After this, the stack is: lambda_(2T) P Q -Q T, altstack = [f_i^2 * ev_(l_(T,T))(P)]
                     out += miller_loop_output_times_eval(
-                        take_modulo=take_modulo_F, check_constant=False, clean_constant=False, is_constant_reused=False
+                        take_modulo=take_modulo_F[i],
+                        check_constant=False,
+                        clean_constant=False,
+                        is_constant_reused=False,
+                        **positive_input_kwargs(miller_loop_output_times_eval, is_f_positive),
                     )
-                    out += Script.parse_string(" ".join(["OP_TOALTSTACK"] * N_ELEMENTS_MILLER_OUTPUT))
-                    stack_length_added = 0
+                    is_f_positive = take_modulo_F[i] or (
+                        is_f_positive and is_positive_output(miller_loop_output_times_eval)
+                    )
+                    stack.apply(["f", "ev_T"], [("f", N_ELEMENTS_MILLER_OUTPUT)])
+                    out += stack.to_altstack("f")
                     # After this, the stack is: P Q -Q 2T, altstack = [f_i^2 * ev_(l_(T,T))(P)]
-                    out += roll(
-                        position=3 * N_POINTS_TWIST + N_POINTS_CURVE + EXTENSION_DEGREE + stack_length_added - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Roll lambda_2T
-                    stack_length_added += EXTENSION_DEGREE
-                    out += roll(position=N_POINTS_TWIST + EXTENSION_DEGREE - 1, n_elements=N_POINTS_TWIST)  # Roll T
+                    out += stack.roll("lambda_2T")
+                    out += stack.roll("T")
                     out += point_doubling_twisted_curve(
-                        take_modulo=take_modulo_T, check_constant=False, clean_constant=clean_final
+                        take_modulo=take_modulo_T[i], check_constant=False, clean_constant=clean_final
                     )
-                    stack_length_added = 0
+                    stack.apply(["lambda_2T", "T"], [("T", N_POINTS_TWIST)])
                     # After this, the stack is: P Q -Q 2T, f_i^2 * ev_(l_(T,T))(P)
-                    out += Script.parse_string(" ".join(["OP_FROMALTSTACK"] * N_ELEMENTS_MILLER_OUTPUT))
-                    stack_length_added = N_ELEMENTS_MILLER_OUTPUT
+                    out += stack.from_altstack("f")
                 else:
                     # After this, the stack is: lambda_(2T \pm Q) lambda_(2T) P Q -Q T, altstack = [f_i^2]
-                    stack_length_added = 0
-                    out += Script.parse_string(" ".join(["OP_TOALTSTACK"] * N_ELEMENTS_MILLER_OUTPUT))
+                    out += stack.to_altstack("f")
                     # After this, the stack is: lambda_(2T \pm Q) lambda_(2T) P Q -Q T 2T, altstack = [f_i^2]
-                    out += pick(
-                        position=3 * N_POINTS_TWIST + N_POINTS_CURVE + EXTENSION_DEGREE + stack_length_added - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Pick lambda_2T
-                    stack_length_added += EXTENSION_DEGREE
-                    out += pick(position=N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST)  # Pick T
-                    stack_length_added += N_POINTS_TWIST
+                    out += stack.pick("lambda_2T")
+                    out += stack.pick("T")
                     out += point_doubling_twisted_curve(
-                        take_modulo=take_modulo_T, check_constant=False, clean_constant=False
+                        take_modulo=take_modulo_T[i], check_constant=False, clean_constant=False
                     )
-                    stack_length_added = N_POINTS_TWIST
+                    stack.apply(["lambda_2T", "T"], [("2T", N_POINTS_TWIST)])
                     # After this, the stack is: lambda_(2T \pm Q) lambda_(2T) P Q -Q T 2T (2T \pm Q), altstack = [f_i^2]
-                    out += pick(
-                        position=3 * N_POINTS_TWIST + N_POINTS_CURVE + 2 * EXTENSION_DEGREE + stack_length_added - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Pick lambda_(2T pm Q)
-                    stack_length_added += EXTENSION_DEGREE
-                    out += pick(position=EXTENSION_DEGREE + N_POINTS_TWIST - 1, n_elements=N_POINTS_TWIST)  # Pick 2T
-                    stack_length_added += N_POINTS_TWIST
-                    if exp_miller_loop[i] == 1:
-                        out += pick(
-                            position=3 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST
-                        )  # Pick Q
-                    else:
-                        out += pick(
-                            position=2 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST
-                        )  # Pick -Q
+                    out += stack.pick("lambda_2T_pm_Q")
+                    out += stack.pick("2T")
+                    out += stack.pick(pm_Q)
                     out += point_addition_twisted_curve(
-                        take_modulo=take_modulo_T, check_constant=False, clean_constant=False
+                        take_modulo=take_modulo_T[i], check_constant=False, clean_constant=False
                     )
-                    stack_length_added = 2 * N_POINTS_TWIST
+                    stack.apply(["lambda_2T_pm_Q", "2T", pm_Q], [("2T_pm_Q", N_POINTS_TWIST)])
                     # After this, the stack is: lambda_(2T \pm Q) P Q -Q 2T (2T \pm Q) ev_(l_(T,T))(P),
                     # altstack = [f_i^2]
-                    out += roll(
-                        position=3 * N_POINTS_TWIST + N_POINTS_CURVE + EXTENSION_DEGREE + stack_length_added - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Roll lambda_2T
-                    stack_length_added += EXTENSION_DEGREE
-                    out += roll(position=N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST)  # Roll T
-                    stack_length_added += 0
-                    out += pick(
-                        position=3 * N_POINTS_TWIST + N_POINTS_CURVE + stack_length_added - 1, n_elements=N_POINTS_CURVE
-                    )  # Pick P
-                    stack_length_added += N_POINTS_CURVE
+                    out += stack.roll("lambda_2T")
+                    out += stack.roll("T")
+                    out += stack.pick("P")
                     out += line_eval(
                         take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
                     )
-                    stack_length_added = N_ELEMENTS_EVALUATION_OUTPUT + N_POINTS_TWIST
+                    stack.apply(["lambda_2T", "T", "P"], [("ev_T", N_ELEMENTS_EVALUATION_OUTPUT)])
                     # After this, the stack is: P Q -Q (2T \pm Q) ev_(l_(T,T))(P) ev_(l_(2T,\pm Q))(P),
                     # altstack = [f_i^2]
-                    out += roll(
-                        position=3 * N_POINTS_TWIST + N_POINTS_CURVE + EXTENSION_DEGREE + stack_length_added - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Roll lambda_(2T pm Q)
-                    stack_length_added += EXTENSION_DEGREE
-                    out += roll(position=N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST)  # Roll 2T
-                    stack_length_added += 0
-                    out += pick(
-                        position=3 * N_POINTS_TWIST + N_POINTS_CURVE + stack_length_added - 1, n_elements=N_POINTS_CURVE
-                    )  # Pick P
+                    out += stack.roll("lambda_2T_pm_Q")
+                    out += stack.roll("2T")
+                    out += stack.pick("P")
                     out += line_eval(
                         take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
                     )
-                    stack_length_added = 2 * N_ELEMENTS_EVALUATION_OUTPUT
+                    stack.apply(["lambda_2T_pm_Q", "2T", "P"], [("ev_2T_pm_Q", N_ELEMENTS_EVALUATION_OUTPUT)])
                     # After this, the stack is: P Q -Q (2T \pm Q) [ev_(l_(T,T))(P) * ev_(l_(2T,\pm Q))(P) * f_i^2]
                     out += line_eval_times_eval(take_modulo=False, check_constant=False, clean_constant=False)
-                    out += Script.parse_string(" ".join(["OP_FROMALTSTACK"] * N_ELEMENTS_MILLER_OUTPUT))
+                    stack.apply(["ev_T", "ev_2T_pm_Q"], [("ev_times_ev", N_ELEMENTS_EVALUATION_TIMES_EVALUATION)])
+                    out += stack.from_altstack("f")
+                    is_input_positive = is_f_positive and is_positive_output(line_eval_times_eval)
                     out += line_eval_times_eval_times_miller_loop_output(
-                        take_modulo=take_modulo_F,
+                        take_modulo=take_modulo_F[i],
                         check_constant=False,
                         clean_constant=clean_final,
                         is_constant_reused=False,
+                        **positive_input_kwargs(line_eval_times_eval_times_miller_loop_output, is_input_positive),
+                    )
+                    is_f_positive = take_modulo_F[i] or (
+                        is_input_positive and is_positive_output(line_eval_times_eval_times_miller_loop_output)
                     )
+                    stack.apply(["ev_times_ev", "f"], [("f", N_ELEMENTS_MILLER_OUTPUT)])
+                    stack.rename("2T_pm_Q", "T")
 
         # After this, the stack is: (t-1)Q miller(P,Q)
-        out += roll(
-            position=N_ELEMENTS_MILLER_OUTPUT + 3 * N_POINTS_TWIST + N_POINTS_CURVE - 1,
-            n_elements=2 * N_POINTS_TWIST + N_POINTS_CURVE,
-        )
-        out += Script.parse_string(" ".join(["OP_DROP"] * (2 * N_POINTS_TWIST + N_POINTS_CURVE)))
+        out += stack.drop("P", "Q", "-Q")
 
         return optimise_script(out)
 
+    def miller_loop_reduction_plan(
+        self, modulo_threshold: int, reduction_cost: str = "count"
+    ) -> tuple[list[bool], list[bool]]:
+        """Compute the iterations of miller_loop at which f and T are reduced.
+
+        The plan is computed with plan_reductions, separately for f and T. To estimate the size increases, we use:
+            - log2(f^2) <= log2(13*3) + 2*sizeF
+            - log2(f * lineEvaluation) <= log2(13*3) + sizeF + log2(q)
+            - log2(f * lineEvaluation * lineEvaluation) <= 2*log2(13*3) + sizeF + 2*log2(q)
+            - P + Q has its worst computation at lambda verification:
+            log2(lambda * (xP - xQ)) <= log2(q) + log2(2) + log2(max(xP,xQ)) (lambda is always assumed to be in Fq)
+            - P + Q has its worst coordinate at y:
+            log2(-y_P + (x_(P+Q) - x_P) * lambda) <= log2(max(2yP, 2 * lambda * x_(P+Q))
+                <= log2(max(2yP,4*x_(P+Q)))
+                <= log2(2*lambda*x_(P+Q))
+                <= log2(6) + log2(q) + log2(max(xP,xQ)),
+            where we used x_(P+Q) = lambda^2 - xP - xQ,
+            and log2(lambda^2 - xP - xQ) <= log2(3*max(xP,xQ))
+                <= log2(3) + log2(max(xP,xQ)) (lambda is always assumed to be in Fq)
+        The reduction at the i-th iteration is decided based on the size of the values after the (i-1)-th iteration.
+        At the last iteration, f and T are always reduced.
+
+        Args:
+            modulo_threshold (int): The maximum bit size of the values on the stack.
+            reduction_cost (str): The cost model of the reductions, one of REDUCTION_COSTS. With "count" (the
+                default), the plan reduces only when a value would otherwise exceed modulo_threshold.
+
+        Returns:
+            The lists take_modulo_F and take_modulo_T, such that take_modulo_F[i] (resp. take_modulo_T[i]) is True if f
+            (resp. T) is reduced at the iteration of miller_loop corresponding to exp_miller_loop[i].
+
+        """
+        if reduction_cost not in REDUCTION_COSTS:
+            msg = f"reduction_cost must be one of {REDUCTION_COSTS}, not {reduction_cost}"
+            raise ValueError(msg)
+
+        exp_miller_loop = self.exp_miller_loop
+        BIT_SIZE_Q = ceil(log2(self.MODULUS))
+        flags = {"check_constant": False, "clean_constant": False}
+
+        def growth_f(i: int) -> Callable[[float], float]:
+            if exp_miller_loop[i - 1] == 0:
+                # In this case, the next iteration will have: f <-- f^2 * lineEvaluation and T <-- 2T.
+                return lambda size: log2(13 * 3) + 2 * size + log2(13 * 3) + BIT_SIZE_Q
+            # In this case, the next iteration will have:
+            # f <-- f^2 * lineEvaluation * lineEvaluation and T <-- 2T \pm Q.
+            return lambda size: log2(13 * 3) + 2 * size + 2 * log2(13 * 3) + 2 * BIT_SIZE_Q
+
+        def growth_t(size: float) -> float:
+            return size + BIT_SIZE_Q + log2(6)
+
+        def fragment_f(i: int, take_modulo: bool) -> Script:
+            if i == len(exp_miller_loop) - 2:
+                out = self.point_doubling_twisted_curve(take_modulo=take_modulo, **flags)
+                if exp_miller_loop[i] == 0:
+                    out += self.line_eval_times_eval(take_modulo=take_modulo, is_constant_reused=False, **flags)
+                else:
+                    out += self.line_eval_times_eval_times_eval_times_eval(
+                        take_modulo=take_modulo, is_constant_reused=False, **flags
+                    )
+                return out
+            if exp_miller_loop[i] == 0:
+                return self.miller_loop_output_times_eval(take_modulo=take_modulo, is_constant_reused=False, **flags)
+            return self.line_eval_times_eval_times_miller_loop_output(
+                take_modulo=take_modulo, is_constant_reused=False, **flags
+            )
+
+        def fragment_t(i: int, take_modulo: bool) -> Script:
+            out = Script()
+            if i != len(exp_miller_loop) - 2:
+                out += self.point_doubling_twisted_curve(take_modulo=take_modulo, **flags)
+            if exp_miller_loop[i] != 0:
+                out += self.point_addition_twisted_curve(take_modulo=take_modulo, **flags)
+            return out
+
+        # The iterations at which the reductions are planned, the last one (i = 0) always reduces
+        iterations = range(len(exp_miller_loop) - 2, 0, -1)
+        plan_F = plan_reductions(
+            growth=[growth_f(i) for i in iterations],
+            modulo_threshold=modulo_threshold,
+            initial_size=BIT_SIZE_Q,
+            reset_size=BIT_SIZE_Q,
+            costs=[fragment_reduction_cost(partial(fragment_f, i), reduction_cost) for i in iterations],
+        )
+        plan_T = plan_reductions(
+            growth=[growth_t for _ in iterations],
+            modulo_threshold=modulo_threshold,
+            initial_size=BIT_SIZE_Q,
+            reset_size=BIT_SIZE_Q,
+            costs=[fragment_reduction_cost(partial(fragment_t, i), reduction_cost) for i in iterations],
+        )
+
+        take_modulo_F = [True] * (len(exp_miller_loop) - 1)
+        take_modulo_T = [True] * (len(exp_miller_loop) - 1)
+        for i, reduce_F, reduce_T in zip(iterations, plan_F, plan_T, strict=True):
+            take_modulo_F[i] = reduce_F
+            take_modulo_T[i] = reduce_T
+
+        return take_modulo_F, take_modulo_T
+
+    def miller_loop_lines(self, point_q: list[int]) -> list[list[tuple[list[int], list[int]]]]:
+        """Compute the lines of the Miller loop of a fixed point Q.
+
+        The lines depend only on Q, so if Q is known when the locking script is generated, they can be precomputed and
+        hard-coded in the script (see line_eval_fixed_q), instead of being computed from the gradients supplied in the
+        unlocking script.
+
+        Args:
+            point_q (list[int]): The point Q on the twisted curve, as a list of integers. Q must not be the point at
+                infinity.
+
+        Returns:
+            The list lines, such that lines[k][0] = (lambda_(2T), T) is the line tangent at T and, if the k-th iteration
+            of the Miller loop requires an addition, lines[k][1] = (lambda_(2T pm Q), pm Q) is the line through 2T and
+            pm Q. The lines are listed in the same order as the gradients lambdas_q_exp_miller_loop in
+            miller_loop_input_data, i.e., lines[k][j][0] == lambdas_q_exp_miller_loop[k][j].
+
+        """
+        q = self.MODULUS
+        non_residue = self.NON_RESIDUE_FQ
+        exp_miller_loop = self.exp_miller_loop
+
+        def mul(x: list[int], y: list[int]) -> list[int]:
+            return [(x[0] * y[0] + non_residue * x[1] * y[1]) % q, (x[0] * y[1] + x[1] * y[0]) % q]
+
+        def inverse(x: list[int]) -> list[int]:
+            norm_inverse = pow(x[0] * x[0] - non_residue * x[1] * x[1], -1, q)
+            return [x[0] * norm_inverse % q, -x[1] * norm_inverse % q]
+
+        def add(x: list[int], y: list[int]) -> list[int]:
+            return [(x[0] + y[0]) % q, (x[1] + y[1]) % q]
+
+        def sub(x: list[int], y: list[int]) -> list[int]:
+            return [(x[0] - y[0]) % q, (x[1] - y[1]) % q]
+
+        def line_and_sum(gradient: list[int], x_t: list[int], y_t: list[int], x_s: list[int]) -> list[int]:
+            # The point T + S, where S = (x_s, y_s) is on the line through T with gradient `gradient`
+            x = sub(sub(mul(gradient, gradient), x_t), x_s)
+            return [*x, *sub(mul(gradient, sub(x_t, x)), y_t)]
+
+        point_q = [el % q for el in point_q]
+        minus_q = [*point_q[:2], -point_q[2] % q, -point_q[3] % q]
+        t = point_q if exp_miller_loop[-1] == 1 else minus_q
+
+        lines = []
+        for i in range(len(exp_miller_loop) - 2, -1, -1):
+            x_t, y_t = t[:2], t[2:]
+            # Gradient of the line tangent at T: (3 * x_T^2 + a) / (2 * y_T)
+            x_t_squared = mul(x_t, x_t)
+            gradient = mul(add(add(add(x_t_squared, x_t_squared), x_t_squared), self.TWISTED_A), inverse(add(y_t, y_t)))
+            iteration_lines = [(gradient, t)]
+            t = line_and_sum(gradient, x_t, y_t, x_t)
+            if exp_miller_loop[i] != 0:
+                pm_q = point_q if exp_miller_loop[i] == 1 else minus_q
+                # Gradient of the line through 2T and pm Q: (y_(pm Q) - y_(2T)) / (x_(pm Q) - x_(2T))
+                gradient = mul(sub(pm_q[2:], t[2:]), inverse(sub(pm_q[:2], t[:2])))
+                iteration_lines.append((gradient, pm_q))
+                t = line_and_sum(gradient, t[:2], t[2:], pm_q[:2])
+            lines.append(iteration_lines)
+
+        return lines
+
     def miller_loop_input_data(
         self, point_p: list[int], point_q: list[int], lambdas_q_exp_miller_loop: list[list[list[int]]]
     ) -> Script:
@@ -423,12 +462,13 @@ class MillerLoop:
         Take q, exp_miller_loop, P and Q, lambdas_Q as input.
         lambdas_Q are the lambdas needed to compute the multiplication (t-1)Q. See unrolled_multiplication_input.
         """
-        out = nums_to_script([self.MODULUS])
+        out = ScriptBuilder()
+        out.append_nums([self.MODULUS])
         for i in range(len(lambdas_q_exp_miller_loop) - 1, -1, -1):
             for j in range(len(lambdas_q_exp_miller_loop[i]) - 1, -1, -1):
-                out += nums_to_script(lambdas_q_exp_miller_loop[i][j])
+                out.append_nums(lambdas_q_exp_miller_loop[i][j])
 
-        out += nums_to_script(point_p)
-        out += nums_to_script(point_q)
+        out.append_nums(point_p)
+        out.append_nums(point_q)
 
-        return out
+        return out.to_script()
@@ -1,9 +1,10 @@
 from src.zkscript.bilinear_pairings.model.miller_loop import MillerLoop
+from src.zkscript.bilinear_pairings.model.multi_miller_loop import MultiMillerLoop
 from src.zkscript.bilinear_pairings.model.pairing import Pairing
 from src.zkscript.bilinear_pairings.model.triple_miller_loop import TripleMillerLoop
 
 
-class PairingModel(MillerLoop, TripleMillerLoop, Pairing):
+class PairingModel(MillerLoop, TripleMillerLoop, MultiMillerLoop, Pairing):
     def __init__(
         self,
         q,
@@ -18,6 +19,7 @@ class PairingModel(MillerLoop, TripleMillerLoop, Pairing):
         point_addition_twisted_curve,
         point_negation_twisted_curve,
         line_eval,
+        line_eval_fixed_q,
         line_eval_times_eval,
         line_eval_times_eval_times_eval,
         line_eval_times_eval_times_eval_times_eval,
@@ -33,6 +35,10 @@ class PairingModel(MillerLoop, TripleMillerLoop, Pairing):
         cyclotomic_inverse,
         easy_exponentiation_with_inverse_check,
         hard_exponentiation,
+        residue_witness_check,
+        n_elements_scaling_factor,
+        twisted_a,
+        non_residue_fq,
     ):
         # Characteristic of the field over which the pairing is defined
         self.MODULUS = q
@@ -58,6 +64,8 @@ class PairingModel(MillerLoop, TripleMillerLoop, Pairing):
         self.point_negation_twisted_curve = point_negation_twisted_curve
         # Script for line evaluation
         self.line_eval = line_eval
+        # Script for line evaluation, where the line is hard-coded in the script (see line_evaluation_fixed_q)
+        self.line_eval_fixed_q = line_eval_fixed_q
         # Script for product of two line evaluations
         self.line_eval_times_eval = line_eval_times_eval
         # Script for product of three line evaluations, assuming the first product has been calculated: the script
@@ -100,3 +108,11 @@ class PairingModel(MillerLoop, TripleMillerLoop, Pairing):
         self.easy_exponentiation_with_inverse_check = easy_exponentiation_with_inverse_check
         # Script to compute hard exponentation
         self.hard_exponentiation = hard_exponentiation
+        # Script to check the output of the Miller loop against a residue witness, replacing the final exponentiation
+        self.residue_witness_check = residue_witness_check
+        # Number of integers needed to write the scaling factor of the residue witness check (0 if it is not needed)
+        self.N_ELEMENTS_SCALING_FACTOR = n_elements_scaling_factor
+        # A coefficient of the twisted curve, as a list of integers
+        self.TWISTED_A = twisted_a
+        # Non-residue defining F_q^2 = F_q[u] / (u^2 - NON_RESIDUE_FQ), used to precompute the lines of fixed points
+        self.NON_RESIDUE_FQ = non_residue_fq
@@ -0,0 +1,421 @@
+from collections.abc import Callable
+from functools import partial
+
+# Math
+from math import ceil, log2
+
+from tx_engine import Script
+from tx_engine.engine.op_codes import (
+    OP_1SUB,
+    OP_DEPTH,
+    OP_EQUALVERIFY,
+    OP_PICK,
+)
+
+from src.zkscript.util.reduction_planner import REDUCTION_COSTS, fragment_reduction_cost, plan_reductions
+from src.zkscript.util.script_builder import ScriptBuilder
+from src.zkscript.util.stack_tracker import StackTracker
+from src.zkscript.util.utility_functions import optimise_script
+from src.zkscript.util.utility_scripts import nums_to_script
+
+
+class MultiMillerLoop:
+    def multi_miller_loop(
+        self,
+        n_pairs: int,
+        modulo_threshold: int,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        reduction_cost: str = "count",
+        residue_witness: bool = False,
+    ) -> Script:
+        """Evaluate the product of n_pairs miller loops.
+
+        Input parameters:
+            - Stack: q .. lambdas P1 .. Pn Q1 .. Qn
+            - Altstack: []
+        Output:
+            - miller(P1,Q1) * .. * miller(Pn,Qn)
+        Assumption on data:
+            - Pi are passed as couples of integers (minimally encoded, in little endian)
+            - Qi are passed as couples of elements in Fq2 (see Fq2.py)
+            - lambdas are the gradients needed to compute (t-1)Qi, interleaved as in multi_miller_loop_input
+            - miller(P1,Q1) * .. * miller(Pn,Qn) is in Fq4
+
+        The n_pairs Miller loops share the accumulator f, so that f is squared only once per iteration. At every
+        iteration, the line evaluations t_1, .., t_m (m = n_pairs if exp_miller_loop[i] == 0, else m = 2 * n_pairs) are
+        multiplied together before being multiplied with f:
+            - if m is odd, t_1 is computed first and left on the stack
+            - the remaining line evaluations are computed two at a time, and each couple is immediately multiplied
+            together (see line_eval_times_eval), so that the stack holds at most m/2 products of two line evaluations
+            - the products of two line evaluations are multiplied together starting from the top of the stack, and
+            the result is finally multiplied with t_1 (if m is odd)
+        The cheapest available multiplication is used at every step (sparse, somewhat sparse or dense). At the first
+        iteration, f is not there, so that if the product of the line evaluations is not dense, f is set to its square
+        and the squaring at the following iteration is skipped (as in miller_loop).
+
+        The iterations at which f and the Ti's are reduced are computed by multi_miller_loop_reduction_plan.
+
+        If residue_witness is True, the multiplications by a residue witness c are folded into the loop (see
+        multi_pairing_with_residue_witness):
+            - Stack: q .. [c] c^-1 lambdas P1 .. Pn Q1 .. Qn
+            - Output: [c] c^-1 miller(P1,Q1) * .. * miller(Pn,Qn) * c^m
+        where m = sum_i exp_miller_loop[i] * 2^i, and c (in the same representation as the Miller output) is only
+        present if exp_miller_loop contains a 1. The accumulator f is initialised to c^(exp_miller_loop[-1]), and is
+        multiplied by c or c^-1 after the squaring at every iteration at which exp_miller_loop[i] is 1 or -1.
+        """
+        if n_pairs < 1:
+            msg = f"The number of pairs must be positive, not {n_pairs}."
+            raise ValueError(msg)
+
+        q = self.MODULUS
+        exp_miller_loop = self.exp_miller_loop
+        point_doubling_twisted_curve = self.point_doubling_twisted_curve
+        point_addition_twisted_curve = self.point_addition_twisted_curve
+        point_negation_twisted_curve = self.point_negation_twisted_curve
+        line_eval = self.line_eval
+        line_eval_times_eval = self.line_eval_times_eval
+        line_eval_times_eval_times_eval = self.line_eval_times_eval_times_eval
+        line_eval_times_eval_times_eval_times_eval = self.line_eval_times_eval_times_eval_times_eval
+        line_eval_times_eval_times_miller_loop_output = self.line_eval_times_eval_times_miller_loop_output
+        miller_loop_output_square = self.miller_loop_output_square
+        miller_loop_output_mul = self.miller_loop_output_mul
+        miller_loop_output_times_eval = self.miller_loop_output_times_eval
+        pad_eval_times_eval_to_miller_output = self.pad_eval_times_eval_to_miller_output
+        pad_eval_times_eval_times_eval_times_eval_to_miller_output = (
+            self.pad_eval_times_eval_times_eval_times_eval_to_miller_output
+        )
+
+        EXTENSION_DEGREE = self.EXTENSION_DEGREE
+        N_POINTS_CURVE = self.N_POINTS_CURVE
+        N_POINTS_TWIST = self.N_POINTS_TWIST
+        N_ELEMENTS_MILLER_OUTPUT = self.N_ELEMENTS_MILLER_OUTPUT
+        N_ELEMENTS_EVALUATION_OUTPUT = self.N_ELEMENTS_EVALUATION_OUTPUT
+        N_ELEMENTS_EVALUATION_TIMES_EVALUATION = self.N_ELEMENTS_EVALUATION_TIMES_EVALUATION
+
+        # The kind of the values in the product of the line evaluations: sparse (a line evaluation), somewhat sparse
+        # (the product of two line evaluations) or dense
+        SPARSE, SOMEWHAT_SPARSE, DENSE = "sparse", "somewhat_sparse", "dense"
+
+        pairs = range(1, n_pairs + 1)
+
+        def eval_line(gradient: str, point_q: str, point_p: str, name: str) -> Script:
+            out = stack.pick(gradient)
+            out += stack.pick(point_q)
+            out += stack.pick(point_p)
+            out += line_eval(take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False)
+            stack.apply([gradient, point_q, point_p], [(name, N_ELEMENTS_EVALUATION_OUTPUT)])
+            return out
+
+        def eval_lines(lines: list[tuple[str, str, str]]) -> tuple[Script, str]:
+            """Compute the product of the evaluations of `lines`, and return the script and the kind of the product."""
+            out = Script()
+            products = []
+            if len(lines) % 2 == 1:
+                out += eval_line(*lines[0], name="t_1")
+                products.append(SPARSE)
+                lines = lines[1:]
+            for j in range(0, len(lines), 2):
+                out += eval_line(*lines[j], name="t")
+                out += eval_line(*lines[j + 1], name="t")
+                out += line_eval_times_eval(take_modulo=False, check_constant=False, clean_constant=False)
+                stack.apply(["t", "t"], [("t", N_ELEMENTS_EVALUATION_TIMES_EVALUATION)])
+                products.append(SOMEWHAT_SPARSE)
+            # Multiply the products of two line evaluations, starting from the top of the stack
+            while len(products) > 1 and products[-2] == SOMEWHAT_SPARSE:
+                if products[-1] == SOMEWHAT_SPARSE:
+                    out += line_eval_times_eval_times_eval_times_eval(
+                        take_modulo=False, check_constant=False, clean_constant=False
+                    )
+                    out += pad_eval_times_eval_times_eval_times_eval_to_miller_output
+                else:
+                    out += line_eval_times_eval_times_miller_loop_output(
+                        take_modulo=False, check_constant=False, clean_constant=False
+                    )
+                stack.apply(["t", "t"], [("t", N_ELEMENTS_MILLER_OUTPUT)])
+                products[-2:] = [DENSE]
+            # Multiply by t_1
+            if len(products) > 1:
+                if products[-1] == SOMEWHAT_SPARSE:
+                    out += line_eval_times_eval_times_eval(
+                        take_modulo=False, check_constant=False, clean_constant=False
+                    )
+                    stack.apply(["t_1", "t"], [("t", N_ELEMENTS_MILLER_OUTPUT)])
+                else:
+                    out += stack.roll("t_1")
+                    out += miller_loop_output_times_eval(
+                        take_modulo=False, check_constant=False, clean_constant=False, is_constant_reused=False
+                    )
+                    stack.apply(["t", "t_1"], [("t", N_ELEMENTS_MILLER_OUTPUT)])
+                products = [DENSE]
+            elif products == [SPARSE]:
+                stack.rename("t_1", "t")
+            return out, products[0]
+
+        out = ScriptBuilder()
+        if check_constant:
+            out += Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([q]) + Script([OP_EQUALVERIFY])
+
+        # The slots accessed by the loop, from the bottom: the gradients (see multi_miller_loop_input), the Pi's and
+        # the Qi's
+        slots = []
+        if residue_witness:
+            if 1 in exp_miller_loop:
+                slots.append(("c", N_ELEMENTS_MILLER_OUTPUT))
+            slots.append(("c^-1", N_ELEMENTS_MILLER_OUTPUT))
+        for i in range(len(exp_miller_loop) - 1):
+            if exp_miller_loop[i] != 0:
+                slots += [(f"lambda_2T{k}_pm_Q{k}", EXTENSION_DEGREE) for k in pairs]
+            slots += [(f"lambda_2T{k}", EXTENSION_DEGREE) for k in pairs]
+        slots += [(f"P{k}", N_POINTS_CURVE) for k in pairs]
+        slots += [(f"Q{k}", N_POINTS_TWIST) for k in pairs]
+        stack = StackTracker(slots)
+
+        # After this, the stack is: P1 .. Pn Q1 .. Qn -Q1 .. -Qn T1 .. Tn
+        for k in pairs:
+            out += stack.pick(f"Q{k}")
+            out += point_negation_twisted_curve(take_modulo=False, check_constant=False, clean_constant=False)
+            stack.apply([f"Q{k}"], [(f"-Q{k}", N_POINTS_TWIST)])
+        if exp_miller_loop[-1] not in {1, -1}:
+            msg = "Last element of exp_miller_loop must be non-zero."
+            raise ValueError(msg)
+        for k in pairs:
+            initial_point = f"Q{k}" if exp_miller_loop[-1] == 1 else f"-Q{k}"
+            out += stack.pick(initial_point)
+            stack.rename(initial_point, f"T{k}")
+        # The power of the residue witness by which f is multiplied when exp_miller_loop[i] is 1 or -1
+        residue_witness_power = {1: "c", -1: "c^-1"}
+        if residue_witness:
+            out += stack.pick(residue_witness_power[exp_miller_loop[-1]])
+            stack.rename(residue_witness_power[exp_miller_loop[-1]], "f")
+
+        take_modulo_F, take_modulo_T = self.multi_miller_loop_reduction_plan(
+            n_pairs=n_pairs,
+            modulo_threshold=modulo_threshold,
+            reduction_cost=reduction_cost,
+            residue_witness=residue_witness,
+        )
+
+        clean_final = False
+        skip_square = False
+        # After this, the stack is: P1 .. Pn Q1 .. Qn -Q1 .. -Qn uQ1 .. uQn [miller(P1,Q1) * .. * miller(Pn,Qn)]
+        for i in range(len(exp_miller_loop) - 2, -1, -1):
+            if i == 0:
+                clean_final = clean_constant
+            # With the residue witness, f is already there at the first iteration
+            is_first_iteration = i == len(exp_miller_loop) - 2 and not residue_witness
+            pm_Q = "Q" if exp_miller_loop[i] == 1 else "-Q"
+
+            if not is_first_iteration and not skip_square:
+                # After this, the stack is: .. T1 .. Tn f_i^2
+                out += miller_loop_output_square(take_modulo=False, check_constant=False, clean_constant=False)
+            skip_square = False
+
+            if residue_witness and exp_miller_loop[i] != 0:
+                # After this, the stack is: .. T1 .. Tn f_i^2 * c^(exp_miller_loop[i])
+                out += stack.pick(residue_witness_power[exp_miller_loop[i]])
+                out += miller_loop_output_mul(
+                    take_modulo=False, check_constant=False, clean_constant=False, is_constant_reused=False
+                )
+                stack.apply(["f", residue_witness_power[exp_miller_loop[i]]], [("f", N_ELEMENTS_MILLER_OUTPUT)])
+
+            # After this, the stack is: .. T1 .. Tn [f_i^2] t, where t is the product of the line evaluations
+            lines = [(f"lambda_2T{k}", f"T{k}", f"P{k}") for k in pairs]
+            if exp_miller_loop[i] != 0:
+                lines += [(f"lambda_2T{k}_pm_Q{k}", f"{pm_Q}{k}", f"P{k}") for k in pairs]
+            evaluation, kind = eval_lines(lines)
+            out += evaluation
+
+            # After this, the stack is: .. T1 .. Tn f_(i+1)
+            if is_first_iteration:
+                if kind == SPARSE:
+                    out += stack.pick("t")
+                    out += line_eval_times_eval(
+                        take_modulo=take_modulo_F[i],
+                        check_constant=False,
+                        clean_constant=False,
+                        is_constant_reused=False,
+                    )
+                    out += pad_eval_times_eval_to_miller_output
+                    skip_square = True
+                elif kind == SOMEWHAT_SPARSE:
+                    out += stack.pick("t")
+                    out += line_eval_times_eval_times_eval_times_eval(
+                        take_modulo=take_modulo_F[i],
+                        check_constant=False,
+                        clean_constant=False,
+                        is_constant_reused=False,
+                    )
+                    out += pad_eval_times_eval_times_eval_times_eval_to_miller_output
+                    skip_square = True
+                if skip_square:
+                    stack.apply(["t", "t"], [("t", N_ELEMENTS_MILLER_OUTPUT)])
+            elif kind == SPARSE:
+                out += miller_loop_output_times_eval(
+                    take_modulo=take_modulo_F[i],
+                    check_constant=False,
+                    clean_constant=False,
+                    is_constant_reused=False,
+                )
+                stack.apply(["f", "t"], [("t", N_ELEMENTS_MILLER_OUTPUT)])
+            elif kind == SOMEWHAT_SPARSE:
+                out += stack.roll("f")
+                out += line_eval_times_eval_times_miller_loop_output(
+                    take_modulo=take_modulo_F[i],
+                    check_constant=False,
+                    clean_constant=False,
+                    is_constant_reused=False,
+                )
+                stack.apply(["t", "f"], [("t", N_ELEMENTS_MILLER_OUTPUT)])
+            else:
+                out += miller_loop_output_mul(
+                    take_modulo=take_modulo_F[i],
+                    check_constant=False,
+                    clean_constant=False,
+                    is_constant_reused=False,
+                )
+                stack.apply(["f", "t"], [("t", N_ELEMENTS_MILLER_OUTPUT)])
+            stack.rename("t", "f")
+
+            # After this, the stack is: .. P1 .. Pn Q1 .. Qn -Q1 .. -Qn (2*T1 [pm Q1]) .. (2*Tn [pm Qn]),
+            # altstack = [f_(i+1)]
+            out += stack.to_altstack("f")
+            for k in pairs:
+                is_last_operation = k == n_pairs and exp_miller_loop[i] == 0
+                out += stack.roll(f"lambda_2T{k}")
+                out += stack.roll(f"T{k}")
+                out += point_doubling_twisted_curve(
+                    take_modulo=take_modulo_T[i],
+                    check_constant=False,
+                    clean_constant=clean_final and is_last_operation,
+                )
+                stack.apply([f"lambda_2T{k}", f"T{k}"], [(f"T{k}", N_POINTS_TWIST)])
+                if exp_miller_loop[i] != 0:
+                    is_last_operation = k == n_pairs
+                    out += stack.roll(f"lambda_2T{k}_pm_Q{k}")
+                    out += stack.roll(f"T{k}")
+                    out += stack.pick(f"{pm_Q}{k}")
+                    out += point_addition_twisted_curve(
+                        take_modulo=take_modulo_T[i],
+                        check_constant=False,
+                        clean_constant=clean_final and is_last_operation,
+                    )
+                    stack.apply([f"lambda_2T{k}_pm_Q{k}", f"T{k}", f"{pm_Q}{k}"], [(f"T{k}", N_POINTS_TWIST)])
+            # After this, the stack is: .. P1 .. Pn Q1 .. Qn -Q1 .. -Qn T1 .. Tn f_(i+1)
+            out += stack.from_altstack("f")
+
+        # After this, the stack is: [c c^-1] [miller(P1,Q1) * .. * miller(Pn,Qn) [* c^m]]
+        out += stack.drop(
+            *[f"P{k}" for k in pairs],
+            *[f"Q{k}" for k in pairs],
+            *[f"-Q{k}" for k in pairs],
+            *[f"T{k}" for k in pairs],
+        )
+
+        return optimise_script(out)
+
+    def multi_miller_loop_reduction_plan(
+        self, n_pairs: int, modulo_threshold: int, reduction_cost: str = "count", residue_witness: bool = False
+    ) -> tuple[list[bool], list[bool]]:
+        """Compute the iterations of multi_miller_loop at which f and the Ti's are reduced.
+
+        The plan is computed as in triple_miller_loop_reduction_plan, the only difference being that the update of f
+        is of the form: f <-- f^2 * Dense, where Dense is the product of n_pairs (if exp_miller_loop[i] == 0) or
+        2 * n_pairs line evaluations. At the last iteration, f and the Ti's are always reduced. If residue_witness is
+        True, Dense also contains c or c^-1 at the iterations at which exp_miller_loop[i] != 0.
+
+        Args:
+            n_pairs (int): The number of pairs in the Miller loop.
+            modulo_threshold (int): The maximum bit size of the values on the stack.
+            reduction_cost (str): The cost model of the reductions, one of REDUCTION_COSTS. With "count" (the
+                default), the plan reduces only when a value would otherwise exceed modulo_threshold.
+            residue_witness (bool): Whether the multiplications by the residue witness are folded into the loop.
+
+        Returns:
+            The lists take_modulo_F and take_modulo_T, such that take_modulo_F[i] (resp. take_modulo_T[i]) is True if f
+            (resp. the Ti's) is reduced at the iteration of multi_miller_loop corresponding to exp_miller_loop[i].
+
+        """
+        if reduction_cost not in REDUCTION_COSTS:
+            msg = f"reduction_cost must be one of {REDUCTION_COSTS}, not {reduction_cost}"
+            raise ValueError(msg)
+
+        exp_miller_loop = self.exp_miller_loop
+        BIT_SIZE_Q = ceil(log2(self.MODULUS))
+        flags = {"check_constant": False, "clean_constant": False}
+
+        def growth_f(i: int) -> Callable[[float], float]:
+            # Next iteration will have: f <-- f^2 * Dense and T_i <-- 2T_i or T_i <-- 2T_i pm Q_i.
+            multiplier = n_pairs if exp_miller_loop[i] == 0 else 2 * n_pairs + residue_witness
+            return lambda size: multiplier * log2(13 * 3) + multiplier * BIT_SIZE_Q + (ceil(log2(13 * 3)) + 2 * size)
+
+        def growth_t(size: float) -> float:
+            return size + BIT_SIZE_Q + log2(6)
+
+        def fragment_f(i: int, take_modulo: bool) -> Script:
+            if i == len(exp_miller_loop) - 2 and not residue_witness:
+                return Script()
+            return self.miller_loop_output_mul(take_modulo=take_modulo, is_constant_reused=False, **flags)
+
+        def fragment_t(i: int, take_modulo: bool) -> Script:
+            out = Script()
+            for _ in range(n_pairs):
+                out += self.point_doubling_twisted_curve(take_modulo=take_modulo, **flags)
+                if exp_miller_loop[i] != 0:
+                    out += self.point_addition_twisted_curve(take_modulo=take_modulo, **flags)
+            return out
+
+        # The iterations at which the reductions are planned, the last one (i = 0) always reduces
+        iterations = range(len(exp_miller_loop) - 2, 0, -1)
+        plan_F = plan_reductions(
+            growth=[growth_f(i) for i in iterations],
+            modulo_threshold=modulo_threshold,
+            initial_size=BIT_SIZE_Q,
+            reset_size=BIT_SIZE_Q,
+            costs=[fragment_reduction_cost(partial(fragment_f, i), reduction_cost) for i in iterations],
+        )
+        plan_T = plan_reductions(
+            growth=[growth_t for _ in iterations],
+            modulo_threshold=modulo_threshold,
+            initial_size=BIT_SIZE_Q,
+            reset_size=BIT_SIZE_Q,
+            costs=[fragment_reduction_cost(partial(fragment_t, i), reduction_cost) for i in iterations],
+        )
+
+        take_modulo_F = [True] * (len(exp_miller_loop) - 1)
+        take_modulo_T = [True] * (len(exp_miller_loop) - 1)
+        for i, reduce_F, reduce_T in zip(iterations, plan_F, plan_T, strict=True):
+            take_modulo_F[i] = reduce_F
+            take_modulo_T[i] = reduce_T
+
+        return take_modulo_F, take_modulo_T
+
+    def multi_miller_loop_input(
+        self,
+        points_p: list[list[int]],
+        points_q: list[list[int]],
+        lambdas_exp_miller_loop: list[list[list[list[int]]]],
+    ) -> Script:
+        """Return the script needed to execute the multi_miller_loop function above.
+
+        Take the Pi's, the Qi's, and the lamdbas for computing (t-1)Qi as input: lambdas_exp_miller_loop[k] are the
+        gradients for points_q[k]. The gradients of the pairs are interleaved as in triple_miller_loop_input.
+        """
+        if not len(points_p) == len(points_q) == len(lambdas_exp_miller_loop):
+            msg = "The number of Pi's, Qi's and lambdas must be the same."
+            raise ValueError(msg)
+
+        out = ScriptBuilder()
+        out.append_nums([self.MODULUS])
+        # Load lambdas
+        for i in range(len(lambdas_exp_miller_loop[0]) - 1, -1, -1):
+            for j in range(len(lambdas_exp_miller_loop[0][i]) - 1, -1, -1):
+                for lambdas in lambdas_exp_miller_loop:
+                    out.append_nums(lambdas[i][j])
+
+        for point_p in points_p:
+            out.append_nums(point_p)
+        for point_q in points_q:
+            out.append_nums(point_q)
+
+        return out.to_script()
@@ -1,13 +1,33 @@
 # from src.tx_engine.engine.script import Script
 from tx_engine import Script
-
+from tx_engine.engine.op_codes import (
+    OP_0,
+    OP_1,
+    OP_1SUB,
+    OP_2DROP,
+    OP_CAT,
+    OP_DEPTH,
+    OP_DROP,
+    OP_ELSE,
+    OP_ENDIF,
+    OP_EQUALVERIFY,
+    OP_IF,
+    OP_PICK,
+    OP_ROLL,
+)
+
+from src.zkscript.util.script_builder import ScriptBuilder
 from src.zkscript.util.utility_functions import optimise_script
 from src.zkscript.util.utility_scripts import nums_to_script, pick, roll
 
 
 class Pairing:
     def single_pairing(
-        self, modulo_threshold: int, check_constant: bool | None = None, clean_constant: bool | None = None
+        self,
+        modulo_threshold: int,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        reduction_cost: str = "count",
     ) -> Script:
         """Pairing computation.
 
@@ -24,6 +44,8 @@ class Pairing:
             (NOT OP_0, data payloads of 0x00)
             - If Q is the point at infinity, then it is encoded as 0x00 * N_POINTS_TWIST
             (NOT OP_0, data payloads of 0x00)
+
+        The reductions in the Miller loop are planned with the cost model reduction_cost (see miller_loop).
         """
         q = self.MODULUS
 
@@ -35,37 +57,38 @@ class Pairing:
         N_ELEMENTS_MILLER_OUTPUT = self.N_ELEMENTS_MILLER_OUTPUT
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([q])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([q]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         # Check if Q is point at infinity, in this case, return identity
         out += pick(position=N_POINTS_TWIST - 1, n_elements=N_POINTS_TWIST)
         for _ in range(N_POINTS_TWIST - 1):
-            out += Script.parse_string("OP_CAT")
+            out += Script([OP_CAT])
         out += Script.parse_string("0x" + "00" * N_POINTS_TWIST + " OP_EQUAL OP_NOT")
-        out += Script.parse_string("OP_IF")
+        out += Script([OP_IF])
 
         # Otherwise, check if P is point at infinity, in this case, return identity
         out += pick(position=N_POINTS_TWIST + N_POINTS_CURVE - 1, n_elements=N_POINTS_CURVE)  # Pick P
         for _ in range(N_POINTS_CURVE - 1):
-            out += Script.parse_string("OP_CAT")
+            out += Script([OP_CAT])
         out += Script.parse_string("0x" + "00" * N_POINTS_CURVE + " OP_EQUAL OP_NOT")
-        out += Script.parse_string("OP_IF")
+        out += Script([OP_IF])
 
         # Execute pairing computation ----------------------------------------------------------------------------------
 
         # After this, the stack is: miller(P,Q)^-1 (t-1)Q miller(P,Q)
-        out += self.miller_loop(modulo_threshold=modulo_threshold, check_constant=False, clean_constant=False)
+        out += self.miller_loop(
+            modulo_threshold=modulo_threshold,
+            check_constant=False,
+            clean_constant=False,
+            reduction_cost=reduction_cost,
+        )
 
         # This is where one would perform subgroup membership checks if they were needed
         # For Groth16, they are not, so we simply drop uQ
         out += roll(position=N_ELEMENTS_MILLER_OUTPUT + N_POINTS_TWIST - 1, n_elements=N_POINTS_TWIST)
-        out += Script.parse_string(" ".join(["OP_DROP"] * N_POINTS_TWIST))
+        out += Script([OP_DROP] * N_POINTS_TWIST)
 
         out += easy_exponentiation_with_inverse_check(take_modulo=True, check_constant=False, clean_constant=False)
         out += hard_exponentiation(
@@ -75,27 +98,33 @@ class Pairing:
         # --------------------------------------------------------------------------------------------------------------
 
         # Come here if P is point at infinity
-        out += Script.parse_string("OP_ELSE")
+        out += Script([OP_ELSE])
         for _ in range((N_POINTS_TWIST + N_POINTS_CURVE) // 2):
-            out += Script.parse_string("OP_2DROP")
-        out += Script.parse_string("OP_1") + Script.parse_string(" ".join(["OP_0"] * (N_ELEMENTS_MILLER_OUTPUT - 1)))
+            out += Script([OP_2DROP])
+        out += Script([OP_1]) + Script([OP_0] * (N_ELEMENTS_MILLER_OUTPUT - 1))
         if clean_constant:
-            out += Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL OP_DROP")
-        out += Script.parse_string("OP_ENDIF")
+            out += Script([OP_DEPTH, OP_1SUB, OP_ROLL, OP_DROP])
+        out += Script([OP_ENDIF])
 
         # Come here if Q is point at infinity
-        out += Script.parse_string("OP_ELSE")
+        out += Script([OP_ELSE])
         for _ in range((N_POINTS_TWIST + N_POINTS_CURVE) // 2):
-            out += Script.parse_string("OP_2DROP")
-        out += Script.parse_string("OP_1") + Script.parse_string(" ".join(["OP_0"] * (N_ELEMENTS_MILLER_OUTPUT - 1)))
+            out += Script([OP_2DROP])
+        out += Script([OP_1]) + Script([OP_0] * (N_ELEMENTS_MILLER_OUTPUT - 1))
         if clean_constant:
-            out += Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL OP_DROP")
-        out += Script.parse_string("OP_ENDIF")
+            out += Script([OP_DEPTH, OP_1SUB, OP_ROLL, OP_DROP])
+        out += Script([OP_ENDIF])
 
         return optimise_script(out)
 
     def triple_pairing(
-        self, modulo_threshold: int, check_constant: bool | None = None, clean_constant: bool | None = None
+        self,
+        modulo_threshold: int,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        reduction_cost: str = "count",
+        point_q2: list[int] | None = None,
+        point_q3: list[int] | None = None,
     ) -> Script:
         """Pairing computation.
 
@@ -112,6 +141,13 @@ class Pairing:
             - Qi are points on E'(F_q)
             - [miller(P1,Q1) * miller(P2,Q2) * miller(P3,Q3)] is the product of the outputs of the miller loops computed
             on Pi,Qi
+
+        The reductions in the Miller loop are planned with the cost model reduction_cost (see triple_miller_loop).
+
+        If point_q2 and point_q3 are given, Q2 and Q3 are hard-coded in the script and the Miller loop is computed
+        with triple_miller_loop_with_fixed_qs. In this case, the stack is:
+            [miller(P1,Q1) * miller(P2,Q2) * miller(P3,Q3)]^-1 lambdas P1 P2 P3 Q1
+        where lambdas are the gradients needed to compute (t-1)Q1 only.
         """
         q = self.MODULUS
 
@@ -119,18 +155,83 @@ class Pairing:
         hard_exponentiation = self.hard_exponentiation
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([q])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([q]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         # After this, the stack is:
         # quadratic([miller(P1,Q1) * miller(P2,Q2) * miller(P3,Q3)])^-1
         # quadratic([miller(P1,Q1) * miller(P2,Q2) * miller(P3,Q3)])
-        out += self.triple_miller_loop(modulo_threshold=modulo_threshold, check_constant=False, clean_constant=False)
+        if point_q2 is not None and point_q3 is not None:
+            out += self.triple_miller_loop_with_fixed_qs(
+                modulo_threshold=modulo_threshold,
+                point_q2=point_q2,
+                point_q3=point_q3,
+                check_constant=False,
+                clean_constant=False,
+                reduction_cost=reduction_cost,
+            )
+        else:
+            out += self.triple_miller_loop(
+                modulo_threshold=modulo_threshold,
+                check_constant=False,
+                clean_constant=False,
+                reduction_cost=reduction_cost,
+            )
+
+        out += easy_exponentiation_with_inverse_check(take_modulo=True, check_constant=False, clean_constant=False)
+        out += hard_exponentiation(
+            take_modulo=True, modulo_threshold=modulo_threshold, check_constant=False, clean_constant=clean_constant
+        )
+
+        return optimise_script(out)
+
+    def multi_pairing(
+        self,
+        n_pairs: int,
+        modulo_threshold: int,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        reduction_cost: str = "count",
+    ) -> Script:
+        """Pairing computation.
+
+        NOTE: At the moment, this function does not handle the case where one of the Pi's or one of the Qi's is the
+        point at infinity
+
+        Input parameters:
+            - Stack: [miller(P1,Q1) * .. * miller(Pn,Qn)]^-1 lambdas P1 .. Pn Q1 .. Qn
+            - Altstack:
+        Output:
+            - e(P1,Q1) * .. * e(Pn,Qn)
+        Assuption on data:
+            - Pi are points on E(F_q)
+            - Qi are points on E'(F_q)
+            - [miller(P1,Q1) * .. * miller(Pn,Qn)] is the product of the outputs of the miller loops computed on Pi,Qi
+
+        The Miller loops of the n_pairs pairs are computed by multi_miller_loop, so that the easy and the hard
+        exponentiations are computed only once. The reductions in the Miller loop are planned with the cost model
+        reduction_cost (see multi_miller_loop).
+        """
+        q = self.MODULUS
+
+        easy_exponentiation_with_inverse_check = self.easy_exponentiation_with_inverse_check
+        hard_exponentiation = self.hard_exponentiation
+
+        if check_constant:
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([q]) + Script([OP_EQUALVERIFY])
+        else:
+            out = Script()
+
+        # After this, the stack is:
+        # quadratic([miller(P1,Q1) * .. * miller(Pn,Qn)])^-1 quadratic([miller(P1,Q1) * .. * miller(Pn,Qn)])
+        out += self.multi_miller_loop(
+            n_pairs=n_pairs,
+            modulo_threshold=modulo_threshold,
+            check_constant=False,
+            clean_constant=False,
+            reduction_cost=reduction_cost,
+        )
 
         out += easy_exponentiation_with_inverse_check(take_modulo=True, check_constant=False, clean_constant=False)
         out += hard_exponentiation(
@@ -139,6 +240,59 @@ class Pairing:
 
         return optimise_script(out)
 
+    def multi_pairing_with_residue_witness(
+        self,
+        n_pairs: int,
+        modulo_threshold: int,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        reduction_cost: str = "count",
+    ) -> Script:
+        """Pairing check with a residue witness, without final exponentiation.
+
+        NOTE: At the moment, this function does not handle the case where one of the Pi's or one of the Qi's is the
+        point at infinity
+
+        Input parameters:
+            - Stack: q .. [w] [c] c^-1 lambdas P1 .. Pn Q1 .. Qn
+            - Altstack:
+        Output:
+            - miller(P1,Q1) * .. * miller(Pn,Qn) * w * c^(m-q), where m = sum_i exp_miller_loop[i] * 2^i
+        Assuption on data:
+            - Pi are points on E(F_q)
+            - Qi are points on E'(F_q)
+            - c, c^-1 are in the same representation as the output of the Miller loop, and c is only passed if
+            exp_miller_loop contains a 1
+            - w is the scaling factor, made of N_ELEMENTS_SCALING_FACTOR integers, and it is only passed if
+            N_ELEMENTS_SCALING_FACTOR > 0
+
+        The output is 1 if and only if miller(P1,Q1) * .. * miller(Pn,Qn) * w = c^lambda, with lambda = q - m. As r
+        divides lambda and w^((q^k-1)/r) = 1, this proves e(P1,Q1) * .. * e(Pn,Qn) = 1 without computing the final
+        exponentiation: the multiplications by c and c^-1 are folded into the Miller loop (see multi_miller_loop),
+        and only a Frobenius and a couple of multiplications are computed at the end (see residue_witness_check).
+        The witnesses c and w are computed off-chain from the output of the Miller loop.
+        """
+        q = self.MODULUS
+
+        if check_constant:
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([q]) + Script([OP_EQUALVERIFY])
+        else:
+            out = Script()
+
+        # After this, the stack is: [w] [c] c^-1 [miller(P1,Q1) * .. * miller(Pn,Qn) * c^m]
+        out += self.multi_miller_loop(
+            n_pairs=n_pairs,
+            modulo_threshold=modulo_threshold,
+            check_constant=False,
+            clean_constant=False,
+            reduction_cost=reduction_cost,
+            residue_witness=True,
+        )
+
+        out += self.residue_witness_check(take_modulo=True, check_constant=False, clean_constant=clean_constant)
+
+        return optimise_script(out)
+
     def single_pairing_input(
         self,
         point_p: list[int],
@@ -161,30 +315,32 @@ class Pairing:
         is_p_infinity = not any(point_p)
         is_q_infinity = not any(point_q)
 
-        out = nums_to_script([q]) if load_q else Script()
+        out = ScriptBuilder()
+        if load_q:
+            out.append_nums([q])
 
         if is_p_infinity and not is_q_infinity:
             out += Script.parse_string(" ".join(["0x00"] * N_POINTS_CURVE))
-            out += nums_to_script(point_q)
+            out.append_nums(point_q)
         elif not is_p_infinity and is_q_infinity:
-            out += nums_to_script(point_p)
+            out.append_nums(point_p)
             out += Script.parse_string(" ".join(["0x00"] * N_POINTS_TWIST))
         elif is_p_infinity and is_q_infinity:
             out += Script.parse_string(" ".join(["0x00"] * (N_POINTS_TWIST + N_POINTS_CURVE)))
         else:
             # Load inverse of output of Miller loop
-            out += nums_to_script(miller_output_inverse)
+            out.append_nums(miller_output_inverse)
 
             # Load the lambdas
             for i in range(len(lambdas_q_exp_miller_loop) - 1, -1, -1):
                 for j in range(len(lambdas_q_exp_miller_loop[i]) - 1, -1, -1):
-                    out += nums_to_script(lambdas_q_exp_miller_loop[i][j])
+                    out.append_nums(lambdas_q_exp_miller_loop[i][j])
 
             # Load P and Q
-            out += nums_to_script(point_p)
-            out += nums_to_script(point_q)
+            out.append_nums(point_p)
+            out.append_nums(point_q)
 
-        return out
+        return out.to_script()
 
     def triple_pairing_input(
         self,
@@ -207,22 +363,129 @@ class Pairing:
         q = self.MODULUS
         lambdas = [lambdas_q1_exp_miller_loop, lambdas_q2_exp_miller_loop, lambdas_q3_exp_miller_loop]
 
-        out = nums_to_script([q]) if load_q else Script()
+        out = ScriptBuilder()
+        if load_q:
+            out.append_nums([q])
 
         # Load z inverse
-        out += nums_to_script(miller_output_inverse)
+        out.append_nums(miller_output_inverse)
 
         # Load lambdas
         for i in range(len(lambdas[0]) - 1, -1, -1):
             for j in range(len(lambdas[0][i]) - 1, -1, -1):
                 for k in range(3):
-                    out += nums_to_script(lambdas[k][i][j])
+                    out.append_nums(lambdas[k][i][j])
+
+        out.append_nums(point_p1)
+        out.append_nums(point_p2)
+        out.append_nums(point_p3)
+        out.append_nums(point_q1)
+        out.append_nums(point_q2)
+        out.append_nums(point_q3)
+
+        return out.to_script()
+
+    def multi_pairing_input(
+        self,
+        points_p: list[list[int]],
+        points_q: list[list[int]],
+        lambdas_exp_miller_loop: list[list[list[list[int]]]],
+        miller_output_inverse: list[int],
+        load_q: bool = True,
+    ) -> Script:
+        """Return the script needed to execute the multi_pairing function above.
+
+        Take the Pi's, the Qi's, the lamdbas for computing (t-1)Qi (lambdas_exp_miller_loop[k] are the gradients for
+        points_q[k]), and the inverse of the miller loop as input.
+        """
+        if not len(points_p) == len(points_q) == len(lambdas_exp_miller_loop):
+            msg = "The number of Pi's, Qi's and lambdas must be the same."
+            raise ValueError(msg)
 
-        out += nums_to_script(point_p1)
-        out += nums_to_script(point_p2)
-        out += nums_to_script(point_p3)
-        out += nums_to_script(point_q1)
-        out += nums_to_script(point_q2)
-        out += nums_to_script(point_q3)
+        out = ScriptBuilder()
+        if load_q:
+            out.append_nums([self.MODULUS])
 
-        return out
+        # Load z inverse
+        out.append_nums(miller_output_inverse)
+
+        # Load lambdas
+        for i in range(len(lambdas_exp_miller_loop[0]) - 1, -1, -1):
+            for j in range(len(lambdas_exp_miller_loop[0][i]) - 1, -1, -1):
+                for lambdas in lambdas_exp_miller_loop:
+                    out.append_nums(lambdas[i][j])
+
+        for point_p in points_p:
+            out.append_nums(point_p)
+        for point_q in points_q:
+            out.append_nums(point_q)
+
+        return out.to_script()
+
+    def multi_pairing_with_residue_witness_input(
+        self,
+        points_p: list[list[int]],
+        points_q: list[list[int]],
+        lambdas_exp_miller_loop: list[list[list[list[int]]]],
+        residue_witness_inverse: list[int],
+        residue_witness: list[int] | None = None,
+        scaling_factor: list[int] | None = None,
+        load_q: bool = True,
+    ) -> Script:
+        """Return the script needed to execute the multi_pairing_with_residue_witness function above.
+
+        Take the Pi's, the Qi's, the lamdbas for computing (t-1)Qi (lambdas_exp_miller_loop[k] are the gradients for
+        points_q[k]), the inverse of the residue witness c, and, if required by the curve, c and the scaling factor w.
+        """
+        if not len(points_p) == len(points_q) == len(lambdas_exp_miller_loop):
+            msg = "The number of Pi's, Qi's and lambdas must be the same."
+            raise ValueError(msg)
+
+        out = ScriptBuilder()
+        if load_q:
+            out.append_nums([self.MODULUS])
+
+        # Load w, c and c^-1
+        out += self.residue_witness_input(
+            residue_witness_inverse=residue_witness_inverse,
+            residue_witness=residue_witness,
+            scaling_factor=scaling_factor,
+        )
+
+        # Load lambdas
+        for i in range(len(lambdas_exp_miller_loop[0]) - 1, -1, -1):
+            for j in range(len(lambdas_exp_miller_loop[0][i]) - 1, -1, -1):
+                for lambdas in lambdas_exp_miller_loop:
+                    out.append_nums(lambdas[i][j])
+
+        for point_p in points_p:
+            out.append_nums(point_p)
+        for point_q in points_q:
+            out.append_nums(point_q)
+
+        return out.to_script()
+
+    def residue_witness_input(
+        self,
+        residue_witness_inverse: list[int],
+        residue_witness: list[int] | None = None,
+        scaling_factor: list[int] | None = None,
+    ) -> Script:
+        """Return the script loading [w] [c] c^-1, as required by multi_pairing_with_residue_witness.
+
+        c is loaded only if exp_miller_loop contains a 1, and w only if N_ELEMENTS_SCALING_FACTOR > 0.
+        """
+        out = ScriptBuilder()
+        if self.N_ELEMENTS_SCALING_FACTOR > 0:
+            if scaling_factor is None:
+                msg = "The scaling factor is required for this curve."
+                raise ValueError(msg)
+            out.append_nums(scaling_factor)
+        if 1 in self.exp_miller_loop:
+            if residue_witness is None:
+                msg = "The residue witness is required for this curve."
+                raise ValueError(msg)
+            out.append_nums(residue_witness)
+        out.append_nums(residue_witness_inverse)
+
+        return out.to_script()
@@ -1,16 +1,32 @@
+from collections.abc import Callable
+from functools import partial
+
 # Math
 from math import ceil, log2
 
 # from src.tx_engine.engine.script import Script
 from tx_engine import Script
+from tx_engine.engine.op_codes import (
+    OP_1SUB,
+    OP_DEPTH,
+    OP_EQUALVERIFY,
+    OP_PICK,
+)
 
+from src.zkscript.util.reduction_planner import REDUCTION_COSTS, fragment_reduction_cost, plan_reductions
+from src.zkscript.util.script_builder import ScriptBuilder
+from src.zkscript.util.stack_tracker import StackTracker
 from src.zkscript.util.utility_functions import optimise_script
-from src.zkscript.util.utility_scripts import nums_to_script, pick, roll
+from src.zkscript.util.utility_scripts import nums_to_script
 
 
 class TripleMillerLoop:
     def triple_miller_loop(
-        self, modulo_threshold: int, check_constant: bool | None = None, clean_constant: bool | None = None
+        self,
+        modulo_threshold: int,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        reduction_cost: str = "count",
     ) -> Script:
         """Evaluate the miller loop.
 
@@ -79,1197 +95,450 @@ class TripleMillerLoop:
                 - compute f_i * (t_1 * t_2) * (t_3 * t_1') * (t'_2 * t_'3) to get f_(i+1)
 
         Modulo operations are carried out as in a similar fashion to a single miller loop, with the only difference
-        being that the update of f is now always of the form: f <-- f^2 * Dense
+        being that the update of f is now always of the form: f <-- f^2 * Dense. The iterations at which f and the Tj's
+        are reduced are computed by triple_miller_loop_reduction_plan.
         """
 
+        def eval_line(gradient: str, point_q: str, point_p: str, name: str) -> Script:
+            out = stack.pick(gradient)
+            out += stack.pick(point_q)
+            out += stack.pick(point_p)
+            out += line_eval(take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False)
+            stack.apply([gradient, point_q, point_p], [(name, N_ELEMENTS_EVALUATION_OUTPUT)])
+            return out
+
+        out = ScriptBuilder()
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([q])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
-        else:
-            out = Script()
+            out += Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([q]) + Script([OP_EQUALVERIFY])
+
+        # The slots accessed by the loop, from the bottom: the gradients (for i = 0, .., len(exp_miller_loop) - 2, the
+        # stack holds the lambda_(2*Tj pm Qj)'s if exp_miller_loop[i] != 0, and the lambda_(2*Tj)'s), the Pj's and
+        # the Qj's
+        slots = []
+        for i in range(len(exp_miller_loop) - 1):
+            if exp_miller_loop[i] != 0:
+                slots += [(f"lambda_2T{j}_pm_Q{j}", EXTENSION_DEGREE) for j in (1, 2, 3)]
+            slots += [(f"lambda_2T{j}", EXTENSION_DEGREE) for j in (1, 2, 3)]
+        stack = StackTracker(
+            [
+                *slots,
+                *[(f"P{j}", N_POINTS_CURVE) for j in (1, 2, 3)],
+                *[(f"Q{j}", N_POINTS_TWIST) for j in (1, 2, 3)],
+            ]
+        )
 
         # After this, the stack is: xP1 yP1 xP2 yP2 xP3 yP3 xQ1 yQ1 xQ2 yQ2 xQ3 yQ3 xQ1 -yQ1 xQ2 -yQ2 xQ3 -yQ3
-        set_Qs = pick(position=3 * N_POINTS_TWIST - 1, n_elements=N_POINTS_TWIST)
-        set_Qs += point_negation_twisted_curve(take_modulo=False, check_constant=False, clean_constant=False)
-        set_Qs += pick(position=3 * N_POINTS_TWIST - 1, n_elements=N_POINTS_TWIST)
-        set_Qs += point_negation_twisted_curve(take_modulo=False, check_constant=False, clean_constant=False)
-        set_Qs += pick(position=3 * N_POINTS_TWIST - 1, n_elements=N_POINTS_TWIST)
-        set_Qs += point_negation_twisted_curve(take_modulo=False, check_constant=False, clean_constant=False)
+        for j in (1, 2, 3):
+            out += stack.pick(f"Q{j}")
+            out += point_negation_twisted_curve(take_modulo=False, check_constant=False, clean_constant=False)
+            stack.apply([f"Q{j}"], [(f"-Q{j}", N_POINTS_TWIST)])
 
         # After this, the stack is: xP1 yP1 xP2 yP2 xP3 yP3 xQ1 yQ1 xQ2 yQ2 xQ3 yQ3 xQ1 -yQ1 xQ2 -yQ2 xQ3 -yQ3 xT1 yT1
         # xT2 yT2 xT3 yT3
-        set_Ts = Script()
         if exp_miller_loop[-1] == 1:
-            set_Ts += pick(position=6 * N_POINTS_TWIST - 1, n_elements=3 * N_POINTS_TWIST)  # Pick Q1, Q2, Q3
+            out += stack.pick("Q1", "Q2", "Q3")
+            for j in (1, 2, 3):
+                stack.rename(f"Q{j}", f"T{j}")
         elif exp_miller_loop[-1] == -1:
-            set_Ts += pick(position=3 * N_POINTS_TWIST - 1, n_elements=3 * N_POINTS_TWIST)  # Pick -Q1, -Q2, -Q3
+            out += stack.pick("-Q1", "-Q2", "-Q3")
+            for j in (1, 2, 3):
+                stack.rename(f"-Q{j}", f"T{j}")
         else:
             raise ValueError("Last element of exp_miller_loop must be non-zero.")
 
-        out += set_Qs + set_Ts
+        take_modulo_F, take_modulo_T = self.triple_miller_loop_reduction_plan(
+            modulo_threshold=modulo_threshold, reduction_cost=reduction_cost
+        )
 
         clean_final = False
-        BIT_SIZE_Q = ceil(log2(q))
-        current_size_T = BIT_SIZE_Q
-        current_size_F = BIT_SIZE_Q
         # After this, the stack is: P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 uQ1 uQ2 uQ3 [miller(P1,Q1) * miller(P2,Q2) *
         # miller(P3,Q3)]
         for i in range(len(exp_miller_loop) - 2, -1, -1):
-            take_modulo_F = False
-            take_modulo_T = False
-
-            # Constants set up
             if i == 0:
                 clean_final = clean_constant
-                take_modulo_F = True
-                take_modulo_T = True
-            else:
-                # Next iteration will have: f <-- f^2 * Dense and T_i <-- 2T_i or T_i <-- 2T_i pm Q_i.
-                multiplier = 3 if exp_miller_loop[i] == 0 else 6
-                future_size_F = (
-                    multiplier * log2(13 * 3) + multiplier * BIT_SIZE_Q + (ceil(log2(13 * 3)) + 2 * current_size_F)
-                )
-                if future_size_F > modulo_threshold:
-                    take_modulo_F = True
-                    current_size_F = BIT_SIZE_Q
-                else:
-                    current_size_F = future_size_F
+            is_first_iteration = i == len(exp_miller_loop) - 2
+            pm_Q = "Q" if exp_miller_loop[i] == 1 else "-Q"
 
-                if current_size_T + BIT_SIZE_Q + log2(6) > modulo_threshold:
-                    take_modulo_T = True
-                    current_size_T = BIT_SIZE_Q
-                else:
-                    current_size_T = current_size_T + BIT_SIZE_Q + log2(6)
+            if not is_first_iteration:
+                # After this, the stack is: .. P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T1 T2 T3 f_i^2
+                out += miller_loop_output_square(take_modulo=False, check_constant=False, clean_constant=False)
 
-            if i == len(exp_miller_loop) - 2:
-                # In this case, f is not there, so we need to take that into account
-                if exp_miller_loop[i] == 0:
-                    # After this, the stack is: lambda_(2*T1) lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3
-                    # T1 T2 T3 t_1
-                    stack_length_added = 0
-                    out += pick(
-                        position=9 * N_POINTS_TWIST
-                        + 3 * N_POINTS_CURVE
-                        + 3 * EXTENSION_DEGREE
-                        + stack_length_added
-                        - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Pick lambda_(2*T1)
-                    stack_length_added += EXTENSION_DEGREE
-                    out += pick(
-                        position=3 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST
-                    )  # Pick T1
-                    stack_length_added += N_POINTS_TWIST
-                    out += pick(
-                        position=9 * N_POINTS_TWIST + 3 * N_POINTS_CURVE + stack_length_added - 1,
-                        n_elements=N_POINTS_CURVE,
-                    )  # Pick P1
-                    stack_length_added += N_POINTS_CURVE
-                    out += line_eval(
-                        take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
-                    )  # Compute t_1 = ev_(l_(T1,T1))(P_1)
-                    # After this, the stack is: lambda_(2*T1) lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3
-                    # T1 T2 T3 t_1 t_2
-                    stack_length_added = 0
-                    out += pick(
-                        position=9 * N_POINTS_TWIST
-                        + 3 * N_POINTS_CURVE
-                        + 2 * EXTENSION_DEGREE
-                        + N_ELEMENTS_EVALUATION_OUTPUT
-                        + stack_length_added
-                        - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Pick lambda_(2*T2)
-                    stack_length_added += EXTENSION_DEGREE
-                    out += pick(
-                        position=2 * N_POINTS_TWIST + N_ELEMENTS_EVALUATION_OUTPUT + stack_length_added - 1,
-                        n_elements=N_POINTS_TWIST,
-                    )  # Pick T2
-                    stack_length_added += N_POINTS_TWIST
-                    out += pick(
-                        position=9 * N_POINTS_TWIST
-                        + 2 * N_POINTS_CURVE
-                        + N_ELEMENTS_EVALUATION_OUTPUT
-                        + stack_length_added
-                        - 1,
-                        n_elements=N_POINTS_CURVE,
-                    )  # Pick P2
-                    stack_length_added += N_POINTS_CURVE
-                    out += line_eval(
-                        take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
-                    )  # Compute t_2 = ev_(l_(T2,T2))(P_2)
-                    # After this, the stack is: lambda_(2*T1) lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3
-                    # T1 T2 T3 t_1 t_2 t_3
-                    stack_length_added = 0
-                    out += pick(
-                        position=9 * N_POINTS_TWIST
-                        + 3 * N_POINTS_CURVE
-                        + EXTENSION_DEGREE
-                        + 2 * N_ELEMENTS_EVALUATION_OUTPUT
-                        + stack_length_added
-                        - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Pick lambda_(2*T3)
-                    stack_length_added += EXTENSION_DEGREE
-                    out += pick(
-                        position=N_POINTS_TWIST + 2 * N_ELEMENTS_EVALUATION_OUTPUT + stack_length_added - 1,
-                        n_elements=N_POINTS_TWIST,
-                    )  # Pick T3
-                    stack_length_added += N_POINTS_TWIST
-                    out += pick(
-                        position=9 * N_POINTS_TWIST
-                        + N_POINTS_CURVE
-                        + 2 * N_ELEMENTS_EVALUATION_OUTPUT
-                        + stack_length_added
-                        - 1,
-                        n_elements=N_POINTS_CURVE,
-                    )  # Pick P3
-                    stack_length_added += N_POINTS_CURVE
-                    out += line_eval(
-                        take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
-                    )  # Compute t_3 = ev_(l_(T3,T3))(P_3)
-                    # After this, the stack is: lambda_(2*T1) lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3
-                    # T1 T2 T3 (t_1 * t_2 * t_3)
-                    out += line_eval_times_eval(
-                        take_modulo=False, check_constant=False, clean_constant=False
-                    )  # Compute t2 * t3
-                    out += line_eval_times_eval_times_eval(
-                        take_modulo=False, check_constant=False, clean_constant=False
-                    )  # Compute t1 * (t2 * t3)
-                    # After this, the stack is: lambda_(2*T1) lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3
-                    # T1 T2 T3, altstack = [(t_1 * t_2 * t_3)]
-                    out += Script.parse_string(" ".join(["OP_TOALTSTACK"] * N_ELEMENTS_MILLER_OUTPUT))
-                    # After this, the stack is: lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T2 T3 (2*T1),
-                    # altstack = [(t_1 * t_2 * t_3)]
-                    stack_length_added = 0
-                    out += roll(
-                        position=9 * N_POINTS_TWIST
-                        + 3 * N_POINTS_CURVE
-                        + 3 * EXTENSION_DEGREE
-                        + stack_length_added
-                        - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Roll lambda_(2*T1)
-                    stack_length_added += EXTENSION_DEGREE
-                    out += roll(
-                        position=3 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST
-                    )  # Roll T1
-                    stack_length_added += N_POINTS_TWIST
-                    out += point_doubling_twisted_curve(
-                        take_modulo=take_modulo_T, check_constant=False, clean_constant=False
-                    )  # Compute 2*T1
-                    # After this, the stack is: lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T3 (2*T1) (2*T2),
-                    # altstack = [(t_1 * t_2 * t_3)]
-                    stack_length_added = 0
-                    out += roll(
-                        position=9 * N_POINTS_TWIST
-                        + 3 * N_POINTS_CURVE
-                        + 2 * EXTENSION_DEGREE
-                        + stack_length_added
-                        - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Roll lambda_(2*T2)
-                    stack_length_added += EXTENSION_DEGREE
-                    out += roll(
-                        position=3 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST
-                    )  # Roll T2
-                    stack_length_added += N_POINTS_TWIST
-                    out += point_doubling_twisted_curve(
-                        take_modulo=take_modulo_T, check_constant=False, clean_constant=False
-                    )  # Compute 2*T2
-                    # After this, the stack is: P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 (2*T1) (2*T2) (2*T3),
-                    # altstack = [(t_1 * t_2 * t_3)]
-                    stack_length_added = 0
-                    out += roll(
-                        position=9 * N_POINTS_TWIST + 3 * N_POINTS_CURVE + EXTENSION_DEGREE + stack_length_added - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Roll lambda_(2*T3)
-                    stack_length_added += EXTENSION_DEGREE
-                    out += roll(
-                        position=3 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST
-                    )  # Roll T3
-                    stack_length_added += N_POINTS_TWIST
-                    out += point_doubling_twisted_curve(
-                        take_modulo=take_modulo_T, check_constant=False, clean_constant=clean_final
-                    )  # Compute 2*T3
-                    # After this, the stack is: P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 (2*T1) (2*T2) (2*T3) (t_1 * t_2 * t_3)
-                    out += Script.parse_string(" ".join(["OP_FROMALTSTACK"] * N_ELEMENTS_MILLER_OUTPUT))
-                else:
-                    # After this, the stack is: lambda_(2* T1 pm Q1) lambda_(2* T2 pm Q2) lambda_(2* T3 pm Q3)
-                    # lambda_(2*T1) lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T1 T2 T3 t_1
-                    stack_length_added = 0
-                    out += pick(
-                        position=9 * N_POINTS_TWIST
-                        + 3 * N_POINTS_CURVE
-                        + 3 * EXTENSION_DEGREE
-                        + stack_length_added
-                        - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Pick lambda_(2*T1)
-                    stack_length_added += EXTENSION_DEGREE
-                    out += pick(
-                        position=3 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST
-                    )  # Pick T1
-                    stack_length_added += N_POINTS_TWIST
-                    out += pick(
-                        position=9 * N_POINTS_TWIST + 3 * N_POINTS_CURVE + stack_length_added - 1,
-                        n_elements=N_POINTS_CURVE,
-                    )  # Pick P1
-                    stack_length_added += N_POINTS_CURVE
-                    out += line_eval(
-                        take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
-                    )  # Compute t_1 = ev_(l_(T1,T1))(P_1)
-                    # After this, the stack is: lambda_(2* T1 pm Q1) lambda_(2* T2 pm Q2) lambda_(2* T3 pm Q3)
-                    # lambda_(2*T1) lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T1 T2 T3 (t_1 * t_2)
-                    stack_length_added = 0
-                    out += pick(
-                        position=9 * N_POINTS_TWIST
-                        + 3 * N_POINTS_CURVE
-                        + 2 * EXTENSION_DEGREE
-                        + N_ELEMENTS_EVALUATION_OUTPUT
-                        + stack_length_added
-                        - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Pick lambda_(2*T2)
-                    stack_length_added += EXTENSION_DEGREE
-                    out += pick(
-                        position=2 * N_POINTS_TWIST + N_ELEMENTS_EVALUATION_OUTPUT + stack_length_added - 1,
-                        n_elements=N_POINTS_TWIST,
-                    )  # Pick T2
-                    stack_length_added += N_POINTS_TWIST
-                    out += pick(
-                        position=9 * N_POINTS_TWIST
-                        + 2 * N_POINTS_CURVE
-                        + N_ELEMENTS_EVALUATION_OUTPUT
-                        + stack_length_added
-                        - 1,
-                        n_elements=N_POINTS_CURVE,
-                    )  # Pick P2
-                    stack_length_added += N_POINTS_CURVE
-                    out += line_eval(
-                        take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
-                    )  # Compute t_2 = ev_(l_(T2,T2))(P_2)
-                    out += line_eval_times_eval(
-                        take_modulo=False, check_constant=False, clean_constant=False
-                    )  # Compute t1 * t2
-                    # After this, the stack is: lambda_(2* T1 pm Q1) lambda_(2* T2 pm Q2) lambda_(2* T3 pm Q3)
-                    # lambda_(2*T1) lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T1 T2 T3 (t_1 * t_2) t_3
-                    stack_length_added = 0
-                    out += pick(
-                        position=9 * N_POINTS_TWIST
-                        + 3 * N_POINTS_CURVE
-                        + EXTENSION_DEGREE
-                        + N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                        + stack_length_added
-                        - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Pick lambda_(2*T3)
-                    stack_length_added += EXTENSION_DEGREE
-                    out += pick(
-                        position=N_POINTS_TWIST + N_ELEMENTS_EVALUATION_TIMES_EVALUATION + stack_length_added - 1,
-                        n_elements=N_POINTS_TWIST,
-                    )  # Pick T3
-                    stack_length_added += N_POINTS_TWIST
-                    out += pick(
-                        position=9 * N_POINTS_TWIST
-                        + N_POINTS_CURVE
-                        + N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                        + stack_length_added
-                        - 1,
-                        n_elements=N_POINTS_CURVE,
-                    )  # Pick P3
-                    stack_length_added += N_POINTS_CURVE
-                    out += line_eval(
-                        take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
-                    )  # Compute t_3 = ev_(l_(T3,T3))(P_3)
-                    # After this, the stack is: lambda_(2* T1 pm Q1) lambda_(2* T2 pm Q2) lambda_(2* T3 pm Q3)
-                    # lambda_(2*T1) lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T1 T2 T3
-                    # (t_1 * t_2) (t_3 * t'_1)
-                    stack_length_added = 0
-                    out += pick(
-                        position=9 * N_POINTS_TWIST
-                        + 3 * N_POINTS_CURVE
-                        + N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                        + N_ELEMENTS_EVALUATION_OUTPUT
-                        + 6 * EXTENSION_DEGREE
-                        + stack_length_added
-                        - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Pick lambda_(2*T1 pm Q)
-                    stack_length_added += EXTENSION_DEGREE
-                    if exp_miller_loop[i] == 1:
-                        out += pick(
-                            position=9 * N_POINTS_TWIST
-                            + N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                            + N_ELEMENTS_EVALUATION_OUTPUT
-                            + stack_length_added
-                            - 1,
-                            n_elements=N_POINTS_TWIST,
-                        )  # Pick Q1
-                        stack_length_added += N_POINTS_TWIST
-                    elif exp_miller_loop[i] == -1:
-                        out += pick(
-                            position=6 * N_POINTS_TWIST
-                            + N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                            + N_ELEMENTS_EVALUATION_OUTPUT
-                            + stack_length_added
-                            - 1,
-                            n_elements=N_POINTS_TWIST,
-                        )  # Pick -Q1
-                        stack_length_added += N_POINTS_TWIST
-                    else:
-                        raise ValueError
-                    out += pick(
-                        position=9 * N_POINTS_TWIST
-                        + 3 * N_POINTS_CURVE
-                        + N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                        + N_ELEMENTS_EVALUATION_OUTPUT
-                        + stack_length_added
-                        - 1,
-                        n_elements=N_POINTS_CURVE,
-                    )  # Pick P1
-                    stack_length_added += N_POINTS_CURVE
-                    out += line_eval(
-                        take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
-                    )  # Compute t'_1 = ev_(l_(2*T1,pm Q1))(P_1)
-                    out += line_eval_times_eval(
-                        take_modulo=False, check_constant=False, clean_constant=False
-                    )  # Compute t_3 * t'_1
-                    # After this, the stack is: lambda_(2* T1 pm Q1) lambda_(2* T2 pm Q2) lambda_(2* T3 pm Q3)
-                    # lambda_(2*T1) lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T1 T2 T3
-                    # (t_1 * t_2) (t_3 * t'_1) t'_2
-                    stack_length_added = 0
-                    out += pick(
-                        position=9 * N_POINTS_TWIST
-                        + 3 * N_POINTS_CURVE
-                        + 2 * N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                        + 5 * EXTENSION_DEGREE
-                        + stack_length_added
-                        - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Pick lambda_(2*T2 pm Q)
-                    stack_length_added += EXTENSION_DEGREE
-                    if exp_miller_loop[i] == 1:
-                        out += pick(
-                            position=8 * N_POINTS_TWIST
-                            + 2 * N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                            + stack_length_added
-                            - 1,
-                            n_elements=N_POINTS_TWIST,
-                        )  # Pick Q2
-                        stack_length_added += N_POINTS_TWIST
-                    elif exp_miller_loop[i] == -1:
-                        out += pick(
-                            position=5 * N_POINTS_TWIST
-                            + 2 * N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                            + stack_length_added
-                            - 1,
-                            n_elements=N_POINTS_TWIST,
-                        )  # Pick -Q2
-                        stack_length_added += N_POINTS_TWIST
-                    else:
-                        raise ValueError
-                    out += pick(
-                        position=9 * N_POINTS_TWIST
-                        + 2 * N_POINTS_CURVE
-                        + 2 * N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                        + stack_length_added
-                        - 1,
-                        n_elements=N_POINTS_CURVE,
-                    )  # Pick P2
-                    stack_length_added += N_POINTS_CURVE
-                    out += line_eval(
-                        take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
-                    )  # Compute t'_2 = ev_(l_(2*T2,pm Q2))(P_2)
-                    # After this, the stack is: lambda_(2* T1 pm Q1) lambda_(2* T2 pm Q2) lambda_(2* T3 pm Q3)
-                    # lambda_(2*T1) lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T1 T2 T3
-                    # (t_1 * t_2) (t_3 * t'_1) (t'_2 * t'_3)
-                    stack_length_added = 0
-                    out += pick(
-                        position=9 * N_POINTS_TWIST
-                        + 3 * N_POINTS_CURVE
-                        + 2 * N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                        + N_ELEMENTS_EVALUATION_OUTPUT
-                        + 4 * EXTENSION_DEGREE
-                        + stack_length_added
-                        - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Pick lambda_(2*T3 pm Q)
-                    stack_length_added += EXTENSION_DEGREE
-                    if exp_miller_loop[i] == 1:
-                        out += pick(
-                            position=7 * N_POINTS_TWIST
-                            + 2 * N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                            + N_ELEMENTS_EVALUATION_OUTPUT
-                            + stack_length_added
-                            - 1,
-                            n_elements=N_POINTS_TWIST,
-                        )  # Pick Q3
-                        stack_length_added += N_POINTS_TWIST
-                    elif exp_miller_loop[i] == -1:
-                        out += pick(
-                            position=4 * N_POINTS_TWIST
-                            + 2 * N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                            + N_ELEMENTS_EVALUATION_OUTPUT
-                            + stack_length_added
-                            - 1,
-                            n_elements=N_POINTS_TWIST,
-                        )  # Pick -Q3
-                        stack_length_added += N_POINTS_TWIST
-                    else:
-                        raise ValueError
-                    out += pick(
-                        position=9 * N_POINTS_TWIST
-                        + N_POINTS_CURVE
-                        + 2 * N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                        + N_ELEMENTS_EVALUATION_OUTPUT
-                        + stack_length_added
-                        - 1,
-                        n_elements=N_POINTS_CURVE,
-                    )  # Pick P3
-                    stack_length_added += N_POINTS_CURVE
-                    out += line_eval(
-                        take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
-                    )  # Compute t'_3 = ev_(l_(2*T3,pm Q3))(P_3)
-                    out += line_eval_times_eval(
-                        take_modulo=False, check_constant=False, clean_constant=False
-                    )  # Compute t'_2 * t'_3
-                    # After this, the stack is: lambda_(2* T1 pm Q1) lambda_(2* T2 pm Q2) lambda_(2* T3 pm Q3)
-                    # lambda_(2*T1) lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T1 T2 T3
-                    # [(t_1 * t_2) * (t_3 * t'_1) * (t'_2 * t'_3)]
-                    # Compute (t_3 * t'_1) * (t'_2 * t'_3)
-                    out += line_eval_times_eval_times_eval_times_eval(
-                        take_modulo=False, check_constant=False, clean_constant=False
-                    )
-                    # Compute (t_1 * t_2) * (t_3 * t'_1) * (t'_2 * t'_3)
-                    out += line_eval_times_eval_times_eval_times_eval_times_eval_times_eval(
-                        take_modulo=False, check_constant=False, clean_constant=False
-                    )
-                    # After this, the stack is: lambda_(2* T1 pm Q1) lambda_(2* T2 pm Q2) lambda_(2* T3 pm Q3)
-                    # lambda_(2*T1) lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T1 T2 T3,
-                    # altstack = [(t_1 * t_2) * (t_3 * t'_1) * (t'_2 * t'_3)]
-                    out += Script.parse_string(" ".join(["OP_TOALTSTACK"] * N_ELEMENTS_MILLER_OUTPUT))
-                    # After this, the stack is: lambda_(2* T2 pm Q2) lambda_(2* T3 pm Q3) lambda_(2*T2) lambda_(2*T3)
-                    # P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T2 T3 (2*T1 pm Q1),
-                    # altstack = [(t_1 * t_2) * (t_3 * t'_1) * (t'_2 * t'_3)]
-                    stack_length_added = 0
-                    out += roll(
-                        position=9 * N_POINTS_TWIST
-                        + 3 * N_POINTS_CURVE
-                        + 3 * EXTENSION_DEGREE
-                        + stack_length_added
-                        - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Roll lambda_(2*T1)
-                    stack_length_added += EXTENSION_DEGREE
-                    out += roll(
-                        position=3 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST
-                    )  # Roll T1
-                    stack_length_added += 0
-                    out += point_doubling_twisted_curve(
-                        take_modulo=take_modulo_T, check_constant=False, clean_constant=False
-                    )  # Compute 2 * T1
-                    stack_length_added = 0
-                    out += roll(
-                        position=9 * N_POINTS_TWIST
-                        + 3 * N_POINTS_CURVE
-                        + 5 * EXTENSION_DEGREE
-                        + stack_length_added
-                        - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Roll lambda_(2* T1 pm Q1)
-                    stack_length_added += EXTENSION_DEGREE
-                    out += roll(
-                        position=EXTENSION_DEGREE + N_POINTS_TWIST - 1, n_elements=N_POINTS_TWIST
-                    )  # Bring 2*T1 on top of the stack
-                    if exp_miller_loop[i] == 1:
-                        out += pick(
-                            position=9 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST
-                        )  # Pick Q1
-                        stack_length_added += N_POINTS_TWIST
-                    elif exp_miller_loop[i] == -1:
-                        out += pick(
-                            position=6 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST
-                        )  # Pick -Q1
-                        stack_length_added += N_POINTS_TWIST
-                    else:
-                        raise ValueError
-                    out += point_addition_twisted_curve(
-                        take_modulo=take_modulo_T, check_constant=False, clean_constant=False
-                    )
-                    # After this, the stack is: lambda_(2* T3 pm Q3) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T3
-                    # (2*T1 pm Q1) (2*T2 pm Q2),
-                    # altstack = [(t_1 * t_2) * (t_3 * t'_1) * (t'_2 * t'_3)]
-                    stack_length_added = 0
-                    out += roll(
-                        position=9 * N_POINTS_TWIST
-                        + 3 * N_POINTS_CURVE
-                        + 2 * EXTENSION_DEGREE
-                        + stack_length_added
-                        - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Roll lambda_(2*T2)
-                    stack_length_added += EXTENSION_DEGREE
-                    out += roll(
-                        position=3 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST
-                    )  # Roll T2
-                    stack_length_added += 0
-                    out += point_doubling_twisted_curve(
-                        take_modulo=take_modulo_T, check_constant=False, clean_constant=False
-                    )  # Compute 2 * T2
-                    stack_length_added = 0
-                    out += roll(
-                        position=9 * N_POINTS_TWIST
-                        + 3 * N_POINTS_CURVE
-                        + 3 * EXTENSION_DEGREE
-                        + stack_length_added
-                        - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Roll lambda_(2* T2 pm Q2)
-                    stack_length_added += EXTENSION_DEGREE
-                    out += roll(
-                        position=EXTENSION_DEGREE + N_POINTS_TWIST - 1, n_elements=N_POINTS_TWIST
-                    )  # Bring 2*T2 on top of the stack
-                    if exp_miller_loop[i] == 1:
-                        out += pick(
-                            position=8 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST
-                        )  # Pick Q2
-                        stack_length_added += N_POINTS_TWIST
-                    elif exp_miller_loop[i] == -1:
-                        out += pick(
-                            position=5 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST
-                        )  # Pick -Q2
-                        stack_length_added += N_POINTS_TWIST
-                    else:
-                        raise ValueError
-                    out += point_addition_twisted_curve(
-                        take_modulo=take_modulo_T, check_constant=False, clean_constant=False
+            if exp_miller_loop[i] == 0:
+                # After this, the stack is: .. P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T1 T2 T3 [f_i^2] t_1 t_2 t_3
+                for j in (1, 2, 3):
+                    out += eval_line(f"lambda_2T{j}", f"T{j}", f"P{j}", f"t_{j}")
+                # After this, the stack is: .. P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T1 T2 T3 [f_i^2] (t_1 * t_2 * t_3)
+                out += line_eval_times_eval(take_modulo=False, check_constant=False, clean_constant=False)
+                stack.apply(["t_2", "t_3"], [("t_2 * t_3", N_ELEMENTS_EVALUATION_TIMES_EVALUATION)])
+                out += line_eval_times_eval_times_eval(take_modulo=False, check_constant=False, clean_constant=False)
+                stack.apply(["t_1", "t_2 * t_3"], [("dense", N_ELEMENTS_MILLER_OUTPUT)])
+                if not is_first_iteration:
+                    # After this, the stack is: .. P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T1 T2 T3 (f_i^2 * t_1 * t_2 * t_3)
+                    out += miller_loop_output_times_eval_times_eval_times_eval(
+                        take_modulo=take_modulo_F[i],
+                        check_constant=False,
+                        clean_constant=False,
+                        is_constant_reused=False,
                     )
-                    # After this, the stack is: P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 (2*T1 pm Q1) (2*T2 pm Q2) (2*T3 pm Q3),
-                    # altstack = [(t_1 * t_2) * (t_3 * t'_1) * (t'_2 * t'_3)]
-                    stack_length_added = 0
-                    out += roll(
-                        position=9 * N_POINTS_TWIST + 3 * N_POINTS_CURVE + EXTENSION_DEGREE + stack_length_added - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Roll lambda_(2*T3)
-                    stack_length_added += EXTENSION_DEGREE
-                    out += roll(
-                        position=3 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST
-                    )  # Roll T3
-                    stack_length_added += 0
-                    out += point_doubling_twisted_curve(
-                        take_modulo=take_modulo_T, check_constant=False, clean_constant=False
-                    )  # Compute 2 * T3
-                    stack_length_added = 0
-                    out += roll(
-                        position=9 * N_POINTS_TWIST + 3 * N_POINTS_CURVE + EXTENSION_DEGREE + stack_length_added - 1,
-                        n_elements=EXTENSION_DEGREE,
-                    )  # Roll lambda_(2* T3 pm Q3)
-                    stack_length_added += EXTENSION_DEGREE
-                    out += roll(
-                        position=EXTENSION_DEGREE + N_POINTS_TWIST - 1, n_elements=N_POINTS_TWIST
-                    )  # Bring 2*T3 on top of the stack
-                    if exp_miller_loop[i] == 1:
-                        out += pick(
-                            position=7 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST
-                        )  # Pick Q3
-                        stack_length_added += N_POINTS_TWIST
-                    elif exp_miller_loop[i] == -1:
-                        out += pick(
-                            position=4 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST
-                        )  # Pick -Q3
-                        stack_length_added += N_POINTS_TWIST
-                    else:
-                        raise ValueError
-                    out += point_addition_twisted_curve(
-                        take_modulo=take_modulo_T, check_constant=False, clean_constant=False
-                    )
-                    # After this, the stack is: P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T2 T3
-                    # (2*T1 pm Q1) (2*T2 pm Q2) (2*T3 pm Q3) [(t_1 * t_2) * (t_3 * t'_1) * (t'_2 * t'_3)]
-                    out += Script.parse_string(" ".join(["OP_FROMALTSTACK"] * N_ELEMENTS_MILLER_OUTPUT))
-            elif exp_miller_loop[i] == 0:
-                # After this, the stack is: lambda_(2*T1) lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T1
-                # T2 T3 f_i^2
-                stack_length_added = 0
-                out += miller_loop_output_square(take_modulo=False, check_constant=False, clean_constant=False)
-                # After this, the stack is: lambda_(2*T1) lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T1
-                # T2 T3 f_i^2 t_1
-                stack_length_added = 0
-                out += pick(
-                    position=9 * N_POINTS_TWIST
-                    + 3 * N_POINTS_CURVE
-                    + 3 * EXTENSION_DEGREE
-                    + N_ELEMENTS_MILLER_OUTPUT
-                    + stack_length_added
-                    - 1,
-                    n_elements=EXTENSION_DEGREE,
-                )  # Pick lambda_(2*T1)
-                stack_length_added += EXTENSION_DEGREE
-                out += pick(
-                    position=3 * N_POINTS_TWIST + N_ELEMENTS_MILLER_OUTPUT + stack_length_added - 1,
-                    n_elements=N_POINTS_TWIST,
-                )  # Pick T1
-                stack_length_added += N_POINTS_TWIST
-                out += pick(
-                    position=9 * N_POINTS_TWIST
-                    + 3 * N_POINTS_CURVE
-                    + N_ELEMENTS_MILLER_OUTPUT
-                    + stack_length_added
-                    - 1,
-                    n_elements=N_POINTS_CURVE,
-                )  # Pick P1
-                stack_length_added += N_POINTS_TWIST
-                out += line_eval(
-                    take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
-                )  # Compute t_1 = ev_(l_(T1,T1))(P_1)
-                # After this, the stack is: lambda_(2*T1) lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3
-                # T1 T2 T3 f_i^2 t_1 t_2
-                stack_length_added = 0
-                out += pick(
-                    position=9 * N_POINTS_TWIST
-                    + 3 * N_POINTS_CURVE
-                    + 2 * EXTENSION_DEGREE
-                    + N_ELEMENTS_MILLER_OUTPUT
-                    + N_ELEMENTS_EVALUATION_OUTPUT
-                    + stack_length_added
-                    - 1,
-                    n_elements=EXTENSION_DEGREE,
-                )  # Pick lambda_(2*T2)
-                stack_length_added += EXTENSION_DEGREE
-                out += pick(
-                    position=2 * N_POINTS_TWIST
-                    + N_ELEMENTS_MILLER_OUTPUT
-                    + N_ELEMENTS_EVALUATION_OUTPUT
-                    + stack_length_added
-                    - 1,
-                    n_elements=N_POINTS_TWIST,
-                )  # Pick T2
-                stack_length_added += N_POINTS_TWIST
-                out += pick(
-                    position=9 * N_POINTS_TWIST
-                    + 2 * N_POINTS_CURVE
-                    + N_ELEMENTS_MILLER_OUTPUT
-                    + N_ELEMENTS_EVALUATION_OUTPUT
-                    + stack_length_added
-                    - 1,
-                    n_elements=N_POINTS_CURVE,
-                )  # Pick P2
-                stack_length_added += N_POINTS_CURVE
-                out += line_eval(
-                    take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
-                )  # Compute t_2 = ev_(l_(T2,T2))(P_2)
-                # After this, the stack is: lambda_(2*T1) lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3
-                # T1 T2 T3 f_i^2 t_1 t_2 t_3
-                stack_length_added = 0
-                out += pick(
-                    position=9 * N_POINTS_TWIST
-                    + 3 * N_POINTS_CURVE
-                    + EXTENSION_DEGREE
-                    + N_ELEMENTS_MILLER_OUTPUT
-                    + 2 * N_ELEMENTS_EVALUATION_OUTPUT
-                    + stack_length_added
-                    - 1,
-                    n_elements=EXTENSION_DEGREE,
-                )  # Pick lambda_(2*T3)
-                stack_length_added += EXTENSION_DEGREE
-                out += pick(
-                    position=N_POINTS_TWIST
-                    + N_ELEMENTS_MILLER_OUTPUT
-                    + 2 * N_ELEMENTS_EVALUATION_OUTPUT
-                    + stack_length_added
-                    - 1,
-                    n_elements=N_POINTS_TWIST,
-                )  # Pick T3
-                stack_length_added += N_POINTS_TWIST
-                out += pick(
-                    position=9 * N_POINTS_TWIST
-                    + N_POINTS_CURVE
-                    + N_ELEMENTS_MILLER_OUTPUT
-                    + 2 * N_ELEMENTS_EVALUATION_OUTPUT
-                    + stack_length_added
-                    - 1,
-                    n_elements=N_POINTS_CURVE,
-                )  # Pick P3
-                stack_length_added += N_POINTS_CURVE
-                out += line_eval(
-                    take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
-                )  # Compute t_3 = ev_(l_(T3,T3))(P_3)
-                # After this, the stack is: lambda_(2*T1) lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3
-                # T1 T2 T3 (f_i^2 * t_1 * t_2 * t_3)
-                out += line_eval_times_eval(
+                    stack.apply(["f", "dense"], [("dense", N_ELEMENTS_MILLER_OUTPUT)])
+            else:
+                # After this, the stack is: .. P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T1 T2 T3 [f_i^2] (t_1 * t_2)
+                # (t_3 * t'_1) (t'_2 * t'_3)
+                out += eval_line("lambda_2T1", "T1", "P1", "t_1")
+                out += eval_line("lambda_2T2", "T2", "P2", "t_2")
+                out += line_eval_times_eval(take_modulo=False, check_constant=False, clean_constant=False)
+                stack.apply(["t_1", "t_2"], [("t_1 * t_2", N_ELEMENTS_EVALUATION_TIMES_EVALUATION)])
+                out += eval_line("lambda_2T3", "T3", "P3", "t_3")
+                out += eval_line("lambda_2T1_pm_Q1", f"{pm_Q}1", "P1", "t'_1")
+                out += line_eval_times_eval(take_modulo=False, check_constant=False, clean_constant=False)
+                stack.apply(["t_3", "t'_1"], [("t_3 * t'_1", N_ELEMENTS_EVALUATION_TIMES_EVALUATION)])
+                out += eval_line("lambda_2T2_pm_Q2", f"{pm_Q}2", "P2", "t'_2")
+                out += eval_line("lambda_2T3_pm_Q3", f"{pm_Q}3", "P3", "t'_3")
+                out += line_eval_times_eval(take_modulo=False, check_constant=False, clean_constant=False)
+                stack.apply(["t'_2", "t'_3"], [("t'_2 * t'_3", N_ELEMENTS_EVALUATION_TIMES_EVALUATION)])
+                # After this, the stack is: .. P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T1 T2 T3 [f_i^2]
+                # [(t_1 * t_2) * (t_3 * t'_1) * (t'_2 * t'_3)]
+                out += line_eval_times_eval_times_eval_times_eval(
                     take_modulo=False, check_constant=False, clean_constant=False
-                )  # Compute t2 * t3
-                out += line_eval_times_eval_times_eval(
+                )
+                stack.apply(
+                    ["t_3 * t'_1", "t'_2 * t'_3"],
+                    [("t_3 * t'_1 * t'_2 * t'_3", N_ELEMENTS_EVALUATION_TIMES_EVALUATION)],
+                )
+                out += line_eval_times_eval_times_eval_times_eval_times_eval_times_eval(
                     take_modulo=False, check_constant=False, clean_constant=False
-                )  # Compute t1 * (t2 * t3)
-                # Compute f_i * (t1 * t2 * t3)
-                out += miller_loop_output_times_eval_times_eval_times_eval(
-                    take_modulo=take_modulo_F, check_constant=False, clean_constant=False, is_constant_reused=False
                 )
-                # After this, the stack is: lambda_(2*T1) lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3
-                # T1 T2 T3, altstack = [(f_i^2 * t_1 * t_2 * t_3)]
-                out += Script.parse_string(" ".join(["OP_TOALTSTACK"] * N_ELEMENTS_MILLER_OUTPUT))
-                # After this, the stack is: lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T2 T3 (2*T1),
-                # altstack = [(f_i^2 * t_1 * t_2 * t_3)]
-                stack_length_added = 0
-                out += roll(
-                    position=9 * N_POINTS_TWIST + 3 * N_POINTS_CURVE + 3 * EXTENSION_DEGREE + stack_length_added - 1,
-                    n_elements=EXTENSION_DEGREE,
-                )  # Roll lambda_(2*T1)
-                stack_length_added += EXTENSION_DEGREE
-                out += roll(position=3 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST)  # Roll T1
-                stack_length_added += N_POINTS_TWIST
-                out += point_doubling_twisted_curve(
-                    take_modulo=take_modulo_T, check_constant=False, clean_constant=False
-                )  # Compute 2*T1
-                # After this, the stack is: lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T3 (2*T1) (2*T2),
-                # altstack = [(f_i^2 * t_1 * t_2 * t_3)]
-                stack_length_added = 0
-                out += roll(
-                    position=9 * N_POINTS_TWIST + 3 * N_POINTS_CURVE + 2 * EXTENSION_DEGREE + stack_length_added - 1,
-                    n_elements=EXTENSION_DEGREE,
-                )  # Roll lambda_(2*T2)
-                stack_length_added += EXTENSION_DEGREE
-                out += roll(position=3 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST)  # Roll T2
-                stack_length_added += N_POINTS_TWIST
-                out += point_doubling_twisted_curve(
-                    take_modulo=take_modulo_T, check_constant=False, clean_constant=False
-                )  # Compute 2*T2
-                # After this, the stack is: P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 (2*T1) (2*T2) (2*T3),
-                # altstack = [(f_i^2 * t_1 * t_2 * t_3)]
-                stack_length_added = 0
-                out += roll(
-                    position=9 * N_POINTS_TWIST + 3 * N_POINTS_CURVE + EXTENSION_DEGREE + stack_length_added - 1,
-                    n_elements=EXTENSION_DEGREE,
-                )  # Roll lambda_(2*T3)
-                stack_length_added += EXTENSION_DEGREE
-                out += roll(position=3 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST)  # Roll T3
-                stack_length_added += N_POINTS_TWIST
+                stack.apply(["t_1 * t_2", "t_3 * t'_1 * t'_2 * t'_3"], [("dense", N_ELEMENTS_MILLER_OUTPUT)])
+                if not is_first_iteration:
+                    # After this, the stack is: .. P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T1 T2 T3
+                    # [f_i^2 * (t_1 * t_2) * (t_3 * t'_1) * (t'_2 * t'_3)]
+                    out += miller_loop_output_times_eval_times_eval_times_eval_times_eval_times_eval_times_eval(
+                        take_modulo=take_modulo_F[i],
+                        check_constant=False,
+                        clean_constant=False,
+                        is_constant_reused=False,
+                    )
+                    stack.apply(["f", "dense"], [("dense", N_ELEMENTS_MILLER_OUTPUT)])
+            stack.rename("dense", "f")
+
+            # After this, the stack is: .. P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 (2*T1 [pm Q1]) (2*T2 [pm Q2]) (2*T3 [pm Q3]),
+            # altstack = [f_(i+1)]
+            out += stack.to_altstack("f")
+            for j in (1, 2, 3):
+                is_last_point = j == 3  # noqa: PLR2004
+                out += stack.roll(f"lambda_2T{j}")
+                out += stack.roll(f"T{j}")
                 out += point_doubling_twisted_curve(
-                    take_modulo=take_modulo_T, check_constant=False, clean_constant=clean_final
-                )  # Compute 2*T3
-                # After this, the stack is: P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 (2*T1) (2*T2) (2*T3) (f_i^2 * t_1 * t_2 * t_3)
-                out += Script.parse_string(" ".join(["OP_FROMALTSTACK"] * N_ELEMENTS_MILLER_OUTPUT))
-            else:
-                # After this, the stack is: lambda_(2*T1) lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3
-                # T1 T2 T3 f_i^2
+                    take_modulo=take_modulo_T[i],
+                    check_constant=False,
+                    clean_constant=clean_final and is_last_point and exp_miller_loop[i] == 0,
+                )
+                stack.apply([f"lambda_2T{j}", f"T{j}"], [(f"T{j}", N_POINTS_TWIST)])
+                if exp_miller_loop[i] != 0:
+                    out += stack.roll(f"lambda_2T{j}_pm_Q{j}")
+                    out += stack.roll(f"T{j}")
+                    out += stack.pick(f"{pm_Q}{j}")
+                    out += point_addition_twisted_curve(
+                        take_modulo=take_modulo_T[i],
+                        check_constant=False,
+                        clean_constant=clean_final and is_last_point,
+                    )
+                    stack.apply([f"lambda_2T{j}_pm_Q{j}", f"T{j}", f"{pm_Q}{j}"], [(f"T{j}", N_POINTS_TWIST)])
+            # After this, the stack is: .. P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T1 T2 T3 f_(i+1)
+            out += stack.from_altstack("f")
+
+        # After this, the stack is: [miller(P1,Q1) * miller(P2,Q2) * miller(P3,Q3)]
+        out += stack.drop("P1", "P2", "P3", "Q1", "Q2", "Q3", "-Q1", "-Q2", "-Q3", "T1", "T2", "T3")
+
+        return optimise_script(out)
+
+    def triple_miller_loop_with_fixed_qs(
+        self,
+        modulo_threshold: int,
+        point_q2: list[int],
+        point_q3: list[int],
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        reduction_cost: str = "count",
+    ) -> Script:
+        """Evaluate the triple miller loop, where Q2 and Q3 are hard-coded in the script.
+
+        Input parameters:
+            - Stack: q .. lambdas P1 P2 P3 Q1
+            - Altstack: []
+        Output:
+            - miller(P1,Q1) * miller(P2,Q2) * miller(P3,Q3)
+        Assumption on data:
+            - Pi are passed as couples of integers (minimally encoded, in little endian)
+            - Q1 is passed as a couple of elements in Fq2 (see Fq2.py)
+            - lambdas are the gradients needed to compute (t-1)Q1, as in miller_loop
+            - point_q2 and point_q3 are not the point at infinity
+            - miller(P1,Q1) * miller(P2,Q2) * miller(P3,Q3) is in Fq4
+
+        The lines of the Miller loops of Q2 and Q3 are computed by miller_loop_lines when the script is generated and
+        hard-coded in the script: for Q2 and Q3, only the line evaluations at P2 and P3 are computed in the script (see
+        line_eval_fixed_q), and no gradient is required in the unlocking script. The computation of Q1 and the updates
+        of f are the same as in triple_miller_loop, and so is the output.
+        """
+        q = self.MODULUS
+        exp_miller_loop = self.exp_miller_loop
+        point_doubling_twisted_curve = self.point_doubling_twisted_curve
+        point_addition_twisted_curve = self.point_addition_twisted_curve
+        point_negation_twisted_curve = self.point_negation_twisted_curve
+        line_eval = self.line_eval
+        line_eval_fixed_q = self.line_eval_fixed_q
+        line_eval_times_eval = self.line_eval_times_eval
+        line_eval_times_eval_times_eval = self.line_eval_times_eval_times_eval
+        line_eval_times_eval_times_eval_times_eval = self.line_eval_times_eval_times_eval_times_eval
+        line_eval_times_eval_times_eval_times_eval_times_eval_times_eval = (
+            self.line_eval_times_eval_times_eval_times_eval_times_eval_times_eval
+        )
+        miller_loop_output_square = self.miller_loop_output_square
+        miller_loop_output_times_eval_times_eval_times_eval = self.miller_loop_output_times_eval_times_eval_times_eval
+        miller_loop_output_times_eval_times_eval_times_eval_times_eval_times_eval_times_eval = (
+            self.miller_loop_output_times_eval_times_eval_times_eval_times_eval_times_eval_times_eval
+        )
+
+        EXTENSION_DEGREE = self.EXTENSION_DEGREE
+        N_POINTS_CURVE = self.N_POINTS_CURVE
+        N_POINTS_TWIST = self.N_POINTS_TWIST
+        N_ELEMENTS_MILLER_OUTPUT = self.N_ELEMENTS_MILLER_OUTPUT
+        N_ELEMENTS_EVALUATION_OUTPUT = self.N_ELEMENTS_EVALUATION_OUTPUT
+        N_ELEMENTS_EVALUATION_TIMES_EVALUATION = self.N_ELEMENTS_EVALUATION_TIMES_EVALUATION
+
+        lines_q2 = self.miller_loop_lines(point_q2)
+        lines_q3 = self.miller_loop_lines(point_q3)
+
+        def eval_fixed_line(point_p: str, line: tuple[list[int], list[int]], name: str) -> Script:
+            out = stack.pick(point_p)
+            out += line_eval_fixed_q(
+                gradient=line[0],
+                point_q=line[1],
+                take_modulo=True,
+                check_constant=False,
+                clean_constant=False,
+                is_constant_reused=False,
+            )
+            stack.apply([point_p], [(name, N_ELEMENTS_EVALUATION_OUTPUT)])
+            return out
+
+        def eval_line(gradient: str, point_q: str, name: str) -> Script:
+            out = stack.pick(gradient)
+            out += stack.pick(point_q)
+            out += stack.pick("P1")
+            out += line_eval(take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False)
+            stack.apply([gradient, point_q, "P1"], [(name, N_ELEMENTS_EVALUATION_OUTPUT)])
+            return out
+
+        out = ScriptBuilder()
+        if check_constant:
+            out += Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([q]) + Script([OP_EQUALVERIFY])
+
+        # The slots accessed by the loop, from the bottom: the gradients of Q1 (as in miller_loop), the Pi's and Q1
+        slots = []
+        for i in range(len(exp_miller_loop) - 1):
+            if exp_miller_loop[i] != 0:
+                slots.append(("lambda_2T_pm_Q", EXTENSION_DEGREE))
+            slots.append(("lambda_2T", EXTENSION_DEGREE))
+        stack = StackTracker(
+            [*slots, ("P1", N_POINTS_CURVE), ("P2", N_POINTS_CURVE), ("P3", N_POINTS_CURVE), ("Q1", N_POINTS_TWIST)]
+        )
+
+        # After this, the stack is: P1 P2 P3 Q1 -Q1 T1
+        out += stack.pick("Q1")
+        out += point_negation_twisted_curve(take_modulo=False, check_constant=False, clean_constant=False)
+        stack.apply(["Q1"], [("-Q1", N_POINTS_TWIST)])
+        if exp_miller_loop[-1] == 1:
+            out += stack.pick("Q1")
+            stack.rename("Q1", "T1")
+        elif exp_miller_loop[-1] == -1:
+            out += stack.pick("-Q1")
+            stack.rename("-Q1", "T1")
+        else:
+            msg = "Last element of exp_miller_loop must be non-zero."
+            raise ValueError(msg)
+
+        take_modulo_F, _ = self.triple_miller_loop_reduction_plan(
+            modulo_threshold=modulo_threshold, reduction_cost=reduction_cost
+        )
+        _, take_modulo_T = self.miller_loop_reduction_plan(
+            modulo_threshold=modulo_threshold, reduction_cost=reduction_cost
+        )
+
+        clean_final = False
+        # After this, the stack is: P1 P2 P3 Q1 -Q1 uQ1 [miller(P1,Q1) * miller(P2,Q2) * miller(P3,Q3)]
+        for i in range(len(exp_miller_loop) - 2, -1, -1):
+            if i == 0:
+                clean_final = clean_constant
+            k = len(exp_miller_loop) - 2 - i
+            is_first_iteration = i == len(exp_miller_loop) - 2
+            pm_Q1 = "Q1" if exp_miller_loop[i] == 1 else "-Q1"
+
+            if not is_first_iteration:
+                # After this, the stack is: .. P1 P2 P3 Q1 -Q1 T1 f_i^2
                 out += miller_loop_output_square(take_modulo=False, check_constant=False, clean_constant=False)
-                # After this, the stack is: lambda_(2* T1 pm Q1) lambda_(2* T2 pm Q2) lambda_(2* T3 pm Q3) lambda_(2*T1)
-                # lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T1 T2 T3 f_i^2 t_1
-                stack_length_added = 0
-                out += pick(
-                    position=9 * N_POINTS_TWIST
-                    + 3 * N_POINTS_CURVE
-                    + 3 * EXTENSION_DEGREE
-                    + N_ELEMENTS_MILLER_OUTPUT
-                    + stack_length_added
-                    - 1,
-                    n_elements=EXTENSION_DEGREE,
-                )  # Pick lambda_(2*T1)
-                stack_length_added += EXTENSION_DEGREE
-                out += pick(
-                    position=3 * N_POINTS_TWIST + N_ELEMENTS_MILLER_OUTPUT + stack_length_added - 1,
-                    n_elements=N_POINTS_TWIST,
-                )  # Pick T1
-                stack_length_added += N_POINTS_TWIST
-                out += pick(
-                    position=9 * N_POINTS_TWIST
-                    + 3 * N_POINTS_CURVE
-                    + N_ELEMENTS_MILLER_OUTPUT
-                    + stack_length_added
-                    - 1,
-                    n_elements=N_POINTS_CURVE,
-                )  # Pick P1
-                stack_length_added += N_POINTS_TWIST
-                out += line_eval(
-                    take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
-                )  # Compute t_1 = ev_(l_(T1,T1))(P_1)
-                # After this, the stack is: lambda_(2* T1 pm Q1) lambda_(2* T2 pm Q2) lambda_(2* T3 pm Q3) lambda_(2*T1)
-                # lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T1 T2 T3 f_i^2 (t_1 * t_2)
-                stack_length_added = 0
-                out += pick(
-                    position=9 * N_POINTS_TWIST
-                    + 3 * N_POINTS_CURVE
-                    + 2 * EXTENSION_DEGREE
-                    + N_ELEMENTS_MILLER_OUTPUT
-                    + N_ELEMENTS_EVALUATION_OUTPUT
-                    + stack_length_added
-                    - 1,
-                    n_elements=EXTENSION_DEGREE,
-                )  # Pick lambda_(2*T2)
-                stack_length_added += EXTENSION_DEGREE
-                out += pick(
-                    position=2 * N_POINTS_TWIST
-                    + N_ELEMENTS_MILLER_OUTPUT
-                    + N_ELEMENTS_EVALUATION_OUTPUT
-                    + stack_length_added
-                    - 1,
-                    n_elements=N_POINTS_TWIST,
-                )  # Pick T2
-                stack_length_added += N_POINTS_TWIST
-                out += pick(
-                    position=9 * N_POINTS_TWIST
-                    + 2 * N_POINTS_CURVE
-                    + N_ELEMENTS_MILLER_OUTPUT
-                    + N_ELEMENTS_EVALUATION_OUTPUT
-                    + stack_length_added
-                    - 1,
-                    n_elements=N_POINTS_CURVE,
-                )  # Pick P2
-                stack_length_added += N_POINTS_CURVE
-                out += line_eval(
-                    take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
-                )  # Compute t_2 = ev_(l_(T2,T2))(P_2)
-                out += line_eval_times_eval(
-                    take_modulo=False, check_constant=False, clean_constant=False
-                )  # Compute t1 * t2
-                # After this, the stack is: lambda_(2* T1 pm Q1) lambda_(2* T2 pm Q2) lambda_(2* T3 pm Q3) lambda_(2*T1)
-                # lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T1 T2 T3 f_i^2 (t_1 * t_2) t_3
-                stack_length_added = 0
-                out += pick(
-                    position=9 * N_POINTS_TWIST
-                    + 3 * N_POINTS_CURVE
-                    + EXTENSION_DEGREE
-                    + N_ELEMENTS_MILLER_OUTPUT
-                    + N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                    + stack_length_added
-                    - 1,
-                    n_elements=EXTENSION_DEGREE,
-                )  # Pick lambda_(2*T3)
-                stack_length_added += EXTENSION_DEGREE
-                out += pick(
-                    position=N_POINTS_TWIST
-                    + N_ELEMENTS_MILLER_OUTPUT
-                    + N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                    + stack_length_added
-                    - 1,
-                    n_elements=N_POINTS_TWIST,
-                )  # Pick T3
-                stack_length_added += N_POINTS_TWIST
-                out += pick(
-                    position=9 * N_POINTS_TWIST
-                    + N_POINTS_CURVE
-                    + N_ELEMENTS_MILLER_OUTPUT
-                    + N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                    + stack_length_added
-                    - 1,
-                    n_elements=N_POINTS_CURVE,
-                )  # Pick P3
-                stack_length_added += N_POINTS_CURVE
-                out += line_eval(
-                    take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
-                )  # Compute t_3 = ev_(l_(T3,T3))(P_3)
-                # After this, the stack is: lambda_(2* T1 pm Q1) lambda_(2* T2 pm Q2) lambda_(2* T3 pm Q3) lambda_(2*T1)
-                # lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T1 T2 T3 f_i^2 (t_1 * t_2) (t_3 * t'_1)
-                stack_length_added = 0
-                out += pick(
-                    position=9 * N_POINTS_TWIST
-                    + 3 * N_POINTS_CURVE
-                    + N_ELEMENTS_MILLER_OUTPUT
-                    + N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                    + N_ELEMENTS_EVALUATION_OUTPUT
-                    + 6 * EXTENSION_DEGREE
-                    + stack_length_added
-                    - 1,
-                    n_elements=EXTENSION_DEGREE,
-                )  # Pick lambda_(2*T1 pm Q)
-                stack_length_added += EXTENSION_DEGREE
-                if exp_miller_loop[i] == 1:
-                    out += pick(
-                        position=9 * N_POINTS_TWIST
-                        + N_ELEMENTS_MILLER_OUTPUT
-                        + N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                        + N_ELEMENTS_EVALUATION_OUTPUT
-                        + stack_length_added
-                        - 1,
-                        n_elements=N_POINTS_TWIST,
-                    )  # Pick Q1
-                    stack_length_added += N_POINTS_TWIST
-                elif exp_miller_loop[i] == -1:
-                    out += pick(
-                        position=6 * N_POINTS_TWIST
-                        + N_ELEMENTS_MILLER_OUTPUT
-                        + N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                        + N_ELEMENTS_EVALUATION_OUTPUT
-                        + stack_length_added
-                        - 1,
-                        n_elements=N_POINTS_TWIST,
-                    )  # Pick -Q1
-                    stack_length_added += N_POINTS_TWIST
-                else:
-                    raise ValueError
-                out += pick(
-                    position=9 * N_POINTS_TWIST
-                    + 3 * N_POINTS_CURVE
-                    + N_ELEMENTS_MILLER_OUTPUT
-                    + N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                    + N_ELEMENTS_EVALUATION_OUTPUT
-                    + stack_length_added
-                    - 1,
-                    n_elements=N_POINTS_CURVE,
-                )  # Pick P1
-                stack_length_added += N_POINTS_CURVE
-                out += line_eval(
-                    take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
-                )  # Compute t'_1 = ev_(l_(2*T1,pm Q1))(P_1)
-                out += line_eval_times_eval(
-                    take_modulo=False, check_constant=False, clean_constant=False
-                )  # Compute t_3 * t'_1
-                # After this, the stack is: lambda_(2* T1 pm Q1) lambda_(2* T2 pm Q2) lambda_(2* T3 pm Q3) lambda_(2*T1)
-                # lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T1 T2 T3 f_i^2 (t_1 * t_2) (t_3 * t'_1) t'_2
-                stack_length_added = 0
-                out += pick(
-                    position=9 * N_POINTS_TWIST
-                    + 3 * N_POINTS_CURVE
-                    + N_ELEMENTS_MILLER_OUTPUT
-                    + 2 * N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                    + 5 * EXTENSION_DEGREE
-                    + stack_length_added
-                    - 1,
-                    n_elements=EXTENSION_DEGREE,
-                )  # Pick lambda_(2*T2 pm Q)
-                stack_length_added += EXTENSION_DEGREE
-                if exp_miller_loop[i] == 1:
-                    out += pick(
-                        position=8 * N_POINTS_TWIST
-                        + N_ELEMENTS_MILLER_OUTPUT
-                        + 2 * N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                        + stack_length_added
-                        - 1,
-                        n_elements=N_POINTS_TWIST,
-                    )  # Pick Q2
-                    stack_length_added += N_POINTS_TWIST
-                elif exp_miller_loop[i] == -1:
-                    out += pick(
-                        position=5 * N_POINTS_TWIST
-                        + N_ELEMENTS_MILLER_OUTPUT
-                        + 2 * N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                        + stack_length_added
-                        - 1,
-                        n_elements=N_POINTS_TWIST,
-                    )  # Pick -Q2
-                    stack_length_added += N_POINTS_TWIST
-                else:
-                    raise ValueError
-                out += pick(
-                    position=9 * N_POINTS_TWIST
-                    + 2 * N_POINTS_CURVE
-                    + N_ELEMENTS_MILLER_OUTPUT
-                    + 2 * N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                    + stack_length_added
-                    - 1,
-                    n_elements=N_POINTS_CURVE,
-                )  # Pick P2
-                stack_length_added += N_POINTS_CURVE
-                out += line_eval(
-                    take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
-                )  # Compute t'_2 = ev_(l_(2*T2,pm Q2))(P_2)
-                # After this, the stack is: lambda_(2* T1 pm Q1) lambda_(2* T2 pm Q2) lambda_(2* T3 pm Q3) lambda_(2*T1)
-                # lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T1 T2 T3 f_i^2
-                # (t_1 * t_2) (t_3 * t'_1) (t'_2 * t'_3)
-                stack_length_added = 0
-                out += pick(
-                    position=9 * N_POINTS_TWIST
-                    + 3 * N_POINTS_CURVE
-                    + N_ELEMENTS_MILLER_OUTPUT
-                    + 2 * N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                    + N_ELEMENTS_EVALUATION_OUTPUT
-                    + 4 * EXTENSION_DEGREE
-                    + stack_length_added
-                    - 1,
-                    n_elements=EXTENSION_DEGREE,
-                )  # Pick lambda_(2*T3 pm Q)
-                stack_length_added += EXTENSION_DEGREE
-                if exp_miller_loop[i] == 1:
-                    out += pick(
-                        position=7 * N_POINTS_TWIST
-                        + N_ELEMENTS_MILLER_OUTPUT
-                        + 2 * N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                        + N_ELEMENTS_EVALUATION_OUTPUT
-                        + stack_length_added
-                        - 1,
-                        n_elements=N_POINTS_TWIST,
-                    )  # Pick Q3
-                    stack_length_added += N_POINTS_TWIST
-                elif exp_miller_loop[i] == -1:
-                    out += pick(
-                        position=4 * N_POINTS_TWIST
-                        + N_ELEMENTS_MILLER_OUTPUT
-                        + 2 * N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                        + N_ELEMENTS_EVALUATION_OUTPUT
-                        + stack_length_added
-                        - 1,
-                        n_elements=N_POINTS_TWIST,
-                    )  # Pick -Q3
-                    stack_length_added += N_POINTS_TWIST
-                else:
-                    raise ValueError
-                out += pick(
-                    position=9 * N_POINTS_TWIST
-                    + N_POINTS_CURVE
-                    + N_ELEMENTS_MILLER_OUTPUT
-                    + 2 * N_ELEMENTS_EVALUATION_TIMES_EVALUATION
-                    + N_ELEMENTS_EVALUATION_OUTPUT
-                    + stack_length_added
-                    - 1,
-                    n_elements=N_POINTS_CURVE,
-                )  # Pick P3
-                stack_length_added += N_POINTS_CURVE
-                out += line_eval(
-                    take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
-                )  # Compute t'_3 = ev_(l_(2*T3,pm Q3))(P_3)
-                out += line_eval_times_eval(
-                    take_modulo=False, check_constant=False, clean_constant=False
-                )  # Compute t'_2 * t'_3
-                # After this, the stack is: lambda_(2* T1 pm Q1) lambda_(2* T2 pm Q2) lambda_(2* T3 pm Q3) lambda_(2*T1)
-                # lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T1 T2 T3
-                # [f_i^2 * (t_1 * t_2) * (t_3 * t'_1) * (t'_2 * t'_3)]
-                # Compute (t_3 * t'_1) * (t'_2 * t'_3)
+
+            # After this, the stack is: .. P1 P2 P3 Q1 -Q1 T1 [f_i^2] t_1 t_2 t_3
+            out += eval_line("lambda_2T", "T1", "t_1")
+            out += eval_fixed_line("P2", lines_q2[k][0], "t_2")
+            if exp_miller_loop[i] == 0:
+                out += eval_fixed_line("P3", lines_q3[k][0], "t_3")
+                # After this, the stack is: .. P1 P2 P3 Q1 -Q1 T1 [f_i^2] (t_1 * t_2 * t_3)
+                out += line_eval_times_eval(take_modulo=False, check_constant=False, clean_constant=False)
+                stack.apply(["t_2", "t_3"], [("t_2 * t_3", N_ELEMENTS_EVALUATION_TIMES_EVALUATION)])
+                out += line_eval_times_eval_times_eval(take_modulo=False, check_constant=False, clean_constant=False)
+                stack.apply(["t_1", "t_2 * t_3"], [("dense", N_ELEMENTS_MILLER_OUTPUT)])
+                if not is_first_iteration:
+                    # After this, the stack is: .. P1 P2 P3 Q1 -Q1 T1 (f_i^2 * t_1 * t_2 * t_3)
+                    out += miller_loop_output_times_eval_times_eval_times_eval(
+                        take_modulo=take_modulo_F[i],
+                        check_constant=False,
+                        clean_constant=False,
+                        is_constant_reused=False,
+                    )
+                    stack.apply(["f", "dense"], [("dense", N_ELEMENTS_MILLER_OUTPUT)])
+            else:
+                # After this, the stack is: .. P1 P2 P3 Q1 -Q1 T1 [f_i^2] (t_1 * t_2) (t_3 * t'_1) (t'_2 * t'_3)
+                out += line_eval_times_eval(take_modulo=False, check_constant=False, clean_constant=False)
+                stack.apply(["t_1", "t_2"], [("t_1 * t_2", N_ELEMENTS_EVALUATION_TIMES_EVALUATION)])
+                out += eval_fixed_line("P3", lines_q3[k][0], "t_3")
+                out += eval_line("lambda_2T_pm_Q", pm_Q1, "t'_1")
+                out += line_eval_times_eval(take_modulo=False, check_constant=False, clean_constant=False)
+                stack.apply(["t_3", "t'_1"], [("t_3 * t'_1", N_ELEMENTS_EVALUATION_TIMES_EVALUATION)])
+                out += eval_fixed_line("P2", lines_q2[k][1], "t'_2")
+                out += eval_fixed_line("P3", lines_q3[k][1], "t'_3")
+                out += line_eval_times_eval(take_modulo=False, check_constant=False, clean_constant=False)
+                stack.apply(["t'_2", "t'_3"], [("t'_2 * t'_3", N_ELEMENTS_EVALUATION_TIMES_EVALUATION)])
+                # After this, the stack is: .. P1 P2 P3 Q1 -Q1 T1 [f_i^2] [(t_1 * t_2) * (t_3 * t'_1) * (t'_2 * t'_3)]
                 out += line_eval_times_eval_times_eval_times_eval(
                     take_modulo=False, check_constant=False, clean_constant=False
                 )
-                # Compute (t_1 * t_2) * (t_3 * t'_1) * (t'_2 * t'_3)
+                stack.apply(
+                    ["t_3 * t'_1", "t'_2 * t'_3"],
+                    [("t_3 * t'_1 * t'_2 * t'_3", N_ELEMENTS_EVALUATION_TIMES_EVALUATION)],
+                )
                 out += line_eval_times_eval_times_eval_times_eval_times_eval_times_eval(
                     take_modulo=False, check_constant=False, clean_constant=False
                 )
-                out += miller_loop_output_times_eval_times_eval_times_eval_times_eval_times_eval_times_eval(
-                    take_modulo=take_modulo_F, check_constant=False, clean_constant=False, is_constant_reused=False
-                )  # Compute [f_i * (t_1 * t_2) * (t_3 * t'_1) * (t'_2 * t'_3)]
-                # After this, the stack is: lambda_(2* T1 pm Q1) lambda_(2* T2 pm Q2) lambda_(2* T3 pm Q3) lambda_(2*T1)
-                # lambda_(2*T2) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T1 T2 T3,
-                # altstack = [f_i^2 * (t_1 * t_2) * (t_3 * t'_1) * (t'_2 * t'_3)]
-                out += Script.parse_string(" ".join(["OP_TOALTSTACK"] * N_ELEMENTS_MILLER_OUTPUT))
-                # After this, the stack is: lambda_(2* T2 pm Q2) lambda_(2* T3 pm Q3) lambda_(2*T2) lambda_(2*T3)
-                # P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T2 T3 (2*T1 pm Q1),
-                # altstack = [f_i^2 * (t_1 * t_2) * (t_3 * t'_1) * (t'_2 * t'_3)]
-                stack_length_added = 0
-                out += roll(
-                    position=9 * N_POINTS_TWIST + 3 * N_POINTS_CURVE + 3 * EXTENSION_DEGREE + stack_length_added - 1,
-                    n_elements=EXTENSION_DEGREE,
-                )  # Roll lambda_(2*T1)
-                stack_length_added += EXTENSION_DEGREE
-                out += roll(position=3 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST)  # Roll T1
-                stack_length_added += 0
-                out += point_doubling_twisted_curve(
-                    take_modulo=take_modulo_T, check_constant=False, clean_constant=False
-                )  # Compute 2 * T1
-                stack_length_added = 0
-                out += roll(
-                    position=9 * N_POINTS_TWIST + 3 * N_POINTS_CURVE + 5 * EXTENSION_DEGREE + stack_length_added - 1,
-                    n_elements=EXTENSION_DEGREE,
-                )  # Roll lambda_(2* T1 pm Q1)
-                stack_length_added += EXTENSION_DEGREE
-                out += roll(
-                    position=EXTENSION_DEGREE + N_POINTS_TWIST - 1, n_elements=N_POINTS_TWIST
-                )  # Bring 2*T1 on top of the stack
-                if exp_miller_loop[i] == 1:
-                    out += pick(
-                        position=9 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST
-                    )  # Pick Q1
-                    stack_length_added += N_POINTS_TWIST
-                elif exp_miller_loop[i] == -1:
-                    out += pick(
-                        position=6 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST
-                    )  # Pick -Q1
-                    stack_length_added += N_POINTS_TWIST
-                else:
-                    raise ValueError
-                out += point_addition_twisted_curve(
-                    take_modulo=take_modulo_T, check_constant=False, clean_constant=False
-                )
-                # After this, the stack is: lambda_(2* T3 pm Q3) lambda_(2*T3) P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T3
-                # (2*T1 pm Q1) (2*T2 pm Q2),
-                # altstack = [f_i^2 * (t_1 * t_2) * (t_3 * t'_1) * (t'_2 * t'_3)]
-                stack_length_added = 0
-                out += roll(
-                    position=9 * N_POINTS_TWIST + 3 * N_POINTS_CURVE + 2 * EXTENSION_DEGREE + stack_length_added - 1,
-                    n_elements=EXTENSION_DEGREE,
-                )  # Roll lambda_(2*T2)
-                stack_length_added += EXTENSION_DEGREE
-                out += roll(position=3 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST)  # Roll T2
-                stack_length_added += 0
-                out += point_doubling_twisted_curve(
-                    take_modulo=take_modulo_T, check_constant=False, clean_constant=False
-                )  # Compute 2 * T2
-                stack_length_added = 0
-                out += roll(
-                    position=9 * N_POINTS_TWIST + 3 * N_POINTS_CURVE + 3 * EXTENSION_DEGREE + stack_length_added - 1,
-                    n_elements=EXTENSION_DEGREE,
-                )  # Roll lambda_(2* T2 pm Q2)
-                stack_length_added += EXTENSION_DEGREE
-                out += roll(
-                    position=EXTENSION_DEGREE + N_POINTS_TWIST - 1, n_elements=N_POINTS_TWIST
-                )  # Bring 2*T2 on top of the stack
-                if exp_miller_loop[i] == 1:
-                    out += pick(
-                        position=8 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST
-                    )  # Pick Q2
-                    stack_length_added += N_POINTS_TWIST
-                elif exp_miller_loop[i] == -1:
-                    out += pick(
-                        position=5 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST
-                    )  # Pick -Q2
-                    stack_length_added += N_POINTS_TWIST
-                else:
-                    raise ValueError
-                out += point_addition_twisted_curve(
-                    take_modulo=take_modulo_T, check_constant=False, clean_constant=False
-                )
-                # After this, the stack is: P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 (2*T1 pm Q1) (2*T2 pm Q2) (2*T3 pm Q3),
-                # altstack = [f_i^2 * (t_1 * t_2) * (t_3 * t'_1) * (t'_2 * t'_3)]
-                stack_length_added = 0
-                out += roll(
-                    position=9 * N_POINTS_TWIST + 3 * N_POINTS_CURVE + EXTENSION_DEGREE + stack_length_added - 1,
-                    n_elements=EXTENSION_DEGREE,
-                )  # Roll lambda_(2*T3)
-                stack_length_added += EXTENSION_DEGREE
-                out += roll(position=3 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST)  # Roll T3
-                stack_length_added += 0
-                out += point_doubling_twisted_curve(
-                    take_modulo=take_modulo_T, check_constant=False, clean_constant=False
-                )  # Compute 2 * T3
-                stack_length_added = 0
-                out += roll(
-                    position=9 * N_POINTS_TWIST + 3 * N_POINTS_CURVE + EXTENSION_DEGREE + stack_length_added - 1,
-                    n_elements=EXTENSION_DEGREE,
-                )  # Roll lambda_(2* T3 pm Q3)
-                stack_length_added += EXTENSION_DEGREE
-                out += roll(
-                    position=EXTENSION_DEGREE + N_POINTS_TWIST - 1, n_elements=N_POINTS_TWIST
-                )  # Bring 2*T3 on top of the stack
-                if exp_miller_loop[i] == 1:
-                    out += pick(
-                        position=7 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST
-                    )  # Pick Q3
-                    stack_length_added += N_POINTS_TWIST
-                elif exp_miller_loop[i] == -1:
-                    out += pick(
-                        position=4 * N_POINTS_TWIST + stack_length_added - 1, n_elements=N_POINTS_TWIST
-                    )  # Pick -Q3
-                    stack_length_added += N_POINTS_TWIST
-                else:
-                    raise ValueError
+                stack.apply(["t_1 * t_2", "t_3 * t'_1 * t'_2 * t'_3"], [("dense", N_ELEMENTS_MILLER_OUTPUT)])
+                if not is_first_iteration:
+                    # After this, the stack is: .. P1 P2 P3 Q1 -Q1 T1
+                    # [f_i^2 * (t_1 * t_2) * (t_3 * t'_1) * (t'_2 * t'_3)]
+                    out += miller_loop_output_times_eval_times_eval_times_eval_times_eval_times_eval_times_eval(
+                        take_modulo=take_modulo_F[i],
+                        check_constant=False,
+                        clean_constant=False,
+                        is_constant_reused=False,
+                    )
+                    stack.apply(["f", "dense"], [("dense", N_ELEMENTS_MILLER_OUTPUT)])
+            stack.rename("dense", "f")
+
+            # After this, the stack is: .. P1 P2 P3 Q1 -Q1 (2*T1 [pm Q1]), altstack = [f_(i+1)]
+            out += stack.to_altstack("f")
+            out += stack.roll("lambda_2T")
+            out += stack.roll("T1")
+            out += point_doubling_twisted_curve(
+                take_modulo=take_modulo_T[i],
+                check_constant=False,
+                clean_constant=clean_final and exp_miller_loop[i] == 0,
+            )
+            stack.apply(["lambda_2T", "T1"], [("T1", N_POINTS_TWIST)])
+            if exp_miller_loop[i] != 0:
+                out += stack.roll("lambda_2T_pm_Q")
+                out += stack.roll("T1")
+                out += stack.pick(pm_Q1)
                 out += point_addition_twisted_curve(
-                    take_modulo=take_modulo_T, check_constant=False, clean_constant=clean_final
+                    take_modulo=take_modulo_T[i], check_constant=False, clean_constant=clean_final
                 )
-                # After this, the stack is: P1 P2 P3 Q1 Q2 Q3 -Q1 -Q2 -Q3 T2 T3 (2*T1 pm Q1) (2*T2 pm Q2) (2*T3 pm Q3)
-                # [f_i^2 * (t_1 * t_2) * (t_3 * t'_1) * (t'_2 * t'_3)]
-                # Roll [f_i^2 * (t_1 * t_2) * (t_3 * t'_1) * (t'_2 * t'_3)]
-                out += Script.parse_string(" ".join(["OP_FROMALTSTACK"] * N_ELEMENTS_MILLER_OUTPUT))
+                stack.apply(["lambda_2T_pm_Q", "T1", pm_Q1], [("T1", N_POINTS_TWIST)])
+            # After this, the stack is: .. P1 P2 P3 Q1 -Q1 T1 f_(i+1)
+            out += stack.from_altstack("f")
 
         # After this, the stack is: [miller(P1,Q1) * miller(P2,Q2) * miller(P3,Q3)]
-        out += roll(
-            position=9 * N_POINTS_TWIST + 3 * N_POINTS_CURVE + N_ELEMENTS_MILLER_OUTPUT - 1,
-            n_elements=9 * N_POINTS_TWIST + 3 * N_POINTS_CURVE,
-        )
-        out += Script.parse_string(" ".join(["OP_DROP"] * (9 * N_POINTS_TWIST + 3 * N_POINTS_CURVE)))
-        # ----------------------------------------------
+        out += stack.drop("P1", "P2", "P3", "Q1", "-Q1", "T1")
 
         return optimise_script(out)
 
+    def triple_miller_loop_reduction_plan(
+        self, modulo_threshold: int, reduction_cost: str = "count"
+    ) -> tuple[list[bool], list[bool]]:
+        """Compute the iterations of triple_miller_loop at which f and the Tj's are reduced.
+
+        The plan is computed with plan_reductions, separately for f and the Tj's, with the same estimates as
+        miller_loop_reduction_plan. The only difference is that the update of f is now always of the form:
+        f <-- f^2 * Dense, where Dense is the product of three (if exp_miller_loop[i] == 0) or six line evaluations.
+        At the last iteration, f and the Tj's are always reduced.
+
+        Args:
+            modulo_threshold (int): The maximum bit size of the values on the stack.
+            reduction_cost (str): The cost model of the reductions, one of REDUCTION_COSTS. With "count" (the
+                default), the plan reduces only when a value would otherwise exceed modulo_threshold.
+
+        Returns:
+            The lists take_modulo_F and take_modulo_T, such that take_modulo_F[i] (resp. take_modulo_T[i]) is True if f
+            (resp. the Tj's) is reduced at the iteration of triple_miller_loop corresponding to exp_miller_loop[i].
+
+        """
+        if reduction_cost not in REDUCTION_COSTS:
+            msg = f"reduction_cost must be one of {REDUCTION_COSTS}, not {reduction_cost}"
+            raise ValueError(msg)
+
+        exp_miller_loop = self.exp_miller_loop
+        BIT_SIZE_Q = ceil(log2(self.MODULUS))
+        flags = {"check_constant": False, "clean_constant": False}
+
+        def growth_f(i: int) -> Callable[[float], float]:
+            # Next iteration will have: f <-- f^2 * Dense and T_i <-- 2T_i or T_i <-- 2T_i pm Q_i.
+            multiplier = 3 if exp_miller_loop[i] == 0 else 6
+            return lambda size: multiplier * log2(13 * 3) + multiplier * BIT_SIZE_Q + (ceil(log2(13 * 3)) + 2 * size)
+
+        def growth_t(size: float) -> float:
+            return size + BIT_SIZE_Q + log2(6)
+
+        def fragment_f(i: int, take_modulo: bool) -> Script:
+            if i == len(exp_miller_loop) - 2:
+                return Script()
+            if exp_miller_loop[i] == 0:
+                return self.miller_loop_output_times_eval_times_eval_times_eval(
+                    take_modulo=take_modulo, is_constant_reused=False, **flags
+                )
+            return self.miller_loop_output_times_eval_times_eval_times_eval_times_eval_times_eval_times_eval(
+                take_modulo=take_modulo, is_constant_reused=False, **flags
+            )
+
+        def fragment_t(i: int, take_modulo: bool) -> Script:
+            out = Script()
+            for _ in range(3):
+                out += self.point_doubling_twisted_curve(take_modulo=take_modulo, **flags)
+                if exp_miller_loop[i] != 0:
+                    out += self.point_addition_twisted_curve(take_modulo=take_modulo, **flags)
+            return out
+
+        # The iterations at which the reductions are planned, the last one (i = 0) always reduces
+        iterations = range(len(exp_miller_loop) - 2, 0, -1)
+        plan_F = plan_reductions(
+            growth=[growth_f(i) for i in iterations],
+            modulo_threshold=modulo_threshold,
+            initial_size=BIT_SIZE_Q,
+            reset_size=BIT_SIZE_Q,
+            costs=[fragment_reduction_cost(partial(fragment_f, i), reduction_cost) for i in iterations],
+        )
+        plan_T = plan_reductions(
+            growth=[growth_t for _ in iterations],
+            modulo_threshold=modulo_threshold,
+            initial_size=BIT_SIZE_Q,
+            reset_size=BIT_SIZE_Q,
+            costs=[fragment_reduction_cost(partial(fragment_t, i), reduction_cost) for i in iterations],
+        )
+
+        take_modulo_F = [True] * (len(exp_miller_loop) - 1)
+        take_modulo_T = [True] * (len(exp_miller_loop) - 1)
+        for i, reduce_F, reduce_T in zip(iterations, plan_F, plan_T, strict=True):
+            take_modulo_F[i] = reduce_F
+            take_modulo_T[i] = reduce_T
+
+        return take_modulo_F, take_modulo_T
+
     def triple_miller_loop_input(
         self,
         point_p1: list[int],
@@ -1289,18 +558,45 @@ class TripleMillerLoop:
         q = self.MODULUS
         lambdas = [lambdas_q1_exp_miller_loop, lambdas_q2_exp_miller_loop, lambdas_q3_exp_miller_loop]
 
-        out = nums_to_script([q])
+        out = ScriptBuilder()
+        out.append_nums([q])
         # Load lambdas
         for i in range(len(lambdas[0]) - 1, -1, -1):
             for j in range(len(lambdas[0][i]) - 1, -1, -1):
                 for k in range(3):
-                    out += nums_to_script(lambdas[k][i][j])
+                    out.append_nums(lambdas[k][i][j])
+
+        out.append_nums(point_p1)
+        out.append_nums(point_p2)
+        out.append_nums(point_p3)
+        out.append_nums(point_q1)
+        out.append_nums(point_q2)
+        out.append_nums(point_q3)
+
+        return out.to_script()
+
+    def triple_miller_loop_with_fixed_qs_input(
+        self,
+        point_p1: list[int],
+        point_p2: list[int],
+        point_p3: list[int],
+        point_q1: list[int],
+        lambdas_q1_exp_miller_loop: list[list[list[int]]],
+    ) -> Script:
+        """Return the script needed to execute the triple_miller_loop_with_fixed_qs function above.
+
+        Take Pi, Q1, and the lamdbas for computing (t-1)Q1 as input
+        """
+        out = ScriptBuilder()
+        out.append_nums([self.MODULUS])
+        # Load lambdas
+        for i in range(len(lambdas_q1_exp_miller_loop) - 1, -1, -1):
+            for j in range(len(lambdas_q1_exp_miller_loop[i]) - 1, -1, -1):
+                out.append_nums(lambdas_q1_exp_miller_loop[i][j])
 
-        out += nums_to_script(point_p1)
-        out += nums_to_script(point_p2)
-        out += nums_to_script(point_p3)
-        out += nums_to_script(point_q1)
-        out += nums_to_script(point_q2)
-        out += nums_to_script(point_q3)
+        out.append_nums(point_p1)
+        out.append_nums(point_p2)
+        out.append_nums(point_p3)
+        out.append_nums(point_q1)
 
-        return out
+        return out.to_script()
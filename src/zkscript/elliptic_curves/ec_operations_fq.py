@@ -1,4 +1,41 @@
+from math import log2
+
 from tx_engine import Script
+from tx_engine.engine.op_codes import (
+    OP_0,
+    OP_1SUB,
+    OP_2,
+    OP_2DROP,
+    OP_2DUP,
+    OP_2OVER,
+    OP_2SWAP,
+    OP_3,
+    OP_5,
+    OP_ADD,
+    OP_CAT,
+    OP_DEPTH,
+    OP_DROP,
+    OP_DUP,
+    OP_ELSE,
+    OP_ENDIF,
+    OP_EQUAL,
+    OP_EQUALVERIFY,
+    OP_FROMALTSTACK,
+    OP_IF,
+    OP_MOD,
+    OP_MUL,
+    OP_NUMNOTEQUAL,
+    OP_OVER,
+    OP_PICK,
+    OP_ROLL,
+    OP_ROT,
+    OP_SUB,
+    OP_SWAP,
+    OP_TOALTSTACK,
+    OP_TUCK,
+)
+
+from src.zkscript.util.bit_growth import bit_growth, log2_sum
 
 # Utility scripts
 from src.zkscript.util.utility_scripts import nums_to_script, pick, roll
@@ -13,6 +50,34 @@ class EllipticCurveFq:
         # A coefficient of the curve over which we are performing the operations
         self.CURVE_A = curve_a
 
+    def _coordinates_bit_size(self, gradient: float, p: float, q: float) -> float:
+        """Bit size of the coordinates of P + Q computed from `gradient`, with x_(P+Q) = gradient^2 - x_P - x_Q."""
+        x = log2_sum(2 * gradient, p, q)
+        y = log2_sum(gradient + log2_sum(p, x), p)
+        return max(x, y)
+
+    def _tangent_check_bit_size(self, gradient: float, p: float) -> float:
+        """Bit size of 2 * gradient * y_P - (3 * x_P^2 + a)."""
+        three_x_squared = 2 * p + log2(3)
+        if self.CURVE_A != 0:
+            three_x_squared = log2_sum(three_x_squared, log2(abs(self.CURVE_A)))
+        return log2_sum(1 + gradient + p, three_x_squared)
+
+    def _point_addition_bit_size(self, gradient: float, p: float, q: float) -> float:
+        """Bit size of the values computed by `point_addition`."""
+        check = log2_sum(gradient + log2_sum(p, q), log2_sum(p, q))
+        return max(check, self._coordinates_bit_size(gradient, p, q))
+
+    def _point_doubling_bit_size(self, gradient: float, p: float) -> float:
+        """Bit size of the values computed by `point_doubling`."""
+        return max(self._tangent_check_bit_size(gradient, p), self._coordinates_bit_size(gradient, p, p))
+
+    def _point_addition_with_unknown_points_bit_size(self, gradient: float, p: float, q: float) -> float:
+        """Bit size of the values computed by `point_addition_with_unknown_points`."""
+        check = max(self._tangent_check_bit_size(gradient, p), log2_sum(gradient + p, q, gradient + q, p))
+        return max(check, self._coordinates_bit_size(gradient, p, q))
+
+    @bit_growth(_point_addition_bit_size)
     def point_addition(
         self, take_modulo: bool, check_constant: bool | None = None, clean_constant: bool | None = None
     ) -> Script:
@@ -36,52 +101,43 @@ class EllipticCurveFq:
 
         """
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         # P \neq Q, then check that lambda (x_Q - x_P) = (y_Q - y_P)
         # After this, the stack is: x_P y_P x_Q lambda, altstack = [(lambda *(xP - xQ) - (yP - yQ) == 0)]
-        lambda_different_points = Script.parse_string("OP_2OVER")  # Duplicate xP yP
-        lambda_different_points += Script.parse_string("OP_ROT OP_SUB OP_TOALTSTACK")  # Compute yP - yQ
-        lambda_different_points += Script.parse_string("OP_OVER OP_SUB")  # Compute xP - xQ
+        lambda_different_points = Script([OP_2OVER])  # Duplicate xP yP
+        lambda_different_points += Script([OP_ROT, OP_SUB, OP_TOALTSTACK])  # Compute yP - yQ
+        lambda_different_points += Script([OP_OVER, OP_SUB])  # Compute xP - xQ
         lambda_different_points += roll(position=4, n_elements=1)  # Roll lambda
-        lambda_different_points += Script.parse_string("OP_TUCK OP_MUL")  # Compute lambda *(xP - xQ)
-        lambda_different_points += Script.parse_string(
-            "OP_FROMALTSTACK OP_SUB"
-        )  # Compute lambda *(xP - xQ) - (yP - yQ)
-        lambda_different_points += Script.parse_string("OP_TOALTSTACK")
+        lambda_different_points += Script([OP_TUCK, OP_MUL])  # Compute lambda *(xP - xQ)
+        lambda_different_points += Script([OP_FROMALTSTACK, OP_SUB])  # Compute lambda *(xP - xQ) - (yP - yQ)
+        lambda_different_points += Script([OP_TOALTSTACK])
 
         # Compute x_(P+Q) = lambda^2 - x_P - x_Q
         # After this, the stack is: lambda xP x_(P+Q), altstack = [(lambda *(xP - xQ) - (yP - yQ) == 0), yP]
-        compute_coordinates = Script.parse_string("OP_DUP OP_DUP OP_MUL")  # Duplicate lambda and compute lambda^2
-        compute_coordinates += Script.parse_string("OP_ROT OP_SUB")  # Rotate xQ and compute lambda^2 - xQ
-        compute_coordinates += Script.parse_string(
-            "OP_2SWAP OP_TOALTSTACK OP_TUCK"
+        compute_coordinates = Script([OP_DUP, OP_DUP, OP_MUL])  # Duplicate lambda and compute lambda^2
+        compute_coordinates += Script([OP_ROT, OP_SUB])  # Rotate xQ and compute lambda^2 - xQ
+        compute_coordinates += Script(
+            [OP_2SWAP, OP_TOALTSTACK, OP_TUCK]
         )  # Swap xP yP, place yP on altstack, duplicate xP
-        compute_coordinates += Script.parse_string("OP_SUB")  # Compute lambda^2 - xP - xQ
+        compute_coordinates += Script([OP_SUB])  # Compute lambda^2 - xP - xQ
 
         # Compute y_(P+Q)
-        compute_coordinates += Script.parse_string("OP_TUCK OP_SUB")  # Compute xP - x_(P+Q)
-        compute_coordinates += Script.parse_string("OP_ROT OP_MUL")  # Compute lambda * (xP - x_(P+Q))
-        compute_coordinates += Script.parse_string("OP_FROMALTSTACK OP_SUB")  # Compute y_(P+Q)
+        compute_coordinates += Script([OP_TUCK, OP_SUB])  # Compute xP - x_(P+Q)
+        compute_coordinates += Script([OP_ROT, OP_MUL])  # Compute lambda * (xP - x_(P+Q))
+        compute_coordinates += Script([OP_FROMALTSTACK, OP_SUB])  # Compute y_(P+Q)
 
-        if clean_constant:
-            fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL")
-        else:
-            fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
+        fetch_q = Script([OP_DEPTH, OP_1SUB, OP_ROLL]) if clean_constant else Script([OP_DEPTH, OP_1SUB, OP_PICK])
 
         # After this, the stack is: x_(P+Q) y_(P+Q) q, altstack = [(lambda *(xP - xQ) - (yP - yQ) == 0)]
         out += lambda_different_points + compute_coordinates + fetch_q
 
-        batched_modulo = Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")  # Mod out y
-        batched_modulo += Script.parse_string("OP_TOALTSTACK")
-        batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")  # Mod out x
-        batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_ROT")
+        batched_modulo = Script([OP_TUCK, OP_MOD, OP_OVER, OP_ADD, OP_OVER, OP_MOD])  # Mod out y
+        batched_modulo += Script([OP_TOALTSTACK])
+        batched_modulo += Script([OP_TUCK, OP_MOD, OP_OVER, OP_ADD, OP_OVER, OP_MOD])  # Mod out x
+        batched_modulo += Script([OP_FROMALTSTACK, OP_ROT])
 
         # If needed, mod out
         # After this, the stack is: x_(P+Q) y_(P+Q) q, altstack = [(lambda *(xP - xQ) - (yP - yQ) == 0)]
@@ -89,17 +145,18 @@ class EllipticCurveFq:
         if take_modulo:
             out += batched_modulo
 
-        check_lambda = Script.parse_string("OP_FROMALTSTACK")
-        check_lambda += Script.parse_string(
-            "OP_OVER OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD"
+        check_lambda = Script([OP_FROMALTSTACK])
+        check_lambda += Script(
+            [OP_OVER, OP_MOD, OP_OVER, OP_ADD, OP_SWAP, OP_MOD]
         )  # Mod out lambda *(xP - xQ) - (yP - yQ)
-        check_lambda += Script.parse_string("OP_0 OP_EQUALVERIFY")
+        check_lambda += Script([OP_0, OP_EQUALVERIFY])
 
         # Check lambda was correct
         out += check_lambda
 
         return out
 
+    @bit_growth(_point_doubling_bit_size)
     def point_doubling(
         self, take_modulo: bool, check_constant: bool | None = None, clean_constant: bool | None = None
     ) -> Script:
@@ -115,11 +172,7 @@ class EllipticCurveFq:
         If take_modulo = True, the coordinates of 2P are in F_q
         """
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
@@ -127,43 +180,40 @@ class EllipticCurveFq:
 
         # P = Q, then check 2 lambda y_P = 3 x_P^2
         # After this, the stack is: xP yP lambda, altstack = [2*lambda*yP - 3*xP^2]
-        lambda_equal_points = Script.parse_string("OP_ROT OP_2DUP")  # Rotate lambda and duplicate lambda, yP
-        lambda_equal_points += Script.parse_string("OP_2 OP_MUL OP_MUL")  # Compute 2 lambda yP
+        lambda_equal_points = Script([OP_ROT, OP_2DUP])  # Rotate lambda and duplicate lambda, yP
+        lambda_equal_points += Script([OP_2, OP_MUL, OP_MUL])  # Compute 2 lambda yP
         lambda_equal_points += pick(position=3, n_elements=1)  # Pick xP
-        lambda_equal_points += Script.parse_string("OP_DUP OP_3 OP_MUL OP_MUL")  # Compute 3xP^2
+        lambda_equal_points += Script([OP_DUP, OP_3, OP_MUL, OP_MUL])  # Compute 3xP^2
         if curve_a != 0:
-            lambda_equal_points += nums_to_script([curve_a]) + Script.parse_string("OP_ADD")
-        lambda_equal_points += Script.parse_string("OP_SUB")
-        lambda_equal_points += Script.parse_string("OP_TOALTSTACK")
+            lambda_equal_points += nums_to_script([curve_a]) + Script([OP_ADD])
+        lambda_equal_points += Script([OP_SUB])
+        lambda_equal_points += Script([OP_TOALTSTACK])
 
         # Compute coodinates
         # After this, the stack is: yP lambda xP x_(2P)
-        compute_coordinates = Script.parse_string("OP_ROT OP_OVER")  # Rotate xP, duplicate lambda
-        compute_coordinates += Script.parse_string("OP_DUP OP_MUL")  # Compute lambda^2
-        compute_coordinates += Script.parse_string("OP_OVER")  # Roll xP
-        compute_coordinates += Script.parse_string("OP_2 OP_MUL")  # Compute 2xP
-        compute_coordinates += Script.parse_string("OP_SUB")  # Compute x_(2P)
+        compute_coordinates = Script([OP_ROT, OP_OVER])  # Rotate xP, duplicate lambda
+        compute_coordinates += Script([OP_DUP, OP_MUL])  # Compute lambda^2
+        compute_coordinates += Script([OP_OVER])  # Roll xP
+        compute_coordinates += Script([OP_2, OP_MUL])  # Compute 2xP
+        compute_coordinates += Script([OP_SUB])  # Compute x_(2P)
 
         # After this, the stack is: x_(2P) y_(2P)
-        compute_coordinates += Script.parse_string("OP_TUCK")  # Duplicate x_(2P)
-        compute_coordinates += Script.parse_string("OP_SUB")  # Compute xP - x_(2P)
-        compute_coordinates += Script.parse_string("OP_ROT")  # Roll lambda
-        compute_coordinates += Script.parse_string("OP_MUL")  # Compute lambda * (xP - x_(2P))
-        compute_coordinates += Script.parse_string("OP_ROT")  # Roll lambda
-        compute_coordinates += Script.parse_string("OP_SUB")  # Compute lambda * (xP - x_(2P))
+        compute_coordinates += Script([OP_TUCK])  # Duplicate x_(2P)
+        compute_coordinates += Script([OP_SUB])  # Compute xP - x_(2P)
+        compute_coordinates += Script([OP_ROT])  # Roll lambda
+        compute_coordinates += Script([OP_MUL])  # Compute lambda * (xP - x_(2P))
+        compute_coordinates += Script([OP_ROT])  # Roll lambda
+        compute_coordinates += Script([OP_SUB])  # Compute lambda * (xP - x_(2P))
 
-        if clean_constant:
-            fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL")
-        else:
-            fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
+        fetch_q = Script([OP_DEPTH, OP_1SUB, OP_ROLL]) if clean_constant else Script([OP_DEPTH, OP_1SUB, OP_PICK])
 
         # After this, the stack is: x_(P+Q) y_(P+Q) q, altstack = [lambda * 2yP == 3xP^2]
         out += lambda_equal_points + compute_coordinates + fetch_q
 
-        batched_modulo = Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")  # Mod out y
-        batched_modulo += Script.parse_string("OP_TOALTSTACK")
-        batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")  # Mod out x
-        batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_ROT")
+        batched_modulo = Script([OP_TUCK, OP_MOD, OP_OVER, OP_ADD, OP_OVER, OP_MOD])  # Mod out y
+        batched_modulo += Script([OP_TOALTSTACK])
+        batched_modulo += Script([OP_TUCK, OP_MOD, OP_OVER, OP_ADD, OP_OVER, OP_MOD])  # Mod out x
+        batched_modulo += Script([OP_FROMALTSTACK, OP_ROT])
 
         # If needed, mod out
         # After this, the stack is: x_(P+Q) y_(P+Q) q, altstack = [lambda * 2yP == 3xP^2]
@@ -171,17 +221,18 @@ class EllipticCurveFq:
         if take_modulo:
             out += batched_modulo
 
-        check_lambda = Script.parse_string("OP_FROMALTSTACK")
-        check_lambda += Script.parse_string(
-            "OP_OVER OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD"
+        check_lambda = Script([OP_FROMALTSTACK])
+        check_lambda += Script(
+            [OP_OVER, OP_MOD, OP_OVER, OP_ADD, OP_SWAP, OP_MOD]
         )  # Mod out lambda * (yP - yQ) - (xP- xQ)
-        check_lambda += Script.parse_string("OP_0 OP_EQUALVERIFY")
+        check_lambda += Script([OP_0, OP_EQUALVERIFY])
 
         # Check lambda was correct
         out += check_lambda
 
         return out
 
+    @bit_growth(_point_addition_with_unknown_points_bit_size)
     def point_addition_with_unknown_points(
         self, take_modulo: bool, check_constant: bool | None = None, clean_constant: bool | None = None
     ) -> Script:
@@ -206,11 +257,7 @@ class EllipticCurveFq:
             (0,0) would have to be passed as OP_0 OP_0)
         """
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
@@ -221,18 +268,18 @@ class EllipticCurveFq:
 
         # Check if Q is (0x00,0x00), in that case, terminate and return P
         out += Script.parse_string("OP_2DUP OP_CAT 0x0000 OP_EQUAL OP_NOT")
-        out += Script.parse_string("OP_IF")
+        out += Script([OP_IF])
 
         # Check if P is (0x00,0x00), in that case, terminate and return Q
         out += Script.parse_string("OP_2OVER OP_CAT 0x0000 OP_EQUAL OP_NOT")
-        out += Script.parse_string("OP_IF")
+        out += Script([OP_IF])
 
         # Check if P = -Q, in that case terminate and return (0x00,0x00)
-        out += Script.parse_string("OP_DUP")  # Duplicate yQ
+        out += Script([OP_DUP])  # Duplicate yQ
         out += pick(position=3, n_elements=1)  # Pick yP
-        out += Script.parse_string("OP_ADD")
-        out += Script.parse_string("OP_DEPTH OP_1SUB OP_PICK OP_MOD OP_0 OP_NUMNOTEQUAL")
-        out += Script.parse_string("OP_IF")
+        out += Script([OP_ADD])
+        out += Script([OP_DEPTH, OP_1SUB, OP_PICK, OP_MOD, OP_0, OP_NUMNOTEQUAL])
+        out += Script([OP_IF])
 
         # End of initial checks  ---------------------------------------------------------------------------------------
 
@@ -240,36 +287,36 @@ class EllipticCurveFq:
         # After this, the stack is: <lambda> P Q, altstack = [Verify(lambda)]
 
         # Check if P = Q:
-        out += Script.parse_string("OP_2OVER OP_2OVER")  # Roll P and Q
-        out += Script.parse_string("OP_CAT")  # Concatenate xQ||yQ
-        out += Script.parse_string("OP_ROT OP_ROT")  # Rotate xP and xQ
-        out += Script.parse_string("OP_CAT")  # Concatenate xP||yP
-        out += Script.parse_string("OP_EQUAL")  # Check xP||yP = xQ||yQ
+        out += Script([OP_2OVER, OP_2OVER])  # Roll P and Q
+        out += Script([OP_CAT])  # Concatenate xQ||yQ
+        out += Script([OP_ROT, OP_ROT])  # Rotate xP and xQ
+        out += Script([OP_CAT])  # Concatenate xP||yP
+        out += Script([OP_EQUAL])  # Check xP||yP = xQ||yQ
 
         # If P = Q:
-        out += Script.parse_string("OP_IF")
-        out += Script.parse_string("OP_DUP")  # Duplicate y_P
-        out += Script.parse_string("OP_2 OP_MUL")  # Compute 2y_P
+        out += Script([OP_IF])
+        out += Script([OP_DUP])  # Duplicate y_P
+        out += Script([OP_2, OP_MUL])  # Compute 2y_P
         out += pick(position=3, n_elements=1)  # Pick lambda
-        out += Script.parse_string("OP_MUL")  # Compute 2 lambda y_P
+        out += Script([OP_MUL])  # Compute 2 lambda y_P
         out += pick(position=2, n_elements=1)  # Pick x_P
-        out += Script.parse_string("OP_DUP")  # Duplicate x_P
-        out += Script.parse_string("OP_MUL")  # Compute x_P^2
-        out += Script.parse_string("OP_3 OP_MUL")  # Compute 3 x_P^2
+        out += Script([OP_DUP])  # Duplicate x_P
+        out += Script([OP_MUL])  # Compute x_P^2
+        out += Script([OP_3, OP_MUL])  # Compute 3 x_P^2
         if curve_a != 0:
-            out += nums_to_script([curve_a]) + Script.parse_string("OP_ADD")  # Compute 3 x_P^2 + a if a != 0
-        out += Script.parse_string("OP_SUB")
+            out += nums_to_script([curve_a]) + Script([OP_ADD])  # Compute 3 x_P^2 + a if a != 0
+        out += Script([OP_SUB])
 
         # If P != Q:
-        out += Script.parse_string("OP_ELSE")
+        out += Script([OP_ELSE])
         out += pick(position=4, n_elements=2)  # Pick lambda and x_P
-        out += Script.parse_string("OP_MUL OP_ADD")  # compute lambda x_P + y_Q
-        out += Script.parse_string("OP_OVER OP_5 OP_PICK OP_MUL OP_3 OP_PICK OP_ADD")  # compute lambda x_Q + y_P
-        out += Script.parse_string("OP_SUB")
-        out += Script.parse_string("OP_ENDIF")
+        out += Script([OP_MUL, OP_ADD])  # compute lambda x_P + y_Q
+        out += Script([OP_OVER, OP_5, OP_PICK, OP_MUL, OP_3, OP_PICK, OP_ADD])  # compute lambda x_Q + y_P
+        out += Script([OP_SUB])
+        out += Script([OP_ENDIF])
 
         # Place on the altstack
-        out += Script.parse_string("OP_TOALTSTACK")
+        out += Script([OP_TOALTSTACK])
 
         # End of lambda validation -------------------------------------------------------------------------------------
 
@@ -278,41 +325,37 @@ class EllipticCurveFq:
 
         # Compute x_(P+Q) = lambda^2 - x_P - x_Q
         # After this, the base stack is: <lambda> x_P y_P x_(P+Q), altstack = [Verify(lambda)]
-        compute_x_coordinate = Script.parse_string("OP_2OVER")
-        compute_x_coordinate += Script.parse_string("OP_SWAP")
-        compute_x_coordinate += Script.parse_string("OP_DUP OP_MUL")  # Compute lambda^2
-        compute_x_coordinate += Script.parse_string("OP_ROT OP_ROT OP_ADD OP_SUB")  # Compute lambda^2 - (x_P + x_Q)
+        compute_x_coordinate = Script([OP_2OVER])
+        compute_x_coordinate += Script([OP_SWAP])
+        compute_x_coordinate += Script([OP_DUP, OP_MUL])  # Compute lambda^2
+        compute_x_coordinate += Script([OP_ROT, OP_ROT, OP_ADD, OP_SUB])  # Compute lambda^2 - (x_P + x_Q)
 
         # Compute y_(P+Q) = lambda (x_P - x_(P+Q)) - y_P
         # After this, the stack is: x_(P+Q) y_(P+Q), altstack = [Verify(lambda)]
-        compute_y_coordinate = Script.parse_string("OP_TUCK")
-        compute_y_coordinate += Script.parse_string("OP_2SWAP")
-        compute_y_coordinate += Script.parse_string("OP_SUB")  # Compute xP - x_(P+Q)
-        compute_y_coordinate += Script.parse_string("OP_2SWAP OP_TOALTSTACK")
-        compute_y_coordinate += Script.parse_string(
-            "OP_MUL OP_FROMALTSTACK OP_SUB"
-        )  # Compute lambda (x_P - x_(P+Q)) - y_P
+        compute_y_coordinate = Script([OP_TUCK])
+        compute_y_coordinate += Script([OP_2SWAP])
+        compute_y_coordinate += Script([OP_SUB])  # Compute xP - x_(P+Q)
+        compute_y_coordinate += Script([OP_2SWAP, OP_TOALTSTACK])
+        compute_y_coordinate += Script([OP_MUL, OP_FROMALTSTACK, OP_SUB])  # Compute lambda (x_P - x_(P+Q)) - y_P
 
-        fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
+        fetch_q = Script([OP_DEPTH, OP_1SUB, OP_PICK])
 
         # After this, the stack is: (P+Q) q, altstack = [Verify(lambda)]
         out += compute_x_coordinate + compute_y_coordinate + fetch_q
 
-        batched_modulo = Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")  # Mod y
-        batched_modulo += Script.parse_string("OP_TOALTSTACK")
-        batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")  # Mod x
-        batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_ROT")
+        batched_modulo = Script([OP_TUCK, OP_MOD, OP_OVER, OP_ADD, OP_OVER, OP_MOD])  # Mod y
+        batched_modulo += Script([OP_TOALTSTACK])
+        batched_modulo += Script([OP_TUCK, OP_MOD, OP_OVER, OP_ADD, OP_OVER, OP_MOD])  # Mod x
+        batched_modulo += Script([OP_FROMALTSTACK, OP_ROT])
 
         # If needed, mod out
         # After this, the stack is: (P+Q) q, altstack = [Verify(lambda)] with the coefficients in Fq (if executed)
         if take_modulo:
             out += batched_modulo
 
-        check_lambda = Script.parse_string("OP_FROMALTSTACK")
-        check_lambda += Script.parse_string(
-            "OP_OVER OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD"
-        )  # Mod lambda * (yP - yQ) - (xP- xQ)
-        check_lambda += Script.parse_string("OP_0 OP_EQUALVERIFY")
+        check_lambda = Script([OP_FROMALTSTACK])
+        check_lambda += Script([OP_OVER, OP_MOD, OP_OVER, OP_ADD, OP_SWAP, OP_MOD])  # Mod lambda * (yP - yQ) - (xP- xQ)
+        check_lambda += Script([OP_0, OP_EQUALVERIFY])
 
         # Check lambda was correct
         out += check_lambda
@@ -320,24 +363,24 @@ class EllipticCurveFq:
         # Termination conditions  --------------------------------------------------------------------------------------
 
         # Termination because P = -Q
-        out += Script.parse_string("OP_ELSE")
-        out += Script.parse_string("OP_2DROP OP_2DROP")
+        out += Script([OP_ELSE])
+        out += Script([OP_2DROP, OP_2DROP])
         out += Script.parse_string("0x00 0x00")
-        out += Script.parse_string("OP_ENDIF")
+        out += Script([OP_ENDIF])
 
         # Termination because P = (0x00,0x00)
-        out += Script.parse_string("OP_ELSE")
-        out += Script.parse_string("OP_2SWAP OP_2DROP")
-        out += Script.parse_string("OP_ENDIF")
+        out += Script([OP_ELSE])
+        out += Script([OP_2SWAP, OP_2DROP])
+        out += Script([OP_ENDIF])
 
         # Termination because Q = (0x00,0x00)
-        out += Script.parse_string("OP_ELSE")
-        out += Script.parse_string("OP_2DROP")
-        out += Script.parse_string("OP_ENDIF")
+        out += Script([OP_ELSE])
+        out += Script([OP_2DROP])
+        out += Script([OP_ENDIF])
 
         # End of termination conditions --------------------------------------------------------------------------------
 
         if clean_constant:
-            out += Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL OP_DROP")
+            out += Script([OP_DEPTH, OP_1SUB, OP_ROLL, OP_DROP])
 
         return out
@@ -1,6 +1,26 @@
-from tx_engine import Script
+from math import log2
 
-from src.zkscript.util.utility_scripts import nums_to_script, roll
+from tx_engine import Script
+from tx_engine.engine.op_codes import (
+    OP_0,
+    OP_1SUB,
+    OP_2,
+    OP_2DUP,
+    OP_2OVER,
+    OP_2ROT,
+    OP_2SWAP,
+    OP_3,
+    OP_CAT,
+    OP_DEPTH,
+    OP_ENDIF,
+    OP_EQUALVERIFY,
+    OP_FROMALTSTACK,
+    OP_PICK,
+    OP_TOALTSTACK,
+)
+
+from src.zkscript.util.bit_growth import bit_growth, output_bit_size
+from src.zkscript.util.utility_scripts import nums_to_script, reduce_n, roll
 
 
 class EllipticCurveFq2:
@@ -14,6 +34,36 @@ class EllipticCurveFq2:
         # Fq2 implementation in script
         self.FQ2 = fq2
 
+    def _coordinates_bit_size(self, gradient: float, p: float, x: float) -> float:
+        """Bit size of the coordinates of the output, where `x` is the bit size of its first coordinate."""
+        fq2 = self.FQ2
+        y = output_bit_size(fq2.subtract, output_bit_size(fq2.mul, gradient, output_bit_size(fq2.subtract, p, x)), p)
+        return max(x, y)
+
+    def _point_addition_bit_size(self, gradient: float, p: float, q: float) -> float:
+        """Bit size of the values computed by `point_addition`."""
+        fq2 = self.FQ2
+        check = output_bit_size(
+            fq2.add,
+            output_bit_size(fq2.mul, gradient, output_bit_size(fq2.subtract, p, q)),
+            output_bit_size(fq2.subtract, q, p),
+        )
+        x = output_bit_size(fq2.subtract, output_bit_size(fq2.square, gradient), output_bit_size(fq2.add, p, q))
+        return max(check, self._coordinates_bit_size(gradient, p, x))
+
+    def _point_doubling_bit_size(self, gradient: float, p: float) -> float:
+        """Bit size of the values computed by `point_doubling`."""
+        fq2 = self.FQ2
+        three_x_squared = output_bit_size(fq2.scalar_mul, output_bit_size(fq2.square, p), log2(3))
+        if any(self.CURVE_A):
+            three_x_squared = output_bit_size(fq2.add, three_x_squared, log2(max(abs(a) for a in self.CURVE_A)))
+        check = output_bit_size(
+            fq2.subtract, output_bit_size(fq2.scalar_mul, output_bit_size(fq2.mul, gradient, p), 1), three_x_squared
+        )
+        x = output_bit_size(fq2.subtract, output_bit_size(fq2.square, gradient), output_bit_size(fq2.scalar_mul, p, 1))
+        return max(check, self._coordinates_bit_size(gradient, p, x))
+
+    @bit_growth(_point_addition_bit_size)
     def point_addition(
         self,
         take_modulo: bool,
@@ -61,9 +111,9 @@ class EllipticCurveFq2:
         ), f"Position P {position_lambda} must be bigger than position Q {position_p} plus three"
 
         if check_constant:
-            out = Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK])
             out += nums_to_script([self.MODULUS])
-            out += Script.parse_string("OP_EQUALVERIFY")
+            out += Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
@@ -79,18 +129,18 @@ class EllipticCurveFq2:
         stack_length_added += 2
         lambda_different_points += roll(position=position_p + stack_length_added, n_elements=2)  # Roll xP
         stack_length_added += 2
-        lambda_different_points += Script.parse_string("OP_2OVER OP_2OVER")  # Duplicate lambda, xP
+        lambda_different_points += Script([OP_2OVER, OP_2OVER])  # Duplicate lambda, xP
         stack_length_added += 4
         # After this, the stack is: lambda xP xQ [lambda * (xP - xQ)]
         lambda_different_points += roll(position=position_q + stack_length_added, n_elements=2)  # Roll xQ
         stack_length_added += 2
-        lambda_different_points += Script.parse_string("OP_2SWAP OP_2OVER")  # Swap xP and xQ, duplicate xQ
+        lambda_different_points += Script([OP_2SWAP, OP_2OVER])  # Swap xP and xQ, duplicate xQ
         stack_length_added += 2
         lambda_different_points += fq2.subtract(
             take_modulo=False, check_constant=False, clean_constant=False
         )  # Compute x_P - x_Q
         stack_length_added -= 2
-        lambda_different_points += Script.parse_string("OP_2ROT")  # Bring lambda on top of the stack
+        lambda_different_points += Script([OP_2ROT])  # Bring lambda on top of the stack
         lambda_different_points += fq2.mul(
             take_modulo=False, check_constant=False, clean_constant=False
         )  # Compute lambda * (x_P - x_Q)
@@ -101,46 +151,44 @@ class EllipticCurveFq2:
         lambda_different_points += roll(
             position=position_p + stack_length_added - 2 - 2, n_elements=2
         )  # Roll yP: -2 is for y coordinates, -2 is because xQ was already in front of P
-        lambda_different_points += Script.parse_string("OP_2SWAP OP_2OVER")  # Swap yQ and yP, duplicate yP
+        lambda_different_points += Script([OP_2SWAP, OP_2OVER])  # Swap yQ and yP, duplicate yP
         lambda_different_points += fq2.subtract(
             take_modulo=False, check_constant=False, clean_constant=False
         )  # Compute yQ - yP
-        lambda_different_points += Script.parse_string("OP_2ROT")  # Bring lambda * (x_P - x_Q)
+        lambda_different_points += Script([OP_2ROT])  # Bring lambda * (x_P - x_Q)
         lambda_different_points += fq2.add(
             take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
         )  # Compute lambda * (x_P - x_Q) + yQ- yP
-        lambda_different_points += Script.parse_string("OP_CAT OP_0 OP_EQUALVERIFY")
+        lambda_different_points += Script([OP_CAT, OP_0, OP_EQUALVERIFY])
 
         # Compute coordinates
         # After this, the stack is: xP lambda x_(P+Q)
-        compute_coordinates = Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")  # Put yP on altstack
-        compute_coordinates += Script.parse_string("OP_2OVER")  # Duplicate xP
+        compute_coordinates = Script([OP_TOALTSTACK, OP_TOALTSTACK])  # Put yP on altstack
+        compute_coordinates += Script([OP_2OVER])  # Duplicate xP
         compute_coordinates += fq2.add(
             take_modulo=False, check_constant=False, clean_constant=False
         )  # Compute (xP + xQ)
-        compute_coordinates += Script.parse_string(
-            "OP_2ROT OP_2SWAP OP_2OVER"
-        )  # Roll lambda, reorder, duplicate lambda
+        compute_coordinates += Script([OP_2ROT, OP_2SWAP, OP_2OVER])  # Roll lambda, reorder, duplicate lambda
         compute_coordinates += fq2.square(
             take_modulo=False, check_constant=False, clean_constant=False
         )  # Compute lambda^2
-        compute_coordinates += Script.parse_string("OP_2SWAP")
+        compute_coordinates += Script([OP_2SWAP])
         compute_coordinates += fq2.subtract(
             take_modulo=take_modulo, check_constant=False, clean_constant=False, is_constant_reused=False
         )  # Compute lambda^2 - (xP + xQ)
 
         # After this, the stack is: x_(P+Q) lambda (x_P - x_(P+Q))
-        compute_coordinates += Script.parse_string("OP_2ROT OP_2OVER")
+        compute_coordinates += Script([OP_2ROT, OP_2OVER])
         compute_coordinates += fq2.subtract(
             take_modulo=False, check_constant=False, clean_constant=False
         )  # Compute x_P - x_(P+Q)
-        compute_coordinates += Script.parse_string("OP_2ROT")
+        compute_coordinates += Script([OP_2ROT])
         compute_coordinates += fq2.mul(
             take_modulo=False, check_constant=False, clean_constant=False
         )  # Compute lambda (x_P - x_(P+Q))
 
         # After this, the stack is: x_(P+Q) y_(P+Q)
-        compute_coordinates += Script.parse_string("OP_FROMALTSTACK OP_FROMALTSTACK")
+        compute_coordinates += Script([OP_FROMALTSTACK, OP_FROMALTSTACK])
         compute_coordinates += fq2.subtract(
             take_modulo=take_modulo, check_constant=False, clean_constant=clean_constant, is_constant_reused=False
         )  # y_(P+Q)
@@ -149,6 +197,7 @@ class EllipticCurveFq2:
 
         return out
 
+    @bit_growth(_point_doubling_bit_size)
     def point_doubling(
         self,
         take_modulo: bool,
@@ -195,9 +244,9 @@ class EllipticCurveFq2:
         curve_a = self.CURVE_A
 
         if check_constant:
-            out = Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK])
             out += nums_to_script([self.MODULUS])
-            out += Script.parse_string("OP_EQUALVERIFY")
+            out += Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
@@ -210,22 +259,22 @@ class EllipticCurveFq2:
         stack_length_added += 2
         lambda_equal_points += roll(position=position_p + stack_length_added - 2, n_elements=2)  # Roll yP
         stack_length_added += 0  # Elements were already in front of xP
-        lambda_equal_points += Script.parse_string("OP_2OVER OP_2OVER")  # Duplicate lambda, yP
+        lambda_equal_points += Script([OP_2OVER, OP_2OVER])  # Duplicate lambda, yP
         stack_length_added += 4
         # After this, the stack is: lambda yP (2*lambda*yP)
         lambda_equal_points += fq2.mul(
             take_modulo=False, check_constant=False, clean_constant=False
         )  # Compute lamdba * yP
         stack_length_added -= 2
-        lambda_equal_points += Script.parse_string("OP_2")
+        lambda_equal_points += Script([OP_2])
         lambda_equal_points += fq2.scalar_mul(
             take_modulo=False, check_constant=False, clean_constant=False
         )  # Compute 2 * lamdba * yP
         # After this, the stack is: lambda yP xP
         lambda_equal_points += roll(position=position_p + stack_length_added, n_elements=2)  # Roll xP
-        lambda_equal_points += Script.parse_string("OP_2SWAP OP_2OVER")
+        lambda_equal_points += Script([OP_2SWAP, OP_2OVER])
         lambda_equal_points += fq2.square(take_modulo=False, check_constant=False, clean_constant=False)  # Compute xP^2
-        lambda_equal_points += Script.parse_string("OP_3")
+        lambda_equal_points += Script([OP_3])
         lambda_equal_points += fq2.scalar_mul(
             take_modulo=False, check_constant=False, clean_constant=False
         )  # Compute 3 * xP^2
@@ -237,16 +286,16 @@ class EllipticCurveFq2:
         lambda_equal_points += fq2.subtract(
             take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
         )
-        lambda_equal_points += Script.parse_string("OP_CAT OP_0 OP_EQUALVERIFY")
+        lambda_equal_points += Script([OP_CAT, OP_0, OP_EQUALVERIFY])
 
         # Compute coordinates
         # After this, the stack is: yP lambda xP x_(2P)
-        compute_coordinates = Script.parse_string("OP_2ROT OP_2DUP")  # Roll lambda and duplicate it
+        compute_coordinates = Script([OP_2ROT, OP_2DUP])  # Roll lambda and duplicate it
         compute_coordinates += fq2.square(
             take_modulo=False, check_constant=False, clean_constant=False
         )  # Compute lambda^2
-        compute_coordinates += Script.parse_string("OP_2ROT OP_2SWAP OP_2OVER")  # Roll xP and duplicate it
-        compute_coordinates += Script.parse_string("OP_2")
+        compute_coordinates += Script([OP_2ROT, OP_2SWAP, OP_2OVER])  # Roll xP and duplicate it
+        compute_coordinates += Script([OP_2])
         compute_coordinates += fq2.scalar_mul(
             take_modulo=False, check_constant=False, clean_constant=False
         )  # Compute 2 * xP
@@ -255,17 +304,17 @@ class EllipticCurveFq2:
         )  # Compute lambda^2 - 2*xP
 
         # After this, the stack is: yP x_(2P) lambda * (xP - x_(2P))
-        compute_coordinates += Script.parse_string("OP_2SWAP OP_2OVER")
+        compute_coordinates += Script([OP_2SWAP, OP_2OVER])
         compute_coordinates += fq2.subtract(
             take_modulo=False, check_constant=False, clean_constant=False
         )  # Compute x_P - x_(2P)
-        compute_coordinates += Script.parse_string("OP_2ROT")
+        compute_coordinates += Script([OP_2ROT])
         compute_coordinates += fq2.mul(
             take_modulo=False, check_constant=False, clean_constant=False
         )  # Compute lambda * (xP - x_(2P))
 
         # After this, the stack is: x_(2P) y_(2P)
-        compute_coordinates += Script.parse_string("OP_2ROT")
+        compute_coordinates += Script([OP_2ROT])
         compute_coordinates += fq2.subtract(
             take_modulo=take_modulo, check_constant=False, clean_constant=clean_constant, is_constant_reused=False
         )  # Compute y_(2P)
@@ -274,6 +323,7 @@ class EllipticCurveFq2:
 
         return out
 
+    @bit_growth(lambda p: p, uses_instance=False)
     def point_negation(
         self,
         take_modulo: bool,
@@ -301,16 +351,12 @@ class EllipticCurveFq2:
         fq2 = self.FQ2
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         # Check if P is point at infinity
-        out += Script.parse_string("OP_2OVER OP_2OVER")
+        out += Script([OP_2OVER, OP_2OVER])
         out += Script.parse_string("OP_CAT OP_CAT OP_CAT 0x00000000 OP_EQUAL OP_NOT OP_IF")
 
         # If not, carry out the negation
@@ -319,25 +365,11 @@ class EllipticCurveFq2:
         if take_modulo:
             assert is_constant_reused is not None
             # After this, the stack is: P.x0, altstack = [-P.y, P.x1]
-            out += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK")
-
-            fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-
-            batched_modulo = Script()
-            batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+            out += Script([OP_TOALTSTACK, OP_TOALTSTACK, OP_TOALTSTACK])
 
-            out += fetch_q + batched_modulo
+            out += reduce_n(4, clean_constant=False, is_constant_reused=is_constant_reused)
 
         # Else, exit
-        out += Script.parse_string("OP_ENDIF")
+        out += Script([OP_ENDIF])
 
         return out
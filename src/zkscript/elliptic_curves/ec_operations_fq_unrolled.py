@@ -3,14 +3,117 @@ from math import ceil, log2
 
 # from src.tx_engine.engine.script import Script
 from tx_engine import Script
+from tx_engine.engine.op_codes import (
+    OP_0,
+    OP_1,
+    OP_1ADD,
+    OP_1SUB,
+    OP_2,
+    OP_2DROP,
+    OP_2DUP,
+    OP_2ROT,
+    OP_2SWAP,
+    OP_3,
+    OP_4,
+    OP_ABS,
+    OP_ADD,
+    OP_DEPTH,
+    OP_DIV,
+    OP_DROP,
+    OP_DUP,
+    OP_ELSE,
+    OP_ENDIF,
+    OP_EQUALVERIFY,
+    OP_FROMALTSTACK,
+    OP_IF,
+    OP_LESSTHAN,
+    OP_MOD,
+    OP_MUL,
+    OP_NEGATE,
+    OP_NIP,
+    OP_OVER,
+    OP_PICK,
+    OP_ROLL,
+    OP_ROT,
+    OP_SUB,
+    OP_SWAP,
+    OP_TOALTSTACK,
+    OP_TUCK,
+    OP_VERIFY,
+    OP_WITHIN,
+)
 
 # EC arithmetic
 from src.zkscript.elliptic_curves.ec_operations_fq import EllipticCurveFq
 
 # Utility scripts
+from src.zkscript.util.bit_growth import output_bit_size
+from src.zkscript.util.script_builder import ScriptBuilder
 from src.zkscript.util.utility_scripts import nums_to_script, pick, roll
 
 
+def _ec_add(point_p: tuple[int, int] | None, point_q: tuple[int, int] | None, curve_a: int, q: int):
+    """Return P + Q and the gradient used to compute it (None if no gradient is needed).
+
+    The point at infinity is None.
+    """
+    if point_p is None:
+        return point_q, None
+    if point_q is None:
+        return point_p, None
+    if point_p[0] == point_q[0] and (point_p[1] + point_q[1]) % q == 0:
+        return None, None
+    if point_p == point_q:
+        gradient = (3 * point_p[0] * point_p[0] + curve_a) * pow(2 * point_p[1], -1, q) % q
+    else:
+        gradient = (point_q[1] - point_p[1]) * pow(point_q[0] - point_p[0], -1, q) % q
+    x = (gradient * gradient - point_p[0] - point_q[0]) % q
+    y = (gradient * (point_p[0] - x) - point_p[1]) % q
+    return (x, y), gradient
+
+
+def _pick_table_entry(offset: int) -> Script:
+    """Pick the entry of index j = k + offset / 2 of a table of points, k being on top of the stack.
+
+    Input Parameters:
+        - Stack: .. k
+    Output:
+        - .. x_j y_j
+    Assumption on data:
+        - if k were replaced by 2k, y_j would be at position 2k + offset and x_j at position 2k + offset + 1
+    """
+    out = Script([OP_DUP, OP_ADD, OP_DUP])
+    out += nums_to_script([offset + 1]) + Script([OP_ADD, OP_PICK, OP_SWAP])
+    if offset != 0:
+        out += nums_to_script([offset]) + Script([OP_ADD])
+    out += Script([OP_PICK])
+    return out
+
+
+def _glv_bits(max_multiplier: int, eigenvalue: int) -> int:
+    """Return the number of bits of a % eigenvalue and a // eigenvalue for a < max_multiplier."""
+    return max(min(max_multiplier - 1, eigenvalue - 1).bit_length(), ((max_multiplier - 1) // eigenvalue).bit_length())
+
+
+def wnaf(a: int, width: int = 2) -> list[int]:
+    """Return the width-`width` non-adjacent form of a >= 0, little endian.
+
+    The digits d_i are such that a = sum_i d_i 2^i, every non-zero digit is odd with |d_i| < 2^(width-1), and at
+    most one in `width` consecutive digits is non-zero. For width = 2, this is the NAF of a.
+    """
+    digits = []
+    while a > 0:
+        digit = 0
+        if a % 2 == 1:
+            digit = a % 2**width
+            if digit >= 2 ** (width - 1):
+                digit -= 2**width
+            a -= digit
+        digits.append(digit)
+        a //= 2
+    return digits
+
+
 class EllipticCurveFqUnrolled:
     def __init__(self, q: int, ec_over_fq: EllipticCurveFq):
         # Characteristic of the field over which the curve is defined
@@ -24,6 +127,7 @@ class EllipticCurveFqUnrolled:
         modulo_threshold: int,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
+        output_multiplier: bool = False,
     ) -> Script:
         """Unrolled double-and-add multiplication loop for a point in E(F_q).
 
@@ -32,7 +136,8 @@ class EllipticCurveFqUnrolled:
             - Stack: q .. marker_a_is_zero [lambdas,a] P
             - Altstack: []
         Output:
-            - P aP
+            - P aP if output_multiplier is False
+            - P aP a if output_multiplier is True
         Assumption on data:
             - P is passed as a couple of integers (minimally encoded, in little endian)
             - [lambdas,a] is a list, see below for its construction
@@ -81,6 +186,11 @@ class EllipticCurveFqUnrolled:
                 - if after the doubling there is OP_1, then execute the addition, otherwise go to the next iteration of
                 the loop.
 
+        If output_multiplier is True, the multiplier a is read off the markers while executing the loop (it is
+        accumulated on the altstack, starting from 1 for the most significant bit) and returned on top of the stack.
+        This binds the unlocking data to the multiplier: the calling script can check a against a value it computed
+        itself, rather than trusting the markers.
+
         MODULO OPERATIONS:
 
         As we are carrying out EC operation over the base field, each element is a single number. The formula for EC
@@ -119,19 +229,18 @@ class EllipticCurveFqUnrolled:
 			- is OP_1 => then auxiliary_data_addition is assumed to be: lambda_(2T+P)
         """
 
+        out = ScriptBuilder()
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
-        else:
-            out = Script()
+            out += Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
 
         # After this, the stack is: marker_a_is_zero [lambdas,a] P T
-        set_T = Script.parse_string("OP_2DUP")
+        set_T = Script([OP_2DUP])
         out += set_T
 
+        # After this, the altstack is: [1], the most significant bit of a
+        if output_multiplier:
+            out += Script([OP_1, OP_TOALTSTACK])
+
         size_q = ceil(log2(self.MODULUS))
         current_size = size_q
 
@@ -149,40 +258,47 @@ class EllipticCurveFqUnrolled:
                 current_size = size_after_operations
 
             # After this, the stack is: P T auxiliary_data marker_doubling
-            out += Script.parse_string(
-                "OP_2ROT"
-            )  # Roll marker to decide whether to excute the loop and the auxiliary data
-            out += Script.parse_string(
-                "OP_IF"
+            out += Script([OP_2ROT])  # Roll marker to decide whether to excute the loop and the auxiliary data
+            out += Script(
+                [OP_IF]
             )  # Check marker for executing iteration; if we enter here, the stack is: P T lambda_2T
-            out += Script.parse_string("OP_ROT OP_ROT")  # Roll T
+            out += Script([OP_ROT, OP_ROT])  # Roll T
+            if output_multiplier:
+                out += Script([OP_FROMALTSTACK, OP_DUP, OP_ADD, OP_TOALTSTACK])  # a -> 2a
             out += ec_over_fq.point_doubling(
                 take_modulo=take_modulo, check_constant=False, clean_constant=False
             )  # Compute 2T
-            out += Script.parse_string("OP_2ROT")  # Roll marker for addition and auxiliary data addition
-            out += Script.parse_string(
-                "OP_IF"
-            )  # Check marker for +P; if we enter here, the stack is: P 2T lambda_(2T+P)
-            out += Script.parse_string("OP_ROT OP_ROT")  # Roll 2T
+            out += Script([OP_2ROT])  # Roll marker for addition and auxiliary data addition
+            out += Script([OP_IF])  # Check marker for +P; if we enter here, the stack is: P 2T lambda_(2T+P)
+            out += Script([OP_ROT, OP_ROT])  # Roll 2T
+            if output_multiplier:
+                out += Script([OP_FROMALTSTACK, OP_1ADD, OP_TOALTSTACK])  # a -> a + 1
             out += pick(position=4, n_elements=2)  # Pick P
             out += ec_over_fq.point_addition(
                 take_modulo=take_modulo, check_constant=False, clean_constant=False
             )  # Compute 2T + P
-            out += Script.parse_string("OP_0")  # Add data to be dropped
-            out += Script.parse_string("OP_ENDIF OP_ENDIF")  # Conclude the conditional branches
-            out += Script.parse_string("OP_DROP")  # Drop useless data (if marker_doubling = False => auxiliary_data,
+            out += Script([OP_0])  # Add data to be dropped
+            out += Script([OP_ENDIF, OP_ENDIF])  # Conclude the conditional branches
+            out += Script([OP_DROP])  # Drop useless data (if marker_doubling = False => auxiliary_data,
             # if marker_addition = False => auxiliary_data_addition)
 
-        # Check if a == 0, in which case return 0x00 0x00
-        out += roll(position=4, n_elements=1)
-        out += Script.parse_string("OP_IF")
-        out += Script.parse_string("OP_2DROP 0x00 0x00")
-        out += Script.parse_string("OP_ENDIF")
+        # Check if a == 0, in which case return 0x00 0x00 (and a = 0 if output_multiplier)
+        if output_multiplier:
+            out += Script([OP_FROMALTSTACK])
+            out += roll(position=5, n_elements=1)
+            out += Script([OP_IF, OP_DROP, OP_2DROP])
+            out += Script.parse_string("0x00 0x00")
+            out += Script([OP_0, OP_ENDIF])
+        else:
+            out += roll(position=4, n_elements=1)
+            out += Script([OP_IF])
+            out += Script.parse_string("OP_2DROP 0x00 0x00")
+            out += Script([OP_ENDIF])
 
         if clean_constant:
-            out += Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL OP_DROP")
+            out += Script([OP_DEPTH, OP_1SUB, OP_ROLL, OP_DROP])
 
-        return out
+        return out.to_script()
 
     def unrolled_multiplication_input(
         self, point_p: list[int], a: int, lambdas: list[list[list[int]]], max_multiplier: int, load_modulus=True
@@ -205,31 +321,828 @@ class EllipticCurveFqUnrolled:
         """
         M = int(log2(max_multiplier))
 
-        out = nums_to_script([self.MODULUS]) if load_modulus else Script()
+        out = ScriptBuilder()
+        if load_modulus:
+            out.append_nums([self.MODULUS])
 
         # Add the lambdas
         if a == 0:
-            out += Script.parse_string("OP_1") + Script.parse_string(" ".join(["OP_0", "OP_0"] * M))
+            out += [OP_1] + [OP_0, OP_0] * M
         else:
             exp_a = [int(bin(a)[j]) for j in range(2, len(bin(a)))][::-1]
 
             N = len(exp_a) - 1
 
             # Marker marker_a_equal_zero
-            out += Script.parse_string("OP_0")
+            out += [OP_0]
 
             # Load the lambdas and the markers
             for j in range(len(lambdas) - 1, -1, -1):
                 if exp_a[-j - 2] == 1:
-                    out += nums_to_script(lambdas[j][1]) + Script.parse_string("OP_1")
-                    out += nums_to_script(lambdas[j][0]) + Script.parse_string("OP_1")
+                    out.append_nums(lambdas[j][1])
+                    out += [OP_1]
+                    out.append_nums(lambdas[j][0])
+                    out += [OP_1]
                 else:
-                    out += Script.parse_string("OP_0 OP_0")
-                    out += nums_to_script(lambdas[j][0])
-                    out += Script.parse_string("OP_1")
-            out += Script.parse_string(" ".join(["OP_0", "OP_0"] * (M - N)))
+                    out += [OP_0, OP_0]
+                    out.append_nums(lambdas[j][0])
+                    out += [OP_1]
+            out += [OP_0, OP_0] * (M - N)
 
         # Load P
-        out += nums_to_script(point_p)
+        out.append_nums(point_p)
+
+        return out.to_script()
+
+    def unrolled_naf_multiplication(
+        self,
+        max_multiplier: int,
+        modulo_threshold: int,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        output_multiplier: bool = False,
+        width: int = 2,
+    ) -> Script:
+        """Unrolled double-and-add multiplication loop for a point in E(F_q), with a in width-w NAF.
+
+        Notice that modulo_threshold is given as bit length.
+        Input parameters:
+            - Stack: q .. marker_a_is_zero [lambdas,a] [lambdas_table] P
+            - Altstack: []
+        Output:
+            - P aP if output_multiplier is False
+            - P aP a if output_multiplier is True
+        Assumption on data:
+            - P is passed as a couple of integers (minimally encoded, in little endian)
+            - [lambdas,a] and [lambdas_table] are constructed by unrolled_naf_multiplication_input
+            - marker_a_is_zero: a == 0
+
+        The digits of a in width-w NAF (see wnaf) are 0 or odd numbers d with |d| < 2^(w-1), and at most one in w
+        consecutive digits is non-zero: on average, a non-zero digit every w + 1 digits, against one every 2 digits in
+        the binary expansion used by unrolled_multiplication. If w > 2, the script first computes the table of the
+        odd multiples P, 3P, .., (2^(w-1) - 1)P, using the gradients [lambdas_table] (for w = 2, the table is P).
+
+        The marker for the addition is a signed index k: if k = 0, nothing is added, otherwise the script adds
+        sign(k) * (2|k| - 1) P, i.e., it adds or subtracts the |k|-th entry of the table. For each digit after the
+        most significant one, from the top, the list [lambdas,a] contains (from the top of the stack):
+            - marker_doubling lambda_2T, or 0x00 0x00 to skip the step
+            - k lambda_(2T + dP) if the digit d is non-zero, or 0x00 0x00 otherwise
+        For w > 2, [lambdas,a] starts with the index k_top of the most significant digit d_top = 2k_top - 1 (for
+        w = 2, d_top = 1). The indices are checked to be in the range of the table.
+        """
+        ec_over_fq = self.EC_OVER_FQ
+        # Number of entries of the table of odd multiples
+        K = 2 ** (width - 2)
+
+        if width < 2:  # noqa: PLR2004
+            msg = "The width of the NAF must be at least 2."
+            raise ValueError(msg)
+
+        out = ScriptBuilder()
+        if check_constant:
+            out += Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
+
+        # After this, the stack is: marker_a_is_zero [lambdas,a] P 3P .. (2K-1)P
+        if K > 1:
+            out += Script([OP_2DUP])
+            out += roll(position=4, n_elements=1)  # Roll lambda_2P
+            out += Script([OP_ROT, OP_ROT])
+            out += ec_over_fq.point_doubling(take_modulo=True, check_constant=False, clean_constant=False)
+            out += Script([OP_TOALTSTACK, OP_TOALTSTACK])  # Put 2P on the altstack
+            for i in range(1, K):
+                out += roll(position=2 * i, n_elements=1)  # Roll lambda_((2i+1)P)
+                out += pick(position=2, n_elements=2)  # Pick (2i-1)P
+                out += Script([OP_FROMALTSTACK, OP_FROMALTSTACK])
+                if i != K - 1:
+                    out += Script([OP_2DUP, OP_TOALTSTACK, OP_TOALTSTACK])
+                out += ec_over_fq.point_addition(
+                    take_modulo=True, check_constant=False, clean_constant=False
+                )  # Compute (2i+1)P = (2i-1)P + 2P
+
+        # After this, the stack is: marker_a_is_zero [lambdas,a] P 3P .. (2K-1)P T, with T = d_top * P
+        if K > 1:
+            out += roll(position=2 * K, n_elements=1)  # Roll k_top
+            out += Script([OP_DUP, OP_1]) + nums_to_script([K + 1]) + Script([OP_WITHIN, OP_VERIFY])
+            if output_multiplier:
+                out += Script([OP_DUP, OP_DUP, OP_ADD, OP_1SUB, OP_TOALTSTACK])
+            out += Script([OP_DUP, OP_ADD]) + nums_to_script([2 * K + 2])
+            out += Script([OP_SWAP, OP_SUB, OP_DUP, OP_PICK, OP_SWAP, OP_1SUB, OP_PICK])
+        else:
+            out += Script([OP_2DUP])
+            if output_multiplier:
+                out += Script([OP_1, OP_TOALTSTACK])
+
+        size_q = ceil(log2(self.MODULUS))
+        current_size = size_q
+
+        # After this, the stack is: marker_a_is_zero P 3P .. (2K-1)P aP
+        for i in range(int(log2(max_multiplier)), -1, -1):
+            size_after_operations = output_bit_size(ec_over_fq.point_doubling, size_q, current_size)
+            size_after_operations = output_bit_size(ec_over_fq.point_addition, size_q, size_after_operations, size_q)
+            if size_after_operations > modulo_threshold or i == 0:
+                take_modulo = True
+                current_size = size_q
+            else:
+                take_modulo = False
+                current_size = size_after_operations
+
+            out += roll(position=2 * K + 3, n_elements=2)  # Roll marker_doubling and lambda_2T
+            out += Script([OP_IF])
+            out += Script([OP_ROT, OP_ROT])  # Roll T
+            if output_multiplier:
+                out += Script([OP_FROMALTSTACK, OP_DUP, OP_ADD, OP_TOALTSTACK])  # a -> 2a
+            out += ec_over_fq.point_doubling(
+                take_modulo=take_modulo, check_constant=False, clean_constant=False
+            )  # Compute 2T
+            out += roll(position=2 * K + 3, n_elements=2)  # Roll k and lambda_(2T+dP)
+            if K > 1 or output_multiplier:
+                out += Script([OP_DUP, OP_ABS]) + nums_to_script([K + 1]) + Script([OP_LESSTHAN, OP_VERIFY])
+            out += Script([OP_DUP, OP_IF])  # Check k != 0
+            if output_multiplier:
+                out += Script([OP_DUP])
+                if K > 1:
+                    out += Script([OP_DUP, OP_DUP, OP_ADD, OP_SWAP, OP_0, OP_LESSTHAN])
+                    out += Script([OP_IF, OP_1ADD, OP_ELSE, OP_1SUB, OP_ENDIF])  # d = 2k - sign(k)
+                out += Script([OP_FROMALTSTACK, OP_ADD, OP_TOALTSTACK])  # a -> a + d
+            out += Script([OP_2SWAP, OP_ROT])  # Reorder as: lambda_(2T+dP) 2T k
+            if K > 1:
+                out += Script([OP_DUP, OP_ABS, OP_DUP, OP_ADD]) + nums_to_script([2 * K + 6])
+                out += Script([OP_SWAP, OP_SUB, OP_DUP, OP_PICK, OP_SWAP, OP_1SUB, OP_PICK])  # Pick (2|k|-1)P
+            else:
+                out += pick(position=5, n_elements=2)  # Pick P
+            out += Script([OP_ROT, OP_0, OP_LESSTHAN, OP_IF, OP_NEGATE, OP_ENDIF])  # Negate if k < 0
+            out += ec_over_fq.point_addition(
+                take_modulo=take_modulo, check_constant=False, clean_constant=False
+            )  # Compute 2T + dP
+            out += Script([OP_ELSE, OP_2DROP, OP_ENDIF])
+            out += Script([OP_ELSE, OP_DROP, OP_ENDIF])
+
+        # After this, the stack is: marker_a_is_zero P aP
+        if K > 1:
+            out += Script([OP_TOALTSTACK, OP_TOALTSTACK])
+            out += Script([OP_2DROP] * (K - 1))
+            out += Script([OP_FROMALTSTACK, OP_FROMALTSTACK])
+
+        # Check if a == 0, in which case return 0x00 0x00 (and a = 0 if output_multiplier)
+        if output_multiplier:
+            out += Script([OP_FROMALTSTACK])
+            out += roll(position=5, n_elements=1)
+            out += Script([OP_IF, OP_DROP, OP_2DROP])
+            out += Script.parse_string("0x00 0x00")
+            out += Script([OP_0, OP_ENDIF])
+        else:
+            out += roll(position=4, n_elements=1)
+            out += Script([OP_IF])
+            out += Script.parse_string("OP_2DROP 0x00 0x00")
+            out += Script([OP_ENDIF])
+
+        if clean_constant:
+            out += Script([OP_DEPTH, OP_1SUB, OP_ROLL, OP_DROP])
+
+        return out.to_script()
+
+    def unrolled_naf_multiplication_input(
+        self,
+        point_p: list[int],
+        a: int,
+        max_multiplier: int,
+        width: int = 2,
+        digits: list[int] | None = None,
+        load_modulus=True,
+    ) -> Script:
+        """Return the input script needed to execute unrolled_naf_multiplication.
+
+        digits is the recoding of a used by the script (little endian): its non-zero digits must be odd, smaller than
+        2^(width-1) in absolute value, and the most significant one must be positive. If digits is None, the
+        width-w NAF of a is used (see wnaf). The gradients are computed from point_p and the digits.
+        """
+        q = self.MODULUS
+        curve_a = self.EC_OVER_FQ.CURVE_A
+        K = 2 ** (width - 2)
+        M = int(log2(max_multiplier))
+
+        if digits is None:
+            digits = wnaf(a, width)
+        if sum(digit * 2**i for i, digit in enumerate(digits)) != a:
+            msg = "The digits do not encode a."
+            raise ValueError(msg)
+        if any(digit != 0 and (digit % 2 == 0 or abs(digit) >= 2 ** (width - 1)) for digit in digits):
+            msg = f"The digits must be 0 or odd numbers smaller than 2^{width - 1} in absolute value."
+            raise ValueError(msg)
+        while digits and digits[-1] == 0:
+            digits = digits[:-1]
+        if digits and digits[-1] < 0:
+            msg = "The most significant digit must be positive."
+            raise ValueError(msg)
+        if len(digits) > M + 2:
+            msg = f"Too many digits: the script handles at most {M + 2} digits."
+            raise ValueError(msg)
+
+        # The elements of marker_a_is_zero [lambdas,a] [lambdas_table], in the order in which they are consumed
+        elements = []
+        table = [tuple(point_p)]
+        if K > 1:
+            double_p, gradient = _ec_add(table[0], table[0], curve_a, q)
+            elements.append(gradient)
+            for _ in range(1, K):
+                entry, gradient = _ec_add(table[-1], double_p, curve_a, q)
+                elements.append(gradient)
+                table.append(entry)
+
+        if not digits:
+            if K > 1:
+                elements.append(1)
+            elements += [0, 0] * (M + 1)
+            elements.append(1)
+        else:
+            if K > 1:
+                elements.append((digits[-1] + 1) // 2)
+            point_t = table[(digits[-1] - 1) // 2]
+            elements += [0, 0] * (M + 2 - len(digits))
+            for digit in digits[-2::-1]:
+                point_t, gradient = _ec_add(point_t, point_t, curve_a, q)
+                elements += [1, gradient]
+                if digit == 0:
+                    elements += [0, 0]
+                    continue
+                entry = table[(abs(digit) - 1) // 2]
+                if digit < 0:
+                    entry = (entry[0], -entry[1] % q)
+                point_t, gradient = _ec_add(point_t, entry, curve_a, q)
+                elements += [(abs(digit) + 1) // 2 * (1 if digit > 0 else -1), gradient]
+            elements.append(0)
+
+        out = ScriptBuilder()
+        if load_modulus:
+            out.append_nums([q])
+        out.append_nums(elements[::-1])
+        out.append_nums(point_p)
+
+        return out.to_script()
+
+    def unrolled_glv_multiplication(
+        self,
+        max_multiplier: int,
+        modulo_threshold: int,
+        beta: int,
+        eigenvalue: int,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        output_multiplier: bool = False,
+    ) -> Script:
+        """Unrolled GLV multiplication for a point in E(F_q) with an endomorphism phi(x,y) = (beta * x, y).
+
+        Notice that modulo_threshold is given as bit length.
+        Input parameters:
+            - Stack: q .. marker_a_is_zero [lambdas,a] lambda_(P+phi(P)) P
+            - Altstack: []
+        Output:
+            - P aP if output_multiplier is False
+            - P aP a if output_multiplier is True
+        Assumption on data:
+            - P is passed as a couple of integers (minimally encoded, in little endian)
+            - P is not the point at infinity, and phi(P) = eigenvalue * P (e.g., P is in the subgroup of order r on
+            BLS12-381, with the constants GLV_BETA and GLV_LAMBDA)
+            - max_multiplier is at most the order of P
+            - [lambdas,a] is constructed by unrolled_glv_multiplication_input
+            - marker_a_is_zero: a == 0
+
+        The multiplier is split as a = a1 + eigenvalue * a2, with a1 = a % eigenvalue and a2 = a // eigenvalue, so that
+        aP = a1 * P + a2 * phi(P). The script computes phi(P) and P + phi(P), and then runs a simultaneous
+        double-and-add on the bits of a1 and a2, which are about half as long as those of a. For each bit after the
+        most significant one, the list [lambdas,a] contains (from the top of the stack):
+            - marker_doubling lambda_2T, or 0x00 0x00 to skip the step
+            - k lambda_(2T + Q), where k = b1 + 2 * b2 for the bits b1 of a1 and b2 of a2, and Q is P, phi(P) or
+            P + phi(P) for k = 1, 2, 3 (if k = 0, lambda_(2T + Q) is 0x00)
+        [lambdas,a] starts with the index k_top of the most significant bits, which is in {1,2,3}.
+
+        The split is proven correct in script: a1 and a2 are read off the indices, and the script checks that
+        a1 < eigenvalue and a = a1 + eigenvalue * a2 < max_multiplier, i.e., that (a1, a2) is the canonical split of a.
+        This also rules out the degenerate additions 2T + Q with 2T = Q, for which the gradient is not constrained.
+        """
+        ec_over_fq = self.EC_OVER_FQ
+
+        if max_multiplier < 2:  # noqa: PLR2004
+            msg = "The max multiplier must be at least 2."
+            raise ValueError(msg)
+
+        out = ScriptBuilder()
+        if check_constant:
+            out += Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
+
+        # After this, the stack is: marker_a_is_zero [lambdas,a] lambda_(P+phi(P)) P phi(P)
+        out += Script([OP_2DUP, OP_SWAP]) + nums_to_script([beta])
+        out += Script([OP_MUL, OP_DEPTH, OP_1SUB, OP_PICK, OP_MOD, OP_SWAP])
+
+        # After this, the stack is: marker_a_is_zero [lambdas,a] P phi(P) P+phi(P)
+        out += roll(position=4, n_elements=1)  # Roll lambda_(P+phi(P))
+        out += pick(position=4, n_elements=4)  # Pick P and phi(P)
+        out += ec_over_fq.point_addition(take_modulo=True, check_constant=False, clean_constant=False)
+
+        # After this, the stack is: marker_a_is_zero [lambdas,a] P phi(P) P+phi(P) T, the altstack is: [a1 a1+2*a2]
+        out += roll(position=6, n_elements=1)  # Roll k_top
+        out += Script([OP_DUP, OP_1, OP_4, OP_WITHIN, OP_VERIFY])
+        out += Script([OP_DUP, OP_2, OP_MOD, OP_TOALTSTACK, OP_DUP, OP_TOALTSTACK])
+        out += Script([OP_DUP, OP_ADD]) + nums_to_script([8])
+        out += Script([OP_SWAP, OP_SUB, OP_DUP, OP_PICK, OP_SWAP, OP_1SUB, OP_PICK])  # Pick the k_top-th entry
+
+        size_q = ceil(log2(self.MODULUS))
+        current_size = size_q
+        n_bits = _glv_bits(max_multiplier, eigenvalue)
+
+        # After this, the stack is: marker_a_is_zero P phi(P) P+phi(P) aP
+        for i in range(n_bits - 2, -1, -1):
+            size_after_operations = output_bit_size(ec_over_fq.point_doubling, size_q, current_size)
+            size_after_operations = output_bit_size(ec_over_fq.point_addition, size_q, size_after_operations, size_q)
+            if size_after_operations > modulo_threshold or i == 0:
+                take_modulo = True
+                current_size = size_q
+            else:
+                take_modulo = False
+                current_size = size_after_operations
+
+            out += roll(position=9, n_elements=2)  # Roll marker_doubling and lambda_2T
+            out += Script([OP_IF])
+            out += Script([OP_ROT, OP_ROT])  # Roll T
+            out += ec_over_fq.point_doubling(
+                take_modulo=take_modulo, check_constant=False, clean_constant=False
+            )  # Compute 2T
+            out += roll(position=9, n_elements=2)  # Roll k and lambda_(2T+Q)
+            out += Script([OP_DUP, OP_0, OP_4, OP_WITHIN, OP_VERIFY])
+            out += Script([OP_DUP, OP_FROMALTSTACK, OP_DUP, OP_ADD, OP_ADD])  # a1+2*a2 -> 2(a1+2*a2) + k
+            out += Script([OP_OVER, OP_2, OP_MOD, OP_FROMALTSTACK, OP_DUP, OP_ADD, OP_ADD])  # a1 -> 2 * a1 + b1
+            out += Script([OP_TOALTSTACK, OP_TOALTSTACK])
+            out += Script([OP_DUP, OP_IF])  # Check k != 0
+            out += Script([OP_2SWAP, OP_ROT])  # Reorder as: lambda_(2T+Q) 2T k
+            out += Script([OP_DUP, OP_DUP, OP_ADD]) + nums_to_script([12])
+            out += Script([OP_SWAP, OP_SUB, OP_DUP, OP_PICK, OP_SWAP, OP_1SUB, OP_PICK])  # Pick Q
+            out += Script([OP_ROT, OP_DROP])
+            out += ec_over_fq.point_addition(
+                take_modulo=take_modulo, check_constant=False, clean_constant=False
+            )  # Compute 2T + Q
+            out += Script([OP_ELSE, OP_2DROP, OP_ENDIF])
+            out += Script([OP_ELSE, OP_DROP, OP_ENDIF])
+
+        # After this, the stack is: marker_a_is_zero P phi(P) P+phi(P) aP a
+        out += Script([OP_FROMALTSTACK, OP_FROMALTSTACK])
+        out += Script([OP_DUP]) + nums_to_script([eigenvalue]) + Script([OP_LESSTHAN, OP_VERIFY])  # a1 < eigenvalue
+        out += Script([OP_TUCK, OP_SUB, OP_2, OP_DIV]) + nums_to_script([eigenvalue])
+        out += Script([OP_MUL, OP_ADD])  # a = a1 + eigenvalue * a2
+        out += Script([OP_DUP]) + nums_to_script([max_multiplier]) + Script([OP_LESSTHAN, OP_VERIFY])
+
+        # After this, the stack is: marker_a_is_zero P aP (a)
+        if output_multiplier:
+            out += Script([OP_TOALTSTACK])
+        else:
+            out += Script([OP_DROP])
+        out += Script([OP_2SWAP, OP_2DROP, OP_2SWAP, OP_2DROP])
+        if output_multiplier:
+            out += Script([OP_FROMALTSTACK])
+
+        # Check if a == 0, in which case return 0x00 0x00 (and a = 0 if output_multiplier)
+        if output_multiplier:
+            out += roll(position=5, n_elements=1)
+            out += Script([OP_IF, OP_DROP, OP_2DROP])
+            out += Script.parse_string("0x00 0x00")
+            out += Script([OP_0, OP_ENDIF])
+        else:
+            out += roll(position=4, n_elements=1)
+            out += Script([OP_IF])
+            out += Script.parse_string("OP_2DROP 0x00 0x00")
+            out += Script([OP_ENDIF])
+
+        if clean_constant:
+            out += Script([OP_DEPTH, OP_1SUB, OP_ROLL, OP_DROP])
+
+        return out.to_script()
+
+    def unrolled_glv_multiplication_input(
+        self,
+        point_p: list[int],
+        a: int,
+        max_multiplier: int,
+        beta: int,
+        eigenvalue: int,
+        load_modulus=True,
+        load_point=True,
+    ) -> Script:
+        """Return the input script needed to execute unrolled_glv_multiplication.
+
+        The multiplier a is split as a = a1 + eigenvalue * a2, and the gradients are computed from point_p. If
+        load_point is False, point_p is not loaded (e.g., if it is hard-coded in the locking script).
+        """
+        q = self.MODULUS
+        curve_a = self.EC_OVER_FQ.CURVE_A
+
+        if not 0 <= a < max_multiplier:
+            msg = "The multiplier must be non-negative and smaller than max_multiplier."
+            raise ValueError(msg)
+
+        n_bits = _glv_bits(max_multiplier, eigenvalue)
+        a1, a2 = a % eigenvalue, a // eigenvalue
+        indices = [((a1 >> i) & 1) + 2 * ((a2 >> i) & 1) for i in range(max(a1.bit_length(), a2.bit_length()))]
+
+        point_phi = (beta * point_p[0] % q, point_p[1])
+        point_sum, gradient = _ec_add(tuple(point_p), point_phi, curve_a, q)
+        table = [tuple(point_p), point_phi, point_sum]
+
+        # The elements of marker_a_is_zero [lambdas,a] lambda_(P+phi(P)), in the order in which they are consumed
+        elements = [gradient]
+        if a == 0:
+            elements += [1] + [0, 0] * (n_bits - 1) + [1]
+        else:
+            point_t = table[indices[-1] - 1]
+            elements += [indices[-1]] + [0, 0] * (n_bits - len(indices))
+            for k in indices[-2::-1]:
+                point_t, gradient = _ec_add(point_t, point_t, curve_a, q)
+                elements += [1, gradient]
+                if k == 0:
+                    elements += [0, 0]
+                    continue
+                point_t, gradient = _ec_add(point_t, table[k - 1], curve_a, q)
+                elements += [k, gradient]
+            elements.append(0)
+
+        out = ScriptBuilder()
+        if load_modulus:
+            out.append_nums([q])
+        out.append_nums(elements[::-1])
+        if load_point:
+            out.append_nums(point_p)
+
+        return out.to_script()
+
+    def _straus_tables(
+        self, points: list[list[int]], max_group_size: int
+    ) -> tuple[list[list[int]], list[list[tuple[int, int]]]]:
+        """Split `points` in groups of at most `max_group_size` points, and compute the table of each group.
+
+        The table of the group [P_(i_0), .., P_(i_(n-1))] is the list of the 2^n - 1 points
+        sum_(b=0)^(n-1) k_b * P_(i_b), for k = sum_b 2^b k_b = 1, .., 2^n - 1.
+        """
+        q = self.MODULUS
+        curve_a = self.EC_OVER_FQ.CURVE_A
+
+        if not points:
+            msg = "At least one point is required."
+            raise ValueError(msg)
+        if max_group_size < 1:
+            msg = "The size of the groups must be at least 1."
+            raise ValueError(msg)
+
+        groups = [list(range(i, min(i + max_group_size, len(points)))) for i in range(0, len(points), max_group_size)]
+        tables = []
+        for group in groups:
+            table = [None]
+            for k in range(1, 2 ** len(group)):
+                lowest_bit = (k & -k).bit_length() - 1
+                entry, _ = _ec_add(table[k & (k - 1)], tuple(points[group[lowest_bit]]), curve_a, q)
+                if entry is None:
+                    msg = "The sums of the points in a group must not be the point at infinity."
+                    raise ValueError(msg)
+                table.append(entry)
+            tables.append(table[1:])
+
+        return groups, tables
+
+    def unrolled_multi_scalar_multiplication(
+        self,
+        points: list[list[int]],
+        max_multipliers: list[int],
+        modulo_threshold: int,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        max_group_size: int = 4,
+        output_indices: bool = False,
+    ) -> Script:
+        """Unrolled interleaved (Straus/Shamir) multi-scalar multiplication for hard-coded points in E(F_q).
+
+        Notice that modulo_threshold is given as bit length.
+        Input parameters:
+            - Stack: q .. [lambdas,a_1,..,a_n]
+            - Altstack: []
+        Output:
+            - a_1 P_1 + .. + a_n P_n
+            - if output_indices is True, the altstack is: [indices], the indices k in the order in which they are read
+        Assumption on data:
+            - points = [P_1, .., P_n] are hard-coded in the script, max_multipliers[i] is the max value of a_(i+1)
+            - [lambdas,a_1,..,a_n] is the list constructed by unrolled_multi_scalar_multiplication_input
+            - the point at infinity is returned as 0x00 0x00
+
+        The points are split in groups of at most max_group_size points, and the table of the 2^n - 1 non-trivial
+        combinations of the points of each group (n being the size of the group) is computed when generating the
+        script and pushed on the stack. Then, a single doubling chain is shared by all the scalars: set
+        M = max_i log_2(max_multipliers[i]), then for j = M, .., 0 the script:
+            - doubles T, if T is not the point at infinity
+            - for each group, adds to T the entry of its table of index k = sum_b 2^b a_(i_b)[j], where a_(i_b)[j] is
+            the j-th bit of the scalar of the b-th point in the group (if k = 0, nothing is added). The additions of a
+            group are only in the script for j <= max_b log_2(max_multipliers[i_b])
+
+        For each step j, the list [lambdas,a_1,..,a_n] contains (from the top of the stack):
+            - the gradient to compute 2T, if T is not the point at infinity
+            - for each group, the index k followed, if k != 0 and T is not the point at infinity, by the gradient to
+            compute T + table[k]
+
+        The index k is checked to be in [0, 2^n), but the scalars are not recomputed from their bits nor bounded by
+        max_multipliers. The script assumes that no linear relation between P_1, .., P_n is known (e.g., the points are
+        independently generated): otherwise, the unlocking script could choose the bits so that T = ±table[k] at some
+        step, where the gradient of the addition is not constrained. Whether T is the point at infinity is tracked by
+        the script, not by the unlocking script.
+
+        Compared to n executions of unrolled_multiplication, the doublings are executed once instead of n times, and
+        the additions are executed at most once per group instead of once per point.
+        """
+        ec_over_fq = self.EC_OVER_FQ
+        groups, tables = self._straus_tables(points, max_group_size)
+        n_entries = sum(len(table) for table in tables)
+        M = max(int(log2(max_multiplier)) for max_multiplier in max_multipliers)
+        # The digits of the g-th group are zero at the steps j > M_groups[g]
+        M_groups = [max(int(log2(max_multipliers[i])) for i in group) for group in groups]
+        # Number of elements on top of [lambdas,a_1,..,a_n]: the tables, the flag T != 0 and T
+        depth = 2 * n_entries + 3
+
+        out = ScriptBuilder()
+        if check_constant:
+            out += Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
+
+        # After this, the stack is: [lambdas,a_1,..,a_n] tables 0 0x00 0x00, where the entry of global index
+        # j = sum_(h < g) len(tables[h]) + k is the k-th entry of the g-th table, and the entry of index 1 is on top
+        out += nums_to_script([el for table in tables[::-1] for entry in table[::-1] for el in entry])
+        out += Script([OP_0])
+        out += Script.parse_string("0x00 0x00")
+
+        size_q = ceil(log2(self.MODULUS))
+        current_size = size_q
+
+        # After this, the stack is: tables marker_T_is_not_zero T
+        for j in range(M, -1, -1):
+            # We always have to take into account all the operations because we don't know which ones are going to be
+            # executed.
+            size_after_operations = output_bit_size(ec_over_fq.point_doubling, size_q, current_size)
+            for _ in [M_group for M_group in M_groups if j <= M_group]:
+                size_after_operations = output_bit_size(
+                    ec_over_fq.point_addition, size_q, size_after_operations, size_q
+                )
+            if size_after_operations > modulo_threshold or j == 0:
+                take_modulo = True
+                current_size = size_q
+            else:
+                take_modulo = False
+                current_size = size_after_operations
+
+            # T is the point at infinity at the first step, no need to double it
+            if j != M:
+                out += Script([OP_2, OP_PICK, OP_IF])  # Check marker_T_is_not_zero
+                out += roll(position=depth, n_elements=1)  # Roll lambda_2T
+                out += Script([OP_ROT, OP_ROT])  # Roll T
+                out += ec_over_fq.point_doubling(
+                    take_modulo=take_modulo, check_constant=False, clean_constant=False
+                )  # Compute 2T
+                out += Script([OP_ENDIF])
+
+            offset = 0
+            for group, table, M_group in zip(groups, tables, M_groups):
+                if j > M_group:
+                    offset += len(table)
+                    continue
+                # After this, the stack is: tables marker_T_is_not_zero T k, with 0 <= k < 2^n
+                out += roll(position=depth, n_elements=1)
+                out += Script([OP_DUP, OP_0]) + nums_to_script([2 ** len(group)]) + Script([OP_WITHIN, OP_VERIFY])
+                if output_indices:
+                    out += Script([OP_DUP, OP_TOALTSTACK])
+                out += Script([OP_DUP, OP_IF])  # Check k != 0
+                out += Script([OP_3, OP_PICK, OP_IF])  # Check marker_T_is_not_zero
+                out += roll(position=depth + 1, n_elements=1)  # Roll lambda_(T+table[k])
+                out += Script([OP_SWAP, OP_2SWAP, OP_ROT])  # Reorder as: lambda_(T+table[k]) T k
+                out += _pick_table_entry(offset=2 * offset + 3)
+                out += ec_over_fq.point_addition(
+                    take_modulo=take_modulo, check_constant=False, clean_constant=False
+                )  # Compute T + table[k]
+                out += Script([OP_ELSE])  # T is the point at infinity, replace it with table[k]
+                out += Script([OP_NIP, OP_NIP, OP_NIP, OP_1, OP_SWAP])
+                out += _pick_table_entry(offset=2 * offset)
+                out += Script([OP_ENDIF])
+                out += Script([OP_ELSE, OP_DROP, OP_ENDIF])
+                offset += len(table)
+
+        # After this, the stack is: sum_i a_i P_i
+        out += Script([OP_ROT, OP_DROP])
+        out += Script([OP_TOALTSTACK, OP_TOALTSTACK])
+        out += Script([OP_2DROP] * n_entries)
+        out += Script([OP_FROMALTSTACK, OP_FROMALTSTACK])
+
+        if clean_constant:
+            out += Script([OP_DEPTH, OP_1SUB, OP_ROLL, OP_DROP])
+
+        return out.to_script()
+
+    def unrolled_multi_scalar_multiplication_input(
+        self,
+        points: list[list[int]],
+        scalars: list[int],
+        max_multipliers: list[int],
+        max_group_size: int = 4,
+        load_modulus=True,
+    ) -> Script:
+        """Return the input script needed to execute unrolled_multi_scalar_multiplication.
+
+        The arguments points, max_multipliers and max_group_size must be the same as the ones used to generate the
+        locking script, and scalars[i] is the multiplier of points[i], with
+        0 <= scalars[i] < 2^(log_2(max_multipliers[i]) + 1). The gradients are computed from the points and the scalars.
+        """
+        q = self.MODULUS
+        curve_a = self.EC_OVER_FQ.CURVE_A
+        groups, tables = self._straus_tables(points, max_group_size)
+        M = max(int(log2(max_multiplier)) for max_multiplier in max_multipliers)
+        M_groups = [max(int(log2(max_multipliers[i])) for i in group) for group in groups]
+
+        if len(scalars) != len(points):
+            msg = "The number of scalars must be the same as the number of points."
+            raise ValueError(msg)
+        for scalar, max_multiplier in zip(scalars, max_multipliers):
+            if not 0 <= scalar < 2 ** (int(log2(max_multiplier)) + 1):
+                msg = f"The scalar {scalar} is out of range."
+                raise ValueError(msg)
+
+        # The elements of [lambdas,a_1,..,a_n], in the order in which they are consumed by the script
+        elements = []
+        point_t = None
+        for j in range(M, -1, -1):
+            if point_t is not None:
+                point_t, gradient = _ec_add(point_t, point_t, curve_a, q)
+                elements.append(gradient)
+            for group, table, M_group in zip(groups, tables, M_groups):
+                if j > M_group:
+                    continue
+                k = sum(((scalars[i] >> j) & 1) << b for b, i in enumerate(group))
+                elements.append(k)
+                if k == 0:
+                    continue
+                if point_t is None:
+                    point_t = table[k - 1]
+                else:
+                    point_t, gradient = _ec_add(point_t, table[k - 1], curve_a, q)
+                    if point_t is None:
+                        msg = "The partial sums of the multi-scalar multiplication must not be the point at infinity."
+                        raise ValueError(msg)
+                    elements.append(gradient)
+
+        out = ScriptBuilder()
+        if load_modulus:
+            out.append_nums([q])
+        out.append_nums(elements[::-1])
+
+        return out.to_script()
+
+    def _comb_teeth(
+        self, points: list[list[int]], max_multipliers: list[int], comb_width: int
+    ) -> tuple[list[list[int]], list[int], list[int]]:
+        """Teeth of the combs of `points`, their max multipliers and the spacing of the teeth of each comb.
+
+        If a < max_multiplier <= 2^n, then a * P = sum_j a_j * (2^(j*s) * P), where s = ceil(n / comb_width) is the
+        spacing of the teeth and a_j < 2^s are the digits of a in base 2^s.
+        """
+        q = self.MODULUS
+        curve_a = self.EC_OVER_FQ.CURVE_A
+
+        if comb_width < 1:
+            msg = "The width of the combs must be at least 1."
+            raise ValueError(msg)
+        if min(max_multipliers) < 2:  # noqa: PLR2004
+            msg = "The max multipliers must be at least 2."
+            raise ValueError(msg)
+
+        teeth, multipliers, spacings = [], [], []
+        for point, max_multiplier in zip(points, max_multipliers):
+            n_bits = (max_multiplier - 1).bit_length()
+            spacing = -(-n_bits // comb_width)
+            tooth = tuple(point)
+            for j in range(0, n_bits, spacing):
+                if j != 0:
+                    for _ in range(spacing):
+                        tooth, _ = _ec_add(tooth, tooth, curve_a, q)
+                if tooth is None:
+                    msg = "The multiples of the points must not be the point at infinity."
+                    raise ValueError(msg)
+                teeth.append(list(tooth))
+                multipliers.append(2 ** (spacing - 1))
+            spacings.append(spacing)
+
+        return teeth, multipliers, spacings
+
+    def unrolled_fixed_base_multiplication(
+        self,
+        points: list[list[int]],
+        max_multipliers: list[int],
+        modulo_threshold: int,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        comb_width: int = 4,
+        max_group_size: int = 4,
+    ) -> Script:
+        """Unrolled fixed-base (comb) multiplication for hard-coded points in E(F_q).
+
+        Input parameters:
+            - Stack: q .. [lambdas,a_1,..,a_n]
+            - Altstack: []
+        Output:
+            - a_1 P_1 + .. + a_n P_n
+        Assumption on data:
+            - points = [P_1, .., P_n] are hard-coded in the script, and a_(i+1) < max_multipliers[i], which is at most
+            the order of P_(i+1)
+            - [lambdas,a_1,..,a_n] is the list constructed by unrolled_fixed_base_multiplication_input
+
+        As the points are known when generating the script, each P_i is replaced by the comb_width teeth
+        2^(j*s) * P_i, j = 0, .., comb_width - 1, where 2^(comb_width*s) >= max_multipliers[i] (see _comb_teeth).
+        Then a_i * P_i is the multi-scalar multiplication of the teeth by the digits of a_i in base 2^s, which is
+        computed with unrolled_multi_scalar_multiplication. The number of doublings is divided by comb_width, and, with
+        max_group_size >= comb_width, so is the number of additions.
+
+        The digits are read off the indices of the multi-scalar multiplication, and the script checks that
+        a_i = sum_j a_(i,j) * 2^(j*s) < max_multipliers[i]. As for unrolled_glv_multiplication, this rules out the
+        degenerate additions T + table[k] with T = ±table[k], for which the gradient is not constrained.
+        """
+        teeth, multipliers, spacings = self._comb_teeth(points, max_multipliers, comb_width)
+        # The groups of teeth of unrolled_multi_scalar_multiplication (see _straus_tables)
+        groups = [list(range(i, min(i + max_group_size, len(teeth)))) for i in range(0, len(teeth), max_group_size)]
+        M = max(int(log2(multiplier)) for multiplier in multipliers)
+        M_groups = [max(int(log2(multipliers[i])) for i in group) for group in groups]
+        n_teeth = len(teeth)
+
+        out = ScriptBuilder()
+        out += self.unrolled_multi_scalar_multiplication(
+            points=teeth,
+            max_multipliers=multipliers,
+            modulo_threshold=modulo_threshold,
+            check_constant=check_constant,
+            clean_constant=clean_constant,
+            max_group_size=max_group_size,
+            output_indices=True,
+        )
+
+        # After this, the stack is: sum_i a_i P_i [indices] 0 .. 0, with the first index read on top of [indices] and
+        # one 0 for each tooth, the digit of the first tooth being the deepest
+        n_indices = sum(1 for j in range(M, -1, -1) for M_group in M_groups if j <= M_group)
+        out += Script([OP_FROMALTSTACK] * n_indices)
+        out += Script([OP_0] * n_teeth)
+
+        # After this, the stack is: sum_i a_i P_i a_(1,0) .. a_(n,comb_width-1). At each step, the digit of each
+        # tooth is rolled from the bottom of the digits, updated as digit <-- 2 * digit + bit and left on top, so that
+        # the digits are back in place at the end of the step.
+        for j in range(M, -1, -1):
+            for group, M_group in zip(groups, M_groups):
+                if j > M_group:
+                    if n_teeth > 1:
+                        out += roll(position=n_teeth - 1, n_elements=len(group))
+                    continue
+                out += roll(position=n_teeth, n_elements=1)  # Roll k
+                for _ in range(len(group) - 1):
+                    out += Script([OP_DUP, OP_2, OP_MOD])  # Lowest bit of k
+                    out += roll(position=n_teeth + 1, n_elements=1)
+                    out += Script([OP_DUP, OP_ADD, OP_ADD, OP_SWAP, OP_2, OP_DIV])  # Shift k
+                out += roll(position=n_teeth, n_elements=1)
+                out += Script([OP_DUP, OP_ADD, OP_ADD])
+
+        # After this, the stack is: sum_i a_i P_i
+        for max_multiplier, spacing in reversed(list(zip(max_multipliers, spacings))):
+            for _ in range(spacing, (max_multiplier - 1).bit_length(), spacing):
+                out += nums_to_script([2**spacing]) + Script([OP_MUL, OP_ADD])
+            out += nums_to_script([max_multiplier]) + Script([OP_LESSTHAN, OP_VERIFY])
+
+        return out.to_script()
+
+    def unrolled_fixed_base_multiplication_input(
+        self,
+        points: list[list[int]],
+        scalars: list[int],
+        max_multipliers: list[int],
+        comb_width: int = 4,
+        max_group_size: int = 4,
+        load_modulus=True,
+    ) -> Script:
+        """Return the input script needed to execute unrolled_fixed_base_multiplication.
+
+        The arguments points, max_multipliers, comb_width and max_group_size must be the same as the ones used to
+        generate the locking script, and scalars[i] < max_multipliers[i] is the multiplier of points[i].
+        """
+        teeth, multipliers, spacings = self._comb_teeth(points, max_multipliers, comb_width)
+
+        if len(scalars) != len(points):
+            msg = "The number of scalars must be the same as the number of points."
+            raise ValueError(msg)
+
+        digits = []
+        for scalar, max_multiplier, spacing in zip(scalars, max_multipliers, spacings):
+            n_bits = (max_multiplier - 1).bit_length()
+            if not 0 <= scalar < max_multiplier:
+                msg = f"The scalar {scalar} is out of range."
+                raise ValueError(msg)
+            digits += [(scalar >> j) % 2**spacing for j in range(0, n_bits, spacing)]
 
-        return out
+        return self.unrolled_multi_scalar_multiplication_input(
+            points=teeth,
+            scalars=digits,
+            max_multipliers=multipliers,
+            max_group_size=max_group_size,
+            load_modulus=load_modulus,
+        )
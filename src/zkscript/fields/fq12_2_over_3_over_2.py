@@ -1,15 +1,50 @@
-from tx_engine import Script
-
-from src.zkscript.util.utility_scripts import nums_to_script, pick, roll
+from math import log2
 
-
-class Fq12:
+from tx_engine import Script
+from tx_engine.engine.op_codes import (
+    OP_1SUB,
+    OP_2,
+    OP_2OVER,
+    OP_2ROT,
+    OP_2SWAP,
+    OP_3,
+    OP_ADD,
+    OP_DEPTH,
+    OP_EQUALVERIFY,
+    OP_FROMALTSTACK,
+    OP_MOD,
+    OP_MUL,
+    OP_OVER,
+    OP_PICK,
+    OP_ROT,
+    OP_SWAP,
+    OP_TOALTSTACK,
+    OP_TUCK,
+)
+
+from src.zkscript.fields.fq2 import MUL_STRATEGIES
+from src.zkscript.util.bit_growth import bit_growth, is_positive_output, keeps_positive, output_bit_size
+from src.zkscript.util.fragment_cache import FragmentCacheable, cached_fragment
+from src.zkscript.util.utility_scripts import mod, nums_to_script, pick, reduce_n, roll
+
+
+class Fq12(FragmentCacheable):
     r"""F_q^12 as quadratic extension of F_q^6, which is built as cubic extension of F_q^2.
 
     F_q^12 = F_q^6[u] / u^2 - v, F_q^6 = F_q^2[v] / v^3 - NON_RESIDUE_OVER_FQ2
     """
 
-    def __init__(self, q: int, fq2, fq6, gammas_frobenius: list[list[int]] | None = None):
+    def __init__(
+        self,
+        q: int,
+        fq2,
+        fq6,
+        gammas_frobenius: list[list[int]] | None = None,
+        mul_strategy: str = "schoolbook",
+    ):
+        if mul_strategy not in MUL_STRATEGIES:
+            msg = f"Unknown multiplication strategy: {mul_strategy}. Available strategies: {MUL_STRATEGIES}."
+            raise ValueError(msg)
         # Characteristic of the field
         self.MODULUS = q
         # Fq2 implementation
@@ -19,13 +54,90 @@ class Fq12:
         # Gammas for the Frobenius - list of [gamma1,gamma2,...,gamma11] where gammai = [gammai1, .., gammai6],
         # with gammaij = list of coefficients of NON_RESIDUE_OVER_FQ2.power(j * (q**i-1)//6)
         self.GAMMAS_FROBENIUS = gammas_frobenius
+        # Multiplication strategy, see MUL_STRATEGIES
+        self.MUL_STRATEGY = mul_strategy
+
+    def _mul_bit_size(self, x: float, y: float) -> float:
+        """Bit size of the values computed by `mul` on inputs of bit sizes `x` and `y`."""
+        fq6 = self.FQ6
+        m = output_bit_size(fq6.mul, x, y)
+        if self.MUL_STRATEGY == "karatsuba":
+            cross = output_bit_size(fq6.mul, output_bit_size(fq6.add, x, x), output_bit_size(fq6.add, y, y))
+            return max(
+                output_bit_size(fq6.subtract, cross, output_bit_size(fq6.add, m, m)),
+                output_bit_size(fq6.add, output_bit_size(fq6.mul_by_non_residue, m), m),
+            )
+        return max(
+            output_bit_size(fq6.add, m, m),
+            output_bit_size(fq6.add, output_bit_size(fq6.mul_by_non_residue, m), m),
+        )
+
+    def _square_bit_size(self, x: float) -> float:
+        """Bit size of the values computed by `square` on an input of bit size `x`."""
+        fq2 = self.FQ2
+        m = output_bit_size(fq2.mul, x, x)
+        sq = output_bit_size(fq2.square, x)
+        double_m = output_bit_size(fq2.scalar_mul, m, 1)
+        double_sum = output_bit_size(fq2.scalar_mul, output_bit_size(fq2.add, m, m), 1)
+        return max(
+            # The last three components are doubled at the end
+            output_bit_size(fq2.add_three, m, m, m) + 1,
+            output_bit_size(fq2.add_three, m, output_bit_size(fq2.mul_by_non_residue, m), m) + 1,
+            output_bit_size(fq2.add, output_bit_size(fq2.mul_by_non_residue, output_bit_size(fq2.add, m, m)), m) + 1,
+            output_bit_size(fq2.add_three, output_bit_size(fq2.mul_by_non_residue, sq), double_sum, sq),
+            output_bit_size(
+                fq2.add_three,
+                output_bit_size(fq2.mul_by_non_residue, output_bit_size(fq2.add, double_m, sq)),
+                double_m,
+                sq,
+            ),
+            output_bit_size(
+                fq2.add, output_bit_size(fq2.mul_by_non_residue, output_bit_size(fq2.add, double_sum, sq)), sq
+            ),
+        )
 
+    def is_mul_positive(self) -> bool:
+        """Whether the output of `mul` is non-negative whenever its inputs are."""
+        fq6 = self.FQ6
+        return is_positive_output(fq6.mul) and is_positive_output(fq6.mul_by_non_residue)
+
+    def is_square_positive(self) -> bool:
+        """Whether the output of `square` is non-negative whenever its input is."""
+        fq2 = self.FQ2
+        return (
+            is_positive_output(fq2.mul)
+            and is_positive_output(fq2.square)
+            and is_positive_output(fq2.mul_by_non_residue)
+        )
+
+    def _cyclotomic_square_bit_size(self, x: float) -> float:
+        """Bit size of the values computed by `cyclotomic_square` on an input of bit size `x`."""
+        fq2 = self.FQ2
+        sq = output_bit_size(fq2.square, x)
+        t = output_bit_size(fq2.add, output_bit_size(fq2.mul_by_non_residue, sq), sq)
+        m = output_bit_size(fq2.mul_by_non_residue, output_bit_size(fq2.mul, x, x))
+        triple_m = output_bit_size(fq2.scalar_mul, m, log2(3))
+        return max(
+            # 3 * t - 2 * x = t + 2 * (t - x)
+            output_bit_size(fq2.add, t, output_bit_size(fq2.scalar_mul, output_bit_size(fq2.subtract, t, x), 1)),
+            # 2 * (3 * m + x)
+            output_bit_size(fq2.scalar_mul, output_bit_size(fq2.add, x, triple_m), 1),
+        )
+
+    def _frobenius_bit_size(self, x: float) -> float:
+        """Bit size of the values computed by `frobenius_odd` and `frobenius_even` on an input of bit size `x`."""
+        return max(x, output_bit_size(self.FQ2.mul, x, log2(self.MODULUS)))
+
+    @cached_fragment
+    @keeps_positive(is_mul_positive)
+    @bit_growth(_mul_bit_size)
     def mul(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         """Multiplication in F_q^12.
 
@@ -39,42 +151,72 @@ class Fq12:
         Variables:
             - If take_modulo is set to True, then the coordinates of the result are in Z_q; otherwise, the coordinates
             are not taken modulo q.
+            - is_input_positive: see `zkscript.util.bit_growth.keeps_positive`. The result is non-negative only if
+            `is_mul_positive()`.
         """
         # Fq6 implementation
         fq6 = self.FQ6
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
+        # After this, the stack holds the two summands of the first component, altstack = [secondComponent]
+        if self.MUL_STRATEGY == "karatsuba":
+            out += self._karatsuba_mul()
+        else:
+            out += self._schoolbook_mul()
+
+        if take_modulo:
+            is_positive = is_input_positive and self.is_mul_positive()
+            out += fq6.add(
+                take_modulo=True,
+                check_constant=False,
+                clean_constant=clean_constant,
+                is_constant_reused=True,
+                is_input_positive=is_positive,
+            )
+            # Batched modulo operations: pull from altstack, rotate, mod out, repeat
+            out += reduce_n(6, is_constant_reused=is_constant_reused, is_positive=is_positive, is_constant_fetched=True)
+        else:
+            out += fq6.add(take_modulo=False, check_constant=False, clean_constant=False)
+            out += Script([OP_FROMALTSTACK] * 6)
+
+        return out
+
+    def _schoolbook_mul(self) -> Script:
+        """Schoolbook multiplication in F_q^12: four multiplications in F_q^6.
+
+        Input parameters:
+            - Stack: q .. X Y
+            - Altstack: []
+        Output:
+            - (x0 * y0) (x1 * y1 * v), to be added to get the first component
+            - Altstack: [(x0 * y1) + (x1 * y0)]
+        """
+        # Fq6 implementation
+        fq6 = self.FQ6
+
         # Computation of second component ---------------------------------------------------------
 
         # After this, the stack is: x0 x1 y0 y1 (x_0 * y_1)
         compute_second_component = (
-            Script.parse_string("OP_2OVER OP_2OVER")
-            + pick(position=9, n_elements=2)
-            + Script.parse_string("OP_2ROT OP_2ROT")
+            Script([OP_2OVER, OP_2OVER]) + pick(position=9, n_elements=2) + Script([OP_2ROT, OP_2ROT])
         )  # Pick y1
         compute_second_component += pick(position=29, n_elements=6)  # Pick x0
         compute_second_component += fq6.mul(take_modulo=False, check_constant=False, clean_constant=False)
 
         # After this, the stack is: x0 x1 y0 y1 (x_0 * y_1) (x1 * y0)
         compute_second_component += (
-            pick(position=15, n_elements=4) + pick(position=21, n_elements=2) + Script.parse_string("OP_2ROT OP_2ROT")
+            pick(position=15, n_elements=4) + pick(position=21, n_elements=2) + Script([OP_2ROT, OP_2ROT])
         )  # Pick y0
         compute_second_component += pick(position=29, n_elements=6)  # Pick x1
         compute_second_component += fq6.mul(take_modulo=False, check_constant=False, clean_constant=False)
 
         # After this, the stack is: x0 x1 y0 y1, altstack = [secondComponent]
         compute_second_component += fq6.add(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_second_component += Script.parse_string(
-            "OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK"
-        )
+        compute_second_component += Script([OP_TOALTSTACK] * 6)
 
         # End of computation of second component --------------------------------------------------
 
@@ -82,60 +224,74 @@ class Fq12:
 
         # After this, the stack is: x_0 y_0, altstack = [secondComponent, (x_1 * y_1 * v)]
         compute_first_component = (
-            roll(position=15, n_elements=4) + roll(position=17, n_elements=2) + Script.parse_string("OP_2ROT OP_2ROT")
+            roll(position=15, n_elements=4) + roll(position=17, n_elements=2) + Script([OP_2ROT, OP_2ROT])
         )  # Roll x1
         compute_first_component += fq6.mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_first_component += fq6.mul_by_non_residue(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_first_component += Script.parse_string(
-            "OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK"
-        )
+        compute_first_component += Script([OP_TOALTSTACK] * 6)
 
         # After this, the stack is: firstComponent, altstack = [secondComponent]
         compute_first_component += fq6.mul(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_first_component += Script.parse_string(
-            "OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK"
-        )
-        if take_modulo:
-            compute_first_component += fq6.add(
-                take_modulo=True, check_constant=False, clean_constant=clean_constant, is_constant_reused=True
-            )
-        else:
-            compute_first_component += fq6.add(take_modulo=False, check_constant=False, clean_constant=False)
+        compute_first_component += Script([OP_FROMALTSTACK] * 6)
 
         # End of computation of first component ---------------------------------------------------
 
-        out += compute_second_component + compute_first_component
+        return compute_second_component + compute_first_component
 
-        if take_modulo:
-            # Batched modulo operations: pull from altstack, rotate, mod out, repeat
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
-        else:
-            out += Script.parse_string(
-                "OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK"
-            )
+    def _karatsuba_mul(self) -> Script:
+        """Karatsuba multiplication in F_q^12: three multiplications in F_q^6.
+
+        The second component is computed as (x0 + x1) * (y0 + y1) - x0 * y0 - x1 * y1.
+
+        Input parameters:
+            - Stack: q .. X Y
+            - Altstack: []
+        Output:
+            - (x0 * y0) (x1 * y1 * v), to be added to get the first component
+            - Altstack: [(x0 * y1) + (x1 * y0)]
+        """
+        # Fq6 implementation
+        fq6 = self.FQ6
+
+        # After this, the stack is: x0 x1 y0 y1, altstack = [(x0 + x1) * (y0 + y1)]
+        out = pick(position=23, n_elements=12)  # Pick x0 x1
+        out += fq6.add(take_modulo=False, check_constant=False, clean_constant=False)
+        out += pick(position=17, n_elements=12)  # Pick y0 y1
+        out += fq6.add(take_modulo=False, check_constant=False, clean_constant=False)
+        out += fq6.mul(take_modulo=False, check_constant=False, clean_constant=False)
+        out += Script([OP_TOALTSTACK] * 6)
+
+        # After this, the stack is: (x1 * y1) (x0 * y0)
+        out += roll(position=17, n_elements=6)  # Roll x1
+        out += fq6.mul(take_modulo=False, check_constant=False, clean_constant=False)
+        out += roll(position=17, n_elements=6)  # Roll x0
+        out += roll(position=17, n_elements=6)  # Roll y0
+        out += fq6.mul(take_modulo=False, check_constant=False, clean_constant=False)
+
+        # After this, the stack is: (x1 * y1) (x0 * y0), altstack = [(x0 * y1) + (x1 * y0)]
+        out += pick(position=11, n_elements=12)
+        out += fq6.add(take_modulo=False, check_constant=False, clean_constant=False)
+        out += Script([OP_FROMALTSTACK] * 6)
+        out += roll(position=11, n_elements=6)
+        out += fq6.subtract(take_modulo=False, check_constant=False, clean_constant=False)
+        out += Script([OP_TOALTSTACK] * 6)
+
+        # After this, the stack is: (x0 * y0) (x1 * y1 * v), altstack = [(x0 * y1) + (x1 * y0)]
+        out += roll(position=11, n_elements=6)
+        out += fq6.mul_by_non_residue(take_modulo=False, check_constant=False, clean_constant=False)
 
         return out
 
+    @cached_fragment
+    @keeps_positive(is_square_positive)
+    @bit_growth(_square_bit_size)
     def square(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         """Squaring in F_q^12.
 
@@ -149,28 +305,28 @@ class Fq12:
         Variables:
             - If take_modulo is set to True, then the coordinates of the result are in Z_q; otherwise, the coordinates
             are not taken modulo q.
+            - is_input_positive: see `zkscript.util.bit_growth.keeps_positive`. The result is non-negative only if
+            `is_square_positive()`.
         """
         # Fq6 implementation
         fq2 = self.FQ2
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
+        is_positive = is_input_positive and self.is_square_positive()
+
         # Computation of sixth component ---------------------------------------------------------
 
         # After this, the stack is: a b c d e f (b*e)
-        compute_sixth_component = Script.parse_string("OP_2OVER")  # Pick e
+        compute_sixth_component = Script([OP_2OVER])  # Pick e
         compute_sixth_component += pick(position=11, n_elements=2)  # Pick b
         compute_sixth_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
 
         # After this, the stack is: a b c d e f (b*e) (a*f)
-        compute_sixth_component += Script.parse_string("OP_2OVER")  # Pick f
+        compute_sixth_component += Script([OP_2OVER])  # Pick f
         compute_sixth_component += pick(position=15, n_elements=2)  # Pick a
         compute_sixth_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
 
@@ -179,17 +335,17 @@ class Fq12:
         compute_sixth_component += pick(position=11, n_elements=2)  # Pick d
         compute_sixth_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_sixth_component += fq2.add_three(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_sixth_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_sixth_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # Computation of fifth component ---------------------------------------------------------
 
         # After this, the stack is: a b c d e f (a*e), altstack = [sixthComponent]
-        compute_fifth_component = Script.parse_string("OP_2OVER")  # Pick e
+        compute_fifth_component = Script([OP_2OVER])  # Pick e
         compute_fifth_component += pick(position=13, n_elements=2)  # Pick a
         compute_fifth_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
 
         # After this, the stack is: a b c d e f (a*e) (c*f*xi), altstack = [sixthComponent]
-        compute_fifth_component += Script.parse_string("OP_2OVER")  # Pick f
+        compute_fifth_component += Script([OP_2OVER])  # Pick f
         compute_fifth_component += pick(position=11, n_elements=2)  # Pick c
         compute_fifth_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_fifth_component += fq2.mul_by_non_residue(take_modulo=False, check_constant=False, clean_constant=False)
@@ -199,17 +355,17 @@ class Fq12:
         compute_fifth_component += pick(position=11, n_elements=2)  # Pick d
         compute_fifth_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_fifth_component += fq2.add_three(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_fifth_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_fifth_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # Computation of fourth component ---------------------------------------------------------
 
         # After this, the stack is: a b c d e f (c*e), altstack = [sixthComponent, fifthComponent]
-        compute_fourth_component = Script.parse_string("OP_2OVER")  # Pick e
+        compute_fourth_component = Script([OP_2OVER])  # Pick e
         compute_fourth_component += pick(position=9, n_elements=2)  # Pick c
         compute_fourth_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
 
         # After this, the stack is: a b c d e f [(c*e) + (b*f)]*xi, altstack = [sixthComponent, fifthComponent]
-        compute_fourth_component += Script.parse_string("OP_2OVER")  # Pick f
+        compute_fourth_component += Script([OP_2OVER])  # Pick f
         compute_fourth_component += pick(position=13, n_elements=2)  # Pick b
         compute_fourth_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_fourth_component += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
@@ -222,30 +378,30 @@ class Fq12:
         compute_fourth_component += pick(position=9, n_elements=2)  # Pick d
         compute_fourth_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_fourth_component += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_fourth_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_fourth_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # Compute third component -------------------------------------------------------------------
 
         # After this, the stack is: a b c d e f (d*e),
         # altstack = [sixthComponent, fifthComponent, fourthComponent]
-        compute_third_component = Script.parse_string("OP_2OVER")  # Pick e
+        compute_third_component = Script([OP_2OVER])  # Pick e
         compute_third_component += pick(position=7, n_elements=2)  # Pick d
         compute_third_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
 
         # After this, the stack is: a b c d e f (d*e) f^2*xi,
         # altstack = [sixthComponent, fifthComponent, fourthComponent]
-        compute_third_component += Script.parse_string("OP_2OVER")  # Pick f
+        compute_third_component += Script([OP_2OVER])  # Pick f
         compute_third_component += fq2.square(take_modulo=False, check_constant=False, clean_constant=False)
         compute_third_component += fq2.mul_by_non_residue(take_modulo=False, check_constant=False, clean_constant=False)
 
         # After this, the stack is: a b c d e f f^2*xi 2*[(d*e) + (a*c)],
         # altstack = [sixthComponent, fifthComponent, fourthComponent]
-        compute_third_component += Script.parse_string("OP_2SWAP")  # Roll (d*e)
+        compute_third_component += Script([OP_2SWAP])  # Roll (d*e)
         compute_third_component += pick(position=15, n_elements=2)  # Pick a
         compute_third_component += pick(position=13, n_elements=2)  # Pick c
         compute_third_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_third_component += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_third_component += Script.parse_string("OP_2")
+        compute_third_component += Script([OP_2])
         compute_third_component += fq2.scalar_mul(take_modulo=False, check_constant=False, clean_constant=False)
 
         # After this, the stack is: a b c d e f,
@@ -253,16 +409,16 @@ class Fq12:
         compute_third_component += pick(position=13, n_elements=2)  # Pick b
         compute_third_component += fq2.square(take_modulo=False, check_constant=False, clean_constant=False)
         compute_third_component += fq2.add_three(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_third_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_third_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # Compute second component ------------------------------------------------------------------
 
         # After this, the stack is: a b c d e f 2*(e*f),
         # altstack = [sixthComponent, fifthComponent, fourthComponent, thirdComponent]
-        compute_second_component = Script.parse_string("OP_2OVER")  # Pick e
-        compute_second_component += Script.parse_string("OP_2OVER")  # Pick f
+        compute_second_component = Script([OP_2OVER])  # Pick e
+        compute_second_component += Script([OP_2OVER])  # Pick f
         compute_second_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_second_component += Script.parse_string("OP_2")
+        compute_second_component += Script([OP_2])
         compute_second_component += fq2.scalar_mul(take_modulo=False, check_constant=False, clean_constant=False)
 
         # After this, the stack is: a b c d e f xi*[c^2 + 2*e*f],
@@ -279,7 +435,7 @@ class Fq12:
         compute_second_component += pick(position=13, n_elements=2)  # Pick a
         compute_second_component += pick(position=13, n_elements=2)  # Pick b
         compute_second_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_second_component += Script.parse_string("OP_2")
+        compute_second_component += Script([OP_2])
         compute_second_component += fq2.scalar_mul(take_modulo=False, check_constant=False, clean_constant=False)
 
         # After this, the stack is: a b c d e f,
@@ -287,12 +443,12 @@ class Fq12:
         compute_second_component += pick(position=9, n_elements=2)  # Pick d
         compute_second_component += fq2.square(take_modulo=False, check_constant=False, clean_constant=False)
         compute_second_component += fq2.add_three(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_second_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_second_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # Compute first component -------------------------------------------------------------------
 
         # After this, the stack is: a b c e (d*f)
-        compute_first_component = Script.parse_string("OP_2ROT")  # Roll d
+        compute_first_component = Script([OP_2ROT])  # Roll d
         compute_first_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
 
         # After this, the stack is: a e (d*f) (b*c)
@@ -302,21 +458,25 @@ class Fq12:
 
         # After this, the stack is: a e 2*[(d*f)+(b*c)]
         compute_first_component += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_first_component += Script.parse_string("OP_2")
+        compute_first_component += Script([OP_2])
         compute_first_component += fq2.scalar_mul(take_modulo=False, check_constant=False, clean_constant=False)
 
         # After this, the stack is: a xi*[e^2 + 2*[(d*f)+(b*c)]]
-        compute_first_component += Script.parse_string("OP_2SWAP")
+        compute_first_component += Script([OP_2SWAP])
         compute_first_component += fq2.square(take_modulo=False, check_constant=False, clean_constant=False)
         compute_first_component += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
         compute_first_component += fq2.mul_by_non_residue(take_modulo=False, check_constant=False, clean_constant=False)
 
         # After this, the stack is: a^2 + xi*[e^2 + 2*[(d*f)+(b*c)]]
-        compute_first_component += Script.parse_string("OP_2SWAP")
+        compute_first_component += Script([OP_2SWAP])
         compute_first_component += fq2.square(take_modulo=False, check_constant=False, clean_constant=False)
         if take_modulo:
             compute_first_component += fq2.add(
-                take_modulo=True, check_constant=False, clean_constant=clean_constant, is_constant_reused=True
+                take_modulo=True,
+                check_constant=False,
+                clean_constant=clean_constant,
+                is_constant_reused=True,
+                is_input_positive=is_positive,
             )
         else:
             compute_first_component += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
@@ -334,40 +494,172 @@ class Fq12:
 
         if take_modulo:
             # Batched modulo operations: pull from altstack, rotate, mod out, repeat
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_2 OP_MUL OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_2 OP_MUL OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_2 OP_MUL OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_2 OP_MUL OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_2 OP_MUL OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_2 OP_MUL OP_ROT")
-            if is_constant_reused:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+            out += Script([OP_FROMALTSTACK, OP_ROT])
+            out += mod(is_positive=is_positive)
+            out += Script([OP_FROMALTSTACK, OP_ROT])
+            out += mod(is_positive=is_positive)
+            out += Script([OP_FROMALTSTACK, OP_ROT])
+            out += mod(is_positive=is_positive)
+            out += Script([OP_FROMALTSTACK, OP_ROT])
+            out += mod(is_positive=is_positive)
+            out += Script([OP_FROMALTSTACK, OP_2, OP_MUL, OP_ROT])
+            out += mod(is_positive=is_positive)
+            out += Script([OP_FROMALTSTACK, OP_2, OP_MUL, OP_ROT])
+            out += mod(is_positive=is_positive)
+            out += Script([OP_FROMALTSTACK, OP_2, OP_MUL, OP_ROT])
+            out += mod(is_positive=is_positive)
+            out += Script([OP_FROMALTSTACK, OP_2, OP_MUL, OP_ROT])
+            out += mod(is_positive=is_positive)
+            out += Script([OP_FROMALTSTACK, OP_2, OP_MUL, OP_ROT])
+            out += mod(is_positive=is_positive)
+            out += Script([OP_FROMALTSTACK, OP_2, OP_MUL, OP_ROT])
+            out += mod(is_constant_reused=is_constant_reused, is_positive=is_positive)
         else:
-            out += Script.parse_string("OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK")
-            out += Script.parse_string(
-                "OP_FROMALTSTACK OP_2 OP_MUL OP_FROMALTSTACK OP_2 OP_MUL OP_FROMALTSTACK OP_2 OP_MUL"
-            )
-            out += Script.parse_string(
-                "OP_FROMALTSTACK OP_2 OP_MUL OP_FROMALTSTACK OP_2 OP_MUL OP_FROMALTSTACK OP_2 OP_MUL"
+            out += Script([OP_FROMALTSTACK] * 4)
+            out += Script([OP_FROMALTSTACK, OP_2, OP_MUL, OP_FROMALTSTACK, OP_2, OP_MUL, OP_FROMALTSTACK, OP_2, OP_MUL])
+            out += Script([OP_FROMALTSTACK, OP_2, OP_MUL, OP_FROMALTSTACK, OP_2, OP_MUL, OP_FROMALTSTACK, OP_2, OP_MUL])
+
+        return out
+
+    @cached_fragment
+    @bit_growth(_cyclotomic_square_bit_size)
+    def cyclotomic_square(
+        self,
+        take_modulo: bool,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        is_constant_reused: bool | None = None,
+    ) -> Script:
+        """Squaring in the cyclotomic subgroup of F_q^12.
+
+        Granger-Scott squaring: F_q^12 is seen as a cubic extension of F_q^4 = F_q^2[s] / (s^2 - NON_RESIDUE_OVER_FQ2),
+        and for X in the cyclotomic subgroup the square of X is a linear combination of X and of the squares of the
+        three elements (a + e*s), (d + c*s), (b + f*s) of F_q^4:
+            X**2 = (3*t0 - 2*a, 3*t1 - 2*b, 3*t2 - 2*c, 6*m2*xi + 2*d, 6*m0 + 2*e, 6*m1 + 2*f)
+        where (a + e*s)^2 = t0 + 2*m0*s, (d + c*s)^2 = t1 + 2*m1*s, (b + f*s)^2 = t2 + 2*m2*s.
+
+        Input parameters:
+            - Stack: q .. X
+            - Altstack: []
+        Output:
+            - X**2
+        Assumption on data:
+            - X is passed as a couple of elements of Fq6: X = x0 x1, x0 = a b c, x1 = d e f
+            - X is in the cyclotomic subgroup of F_q^12, i.e., X^(q^4 - q^2 + 1) = 1, e.g., X is the output of the
+            easy part of the final exponentiation
+        Variables:
+            - If take_modulo is set to True, then the coordinates of the result are in Z_q; otherwise, the coordinates
+            are not taken modulo q.
+        """
+        # Fq2 implementation
+        fq2 = self.FQ2
+
+        if check_constant:
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
+        else:
+            out = Script()
+
+        # Square in F_q^4: x y --> (x^2 + y^2 * xi) (x * y)
+        square_in_fq4 = Script([OP_2OVER, OP_2OVER])
+        square_in_fq4 += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
+        square_in_fq4 += Script([OP_2ROT])
+        square_in_fq4 += fq2.square(take_modulo=False, check_constant=False, clean_constant=False)
+        square_in_fq4 += Script([OP_2ROT])
+        square_in_fq4 += fq2.square(take_modulo=False, check_constant=False, clean_constant=False)
+        square_in_fq4 += fq2.mul_by_non_residue(take_modulo=False, check_constant=False, clean_constant=False)
+        square_in_fq4 += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
+        square_in_fq4 += Script([OP_2SWAP])
+
+        # m y --> 2 * (3 * m + y)
+        double_and_add = Script([OP_2SWAP, OP_3])
+        double_and_add += fq2.scalar_mul(take_modulo=False, check_constant=False, clean_constant=False)
+        double_and_add += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
+        double_and_add += Script([OP_2])
+        double_and_add += fq2.scalar_mul(take_modulo=False, check_constant=False, clean_constant=False)
+
+        # t x --> t 2 * (t - x)
+        double_difference = Script([OP_2OVER, OP_2SWAP])
+        double_difference += fq2.subtract(take_modulo=False, check_constant=False, clean_constant=False)
+        double_difference += Script([OP_2])
+        double_difference += fq2.scalar_mul(take_modulo=False, check_constant=False, clean_constant=False)
+
+        # Computation of sixth component ---------------------------------------------------------
+
+        # After this, the stack is: a b c d e f t1 m1
+        out += pick(position=5, n_elements=2)  # Pick d
+        out += pick(position=9, n_elements=2)  # Pick c
+        out += square_in_fq4
+
+        # After this, the stack is: a b c d e f t1, altstack = [2 * (3 * m1 + f)]
+        out += pick(position=5, n_elements=2)  # Pick f
+        out += double_and_add
+        out += Script([OP_TOALTSTACK, OP_TOALTSTACK])
+
+        # Computation of fifth component ---------------------------------------------------------
+
+        # After this, the stack is: a b c d e f t1 t0 m0, altstack = [sixthComponent]
+        out += pick(position=13, n_elements=2)  # Pick a
+        out += pick(position=7, n_elements=2)  # Pick e
+        out += square_in_fq4
+
+        # After this, the stack is: a b c d f t1 t0, altstack = [sixthComponent, 2 * (3 * m0 + e)]
+        out += roll(position=9, n_elements=2)  # Roll e
+        out += double_and_add
+        out += Script([OP_TOALTSTACK, OP_TOALTSTACK])
+
+        # Computation of fourth component ---------------------------------------------------------
+
+        # After this, the stack is: a b c d t1 t0 t2 m2, altstack = [sixthComponent, fifthComponent]
+        out += pick(position=11, n_elements=2)  # Pick b
+        out += roll(position=7, n_elements=2)  # Roll f
+        out += square_in_fq4
+
+        # After this, the stack is: a b c t1 t0 t2,
+        # altstack = [sixthComponent, fifthComponent, 2 * (3 * m2 * xi + d)]
+        out += fq2.mul_by_non_residue(take_modulo=False, check_constant=False, clean_constant=False)
+        out += roll(position=9, n_elements=2)  # Roll d
+        out += double_and_add
+        out += Script([OP_TOALTSTACK, OP_TOALTSTACK])
+
+        # Computation of third component ---------------------------------------------------------
+
+        # After this, the stack is: a b t1 t0,
+        # altstack = [sixthComponent, fifthComponent, fourthComponent, 3 * t2 - 2 * c]
+        out += roll(position=7, n_elements=2)  # Roll c
+        out += double_difference
+        out += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
+        out += Script([OP_TOALTSTACK, OP_TOALTSTACK])
+
+        # Computation of second component ---------------------------------------------------------
+
+        # After this, the stack is: a t0,
+        # altstack = [sixthComponent, fifthComponent, fourthComponent, thirdComponent, 3 * t1 - 2 * b]
+        out += Script([OP_2SWAP])  # Roll t1
+        out += Script([OP_2ROT])  # Roll b
+        out += double_difference
+        out += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
+        out += Script([OP_TOALTSTACK, OP_TOALTSTACK])
+
+        # Computation of first component ---------------------------------------------------------
+
+        # After this, the stack is: 3 * t0 - 2 * a,
+        # altstack = [sixthComponent, fifthComponent, fourthComponent, thirdComponent, secondComponent]
+        out += Script([OP_2SWAP])
+        out += double_difference
+        if take_modulo:
+            out += fq2.add(
+                take_modulo=True, check_constant=False, clean_constant=clean_constant, is_constant_reused=True
             )
+            # Batched modulo operations: pull from altstack, rotate, mod out, repeat
+            out += reduce_n(10, is_constant_reused=is_constant_reused, is_constant_fetched=True)
+        else:
+            out += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
+            out += Script([OP_FROMALTSTACK] * 10)
 
         return out
 
+    @cached_fragment
+    @bit_growth(lambda x: x, uses_instance=False)
     def conjugate(
         self,
         take_modulo: bool,
@@ -392,11 +684,7 @@ class Fq12:
         fq6 = self.FQ6
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
@@ -404,50 +692,17 @@ class Fq12:
 
         if take_modulo:
             # Put x1 on altstack
-            out += Script.parse_string(
-                "OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK"
-            )
+            out += Script([OP_TOALTSTACK] * 6)
             # Put everything except x00 on altstack
-            out += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK")
+            out += Script([OP_TOALTSTACK] * 5)
 
-            if clean_constant:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL")
-            else:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-
-            # Mod out x00
-            out += fetch_q
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-
-            # Batched modulo operations: pull from altstack, rotate, mod out, repeat
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+            # Mod out x00, then batched modulo operations: pull from altstack, rotate, mod out, repeat
+            out += reduce_n(12, clean_constant, is_constant_reused)
 
         return out
 
+    @cached_fragment
+    @bit_growth(_frobenius_bit_size)
     def frobenius_odd(
         self,
         n: int,
@@ -478,11 +733,7 @@ class Fq12:
         gammas = self.GAMMAS_FROBENIUS[n % 12 - 1]
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
@@ -491,7 +742,7 @@ class Fq12:
         a_conjugate += fq2.conjugate(
             take_modulo=take_modulo, check_constant=False, clean_constant=False, is_constant_reused=False
         )  # Conjugate a
-        a_conjugate += Script.parse_string("OP_2ROT OP_2ROT")  # Bring e and f on top of the stack
+        a_conjugate += Script([OP_2ROT, OP_2ROT])  # Bring e and f on top of the stack
 
         # After this, the stack is: c d Conjugate(a) [Conjugate(b) * gamma12] e f
         b_conjugate_times_gamma12 = roll(position=11, n_elements=2)  # Bring b on top of the stack
@@ -502,7 +753,7 @@ class Fq12:
         b_conjugate_times_gamma12 += fq2.mul(
             take_modulo=take_modulo, check_constant=False, clean_constant=False, is_constant_reused=False
         )  # Multiply
-        b_conjugate_times_gamma12 += Script.parse_string("OP_2ROT OP_2ROT")  # Bring e and f on top of the stack
+        b_conjugate_times_gamma12 += Script([OP_2ROT, OP_2ROT])  # Bring e and f on top of the stack
 
         # After this, the stack is: d Conjugate(a) [Conjugate(b) * gamma12] [Conjugate(c) * gamma14] e f
         c_conjugate_gamma14 = roll(position=11, n_elements=2)  # Bring c on top of the stack
@@ -513,7 +764,7 @@ class Fq12:
         c_conjugate_gamma14 += fq2.mul(
             take_modulo=take_modulo, check_constant=False, clean_constant=False, is_constant_reused=False
         )  # Multiply
-        c_conjugate_gamma14 += Script.parse_string("OP_2ROT OP_2ROT")  # Bring e and f on top of the stack
+        c_conjugate_gamma14 += Script([OP_2ROT, OP_2ROT])  # Bring e and f on top of the stack
 
         # After this, the stack is: Conjugate(a) [Conjugate(b) * gamma12] [Conjugate(c) * gamma14]
         # [Conjugate(d) * gamma11] e f
@@ -525,11 +776,11 @@ class Fq12:
         d_conjugate_gamma11 += fq2.mul(
             take_modulo=take_modulo, check_constant=False, clean_constant=False, is_constant_reused=False
         )  # Multiply
-        d_conjugate_gamma11 += Script.parse_string("OP_2ROT OP_2ROT")  # Bring e and f on top of the stack
+        d_conjugate_gamma11 += Script([OP_2ROT, OP_2ROT])  # Bring e and f on top of the stack
 
         # After this, the stack is: Conjugate(a) [Conjugate(b) * gamma12] [Conjugate(c) * gamma14]
         # [Conjugate(d) * gamma11] [Conjugate(e) * gamma13] f
-        e_conjugate_gamma13 = Script.parse_string("OP_2SWAP")  # Bring e on top of the stack
+        e_conjugate_gamma13 = Script([OP_2SWAP])  # Bring e on top of the stack
         e_conjugate_gamma13 += fq2.conjugate(
             take_modulo=False, check_constant=False, clean_constant=False
         )  # Conjugate e
@@ -537,7 +788,7 @@ class Fq12:
         e_conjugate_gamma13 += fq2.mul(
             take_modulo=take_modulo, check_constant=False, clean_constant=False, is_constant_reused=False
         )  # Multiply
-        e_conjugate_gamma13 += Script.parse_string("OP_2SWAP")  # Bring f on top of the stack
+        e_conjugate_gamma13 += Script([OP_2SWAP])  # Bring f on top of the stack
 
         # After this, the stack is: Conjugate(a) [Conjugate(b) * gamma12] [Conjugate(c) * gamma14]
         # [Conjugate(d) * gamma11] [Conjugate(e) * gamma13] [Conjugate(f) * gamma15]
@@ -563,6 +814,8 @@ class Fq12:
 
         return out
 
+    @cached_fragment
+    @bit_growth(_frobenius_bit_size)
     def frobenius_even(
         self,
         n: int,
@@ -593,22 +846,18 @@ class Fq12:
         gammas = self.GAMMAS_FROBENIUS[n % 12 - 1]
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         # After this, the stack is: b c d a e f
         a = roll(position=11, n_elements=2)  # Bring a on top of the stack
         if take_modulo:
-            a += Script.parse_string("OP_SWAP")
-            a += Script.parse_string("OP_DEPTH OP_1SUB OP_PICK OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            a += Script.parse_string("OP_SWAP OP_ROT")
-            a += Script.parse_string("OP_OVER OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
-        a += Script.parse_string("OP_2ROT OP_2ROT")  # Bring e and f on top of the stack
+            a += Script([OP_SWAP])
+            a += Script([OP_DEPTH, OP_1SUB, OP_PICK, OP_TUCK, OP_MOD, OP_OVER, OP_ADD, OP_OVER, OP_MOD])
+            a += Script([OP_SWAP, OP_ROT])
+            a += Script([OP_OVER, OP_MOD, OP_OVER, OP_ADD, OP_SWAP, OP_MOD])
+        a += Script([OP_2ROT, OP_2ROT])  # Bring e and f on top of the stack
 
         # After this, the stack is: c d a [b * gamma22] e f
         b_gamma22 = roll(position=11, n_elements=2)  # Bring b on top of the stack
@@ -616,7 +865,7 @@ class Fq12:
         b_gamma22 += fq2.mul(
             take_modulo=take_modulo, check_constant=False, clean_constant=False, is_constant_reused=False
         )  # Multiply
-        b_gamma22 += Script.parse_string("OP_2ROT OP_2ROT")  # Bring e and f on top of the stack
+        b_gamma22 += Script([OP_2ROT, OP_2ROT])  # Bring e and f on top of the stack
 
         # After this, the stack is: d a [b * gamma12] [c * gamma24] e f
         c_gamma24 = roll(position=11, n_elements=2)  # Bring c on top of the stack
@@ -624,7 +873,7 @@ class Fq12:
         c_gamma24 += fq2.mul(
             take_modulo=take_modulo, check_constant=False, clean_constant=False, is_constant_reused=False
         )  # Multiply
-        c_gamma24 += Script.parse_string("OP_2ROT OP_2ROT")  # Bring e and f on top of the stack
+        c_gamma24 += Script([OP_2ROT, OP_2ROT])  # Bring e and f on top of the stack
 
         # After this, the stack is: a [b * gamma12] [c * gamma14] [d * gamma21] e f
         d_gamma21 = roll(position=11, n_elements=2)  # Bring d on top of the stack
@@ -632,15 +881,15 @@ class Fq12:
         d_gamma21 += fq2.mul(
             take_modulo=take_modulo, check_constant=False, clean_constant=False, is_constant_reused=False
         )  # Multiply
-        d_gamma21 += Script.parse_string("OP_2ROT OP_2ROT")  # Bring e and f on top of the stack
+        d_gamma21 += Script([OP_2ROT, OP_2ROT])  # Bring e and f on top of the stack
 
         # After this, the stack is: a [b * gamma12] [c * gamma14] [d * gamma21] [e * gamma23] f
-        e_gamma23 = Script.parse_string("OP_2SWAP")  # Bring e on top of the stack
+        e_gamma23 = Script([OP_2SWAP])  # Bring e on top of the stack
         e_gamma23 += nums_to_script(gammas[2])  # gamma23
         e_gamma23 += fq2.mul(
             take_modulo=take_modulo, check_constant=False, clean_constant=False, is_constant_reused=False
         )  # Multiply
-        e_gamma23 += Script.parse_string("OP_2SWAP")  # Bring f on top of the stack
+        e_gamma23 += Script([OP_2SWAP])  # Bring f on top of the stack
 
         # After this, the stack is: a [b * gamma12] [c * gamma14] [d * gamma21] [e * gamma23] [f * gamma25]
         f_gamma25 = nums_to_script(gammas[4])  # gamma25
@@ -1,9 +1,21 @@
 from tx_engine import Script
-
-from src.zkscript.util.utility_scripts import nums_to_script, pick, roll
-
-
-class Fq12Cubic:
+from tx_engine.engine.op_codes import (
+    OP_1SUB,
+    OP_2,
+    OP_2OVER,
+    OP_DEPTH,
+    OP_EQUALVERIFY,
+    OP_FROMALTSTACK,
+    OP_PICK,
+    OP_TOALTSTACK,
+)
+
+from src.zkscript.util.bit_growth import bit_growth, is_positive_output, keeps_positive, output_bit_size
+from src.zkscript.util.fragment_cache import FragmentCacheable, cached_fragment
+from src.zkscript.util.utility_scripts import nums_to_script, pick, reduce_n, roll
+
+
+class Fq12Cubic(FragmentCacheable):
     r"""F_q^12 as cubic extension of F_q^4, which is built as a quadratic extension of F_q^2.
 
     The NON_RESIDUE_OVER_FQ4 is specified by defining the method self.FQ4.mul_by_non_residue
@@ -19,12 +31,47 @@ class Fq12Cubic:
         # FQ4
         self.FQ4 = fq4
 
+    def _mul_bit_size(self, x: float, y: float) -> float:
+        """Bit size of the values computed by `mul` on inputs of bit sizes `x` and `y`."""
+        fq4 = self.FQ4
+        m = output_bit_size(fq4.mul, x, y)
+        nr_m = output_bit_size(fq4.mul_by_non_residue, m)
+        return max(
+            output_bit_size(fq4.add_three, m, m, m),
+            output_bit_size(fq4.add_three, m, nr_m, m),
+            output_bit_size(fq4.add, output_bit_size(fq4.mul_by_non_residue, output_bit_size(fq4.add, m, m)), m),
+        )
+
+    def _square_bit_size(self, x: float) -> float:
+        """Bit size of the values computed by `square` on an input of bit size `x`."""
+        fq4 = self.FQ4
+        sq = output_bit_size(fq4.square, x)
+        double_mul = output_bit_size(fq4.mul, x, output_bit_size(fq4.fq_scalar_mul, x, 1))
+        return max(
+            output_bit_size(fq4.add, sq, double_mul),
+            output_bit_size(fq4.add, output_bit_size(fq4.mul_by_non_residue, sq), double_mul),
+            output_bit_size(fq4.add, output_bit_size(fq4.mul_by_non_residue, double_mul), sq),
+        )
+
+    def is_mul_positive(self) -> bool:
+        """Whether the output of `mul` is non-negative whenever its inputs are."""
+        fq4 = self.FQ4
+        return is_positive_output(fq4.mul) and is_positive_output(fq4.mul_by_non_residue)
+
+    def is_square_positive(self) -> bool:
+        """Whether the output of `square` is non-negative whenever its input is."""
+        return self.is_mul_positive() and is_positive_output(self.FQ4.square)
+
+    @cached_fragment
+    @keeps_positive(is_mul_positive)
+    @bit_growth(_mul_bit_size)
     def mul(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         """Multiplication in F_q^12 as cubic extension.
 
@@ -38,19 +85,19 @@ class Fq12Cubic:
         Variables:
             - If take_modulo is set to True, then the coordinates of the result are in Z_q; otherwise, the coordinates
             are not taken modulo q.
+            - is_input_positive: see `zkscript.util.bit_growth.keeps_positive`. The result is non-negative only if
+            `is_mul_positive()`.
         """
         # Fq4 implementation
         fq4 = self.FQ4
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
+        is_positive = is_input_positive and self.is_mul_positive()
+
         # Computation of third component ---------------------------------------------------------
 
         # After this, the stack is: x0 x1 x2 y0 y1 y2 (x2*y0)
@@ -66,7 +113,7 @@ class Fq12Cubic:
         compute_third_component += pick(position=15, n_elements=4)  # Pick y2
         compute_third_component += fq4.mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_third_component += fq4.add_three(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_third_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK")
+        compute_third_component += Script([OP_TOALTSTACK] * 4)
 
         # End of computation of third component ---------------------------------------------------
 
@@ -91,7 +138,7 @@ class Fq12Cubic:
         compute_second_component += pick(position=35, n_elements=4)  # Pick x0
         compute_second_component += fq4.mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_second_component += fq4.add_three(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_second_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK")
+        compute_second_component += Script([OP_TOALTSTACK] * 4)
 
         # End of computation of second component ---------------------------------------------------
 
@@ -110,14 +157,16 @@ class Fq12Cubic:
         compute_first_component += fq4.add(take_modulo=False, check_constant=False, clean_constant=False)
         compute_first_component += fq4.mul_by_non_residue(take_modulo=False, check_constant=False, clean_constant=False)
         # After this, the stack is: firstComponent, altstack = [thirdComponent, secondComponent]
-        compute_first_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK")
+        compute_first_component += Script([OP_TOALTSTACK] * 4)
         compute_first_component += fq4.mul(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_first_component += Script.parse_string(
-            "OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK"
-        )
+        compute_first_component += Script([OP_FROMALTSTACK] * 4)
         if take_modulo:
             compute_first_component += fq4.add(
-                take_modulo=True, check_constant=False, clean_constant=clean_constant, is_constant_reused=True
+                take_modulo=True,
+                check_constant=False,
+                clean_constant=clean_constant,
+                is_constant_reused=True,
+                is_input_positive=is_positive,
             )
         else:
             compute_first_component += fq4.add(take_modulo=False, check_constant=False, clean_constant=False)
@@ -128,37 +177,23 @@ class Fq12Cubic:
 
         if take_modulo:
             # Batched modulo operations: pull from altstack, rotate, mod out, repeat
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+            out += reduce_n(8, is_constant_reused=is_constant_reused, is_positive=is_positive, is_constant_fetched=True)
         else:
-            out += Script.parse_string("OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK")
-            out += Script.parse_string("OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK")
+            out += Script([OP_FROMALTSTACK] * 4)
+            out += Script([OP_FROMALTSTACK] * 4)
 
         return out
 
+    @cached_fragment
+    @keeps_positive(is_square_positive)
+    @bit_growth(_square_bit_size)
     def square(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         """Squaring in F_q^12 as cubic extension.
 
@@ -172,33 +207,33 @@ class Fq12Cubic:
         Variables:
             - If take_modulo is set to True, then the coordinates of the result are in Z_q; otherwise, the coordinates
             are not taken modulo q.
+            - is_input_positive: see `zkscript.util.bit_growth.keeps_positive`. The result is non-negative only if
+            `is_square_positive()`.
         """
         # Fq2 implementation
         fq4 = self.FQ4
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
+        is_positive = is_input_positive and self.is_square_positive()
+
         # Computation third component ------------------------------------------------------------
 
         # After this, the stack is: x0 x1 x2 (2*x2*x0)
-        compute_third_component = Script.parse_string("OP_2OVER OP_2OVER")  # Pick x2
+        compute_third_component = Script([OP_2OVER, OP_2OVER])  # Pick x2
         compute_third_component += pick(position=15, n_elements=4)  # Pick x0
         compute_third_component += fq4.mul(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_third_component += Script.parse_string("OP_2") + fq4.fq_scalar_mul(
+        compute_third_component += Script([OP_2]) + fq4.fq_scalar_mul(
             take_modulo=False, check_constant=False, clean_constant=False
         )
         # After this, the stack is: x0 x1 x2, altstack = [2*x2*x0 + x1^2]
         compute_third_component += pick(position=11, n_elements=4)  # Pick x1
         compute_third_component += fq4.square(take_modulo=False, check_constant=False, clean_constant=False)
         compute_third_component += fq4.add(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_third_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK")
+        compute_third_component += Script([OP_TOALTSTACK] * 4)
 
         # End of computation of third component --------------------------------------------------
 
@@ -206,10 +241,10 @@ class Fq12Cubic:
 
         # After this, the stack is: x0 x2 2x1 2*x1*x0
         compute_second_component = roll(position=7, n_elements=4)  # Roll x1
-        compute_second_component += Script.parse_string("OP_2") + fq4.fq_scalar_mul(
+        compute_second_component += Script([OP_2]) + fq4.fq_scalar_mul(
             take_modulo=False, check_constant=False, clean_constant=False
         )
-        compute_second_component += Script.parse_string("OP_2OVER OP_2OVER")  # Duplicate 2*x1
+        compute_second_component += Script([OP_2OVER, OP_2OVER])  # Duplicate 2*x1
         compute_second_component += pick(position=15, n_elements=4)  # Pick x0
         compute_second_component += fq4.mul(take_modulo=False, check_constant=False, clean_constant=False)
         # After this, the stack is: x0 x2 2x1, altstack = [thirdComponent, 2*x1*x0 + x2^2 * s]
@@ -219,7 +254,7 @@ class Fq12Cubic:
             take_modulo=False, check_constant=False, clean_constant=False
         )
         compute_second_component += fq4.add(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_second_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK")
+        compute_second_component += Script([OP_TOALTSTACK] * 4)
 
         # End of computation of second component -------------------------------------------------
 
@@ -228,14 +263,16 @@ class Fq12Cubic:
         # After this, the stack is: x0, altstack = [thirdComponent, secondComponent, 2*x1*x2 * s + x0^2]
         compute_first_component = fq4.mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_first_component += fq4.mul_by_non_residue(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_first_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK")
+        compute_first_component += Script([OP_TOALTSTACK] * 4)
         compute_first_component += fq4.square(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_first_component += Script.parse_string(
-            "OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK"
-        )
+        compute_first_component += Script([OP_FROMALTSTACK] * 4)
         if take_modulo:
             compute_first_component += fq4.add(
-                take_modulo=True, check_constant=False, clean_constant=clean_constant, is_constant_reused=True
+                take_modulo=True,
+                check_constant=False,
+                clean_constant=clean_constant,
+                is_constant_reused=True,
+                is_input_positive=is_positive,
             )
         else:
             compute_first_component += fq4.add(take_modulo=False, check_constant=False, clean_constant=False)
@@ -246,27 +283,9 @@ class Fq12Cubic:
 
         if take_modulo:
             # Batched modulo operations: pull from altstack, rotate, mod out, repeat
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+            out += reduce_n(8, is_constant_reused=is_constant_reused, is_positive=is_positive, is_constant_fetched=True)
         else:
-            out += Script.parse_string("OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK")
-            out += Script.parse_string("OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK")
+            out += Script([OP_FROMALTSTACK] * 4)
+            out += Script([OP_FROMALTSTACK] * 4)
 
         return out
@@ -1,6 +1,39 @@
-from tx_engine import Script
+from math import log2
 
-from src.zkscript.util.utility_scripts import nums_to_script
+from tx_engine import Script
+from tx_engine.engine.op_codes import (
+    OP_1SUB,
+    OP_2,
+    OP_2DUP,
+    OP_2OVER,
+    OP_2SWAP,
+    OP_3,
+    OP_ADD,
+    OP_DEPTH,
+    OP_DUP,
+    OP_EQUALVERIFY,
+    OP_FROMALTSTACK,
+    OP_MUL,
+    OP_NEGATE,
+    OP_OVER,
+    OP_PICK,
+    OP_ROLL,
+    OP_ROT,
+    OP_SUB,
+    OP_SWAP,
+    OP_TOALTSTACK,
+    OP_TUCK,
+)
+
+from src.zkscript.util.bit_growth import bit_growth, keeps_positive, log2_sum
+from src.zkscript.util.fragment_cache import FragmentCacheable, cached_fragment
+from src.zkscript.util.utility_scripts import mod, nums_to_script, reduce_n
+
+# Strategies available for the multiplication of the towering extensions:
+#   - schoolbook: the product of two elements of a degree-n extension costs n**2 base multiplications
+#   - karatsuba: the product costs 3 (resp. 6) base multiplications for quadratic (resp. cubic) extensions, at the
+#   price of more additions and of an extra bit of growth in the unreduced result
+MUL_STRATEGIES = ("schoolbook", "karatsuba")
 
 
 def fq2_for_towering(mul_by_non_residue):
@@ -14,7 +47,7 @@ def fq2_for_towering(mul_by_non_residue):
     return Fq2ForTowering
 
 
-class Fq2:
+class Fq2(FragmentCacheable):
     """Implementation of Quadratic Extension of base field.
 
     The modulus and the non_residue are specified when instantiating an object of this class.
@@ -39,18 +72,40 @@ class Fq2:
     clean_constant -> Remove constant from bottom of the stack?
     is_constant_reused -> Will we need q again after modulo operations have been carried out?
 
+    The multiplication strategy (see MUL_STRATEGIES) is fixed when instantiating the class, as the scripts are cached
+    per instance.
+
     """
 
-    def __init__(self, q: int, non_residue: int):
+    def __init__(self, q: int, non_residue: int, mul_strategy: str = "schoolbook"):
+        if mul_strategy not in MUL_STRATEGIES:
+            msg = f"Unknown multiplication strategy: {mul_strategy}. Available strategies: {MUL_STRATEGIES}."
+            raise ValueError(msg)
         self.MODULUS = q
         self.NON_RESIDUE = non_residue
-
+        self.MUL_STRATEGY = mul_strategy
+
+    def _mul_bit_size(self, x: float, y: float) -> float:
+        """Bit size of the values computed by `mul` on inputs of bit sizes `x` and `y`."""
+        if self.MUL_STRATEGY == "karatsuba":
+            # (x_0 + x_1) * (y_0 + y_1) is the largest intermediate value
+            return max(log2_sum(x + y, x + y + log2(abs(self.NON_RESIDUE))), x + y + 2)
+        return self._schoolbook_mul_bit_size(x, y)
+
+    def _schoolbook_mul_bit_size(self, x: float, y: float) -> float:
+        """Bit size of the values computed by the schoolbook `mul` on inputs of bit sizes `x` and `y`."""
+        return max(log2_sum(x + y, x + y + log2(abs(self.NON_RESIDUE))), x + y + 1)
+
+    @cached_fragment
+    @keeps_positive(True)
+    @bit_growth(lambda x, y: log2_sum(x, y), uses_instance=False)
     def add(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         """Addition in F_q^2.
 
@@ -64,6 +119,7 @@ class Fq2:
         Variables:
             - If take_modulo is set to True, then the coordinates of the result are in Z_q; otherwise, the coordinates
             are not taken modulo q.
+            - is_input_positive: see `zkscript.util.bit_growth.keeps_positive`.
 
         Example:
         -------
@@ -74,57 +130,32 @@ class Fq2:
 
         """
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         # After this, base stack is: x_0 y_0, altstack = (x_1 + y_1)
-        sumX1Y1 = Script.parse_string("OP_ROT OP_ADD")  # Compute (x_1 + y_1)
-        sumX1Y1 += Script.parse_string("OP_TOALTSTACK")
+        sumX1Y1 = Script([OP_ROT, OP_ADD])  # Compute (x_1 + y_1)
+        sumX1Y1 += Script([OP_TOALTSTACK])
 
         # After this, base stack is: (x_0 + y_0), altstack = (x_1 + y_1)
-        sumX0Y0 = Script.parse_string("OP_ADD")  # Compute (x_0 + y_0)
+        sumX0Y0 = Script([OP_ADD])  # Compute (x_0 + y_0)
 
         out += sumX1Y1 + sumX0Y0
 
         if take_modulo:
-            batched_modulo = Script()
-
             assert clean_constant is not None
             assert is_constant_reused is not None
-            if clean_constant:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL")
-            else:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-
-            # After this, the stack is: q [(x_0 + y_0) % q], altstack = (x_1 + y_1)
-            batched_modulo += Script.parse_string(
-                "OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD"
-            )  # Compute (x_0 + y_0) % q
-            # After this, the stack is: [(x_0 + y_0) % q] (x_1 + y_1) q
-            batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-
-            if is_constant_reused:
-                # After this, the stack is: [(x_0 + y_0) % q] [(x_1 + y_1) % q]
-                batched_modulo += Script.parse_string(
-                    "OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD"
-                )  # Compute (x_1 + y_1) % q
-            else:
-                # After this, the stack is: [(x_0 + y_0) % q] q [(x_1 + y_1) % q]
-                batched_modulo += Script.parse_string(
-                    "OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD"
-                )  # Compute (x_1 + y_1) % q
-
-            out += fetch_q + batched_modulo
+            # After this, the stack is: [(x_0 + y_0) % q] q [(x_1 + y_1) % q] if is_constant_reused, otherwise
+            # [(x_0 + y_0) % q] [(x_1 + y_1) % q]
+            out += reduce_n(2, clean_constant, is_constant_reused, is_positive=is_input_positive)
         else:
-            out += Script.parse_string("OP_FROMALTSTACK")
+            out += Script([OP_FROMALTSTACK])
 
         return out
 
+    @cached_fragment
+    @bit_growth(lambda x, y: log2_sum(x, y), uses_instance=False)
     def subtract(
         self,
         take_modulo: bool,
@@ -154,57 +185,32 @@ class Fq2:
 
         """
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         # After this, base stack is: x_0 y_0, altstack = [(x_1 - y_1)]
-        subX1Y1 = Script.parse_string("OP_ROT OP_SWAP OP_SUB")  # Compute (x_1 - y_1)
-        subX1Y1 += Script.parse_string("OP_TOALTSTACK")
+        subX1Y1 = Script([OP_ROT, OP_SWAP, OP_SUB])  # Compute (x_1 - y_1)
+        subX1Y1 += Script([OP_TOALTSTACK])
 
         # After this, base stack is:  x_0 - y_0, altstack = [(x_1 - y_1)]
-        subX0Y0 = Script.parse_string("OP_SUB")  # Compute (x_0 - y_0)
+        subX0Y0 = Script([OP_SUB])  # Compute (x_0 - y_0)
 
         out += subX1Y1 + subX0Y0
 
         if take_modulo:
-            batched_modulo = Script()
-
             assert clean_constant is not None
             assert is_constant_reused is not None
-            if clean_constant:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL")
-            else:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-
-            # After this, the stack is: q [(x_0 - y_0) % q], altstack = (x_1 - y_1)
-            batched_modulo += Script.parse_string(
-                "OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD"
-            )  # Compute (x_0 - y_0) % q
-            # After this, the stack is: [(x_0 - y_0) % q] (x_1 - y_1) q
-            batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-
-            if is_constant_reused:
-                # After this, the stack is: [(x_0 - y_0) % q] [(x_1 - y_1) % q]
-                batched_modulo += Script.parse_string(
-                    "OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD"
-                )  # Compute (x_1 - y_1) % q
-            else:
-                # After this, the stack is: [(x_0 - y_0) % q] q [(x_1 - y_1) % q]
-                batched_modulo += Script.parse_string(
-                    "OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD"
-                )  # Compute (x_1 - y_1) % q
-
-            out += fetch_q + batched_modulo
+            # After this, the stack is: [(x_0 - y_0) % q] q [(x_1 - y_1) % q] if is_constant_reused, otherwise
+            # [(x_0 - y_0) % q] [(x_1 - y_1) % q]
+            out += reduce_n(2, clean_constant, is_constant_reused)
         else:
-            out += Script.parse_string("OP_FROMALTSTACK")
+            out += Script([OP_FROMALTSTACK])
 
         return out
 
+    @cached_fragment
+    @bit_growth(lambda x: x, uses_instance=False)
     def negate(
         self,
         take_modulo: bool,
@@ -235,55 +241,37 @@ class Fq2:
 
         """
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
-        flipX1 = Script.parse_string("OP_NEGATE")  # Negate x_1
-        flipX1 += Script.parse_string("OP_TOALTSTACK")
+        flipX1 = Script([OP_NEGATE])  # Negate x_1
+        flipX1 += Script([OP_TOALTSTACK])
 
-        flipX0 = Script.parse_string("OP_NEGATE")  # Negate x_0
+        flipX0 = Script([OP_NEGATE])  # Negate x_0
 
         out += flipX1 + flipX0
 
         if take_modulo:
-            batched_modulo = Script()
-
             assert clean_constant is not None
             assert is_constant_reused is not None
-            if clean_constant:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL")
-            else:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-
-            # After this, the stack is: q [-x0 % q], altstack = (x_1 + y_1)
-            batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")  # Compute -x0 % q
-            # After this, the stack is: [(x_0 + y_0) % q] (x_1 + y_1) q
-            batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-
-            if is_constant_reused:
-                # After this, the stack is: [-x0 % q] [-x1 % q]
-                batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")  # Compute -x1 % q
-            else:
-                # After this, the stack is: [-x0 % q] q [-x1 % q]
-                batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")  # Compute -x1 % q
-
-            out += fetch_q + batched_modulo
+            # After this, the stack is: [-x0 % q] q [-x1 % q] if is_constant_reused, otherwise [-x0 % q] [-x1 % q]
+            out += reduce_n(2, clean_constant, is_constant_reused)
         else:
-            out += Script.parse_string("OP_FROMALTSTACK")
+            out += Script([OP_FROMALTSTACK])
 
         return out
 
+    @cached_fragment
+    @keeps_positive(True)
+    @bit_growth(lambda x, scalar: x + scalar, uses_instance=False)
     def scalar_mul(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         """Scalar multiplication in F_q^2.
 
@@ -298,6 +286,7 @@ class Fq2:
         Variables:
             - If take_modulo is set to True, then the coordinates of the result are in Z_q; otherwise, the coordinates
             are not taken modulo q.
+            - is_input_positive: see `zkscript.util.bit_growth.keeps_positive`.
 
         Example:
         -------
@@ -308,63 +297,40 @@ class Fq2:
 
         """
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         # After this, the base stack is x_0 lambda, altstack = [(x_1 * lambda)]
-        X1Lambda = Script.parse_string("OP_TUCK OP_MUL")  # Compute x_0 * lambda and put it on top of the stack
-        X1Lambda += Script.parse_string("OP_TOALTSTACK")
+        X1Lambda = Script([OP_TUCK, OP_MUL])  # Compute x_0 * lambda and put it on top of the stack
+        X1Lambda += Script([OP_TOALTSTACK])
 
         # After this, the base stack is (x_0 * lambda), altstack = [(x_1 * lambda)]
-        X0Lambda = Script.parse_string("OP_MUL")  # Compute x_1 * lambda
+        X0Lambda = Script([OP_MUL])  # Compute x_1 * lambda
 
         out += X1Lambda + X0Lambda
 
         if take_modulo:
-            batched_modulo = Script()
-
             assert clean_constant is not None
             assert is_constant_reused is not None
-            if clean_constant:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL")
-            else:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-
-            # After this, the stack is: q [(x_0 * lambda) % q], altstack = (x_1 * lambda)
-            batched_modulo += Script.parse_string(
-                "OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD"
-            )  # Compute (x_0 * lambda) % q
-            # After this, the stack is: [(x_0 * lambda) % q] (x_1 * lambda) q
-            batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-
-            if is_constant_reused:
-                # After this, the stack is: [(x_0 * lambda) % q] [-(x_1 * lambda) % q]
-                batched_modulo += Script.parse_string(
-                    "OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD"
-                )  # Compute (x_1 * lambda) % q
-            else:
-                # After this, the stack is: [(x_0 * lambda) % q] q [(x_1 * lambda) % q]
-                batched_modulo += Script.parse_string(
-                    "OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD"
-                )  # Compute (x_1 * lambda) % q
-
-            out += fetch_q + batched_modulo
+            # After this, the stack is: [(x_0 * lambda) % q] q [(x_1 * lambda) % q] if is_constant_reused, otherwise
+            # [(x_0 * lambda) % q] [(x_1 * lambda) % q]
+            out += reduce_n(2, clean_constant, is_constant_reused, is_positive=is_input_positive)
         else:
-            out += Script.parse_string("OP_FROMALTSTACK")
+            out += Script([OP_FROMALTSTACK])
 
         return out
 
+    @cached_fragment
+    @keeps_positive(lambda self: self.NON_RESIDUE > 0)
+    @bit_growth(_mul_bit_size)
     def mul(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         """Multiplication in F_q^2.
 
@@ -378,6 +344,8 @@ class Fq2:
         Variables:
             - If take_modulo is set to True, then the coordinates of the result are in Z_q; otherwise, the coordinates
             are not taken modulo q.
+            - is_input_positive: see `zkscript.util.bit_growth.keeps_positive`. The result is non-negative only if
+            NON_RESIDUE > 0.
 
         Example:
         -------
@@ -390,66 +358,110 @@ class Fq2:
 
         """
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
+        # After this, the stack is: [(x_0 * y_0) - (x_1 * y_1)], altstack = [(x_0 * y_1) + (x_1 * y_0)]
+        # Ready for batched modulo operations
+        if self.MUL_STRATEGY == "karatsuba":
+            out += self._karatsuba_mul()
+        else:
+            out += self._schoolbook_mul()
+            if take_modulo:
+                out += Script([OP_TOALTSTACK])
+
+        if take_modulo:
+            assert clean_constant is not None
+            assert is_constant_reused is not None
+            # x_0 * y_1 + x_1 * y_0 is non-negative if the inputs are, and so is x_0 * y_0 + x_1 * y_1 * NON_RESIDUE if
+            # NON_RESIDUE > 0
+            out += reduce_n(
+                2,
+                clean_constant,
+                is_constant_reused,
+                is_positive=[is_input_positive and self.NON_RESIDUE > 0, is_input_positive],
+            )
+        elif self.MUL_STRATEGY == "karatsuba":
+            out += Script([OP_FROMALTSTACK])
+
+        return out
+
+    def _schoolbook_mul(self) -> Script:
+        """Schoolbook multiplication in F_q^2: four multiplications in F_q.
+
+        Input parameters:
+            - Stack: q .. X Y
+            - Altstack: []
+        Output:
+            - X * Y, coordinates not taken modulo q
+
+        """
         # After this, the base stack is: x_0 x_1 y_0 y_1 [(x_0 * y_0) - (x_1 * y_1)]
-        firstComponent = Script.parse_string("OP_2OVER OP_2OVER")  # Duplicate X Y
-        firstComponent += Script.parse_string("OP_ROT OP_MUL")  # Compute x_1 * y_1
-        firstComponent += Script.parse_string("OP_TOALTSTACK")  # Place x_1 * y_1 on altstack
-        firstComponent += Script.parse_string("OP_MUL")  # Compute x_0 * y_0
-        firstComponent += Script.parse_string("OP_FROMALTSTACK")  # Pull x_1 * y_1 from altstack
+        firstComponent = Script([OP_2OVER, OP_2OVER])  # Duplicate X Y
+        firstComponent += Script([OP_ROT, OP_MUL])  # Compute x_1 * y_1
+        firstComponent += Script([OP_TOALTSTACK])  # Place x_1 * y_1 on altstack
+        firstComponent += Script([OP_MUL])  # Compute x_0 * y_0
+        firstComponent += Script([OP_FROMALTSTACK])  # Pull x_1 * y_1 from altstack
         if self.NON_RESIDUE == -1:
-            firstComponent += Script.parse_string("OP_SUB")  # Compute (x_0 * y_0 - x_1 * y_1)
+            firstComponent += Script([OP_SUB])  # Compute (x_0 * y_0 - x_1 * y_1)
         else:
-            firstComponent += nums_to_script([self.NON_RESIDUE]) + Script.parse_string(
-                "OP_MUL OP_ADD"
+            firstComponent += nums_to_script([self.NON_RESIDUE]) + Script(
+                [OP_MUL, OP_ADD]
             )  # Compute (x_0 * y_0 + x_1 * y_1 * NON_RESIDUE)
 
         # After this, the base stack is: [(x_0 * y_0) - (x_1 * y_1)] [(x_0 * y_1) + (x_1 * y_0)]
-        secondComponent = Script.parse_string("OP_2SWAP OP_MUL")  # Compute x_1 * y_0
-        secondComponent += Script.parse_string("OP_2SWAP OP_MUL")  # Compute x_0 * y_1
-        secondComponent += Script.parse_string("OP_ADD")  # Compute (x_0 * y_1 + x_1 * y_0)
+        secondComponent = Script([OP_2SWAP, OP_MUL])  # Compute x_1 * y_0
+        secondComponent += Script([OP_2SWAP, OP_MUL])  # Compute x_0 * y_1
+        secondComponent += Script([OP_ADD])  # Compute (x_0 * y_1 + x_1 * y_0)
 
-        out += firstComponent + secondComponent
+        return firstComponent + secondComponent
 
-        if take_modulo:
-            # After this, the stack is: [(x_0 * y_0) - (x_1 * y_1)], altstack = [(x_0 * y_1) + (x_1 * y_0)]
-            # Ready for batched modulo operations
-            out += Script.parse_string("OP_TOALTSTACK")
+    def _karatsuba_mul(self) -> Script:
+        """Karatsuba multiplication in F_q^2: three multiplications in F_q.
 
-            batched_modulo = Script()
+        The second component is computed as (x_0 + x_1) * (y_0 + y_1) - x_0 * y_0 - x_1 * y_1.
 
-            assert clean_constant is not None
-            assert is_constant_reused is not None
-            if clean_constant:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL")
-            else:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
+        Input parameters:
+            - Stack: q .. X Y
+            - Altstack: []
+        Output:
+            - The first coordinate of X * Y, not taken modulo q
+            - Altstack: [the second coordinate of X * Y, not taken modulo q]
 
-            batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_ROT")
+        """
+        # After this, the base stack is: x_0 x_1 y_0 y_1, altstack = [(x_0 + x_1) * (y_0 + y_1)]
+        out = Script([OP_2OVER, OP_ADD])  # Compute x_0 + x_1
+        out += Script([OP_OVER, OP_3, OP_PICK, OP_ADD])  # Compute y_0 + y_1
+        out += Script([OP_MUL, OP_TOALTSTACK])
 
-            if is_constant_reused:
-                batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+        # After this, the base stack is: (x_1 * y_1) (x_0 * y_0)
+        out += Script([OP_ROT, OP_MUL])  # Compute x_1 * y_1
+        out += Script([OP_ROT, OP_ROT, OP_MUL])  # Compute x_0 * y_0
+
+        # After this, the base stack is: (x_1 * y_1) (x_0 * y_0) [(x_0 * y_1) + (x_1 * y_0)]
+        out += Script([OP_2DUP, OP_ADD, OP_FROMALTSTACK, OP_SWAP, OP_SUB])
 
-            out += fetch_q + batched_modulo
+        # After this, the base stack is: [(x_0 * y_0) + (x_1 * y_1) * NON_RESIDUE],
+        # altstack = [(x_0 * y_1) + (x_1 * y_0)]
+        out += Script([OP_TOALTSTACK, OP_SWAP])
+        if self.NON_RESIDUE == -1:
+            out += Script([OP_SUB])
+        else:
+            out += nums_to_script([self.NON_RESIDUE]) + Script([OP_MUL, OP_ADD])
 
         return out
 
+    @cached_fragment
+    @keeps_positive(lambda self: self.NON_RESIDUE > 0)
+    @bit_growth(lambda self, x: self._schoolbook_mul_bit_size(x, x))
     def square(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         """Squaring in F_q^2.
 
@@ -463,6 +475,8 @@ class Fq2:
         Variables:
             - If take_modulo is set to True, then the coordinates of the result are in Z_q; otherwise, the coordinates
             are not taken modulo q.
+            - is_input_positive: see `zkscript.util.bit_growth.keeps_positive`. The result is non-negative only if
+            NON_RESIDUE > 0.
 
         Example:
         -------
@@ -475,93 +489,67 @@ class Fq2:
 
         """
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         if self.NON_RESIDUE == -1:
             # After this, the stack is x0 x1 (x0^2 - x1^2)
-            out += Script.parse_string("OP_2DUP OP_2DUP")
-            out += Script.parse_string(
-                "OP_SUB OP_2SWAP OP_ADD OP_MUL"
-            )  # Compute (x0 - x1), compute (x0 + x1), multiply
+            out += Script([OP_2DUP, OP_2DUP])
+            out += Script([OP_SUB, OP_2SWAP, OP_ADD, OP_MUL])  # Compute (x0 - x1), compute (x0 + x1), multiply
 
             if take_modulo:
                 assert clean_constant is not None
                 assert is_constant_reused is not None
                 if clean_constant:
-                    fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL")
+                    fetch_q = Script([OP_DEPTH, OP_1SUB, OP_ROLL])
                 else:
-                    fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
+                    fetch_q = Script([OP_DEPTH, OP_1SUB, OP_PICK])
 
                 # After this, the stack is: x0 x1 q [(x0^2 - x1^2) % q]
-                out += fetch_q + Script.parse_string(
-                    "OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD"
-                )  # Compute (x_0^2 - x_1^2) % q
+                out += fetch_q + mod()  # Compute (x_0^2 - x_1^2) % q
                 # After this, the stack is: [(x0^2 - x1^2) % q] (2x0x1) q
-                out += Script.parse_string("OP_2SWAP OP_MUL OP_2 OP_MUL OP_ROT")
-
-                if is_constant_reused:
-                    # After this, the stack is: [(x0^2 - x1^2) % q] q [(2x0x1) % q]
-                    out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-                else:
-                    # After this, the stack is: [(x0^2 - x1^2) % q] [(2x0x1) % q]
-                    out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+                out += Script([OP_2SWAP, OP_MUL, OP_2, OP_MUL, OP_ROT])
+                # After this, the stack is: [(x0^2 - x1^2) % q] q [(2x0x1) % q] if is_constant_reused, otherwise
+                # [(x0^2 - x1^2) % q] [(2x0x1) % q]
+                out += mod(is_constant_reused=is_constant_reused, is_positive=is_input_positive)
             else:
-                out += Script.parse_string(
-                    "OP_ROT OP_ROT OP_MUL OP_2 OP_MUL"
+                out += Script(
+                    [OP_ROT, OP_ROT, OP_MUL, OP_2, OP_MUL]
                 )  # Compute 2 * x_0 * x_1 and place it on top of the stack
         else:
             # After this, the stack is x0 x1, altstack = (2 x_0 x_1)
-            out += Script.parse_string("OP_2DUP OP_2 OP_MUL OP_MUL")
-            out += Script.parse_string("OP_TOALTSTACK")
+            out += Script([OP_2DUP, OP_2, OP_MUL, OP_MUL])
+            out += Script([OP_TOALTSTACK])
 
             # After this, the stack is: x_0^2 + x_1^2 * NON_RESIDUE
-            out += (
-                Script.parse_string("OP_DUP")
-                + nums_to_script([self.NON_RESIDUE])
-                + Script.parse_string("OP_MUL OP_MUL")
-            )
-            out += Script.parse_string("OP_SWAP OP_DUP OP_MUL OP_ADD")
+            out += Script([OP_DUP]) + nums_to_script([self.NON_RESIDUE]) + Script([OP_MUL, OP_MUL])
+            out += Script([OP_SWAP, OP_DUP, OP_MUL, OP_ADD])
 
             if take_modulo:
-                batched_modulo = Script()
-
                 assert clean_constant is not None
                 assert is_constant_reused is not None
-                if clean_constant:
-                    fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL")
-                else:
-                    fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-
-                # After this, the stack is: q [firstComponent % q], altstack = secondComponent
-                batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-                # After this, the stack is: [firstComponent % q] secondComponent q
-                batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-
-                if is_constant_reused:
-                    # After this, the stack is: [firstComponent % q] q [secondComponent % q]
-                    batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-                else:
-                    # After this, the stack is: [firstComponent % q] [secondComponent % q]
-                    batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
-
-                out += fetch_q + batched_modulo
+                # After this, the stack is: [firstComponent % q] q [secondComponent % q] if is_constant_reused,
+                # otherwise [firstComponent % q] [secondComponent % q]
+                # x_0^2 + x_1^2 * NON_RESIDUE is non-negative for any input if NON_RESIDUE > 0
+                out += reduce_n(
+                    2, clean_constant, is_constant_reused, is_positive=[self.NON_RESIDUE > 0, is_input_positive]
+                )
             else:
-                out += Script.parse_string("OP_FROMALTSTACK")
+                out += Script([OP_FROMALTSTACK])
 
         return out
 
+    @cached_fragment
+    @keeps_positive(True)
+    @bit_growth(lambda x, y, z: log2_sum(x, y, z), uses_instance=False)
     def add_three(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         """Addition of three elements in F_q^2.
 
@@ -576,6 +564,7 @@ class Fq2:
         Variables:
             - If take_modulo is set to True, then the coordinates of the result are in Z_q; otherwise, the coordinates
             are not taken modulo q.
+            - is_input_positive: see `zkscript.util.bit_growth.keeps_positive`.
 
         Example:
         -------
@@ -588,52 +577,45 @@ class Fq2:
 
         """
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         # After this, the stack is: x0 x1 y0 z0, altstack = [y1 + z1]
-        out += Script.parse_string("OP_ROT OP_ADD OP_TOALTSTACK")
+        out += Script([OP_ROT, OP_ADD, OP_TOALTSTACK])
         # After this, the stack is: x1 (x0 + y0 + z0)
-        out += Script.parse_string("OP_ADD OP_ROT OP_ADD")
+        out += Script([OP_ADD, OP_ROT, OP_ADD])
 
         if take_modulo:
             assert clean_constant is not None
             assert is_constant_reused is not None
-            if clean_constant:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL")
-            else:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
+            fetch_q = Script([OP_DEPTH, OP_1SUB, OP_ROLL]) if clean_constant else Script([OP_DEPTH, OP_1SUB, OP_PICK])
 
             # After this, the stack is: x1 q [(x0 + y0 + z0) % q]
-            out += fetch_q + Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
+            out += fetch_q + mod(is_positive=is_input_positive)
             # After this, the stack is: [(x0 + y0 + z0) % q] q x1
-            out += Script.parse_string("OP_SWAP OP_ROT")
+            out += Script([OP_SWAP, OP_ROT])
             # After this, the stack is: [(x0 + y0 + z0) % q] q (x1+y1+z1)
-            out += Script.parse_string("OP_FROMALTSTACK OP_ADD")
-            if is_constant_reused:
-                # After this, the stack is: [(x0 + y0 + z0) % q] q [(x1+y1+z1) % q]
-                out += Script.parse_string("OP_OVER OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                # After this, the stack is: [(x0 + y0 + z0) % q] [(x1+y1+z1) % q]
-                out += Script.parse_string("OP_OVER OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+            out += Script([OP_FROMALTSTACK, OP_ADD])
+            # After this, the stack is: [(x0 + y0 + z0) % q] q [(x1+y1+z1) % q] if is_constant_reused, otherwise
+            # [(x0 + y0 + z0) % q] [(x1+y1+z1) % q]
+            out += mod(is_mod_on_top=False, is_constant_reused=is_constant_reused, is_positive=is_input_positive)
         else:
-            out += Script.parse_string("OP_SWAP")
+            out += Script([OP_SWAP])
             # After this, the stack is: (x0 + y0 + z0) (x1 + y1 + z1)
-            out += Script.parse_string("OP_FROMALTSTACK OP_ADD")
+            out += Script([OP_FROMALTSTACK, OP_ADD])
 
         return out
 
+    @cached_fragment
+    @bit_growth(lambda x: x, uses_instance=False)
     def conjugate(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         """Conjugation in F_q^2.
 
@@ -647,51 +629,38 @@ class Fq2:
         Variables:
             - If take_modulo is set to True, then the coordinates of the result are in Z_q; otherwise, the coordinates
             are not taken modulo q.
+            - is_input_positive: see `zkscript.util.bit_growth.keeps_positive`. Only the first coordinate of the result
+            is known to be non-negative.
         """
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         # After this, the stack is: x0 -x1
-        out += Script.parse_string("OP_NEGATE")
+        out += Script([OP_NEGATE])
 
         if take_modulo:
             assert clean_constant is not None
             assert is_constant_reused is not None
             # After this, the stack is: x0, altstack = [-x1]
-            out += Script.parse_string("OP_TOALTSTACK")
+            out += Script([OP_TOALTSTACK])
 
-            if clean_constant:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL")
-            else:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-
-            # Mod, pull from altstack, rotate, repeat
-            batched_modulo = Script()
-            batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                # After this, the stack is: (x0 % q) q (-x1 % q)
-                batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                # After this, the stack is: (x0 % q) (-x1 % q)
-                batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
-
-            out += fetch_q + batched_modulo
+            # After this, the stack is: (x0 % q) q (-x1 % q) if is_constant_reused, otherwise (x0 % q) (-x1 % q)
+            out += reduce_n(2, clean_constant, is_constant_reused, is_positive=[is_input_positive, False])
 
         return out
 
+    @cached_fragment
+    @keeps_positive(lambda self: self.NON_RESIDUE > 0)
+    @bit_growth(lambda self, x: max(x, x + log2(abs(self.NON_RESIDUE))))
     def mul_by_u(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         """Multiplication by u in F_q^2.
 
@@ -705,53 +674,48 @@ class Fq2:
         Variables:
             - If take_modulo is set to True, then the coordinates of the result are in Z_q; otherwise, the coordinates
             are not taken modulo q.
+            - is_input_positive: see `zkscript.util.bit_growth.keeps_positive`. The result is non-negative only if
+            NON_RESIDUE > 0.
         """
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         if self.NON_RESIDUE != -1:
-            out += nums_to_script([self.NON_RESIDUE]) + Script.parse_string("OP_MUL")
+            out += nums_to_script([self.NON_RESIDUE]) + Script([OP_MUL])
         else:
-            out += Script.parse_string("OP_NEGATE")
+            out += Script([OP_NEGATE])
 
         if take_modulo:
             batchedModulo = Script()
 
             assert clean_constant is not None
             assert is_constant_reused is not None
-            if clean_constant:
-                fetchQ = Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL")
-            else:
-                fetchQ = Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
+            fetchQ = Script([OP_DEPTH, OP_1SUB, OP_ROLL]) if clean_constant else Script([OP_DEPTH, OP_1SUB, OP_PICK])
 
             # After this, the stack is: [x1*NON_RESIDUE % q] x0 q
-            batchedModulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            batchedModulo += Script.parse_string("OP_ROT OP_ROT")
-
-            if is_constant_reused:
-                batchedModulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                batchedModulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+            batchedModulo += mod(is_positive=is_input_positive and self.NON_RESIDUE > 0)
+            batchedModulo += Script([OP_ROT, OP_ROT])
+            batchedModulo += mod(is_constant_reused=is_constant_reused, is_positive=is_input_positive)
 
             out += fetchQ + batchedModulo
         else:
             # After this, the stack is: x1*NON_RESIDUE x0
-            out += Script.parse_string("OP_SWAP")
+            out += Script([OP_SWAP])
 
         return out
 
+    @cached_fragment
+    @keeps_positive(lambda self: self.NON_RESIDUE > 0)
+    @bit_growth(lambda self, x: max(x + 1, log2_sum(x, x + log2(abs(self.NON_RESIDUE)))))
     def mul_by_one_plus_u(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         """Multiplication by 1+u in F_q^2.
 
@@ -765,54 +729,40 @@ class Fq2:
         Variables:
             - If take_modulo is set to True, then the coordinates of the result are in Z_q; otherwise, the coordinates
             are not taken modulo q.
+            - is_input_positive: see `zkscript.util.bit_growth.keeps_positive`. The result is non-negative only if
+            NON_RESIDUE > 0.
         """
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         # After this, the stack is: x0 x1, altstack = [x0 + x1]
-        out += Script.parse_string("OP_2DUP OP_ADD")  # Compute (x_0 + x_1)
-        out += Script.parse_string("OP_TOALTSTACK")
+        out += Script([OP_2DUP, OP_ADD])  # Compute (x_0 + x_1)
+        out += Script([OP_TOALTSTACK])
         if self.NON_RESIDUE == -1:
-            out += Script.parse_string("OP_NEGATE OP_ADD")
+            out += Script([OP_NEGATE, OP_ADD])
         elif self.NON_RESIDUE > 0:
             # After this, the stack is: x0 + x1 * NON_RESIDUE, altstack = [x0 + x1]
-            out += nums_to_script([self.NON_RESIDUE]) + Script.parse_string(
-                "OP_MUL OP_ADD"
-            )  # Compute (x_0 + x_1 * NON_RESIDUE)
+            out += nums_to_script([self.NON_RESIDUE]) + Script([OP_MUL, OP_ADD])  # Compute (x_0 + x_1 * NON_RESIDUE)
         else:
             # After this, the stack is: x0 + x1 * NON_RESIDUE, altstack = [x0 + x1]
-            out += Script.parse_string(
-                str(abs(self.NON_RESIDUE)) + " OP_NEGATE OP_MUL OP_ADD"
+            out += nums_to_script([abs(self.NON_RESIDUE)]) + Script(
+                [OP_NEGATE, OP_MUL, OP_ADD]
             )  # Compute (x_0 + x_1 * NON_RESIDUE)
 
         if take_modulo:
-            batched_modulo = Script()
-
             assert clean_constant is not None
             assert is_constant_reused is not None
-            if clean_constant:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL")
-            else:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-
-            # After this, the stack is: q [(x0 - x1) % q], altstack = [x0 + x1]
-            batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            # After this, the stack is: [(x0 - x1) % q] (x0 + x1) q
-            batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-
-            if is_constant_reused:
-                batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
-
-            out += fetch_q + batched_modulo
+            # After this, the stack is: [(x0 - x1) % q] q [(x0 + x1) % q] if is_constant_reused, otherwise
+            # [(x0 - x1) % q] [(x0 + x1) % q]
+            out += reduce_n(
+                2,
+                clean_constant,
+                is_constant_reused,
+                is_positive=[is_input_positive and self.NON_RESIDUE > 0, is_input_positive],
+            )
         else:
-            out += Script.parse_string("OP_FROMALTSTACK")
+            out += Script([OP_FROMALTSTACK])
 
         return out
@@ -1,7 +1,26 @@
+from math import log2
+
 from tx_engine import Script
+from tx_engine.engine.op_codes import (
+    OP_1SUB,
+    OP_2,
+    OP_2OVER,
+    OP_ADD,
+    OP_DEPTH,
+    OP_DUP,
+    OP_EQUALVERIFY,
+    OP_FROMALTSTACK,
+    OP_MUL,
+    OP_PICK,
+    OP_ROT,
+    OP_SWAP,
+    OP_TOALTSTACK,
+)
 
 from src.zkscript.fields.fq4 import Fq4
-from src.zkscript.util.utility_scripts import nums_to_script
+from src.zkscript.util.bit_growth import bit_growth, keeps_positive, log2_sum
+from src.zkscript.util.fragment_cache import cached_fragment
+from src.zkscript.util.utility_scripts import nums_to_script, reduce_n
 
 
 class Fq2Over2ResidueEqualU(Fq4):
@@ -10,100 +29,106 @@ class Fq2Over2ResidueEqualU(Fq4):
     Build F_q^4 as quadratic extension of F_q^2 = F_q[u] / (u^2 - NON_RESIDUE) with residue equal to u.
     """
 
+    def _square_bit_size(self, x: float) -> float:
+        """Bit size of the values computed by `square` on an input of bit size `x`."""
+        nr = log2(abs(self.BASE_FIELD.NON_RESIDUE))
+        return max(
+            2 * x + 2,
+            log2_sum(2 * x + nr, 2 * x) + 1,
+            log2_sum(2 * x + nr, 2 * x, 2 * x + 1),
+            log2_sum(log2_sum(2 * x + 1, 2 * x) + nr, 2 * x),
+        )
+
+    @cached_fragment
+    @keeps_positive(lambda self: self.BASE_FIELD.NON_RESIDUE > 0)
+    @bit_growth(_square_bit_size)
     def square(
         self,
         take_modulo: bool,
         check_constant: bool | None,
         clean_constant: bool | None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
-        """Squaring in Fq4 = F_q^2[v] / (v^2 - u)."""
+        """Squaring in Fq4 = F_q^2[v] / (v^2 - u).
+
+        For is_input_positive, see `zkscript.util.bit_growth.keeps_positive`. The result is non-negative only if the
+        non-residue of the base field is positive.
+        """
 
         if check_constant:
-            out = Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK])
             out += nums_to_script([self.MODULUS])
-            out += Script.parse_string("OP_EQUALVERIFY")
+            out += Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         # Fourth component ------
 
         # After this, the stack is: x0 x1 x2 x3, altstack = [2*(x1*x2 + x0*x3)]
-        out += Script.parse_string("OP_2OVER OP_2OVER")
-        out += Script.parse_string("OP_TOALTSTACK")
-        out += Script.parse_string("OP_MUL")
-        out += Script.parse_string("OP_SWAP OP_FROMALTSTACK OP_MUL")
-        out += Script.parse_string("OP_ADD OP_2 OP_MUL")
-        out += Script.parse_string("OP_TOALTSTACK")
+        out += Script([OP_2OVER, OP_2OVER])
+        out += Script([OP_TOALTSTACK])
+        out += Script([OP_MUL])
+        out += Script([OP_SWAP, OP_FROMALTSTACK, OP_MUL])
+        out += Script([OP_ADD, OP_2, OP_MUL])
+        out += Script([OP_TOALTSTACK])
 
         # Third component -------
 
         # After this, the stack is: x0 x1 x2 x3, altstack = [fourth_component, 2*(x0*x2 + x1*x3*NON_RESIDUE)]
-        out += Script.parse_string("OP_2OVER OP_2OVER")
-        out += Script.parse_string("OP_ROT")
-        out += Script.parse_string("OP_MUL")
+        out += Script([OP_2OVER, OP_2OVER])
+        out += Script([OP_ROT])
+        out += Script([OP_MUL])
         out += nums_to_script([self.BASE_FIELD.NON_RESIDUE])
-        out += Script.parse_string("OP_MUL")
-        out += Script.parse_string("OP_ROT OP_ROT OP_MUL")
-        out += Script.parse_string("OP_ADD OP_2 OP_MUL")
-        out += Script.parse_string("OP_TOALTSTACK")
+        out += Script([OP_MUL])
+        out += Script([OP_ROT, OP_ROT, OP_MUL])
+        out += Script([OP_ADD, OP_2, OP_MUL])
+        out += Script([OP_TOALTSTACK])
 
         # Second component ------
 
         # After this, the stack is: x0 x1 x2 x3,
         # altstack = [fourth_component, third_component, 2*x0*x1 + x2^2 + x3^2 * NON_RESIDUE]
-        out += Script.parse_string("OP_2OVER OP_2OVER")
-        out += Script.parse_string("OP_DUP OP_MUL")
+        out += Script([OP_2OVER, OP_2OVER])
+        out += Script([OP_DUP, OP_MUL])
         out += nums_to_script([self.BASE_FIELD.NON_RESIDUE])
-        out += Script.parse_string("OP_MUL")
-        out += Script.parse_string("OP_SWAP")
-        out += Script.parse_string("OP_DUP OP_MUL")
-        out += Script.parse_string("OP_ADD")
-        out += Script.parse_string("OP_ROT OP_ROT")
-        out += Script.parse_string("OP_2 OP_MUL OP_MUL")
-        out += Script.parse_string("OP_ADD")
-        out += Script.parse_string("OP_TOALTSTACK")
+        out += Script([OP_MUL])
+        out += Script([OP_SWAP])
+        out += Script([OP_DUP, OP_MUL])
+        out += Script([OP_ADD])
+        out += Script([OP_ROT, OP_ROT])
+        out += Script([OP_2, OP_MUL, OP_MUL])
+        out += Script([OP_ADD])
+        out += Script([OP_TOALTSTACK])
 
         # First component -------
 
         # After this, the stack is: x0^2 + (x1^2 + 2*x2*x3)*NON_RESIDUE,
         # altstack = [fourth_component, third_component, second_component]
-        out += Script.parse_string("OP_2 OP_MUL OP_MUL")
-        out += Script.parse_string("OP_SWAP")
-        out += Script.parse_string("OP_DUP OP_MUL OP_ADD")
+        out += Script([OP_2, OP_MUL, OP_MUL])
+        out += Script([OP_SWAP])
+        out += Script([OP_DUP, OP_MUL, OP_ADD])
         out += nums_to_script([self.BASE_FIELD.NON_RESIDUE])
-        out += Script.parse_string("OP_MUL")
-        out += Script.parse_string("OP_SWAP")
-        out += Script.parse_string("OP_DUP OP_MUL OP_ADD")
+        out += Script([OP_MUL])
+        out += Script([OP_SWAP])
+        out += Script([OP_DUP, OP_MUL, OP_ADD])
 
         if take_modulo:
-            batched_modulo = Script()
-
             if clean_constant is None and is_constant_reused is None:
                 raise ValueError(
                     f"If take_modulo is set, both clean_constant: {clean_constant} \
                         and is_constant_reused: {is_constant_reused} must be set."
                 )
 
-            if clean_constant:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL")
-            else:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-
-            batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-
-            if is_constant_reused:
-                batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
-
-            out += fetch_q + batched_modulo
+            # The first three components involve NON_RESIDUE, the fourth one is 2*(x1*x2 + x0*x3)
+            is_positive = is_input_positive and self.BASE_FIELD.NON_RESIDUE > 0
+            out += reduce_n(
+                4,
+                clean_constant,
+                is_constant_reused,
+                is_positive=[is_positive, is_positive, is_positive, is_input_positive],
+            )
         else:
-            out += Script.parse_string("OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK")
+            out += Script([OP_FROMALTSTACK, OP_FROMALTSTACK, OP_FROMALTSTACK])
 
         return out
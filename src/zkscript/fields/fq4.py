@@ -1,6 +1,38 @@
-from tx_engine import Script
+from math import log2
 
-from src.zkscript.util.utility_scripts import nums_to_script, pick, roll
+from tx_engine import Script
+from tx_engine.engine.op_codes import (
+    OP_1SUB,
+    OP_2,
+    OP_2DUP,
+    OP_2OVER,
+    OP_2ROT,
+    OP_2SWAP,
+    OP_ADD,
+    OP_DEPTH,
+    OP_EQUALVERIFY,
+    OP_FROMALTSTACK,
+    OP_MOD,
+    OP_MUL,
+    OP_OVER,
+    OP_PICK,
+    OP_ROLL,
+    OP_ROT,
+    OP_SWAP,
+    OP_TOALTSTACK,
+    OP_TUCK,
+)
+
+from src.zkscript.fields.fq2 import MUL_STRATEGIES
+from src.zkscript.util.bit_growth import (
+    bit_growth,
+    is_positive_output,
+    keeps_positive,
+    log2_sum,
+    output_bit_size,
+)
+from src.zkscript.util.fragment_cache import FragmentCacheable, cached_fragment
+from src.zkscript.util.utility_scripts import mod, nums_to_script, pick, reduce_n, roll
 
 
 def fq4_for_towering(mul_by_non_residue):
@@ -17,13 +49,22 @@ def fq4_for_towering(mul_by_non_residue):
     return Fq4ForTowering
 
 
-class Fq4:
+class Fq4(FragmentCacheable):
     """F_q^4 built as quadratic extension of F_q^2.
 
     The non residue is specified by defining the method self.BASE_FIELD.mul_by_non_residue.
     """
 
-    def __init__(self, q: int, base_field, gammas_frobenius: list[list[int]] | None = None):
+    def __init__(
+        self,
+        q: int,
+        base_field,
+        gammas_frobenius: list[list[int]] | None = None,
+        mul_strategy: str = "schoolbook",
+    ):
+        if mul_strategy not in MUL_STRATEGIES:
+            msg = f"Unknown multiplication strategy: {mul_strategy}. Available strategies: {MUL_STRATEGIES}."
+            raise ValueError(msg)
         # Characteristic of the field
         self.MODULUS = q
         # Script implementation of the base field Fq2
@@ -31,13 +72,64 @@ class Fq4:
         # Gammas for the Frobenius - list of [gamma1,gamma2,...,gamma3] where gammai = [gammai1],
         # with gammai1 = NON_RESIDUE_OVER_FQ2.power((q**i-1)//2)
         self.GAMMAS_FROBENIUS = gammas_frobenius
+        # Multiplication strategy, see MUL_STRATEGIES
+        self.MUL_STRATEGY = mul_strategy
+
+    def _mul_bit_size(self, x: float, y: float) -> float:
+        """Bit size of the values computed by `mul` on inputs of bit sizes `x` and `y`."""
+        fq2 = self.BASE_FIELD
+        m = output_bit_size(fq2.mul, x, y)
+        if self.MUL_STRATEGY == "karatsuba":
+            cross = output_bit_size(fq2.mul, output_bit_size(fq2.add, x, x), output_bit_size(fq2.add, y, y))
+            return max(
+                output_bit_size(fq2.subtract, cross, output_bit_size(fq2.add, m, m)),
+                output_bit_size(fq2.add, output_bit_size(fq2.mul_by_non_residue, m), m),
+            )
+        return max(
+            output_bit_size(fq2.add, m, m),
+            output_bit_size(fq2.add, output_bit_size(fq2.mul_by_non_residue, m), m),
+        )
+
+    def _square_bit_size(self, x: float) -> float:
+        """Bit size of the values computed by `square` on an input of bit size `x`."""
+        fq2 = self.BASE_FIELD
+        sq = output_bit_size(fq2.square, x)
+        return max(
+            output_bit_size(fq2.scalar_mul, output_bit_size(fq2.mul, x, x), 1),
+            output_bit_size(fq2.add, output_bit_size(fq2.mul_by_non_residue, sq), sq),
+        )
+
+    def is_mul_positive(self) -> bool:
+        """Whether the output of `mul` is non-negative whenever its inputs are."""
+        fq2 = self.BASE_FIELD
+        return is_positive_output(fq2.mul) and is_positive_output(fq2.mul_by_non_residue)
 
+    def is_square_positive(self) -> bool:
+        """Whether the output of `square` is non-negative whenever its input is."""
+        return self.is_mul_positive() and is_positive_output(self.BASE_FIELD.square)
+
+    def _cyclotomic_square_bit_size(self, x: float) -> float:
+        """Bit size of the values computed by `cyclotomic_square` on an input of bit size `x`."""
+        fq2 = self.BASE_FIELD
+        return max(
+            output_bit_size(fq2.scalar_mul, output_bit_size(fq2.mul, x, x), 1),
+            log2_sum(output_bit_size(fq2.scalar_mul, output_bit_size(fq2.square, x), 1), 0),
+        )
+
+    def _frobenius_bit_size(self, x: float) -> float:
+        """Bit size of the values computed by `frobenius_odd` and `frobenius_even` on an input of bit size `x`."""
+        return max(x, output_bit_size(self.BASE_FIELD.mul, x, log2(self.MODULUS)))
+
+    @cached_fragment
+    @keeps_positive(True)
+    @bit_growth(lambda self, x, y: output_bit_size(self.BASE_FIELD.add, x, y))
     def add(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         """Addition in F_q^4.
 
@@ -51,6 +143,7 @@ class Fq4:
         Variables:
             - If take_modulo is set to True, then the coordinates of X + Y are in Z_q; otherwise, the coordinates are
             not taken modulo q.
+            - is_input_positive: see `zkscript.util.bit_growth.keeps_positive`.
 
         Example:
             take_modulo = False:
@@ -63,45 +156,45 @@ class Fq4:
         fq2 = self.BASE_FIELD
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         # After this, base stack is: x_0 y_0, altstack = (x_1 + y_1)
-        out += Script.parse_string("OP_2ROT")
+        out += Script([OP_2ROT])
         out += fq2.add(take_modulo=False)  # Compute (x_1 + y_1)
-        out += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        out += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         if take_modulo:
             # After this, base stack is: (x_0 + y_0)_0 q (x_0 + y_0)_1 altstack = (x1 + y1)
             out += fq2.add(
-                take_modulo=True, check_constant=False, clean_constant=clean_constant, is_constant_reused=True
+                take_modulo=True,
+                check_constant=False,
+                clean_constant=clean_constant,
+                is_constant_reused=True,
+                is_input_positive=is_input_positive,
             )  # Compute (x_0 + y_0)
             # Batched modulo operations: pull from altstack, rotate, mod out, repeat
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+            out += reduce_n(
+                2, is_constant_reused=is_constant_reused, is_positive=is_input_positive, is_constant_fetched=True
+            )
         else:
             # After this, base stack is: (x_0 + y_0) (x_1 + y_1)
             out += fq2.add(take_modulo=False)  # Compute (x_0 + y_0)
-            out += Script.parse_string("OP_FROMALTSTACK OP_FROMALTSTACK")
+            out += Script([OP_FROMALTSTACK, OP_FROMALTSTACK])
 
         return out
 
+    @cached_fragment
+    @keeps_positive(True)
+    @bit_growth(lambda x, scalar: x + scalar, uses_instance=False)
     def fq_scalar_mul(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         """Multiplication in F_q^4 by a scalar in F_q.
 
@@ -116,6 +209,7 @@ class Fq4:
         Variables:
             - If take_modulo is set to True, then the coordinates X are in Z_q; otherwise, the coordinates are not taken
             modulo q.
+            - is_input_positive: see `zkscript.util.bit_growth.keeps_positive`.
 
         Example:
             take_modulo = False:
@@ -128,44 +222,44 @@ class Fq4:
         fq2 = self.BASE_FIELD
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         # After this, the base stack is x_0 lambda, altstack = (x_1 * lambda)
-        out += Script.parse_string("OP_TUCK OP_MUL OP_TOALTSTACK")
-        out += Script.parse_string("OP_TUCK OP_MUL OP_TOALTSTACK")
+        out += Script([OP_TUCK, OP_MUL, OP_TOALTSTACK])
+        out += Script([OP_TUCK, OP_MUL, OP_TOALTSTACK])
 
         if take_modulo:
             # After this, base stack is: x_00 * lambda q x_01 * lambda altstack = (x_1 * lambda)
             out += fq2.scalar_mul(
-                take_modulo=True, check_constant=False, clean_constant=clean_constant, is_constant_reused=True
+                take_modulo=True,
+                check_constant=False,
+                clean_constant=clean_constant,
+                is_constant_reused=True,
+                is_input_positive=is_input_positive,
             )
             # Batched modulo operations: pull from altstack, rotate, mod out, repeat
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+            out += reduce_n(
+                2, is_constant_reused=is_constant_reused, is_positive=is_input_positive, is_constant_fetched=True
+            )
         else:
             # After this, base stack is: (x_0 + y_0) (x_1 + y_1)
             out += fq2.scalar_mul(take_modulo=False)
-            out += Script.parse_string("OP_FROMALTSTACK OP_FROMALTSTACK")
+            out += Script([OP_FROMALTSTACK, OP_FROMALTSTACK])
 
         return out
 
+    @cached_fragment
+    @keeps_positive(lambda self: is_positive_output(self.BASE_FIELD.mul))
+    @bit_growth(lambda self, x, scalar: output_bit_size(self.BASE_FIELD.mul, x, scalar))
     def scalar_mul(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         """Scalar multiplication in F_q^4.
 
@@ -180,6 +274,8 @@ class Fq4:
         Variables:
             - If take_modulo is set to True, then the coordinates X are in Z_q; otherwise, the coordinates are not taken
             modulo q.
+            - is_input_positive: see `zkscript.util.bit_growth.keeps_positive`. The result is non-negative only if
+            BASE_FIELD.mul keeps values non-negative.
 
         Example:
             take_modulo = False:
@@ -192,49 +288,48 @@ class Fq4:
         fq2 = self.BASE_FIELD
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         if take_modulo:
+            is_positive = is_input_positive and is_positive_output(fq2.mul)
             # After this, the base stack is x_0 lambda lambda x1
-            out += Script.parse_string("OP_2DUP OP_2ROT")  # Prepare top of stack: x_0 lambda
+            out += Script([OP_2DUP, OP_2ROT])  # Prepare top of stack: x_0 lambda
             # After this, the base stack is x_0 lambda, altstack = (x1 * lambda)
             out += fq2.mul(take_modulo=False)  # Compute x_1 * lambda
-            out += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+            out += Script([OP_TOALTSTACK, OP_TOALTSTACK])
             # After this, the stack is: (x0 * lambda)_0 q (x0 * lambda)_1, altstack = (x1 * lambda)
             out += fq2.mul(
-                take_modulo=True, check_constant=False, clean_constant=clean_constant, is_constant_reused=True
+                take_modulo=True,
+                check_constant=False,
+                clean_constant=clean_constant,
+                is_constant_reused=True,
+                is_input_positive=is_input_positive,
             )
             # Batched modulo operations: pull from altstack, rotate, mod out, repeat
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+            out += reduce_n(2, is_constant_reused=is_constant_reused, is_positive=is_positive, is_constant_fetched=True)
         else:
             # After this, the base stack is x_1 lambda x0 lambda
-            out += Script.parse_string("OP_2ROT OP_2OVER")  # Prepare top of stack: x_0 lambda
+            out += Script([OP_2ROT, OP_2OVER])  # Prepare top of stack: x_0 lambda
             # After this, the base stack is x_1 lambda (x0 * lambda)
             out += fq2.mul(take_modulo=False)  # Compute x_0 * lambda
             # After this, the base stack is: (x0 * lambda) (x_1 * lambda)
-            out += Script.parse_string("OP_2ROT OP_2ROT")
+            out += Script([OP_2ROT, OP_2ROT])
             out += fq2.mul(take_modulo=False)
 
         return out
 
+    @cached_fragment
+    @keeps_positive(is_mul_positive)
+    @bit_growth(_mul_bit_size)
     def mul(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         """Multiplication in F_q^4.
 
@@ -248,6 +343,8 @@ class Fq4:
         Variables:
             - If take_modulo is set to True, then the coordinates of the result are in Z_q; otherwise, the coordinates
             are not taken modulo q.
+            - is_input_positive: see `zkscript.util.bit_growth.keeps_positive`. The result is non-negative only if
+            `is_mul_positive()`.
 
         Example:
             take_modulo = False:
@@ -260,57 +357,130 @@ class Fq4:
         fq2 = self.BASE_FIELD
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
+        # After this, the stack is (x1 * y1 * NON_RESIDUE) (x0 * y0) in some order, altstack = [(x0*y1) + (x1*y0)]
+        if self.MUL_STRATEGY == "karatsuba":
+            out += self._karatsuba_mul()
+        else:
+            out += self._schoolbook_mul()
+
+        if take_modulo:
+            # x0 * y1 + x1 * y0 is non-negative if the products in F_q^2 are, x0 * y0 + x1 * y1 * xi if the
+            # multiplication by xi also is
+            is_second_positive = is_input_positive and is_positive_output(fq2.mul)
+            is_first_positive = is_second_positive and is_positive_output(fq2.mul_by_non_residue)
+            out += fq2.add(
+                take_modulo=True,
+                check_constant=False,
+                clean_constant=clean_constant,
+                is_constant_reused=True,
+                is_input_positive=is_first_positive,
+            )
+            # Batched modulo operations: pull from altstack, rotate, mod out, repeat
+            out += reduce_n(
+                2,
+                is_constant_reused=is_constant_reused,
+                is_positive=[is_first_positive, is_second_positive],
+                is_constant_fetched=True,
+            )
+        else:
+            out += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
+            out += Script([OP_FROMALTSTACK, OP_FROMALTSTACK])
+
+        return out
+
+    def _schoolbook_mul(self) -> Script:
+        """Schoolbook multiplication in F_q^4: four multiplications in F_q^2.
+
+        Input parameters:
+            - Stack: q .. X Y
+            - Altstack: []
+        Output:
+            - (x1 * y1 * xi) (x0 * y0), to be added to get the first component
+            - Altstack: [(x0 * y1) + (x1 * y0)]
+
+        """
+        # Fq2 implementation
+        fq2 = self.BASE_FIELD
+
         # After this, the stack is: x0 x1 y0 y1 y0 y1
-        out += Script.parse_string("OP_2OVER OP_2OVER")
+        out = Script([OP_2OVER, OP_2OVER])
         # After this, the stack is: x0 x1 y0 y1 y0 (y1 * x0)
         out += pick(position=11, n_elements=2)  # Pick x0
         out += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         # After this, the stack is x0 x1 y0 y1, altstack = [(x0*y1) + (x1*y0)]
-        out += Script.parse_string("OP_2SWAP")
+        out += Script([OP_2SWAP])
         out += pick(position=9, n_elements=2)  # Pick x1
         out += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         out += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
-        out += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        out += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
-        # After this, the stack is (x0 * y0 + x1 * y1 * NON_RESIDUE), altstack = [(x0*y1) + (x1*y0)]
-        out += Script.parse_string("OP_2ROT")
+        # After this, the stack is (x1 * y1 * NON_RESIDUE) (x0 * y0), altstack = [(x0*y1) + (x1*y0)]
+        out += Script([OP_2ROT])
         out += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         out += fq2.mul_by_non_residue(take_modulo=False, check_constant=False, clean_constant=False)
-        out += Script.parse_string("OP_2ROT OP_2ROT")
+        out += Script([OP_2ROT, OP_2ROT])
         out += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
 
-        if take_modulo:
-            out += fq2.add(
-                take_modulo=True, check_constant=False, clean_constant=clean_constant, is_constant_reused=True
-            )
-            # Batched modulo operations: pull from altstack, rotate, mod out, repeat
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
-        else:
-            out += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
-            out += Script.parse_string("OP_FROMALTSTACK OP_FROMALTSTACK")
+        return out
+
+    def _karatsuba_mul(self) -> Script:
+        """Karatsuba multiplication in F_q^4: three multiplications in F_q^2.
+
+        The second component is computed as (x0 + x1) * (y0 + y1) - x0 * y0 - x1 * y1.
+
+        Input parameters:
+            - Stack: q .. X Y
+            - Altstack: []
+        Output:
+            - (x0 * y0) (x1 * y1 * xi), to be added to get the first component
+            - Altstack: [(x0 * y1) + (x1 * y0)]
+
+        """
+        # Fq2 implementation
+        fq2 = self.BASE_FIELD
+
+        # After this, the stack is: x0 x1 y0 y1, altstack = [(x0 + x1) * (y0 + y1)]
+        out = pick(position=7, n_elements=4)  # Pick x0 x1
+        out += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
+        out += pick(position=5, n_elements=4)  # Pick y0 y1
+        out += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
+        out += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
+        out += Script([OP_TOALTSTACK, OP_TOALTSTACK])
+
+        # After this, the stack is: (x1 * y1) (x0 * y0)
+        out += roll(position=5, n_elements=2)  # Roll x1
+        out += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
+        out += roll(position=5, n_elements=2)  # Roll x0
+        out += roll(position=5, n_elements=2)  # Roll y0
+        out += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
+
+        # After this, the stack is: (x1 * y1) (x0 * y0), altstack = [(x0*y1) + (x1*y0)]
+        out += Script([OP_2OVER, OP_2OVER])
+        out += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
+        out += Script([OP_FROMALTSTACK, OP_FROMALTSTACK, OP_2SWAP])
+        out += fq2.subtract(take_modulo=False, check_constant=False, clean_constant=False)
+        out += Script([OP_TOALTSTACK, OP_TOALTSTACK])
+
+        # After this, the stack is: (x0 * y0) (x1 * y1 * xi), altstack = [(x0*y1) + (x1*y0)]
+        out += Script([OP_2SWAP])
+        out += fq2.mul_by_non_residue(take_modulo=False, check_constant=False, clean_constant=False)
 
         return out
 
+    @cached_fragment
+    @keeps_positive(is_square_positive)
+    @bit_growth(_square_bit_size)
     def square(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         """Squaring in F_q^4.
 
@@ -324,6 +494,8 @@ class Fq4:
         Variables:
             - If take_modulo is set to True, then the coordinates of the result are in Z_q; otherwise, the coordinates
             are not taken modulo q.
+            - is_input_positive: see `zkscript.util.bit_growth.keeps_positive`. The result is non-negative only if
+            `is_square_positive()`.
 
         Example:
             take_modulo = False:
@@ -336,68 +508,139 @@ class Fq4:
         fq2 = self.BASE_FIELD
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         if take_modulo:
+            is_second_positive = is_input_positive and is_positive_output(fq2.mul)
+            is_first_positive = (
+                is_input_positive and is_positive_output(fq2.square) and is_positive_output(fq2.mul_by_non_residue)
+            )
             # After this, the stack is: x0 x1, altstack = 2x0*x1
-            out += Script.parse_string("OP_2OVER OP_2OVER")
+            out += Script([OP_2OVER, OP_2OVER])
             out += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
-            out += Script.parse_string("OP_2")
+            out += Script([OP_2])
             out += fq2.scalar_mul(take_modulo=False, check_constant=False, clean_constant=False)
-            out += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+            out += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
             # After this, the stack is: x1^2 * xi x0^2, altstack = 2x0*x1
             out += fq2.square(take_modulo=False, check_constant=False, clean_constant=False)
             out += fq2.mul_by_non_residue(take_modulo=False, check_constant=False, clean_constant=False)
-            out += Script.parse_string("OP_2SWAP")
+            out += Script([OP_2SWAP])
             out += fq2.square(take_modulo=False, check_constant=False, clean_constant=False)
             # After this, the stack is: x1^2 * xi + x0^2, altstack = 2x0*x1
             out += fq2.add(
-                take_modulo=True, check_constant=False, clean_constant=clean_constant, is_constant_reused=True
+                take_modulo=True,
+                check_constant=False,
+                clean_constant=clean_constant,
+                is_constant_reused=True,
+                is_input_positive=is_first_positive,
             )
             # Batched modulo operations: pull from altstack, rotate, mod out, repeat
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+            out += reduce_n(
+                2,
+                is_constant_reused=is_constant_reused,
+                is_positive=[is_first_positive, is_second_positive],
+                is_constant_fetched=True,
+            )
         else:
             # After this, the stack is: x_0 x_1 x_0 (x_1^2 * xi)
-            out += Script.parse_string("OP_2OVER OP_2OVER")  # Prepare top of the stack with  x_1
+            out += Script([OP_2OVER, OP_2OVER])  # Prepare top of the stack with  x_1
             out += fq2.square(take_modulo=False, check_constant=False, clean_constant=False)
             out += fq2.mul_by_non_residue(take_modulo=False, check_constant=False, clean_constant=False)
 
             # After this, the stack is: x_0 x_1 (x_1^2 * xi) x_0^2
-            out += Script.parse_string("OP_2SWAP")  # Prepare top of the stack with x_0
+            out += Script([OP_2SWAP])  # Prepare top of the stack with x_0
             out += fq2.square(take_modulo=False, check_constant=False, clean_constant=False)
 
             # After this, the stack is: x_0 x_1 [(x_1^2 * xi) + x_0^2]
             out += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
 
             # After this, the stack is: [(x_1^2 * xi) + x_0^2] (2 * x_0 * x_1)
-            out += Script.parse_string("OP_2ROT OP_2ROT")  # Prepare top of the stack with x_0 x_1
+            out += Script([OP_2ROT, OP_2ROT])  # Prepare top of the stack with x_0 x_1
             out += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
-            out += Script.parse_string("OP_2")
+            out += Script([OP_2])
             out += fq2.scalar_mul(
                 take_modulo=False, check_constant=False, clean_constant=False
             )  # Top of the stack is now 2 * x_0 * x_1 (not mod by q)
 
         return out
 
+    @cached_fragment
+    @bit_growth(_cyclotomic_square_bit_size)
+    def cyclotomic_square(
+        self,
+        take_modulo: bool,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        is_constant_reused: bool | None = None,
+    ) -> Script:
+        """Squaring in the cyclotomic subgroup of F_q^4.
+
+        If X = x_0 + x_1 * s is in the cyclotomic subgroup, then X^(q^2 + 1) = Norm(X) = x_0^2 - x_1^2 * xi = 1, so
+        that X**2 = (x_0^2 + x_1^2 * xi) + 2 * x_0 * x_1 * s = (2 * x_0^2 - 1) + 2 * x_0 * x_1 * s. This costs a
+        square and a multiplication in F_q^2, against the two squares and the multiplication of `square`.
+
+        Input parameters:
+            - Stack: q .. X
+            - Altstack: []
+        Output:
+            - X**2
+        Assumption on data:
+            - X is passed as a couple of elements of Fq2 (see Fq2.py)
+            - X is in the cyclotomic subgroup of F_q^4, i.e., X^(q^2 + 1) = 1, e.g., X is the output of the easy part
+            of the final exponentiation
+        Variables:
+            - If take_modulo is set to True, then the coordinates of the result are in Z_q; otherwise, the coordinates
+            are not taken modulo q.
+
+        Example:
+            x_0 x_1 [cyclotomic_square] --> (2 * x_0^2 - 1) (2 * x_0 * x_1)
+
+        """
+        # Fq2 implementation
+        fq2 = self.BASE_FIELD
+
+        if check_constant:
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
+        else:
+            out = Script()
+
+        # After this, the stack is: x_0, altstack = [2 * x_0 * x_1]
+        out += Script([OP_2OVER])
+        out += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
+        out += Script([OP_2])
+        out += fq2.scalar_mul(take_modulo=False, check_constant=False, clean_constant=False)
+        out += Script([OP_TOALTSTACK, OP_TOALTSTACK])
+
+        # After this, the stack is: 2 * x_0^2, altstack = [2 * x_0 * x_1]
+        out += fq2.square(take_modulo=False, check_constant=False, clean_constant=False)
+        out += Script([OP_2])
+        out += fq2.scalar_mul(take_modulo=False, check_constant=False, clean_constant=False)
+
+        if take_modulo:
+            # After this, the stack is: (2 * x_0^2)_0 - 1, altstack = [2 * x_0 * x_1, (2 * x_0^2)_1]
+            out += Script([OP_TOALTSTACK, OP_1SUB])
+
+            # Mod, pull from altstack, rotate, repeat
+            out += reduce_n(4, clean_constant, is_constant_reused)
+        else:
+            # After this, the stack is: (2 * x_0^2 - 1) (2 * x_0 * x_1)
+            out += Script([OP_SWAP, OP_1SUB, OP_SWAP, OP_FROMALTSTACK, OP_FROMALTSTACK])
+
+        return out
+
+    @cached_fragment
+    @keeps_positive(True)
+    @bit_growth(lambda self, x, y, z: output_bit_size(self.BASE_FIELD.add_three, x, y, z))
     def add_three(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         """Add three elements in F_q^4.
 
@@ -411,46 +654,45 @@ class Fq4:
         Variables:
             - If take_modulo is set to True, then the coordinates of the result are in Z_q; otherwise, the coordinates
             are not taken modulo q.
+            - is_input_positive: see `zkscript.util.bit_growth.keeps_positive`.
         """
         # Fq2 implementation
         fq2 = self.BASE_FIELD
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         # After this, the stack is: x0 y0 z0, altstack = [ x1 + y1 + z1]
-        out += Script.parse_string("OP_2ROT")  # Roll y1
+        out += Script([OP_2ROT])  # Roll y1
         out += roll(position=9, n_elements=2)  # Roll x1
         out += fq2.add_three(take_modulo=False, check_constant=False, clean_constant=False)
-        out += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        out += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         if take_modulo:
             # After this, the stack is: x0 + y0 + z0, altstack = [x1 + y1 + z1]
             out += fq2.add_three(
-                take_modulo=True, check_constant=False, clean_constant=clean_constant, is_constant_reused=True
+                take_modulo=True,
+                check_constant=False,
+                clean_constant=clean_constant,
+                is_constant_reused=True,
+                is_input_positive=is_input_positive,
             )
             # Batched modulo operations: pull from altstack, rotate, mod out, repeat
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+            out += reduce_n(
+                2, is_constant_reused=is_constant_reused, is_positive=is_input_positive, is_constant_fetched=True
+            )
         else:
             # After this, the stack is: x0 + y0 + z0, altstack = [x1 + y1 + z1]
             out += fq2.add_three(take_modulo=False, check_constant=False, clean_constant=False)
             # After this, the stack is (x0 + y0 + z0) (x1 + y1 + z1)
-            out += Script.parse_string("OP_FROMALTSTACK OP_FROMALTSTACK")
+            out += Script([OP_FROMALTSTACK, OP_FROMALTSTACK])
 
         return out
 
+    @cached_fragment
+    @bit_growth(_frobenius_bit_size)
     def frobenius_odd(
         self,
         n: int,
@@ -478,11 +720,7 @@ class Fq4:
         gammas = self.GAMMAS_FROBENIUS[n % 4 - 1]
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
@@ -490,7 +728,7 @@ class Fq4:
         out += fq2.conjugate(take_modulo=False, check_constant=False, clean_constant=False, is_constant_reused=False)
         out += nums_to_script(gammas)
         out += fq2.mul(take_modulo=take_modulo, check_constant=False, clean_constant=False, is_constant_reused=False)
-        out += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        out += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         if is_constant_reused:
             # After this, the stack is: Conjugate(a)_0 q Conjugate(a)_1
@@ -498,17 +736,19 @@ class Fq4:
                 take_modulo=take_modulo, check_constant=False, clean_constant=clean_constant, is_constant_reused=True
             )
             # After this, the stack is: Conjugate(a) Conjugate(b)_0 q Conjugate(b)_1
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT OP_FROMALTSTACK")
+            out += Script([OP_FROMALTSTACK, OP_ROT, OP_FROMALTSTACK])
         else:
             # After this, the stack is: Conjugate(a)
             out += fq2.conjugate(
                 take_modulo=take_modulo, check_constant=False, clean_constant=clean_constant, is_constant_reused=False
             )
             # After this, the stack is: Conjugate(a) Conjugate(b)
-            out += Script.parse_string("OP_FROMALTSTACK OP_FROMALTSTACK")
+            out += Script([OP_FROMALTSTACK, OP_FROMALTSTACK])
 
         return out
 
+    @cached_fragment
+    @bit_growth(_frobenius_bit_size)
     def frobenius_even(
         self,
         n: int,
@@ -536,57 +776,54 @@ class Fq4:
         gammas = self.GAMMAS_FROBENIUS[n % 4 - 1]
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         # After this, the stack is: a, altstack = [b*gamma]
         out += nums_to_script(gammas)
         out += fq2.mul(take_modulo=take_modulo, check_constant=False, clean_constant=False, is_constant_reused=False)
-        out += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        out += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # After this, the stack is: a b*gamma
         if take_modulo:
-            if clean_constant:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL")
-            else:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
+            fetch_q = Script([OP_DEPTH, OP_1SUB, OP_ROLL]) if clean_constant else Script([OP_DEPTH, OP_1SUB, OP_PICK])
 
             batched_modulo = Script()
             # After this, the stack is [a0, q],  altstack = [b*gamma, a1 % q]
-            batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            batched_modulo += Script.parse_string("OP_TOALTSTACK")
+            batched_modulo += Script([OP_TUCK, OP_MOD, OP_OVER, OP_ADD, OP_OVER, OP_MOD])
+            batched_modulo += Script([OP_TOALTSTACK])
 
             if is_constant_reused:
                 # After this, the stack is: [q, a0 % q], altstack = [b*gamma, a1 % q]
-                batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
+                batched_modulo += Script([OP_TUCK, OP_MOD, OP_OVER, OP_ADD, OP_OVER, OP_MOD])
                 # After this, the stack is: [q, a, b * gamma]
-                batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK")
+                batched_modulo += Script([OP_FROMALTSTACK, OP_FROMALTSTACK, OP_FROMALTSTACK])
                 # After this, the stack is: [a, (b*gamma)_0, q, (b*gamma)_1]
                 batched_modulo += roll(position=4, n_elements=1)
-                batched_modulo += Script.parse_string("OP_SWAP")
+                batched_modulo += Script([OP_SWAP])
             else:
                 # After this, the stack is: [a0 % q], altstack = [b*gamma, a1 % q]
-                batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+                batched_modulo += Script([OP_TUCK, OP_MOD, OP_OVER, OP_ADD, OP_SWAP, OP_MOD])
                 # After this, the stack is: [a, b * gamma]
-                batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK")
+                batched_modulo += Script([OP_FROMALTSTACK, OP_FROMALTSTACK, OP_FROMALTSTACK])
 
             out += fetch_q + batched_modulo
         else:
-            out += Script.parse_string("OP_FROMALTSTACK OP_FROMALTSTACK")
+            out += Script([OP_FROMALTSTACK, OP_FROMALTSTACK])
 
         return out
 
+    @cached_fragment
+    @keeps_positive(lambda self: is_positive_output(self.BASE_FIELD.mul_by_non_residue))
+    @bit_growth(lambda self, x: max(x, output_bit_size(self.BASE_FIELD.mul_by_non_residue, x)))
     def mul_by_u(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         """Multiplication by u in F_q^4 = F_q^2[u] / u^2 - NON_RESIDUE_OVER_FQ2.
 
@@ -600,44 +837,42 @@ class Fq4:
         Variables:
             - If take_modulo is set to True, then the coordinates of the result are in Z_q; otherwise, the coordinates
             are not taken modulo q.
+            - is_input_positive: see `zkscript.util.bit_growth.keeps_positive`. The result is non-negative only if
+            BASE_FIELD.mul_by_non_residue keeps values non-negative.
         """
         # Fq2 implementation
         fq2 = self.BASE_FIELD
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         if take_modulo:
-            if clean_constant:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL")
-            else:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
+            fetch_q = Script([OP_DEPTH, OP_1SUB, OP_ROLL]) if clean_constant else Script([OP_DEPTH, OP_1SUB, OP_PICK])
 
             # After this, the stack is: (x_1 * NON_RESIDUE_OVER_FQ2) x_01 x00
             out += fq2.mul_by_non_residue(
-                take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
+                take_modulo=True,
+                check_constant=False,
+                clean_constant=False,
+                is_constant_reused=False,
+                is_input_positive=is_input_positive,
             )
-            out += Script.parse_string("OP_2SWAP OP_SWAP")
+            out += Script([OP_2SWAP, OP_SWAP])
             # After this, the stack is: (x_1 * NON_RESIDUE_OVER_FQ2) x_01 q (x00 % q)
-            out += fetch_q + Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_SWAP OP_ROT")
-            if is_constant_reused:
-                out += Script.parse_string("OP_OVER OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                out += Script.parse_string("OP_OVER OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+            out += fetch_q + mod(is_positive=is_input_positive)
+            out += Script([OP_SWAP, OP_ROT])
+            out += mod(is_mod_on_top=False, is_constant_reused=is_constant_reused, is_positive=is_input_positive)
         else:
             # After this, the stack is: x_0 (x_1 * NON_RESIDUE_OVER_FQ2)
             out += fq2.mul_by_non_residue(take_modulo=False, check_constant=False, clean_constant=False)
-            out += Script.parse_string("OP_2SWAP")
+            out += Script([OP_2SWAP])
 
         return out
 
+    @cached_fragment
+    @bit_growth(lambda x: x, uses_instance=False)
     def conjugate(
         self,
         take_modulo: bool,
@@ -659,11 +894,7 @@ class Fq4:
             are not taken modulo q.
         """
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
@@ -677,28 +908,10 @@ class Fq4:
             assert clean_constant is not None
             assert is_constant_reused is not None
             # After this, the stack is: x0_0, altstack = [-x1, x0_1]
-            out += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK OP_TOALTSTACK")
+            out += Script([OP_TOALTSTACK, OP_TOALTSTACK, OP_TOALTSTACK])
 
-            if clean_constant:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL")
-            else:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-
-            # Mod, pull from altstack, rotate, repeat
-            batched_modulo = Script()
-            batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            batched_modulo += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                # After this, the stack is: (x0 % q) (-x1 % q)_0 q (-x1 % q)_1
-                batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                # After this, the stack is: (x0 % q) (-x1 % q)
-                batched_modulo += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
-
-            out += fetch_q + batched_modulo
+            # After this, the stack is: (x0 % q) (-x1 % q)_0 q (-x1 % q)_1 if is_constant_reused, otherwise
+            # (x0 % q) (-x1 % q)
+            out += reduce_n(4, clean_constant, is_constant_reused)
 
         return out
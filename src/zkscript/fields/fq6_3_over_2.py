@@ -1,6 +1,26 @@
 from tx_engine import Script
-
-from src.zkscript.util.utility_scripts import nums_to_script, pick, roll
+from tx_engine.engine.op_codes import (
+    OP_1SUB,
+    OP_2,
+    OP_2OVER,
+    OP_2ROT,
+    OP_2SWAP,
+    OP_DEPTH,
+    OP_EQUALVERIFY,
+    OP_FROMALTSTACK,
+    OP_MUL,
+    OP_PICK,
+    OP_ROLL,
+    OP_ROT,
+    OP_SWAP,
+    OP_TOALTSTACK,
+    OP_TUCK,
+)
+
+from src.zkscript.fields.fq2 import MUL_STRATEGIES
+from src.zkscript.util.bit_growth import bit_growth, is_positive_output, keeps_positive, output_bit_size
+from src.zkscript.util.fragment_cache import FragmentCacheable, cached_fragment
+from src.zkscript.util.utility_scripts import mod, nums_to_script, pick, reduce_n, roll
 
 
 def fq6_for_towering(mul_by_non_residue):
@@ -17,24 +37,74 @@ def fq6_for_towering(mul_by_non_residue):
     return Fq6ForTowering
 
 
-class Fq6:
+class Fq6(FragmentCacheable):
     """F_q^6 built as cubic extension of F_q^2.
 
     The non residue is specified by defining the method self.BASE_FIELD.mul_by_non_residue.
     """
 
-    def __init__(self, q: int, base_field):
+    def __init__(self, q: int, base_field, mul_strategy: str = "schoolbook"):
+        if mul_strategy not in MUL_STRATEGIES:
+            msg = f"Unknown multiplication strategy: {mul_strategy}. Available strategies: {MUL_STRATEGIES}."
+            raise ValueError(msg)
         # Characteristic of the field
         self.MODULUS = q
         # Script implementation of the base field Fq2
         self.BASE_FIELD = base_field
+        # Multiplication strategy, see MUL_STRATEGIES
+        self.MUL_STRATEGY = mul_strategy
+
+    def _mul_bit_size(self, x: float, y: float) -> float:
+        """Bit size of the values computed by `mul` on inputs of bit sizes `x` and `y`."""
+        fq2 = self.BASE_FIELD
+        m = output_bit_size(fq2.mul, x, y)
+        nr_m = output_bit_size(fq2.mul_by_non_residue, m)
+        if self.MUL_STRATEGY == "karatsuba":
+            cross = output_bit_size(fq2.mul, output_bit_size(fq2.add, x, x), output_bit_size(fq2.add, y, y))
+            cross_minus_two = output_bit_size(fq2.subtract, output_bit_size(fq2.subtract, cross, m), m)
+            return max(
+                output_bit_size(fq2.subtract, output_bit_size(fq2.subtract, output_bit_size(fq2.add, cross, m), m), m),
+                output_bit_size(
+                    fq2.subtract, output_bit_size(fq2.subtract, output_bit_size(fq2.add, cross, nr_m), m), m
+                ),
+                output_bit_size(fq2.add, m, output_bit_size(fq2.mul_by_non_residue, cross_minus_two)),
+            )
+        return max(
+            output_bit_size(fq2.add_three, m, m, m),
+            output_bit_size(fq2.add_three, m, nr_m, m),
+            output_bit_size(fq2.add, output_bit_size(fq2.mul_by_non_residue, output_bit_size(fq2.add, m, m)), m),
+        )
+
+    def is_mul_positive(self) -> bool:
+        """Whether the output of `mul` is non-negative whenever its inputs are."""
+        fq2 = self.BASE_FIELD
+        return is_positive_output(fq2.mul) and is_positive_output(fq2.mul_by_non_residue)
+
+    def is_square_positive(self) -> bool:
+        """Whether the output of `square` is non-negative whenever its input is."""
+        return self.is_mul_positive() and is_positive_output(self.BASE_FIELD.square)
+
+    def _square_bit_size(self, x: float) -> float:
+        """Bit size of the values computed by `square` on an input of bit size `x`."""
+        fq2 = self.BASE_FIELD
+        sq = output_bit_size(fq2.square, x)
+        double_mul = output_bit_size(fq2.mul, x, output_bit_size(fq2.scalar_mul, x, 1))
+        return max(
+            output_bit_size(fq2.add, sq, double_mul),
+            output_bit_size(fq2.add, output_bit_size(fq2.mul_by_non_residue, sq), double_mul),
+            output_bit_size(fq2.add, output_bit_size(fq2.mul_by_non_residue, double_mul), sq),
+        )
 
+    @cached_fragment
+    @keeps_positive(True)
+    @bit_growth(lambda self, x, y: output_bit_size(self.BASE_FIELD.add, x, y))
     def add(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         """Addition in F_q^6.
 
@@ -48,6 +118,7 @@ class Fq6:
         Variables:
             - If take_modulo is set to True, then the coordinates of X + Y are in Z_q; otherwise, the coordinates are
             not taken modulo q.
+            - is_input_positive: see `zkscript.util.bit_growth.keeps_positive`.
 
         Example:
             - x00 x01 x10 x11 x20 x21 y00 y01 y10 y11 y20 y21 [add] --> (x00 + y00) (x01 + y01) (x10 + y10) (x11 + y11)
@@ -58,51 +129,45 @@ class Fq6:
         fq2 = self.BASE_FIELD
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         # After this, the stack is x0 x1 y0 y1 altstack = [x2 + y2]
         out += roll(position=7, n_elements=2)  # Roll x2
         out += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
-        out += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        out += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # After this, the stack is: x0 y0 (x1 + y1), altstack = [x2 + y2]
-        out += Script.parse_string("OP_2ROT")
+        out += Script([OP_2ROT])
         out += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
 
         if take_modulo:
             # After this the stack is: (x0 + y0), altstack = [x2 + y2, x1 + y1]
-            out += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+            out += Script([OP_TOALTSTACK, OP_TOALTSTACK])
             out += fq2.add(
-                take_modulo=True, check_constant=False, clean_constant=clean_constant, is_constant_reused=True
+                take_modulo=True,
+                check_constant=False,
+                clean_constant=clean_constant,
+                is_constant_reused=True,
+                is_input_positive=is_input_positive,
             )
             # Batched modulo operations: pull from altstack, rotate, mod out, repeat
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+            out += reduce_n(
+                4, is_constant_reused=is_constant_reused, is_positive=is_input_positive, is_constant_fetched=True
+            )
         else:
             # After this the stack is: (x0 + y0) (x1 + y1), altstack = [x2 + y2]
-            out += Script.parse_string("OP_2ROT OP_2ROT")
+            out += Script([OP_2ROT, OP_2ROT])
             out += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
-            out += Script.parse_string("OP_2SWAP")
+            out += Script([OP_2SWAP])
 
-            out += Script.parse_string("OP_FROMALTSTACK OP_FROMALTSTACK")
+            out += Script([OP_FROMALTSTACK, OP_FROMALTSTACK])
 
         return out
 
+    @cached_fragment
+    @bit_growth(lambda self, x, y: output_bit_size(self.BASE_FIELD.subtract, x, y))
     def subtract(
         self,
         take_modulo: bool,
@@ -127,57 +192,47 @@ class Fq6:
         fq2 = self.BASE_FIELD
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         # After this, the stack is: x0 x1 y0 y1, altstack = [x2 - y2]
         out += roll(position=7, n_elements=2)  # Roll x2
-        out += Script.parse_string("OP_2SWAP")
+        out += Script([OP_2SWAP])
         out += fq2.subtract(take_modulo=False, check_constant=False, clean_constant=False)
-        out += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        out += Script([OP_TOALTSTACK, OP_TOALTSTACK])
         # After this, the stack is: x0 y0 (x1 - y1), altstack = [x2 - y2]
-        out += Script.parse_string("OP_2ROT OP_2SWAP")
+        out += Script([OP_2ROT, OP_2SWAP])
         out += fq2.subtract(take_modulo=False, check_constant=False, clean_constant=False)
 
         if take_modulo:
             # After this the stack is: (x0 + y0), altstack = [x2 + y2, x1 + y1]
-            out += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+            out += Script([OP_TOALTSTACK, OP_TOALTSTACK])
             out += fq2.subtract(
                 take_modulo=True, check_constant=False, clean_constant=clean_constant, is_constant_reused=True
             )
             # Batched modulo operations: pull from altstack, rotate, mod out, repeat
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+            out += reduce_n(4, is_constant_reused=is_constant_reused, is_constant_fetched=True)
         else:
             # After this the stack is: (x0 + y0) (x1 + y1), altstack = [x2 + y2]
-            out += Script.parse_string("OP_2ROT OP_2ROT")
+            out += Script([OP_2ROT, OP_2ROT])
             out += fq2.subtract(take_modulo=False, check_constant=False, clean_constant=False)
-            out += Script.parse_string("OP_2SWAP")
+            out += Script([OP_2SWAP])
 
-            out += Script.parse_string("OP_FROMALTSTACK OP_FROMALTSTACK")
+            out += Script([OP_FROMALTSTACK, OP_FROMALTSTACK])
 
         return out
 
+    @cached_fragment
+    @keeps_positive(True)
+    @bit_growth(lambda x, scalar: x + scalar, uses_instance=False)
     def fq_scalar_mul(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         """Multiplication in F_q^6 by a scalar in F_q.
 
@@ -192,57 +247,54 @@ class Fq6:
         Variables:
             - If take_modulo is set to True, then the coordinates X are in Z_q; otherwise, the coordinates are not taken
             modulo q.
+            - is_input_positive: see `zkscript.util.bit_growth.keeps_positive`.
         """
         # Fq2 implementation
         fq2 = self.BASE_FIELD
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         # After this, the stack is: x0 x1 lambda, altstack = [x2*lambda]
-        out += Script.parse_string("OP_TUCK OP_MUL OP_TOALTSTACK")
-        out += Script.parse_string("OP_TUCK OP_MUL OP_TOALTSTACK")
+        out += Script([OP_TUCK, OP_MUL, OP_TOALTSTACK])
+        out += Script([OP_TUCK, OP_MUL, OP_TOALTSTACK])
 
         # After this, the stack is: x0, altstack = [x2*lambda, x1*lambda]
-        out += Script.parse_string("OP_TUCK OP_MUL OP_TOALTSTACK")
-        out += Script.parse_string("OP_TUCK OP_MUL OP_TOALTSTACK")
+        out += Script([OP_TUCK, OP_MUL, OP_TOALTSTACK])
+        out += Script([OP_TUCK, OP_MUL, OP_TOALTSTACK])
 
         if take_modulo:
             # After this, the stack is: x00*lambda q x01*lambda, altstack = [x2*lambda, x1*lambda]
             out += fq2.scalar_mul(
-                take_modulo=True, check_constant=False, clean_constant=clean_constant, is_constant_reused=True
+                take_modulo=True,
+                check_constant=False,
+                clean_constant=clean_constant,
+                is_constant_reused=True,
+                is_input_positive=is_input_positive,
             )
             # Batched modulo operations: pull from altstack, rotate, mod out, repeat
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+            out += reduce_n(
+                4, is_constant_reused=is_constant_reused, is_positive=is_input_positive, is_constant_fetched=True
+            )
         else:
             # After this, the stack is: x00*lambda q x01*lambda, altstack = [x2*lambda, x1*lambda]
             out += fq2.scalar_mul(take_modulo=False, check_constant=False, clean_constant=False)
-            out += Script.parse_string("OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK")
+            out += Script([OP_FROMALTSTACK] * 4)
 
         return out
 
+    @cached_fragment
+    @keeps_positive(lambda self: is_positive_output(self.BASE_FIELD.mul))
+    @bit_growth(lambda self, x, scalar: output_bit_size(self.BASE_FIELD.mul, x, scalar))
     def scalar_mul(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         """Multiplication by scalar in F_q^6.
 
@@ -257,53 +309,48 @@ class Fq6:
         Variables:
             - If take_modulo is set to True, then the coordinates X are in Z_q; otherwise, the coordinates are not taken
             modulo q.
+            - is_input_positive: see `zkscript.util.bit_growth.keeps_positive`. The result is non-negative only if
+            BASE_FIELD.mul keeps values non-negative.
         """
         # Fq2 implementation
         fq2 = self.BASE_FIELD
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         # After this, the stack is: x0 x1 lambda, altstack = [x2 * lambda]
-        out += Script.parse_string("OP_2SWAP OP_2OVER")
+        out += Script([OP_2SWAP, OP_2OVER])
         out += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
-        out += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        out += Script([OP_TOALTSTACK, OP_TOALTSTACK])
         # After this, the stack is: x0 lambda (x1*lamdba), altstack = [x2 * lambda]
-        out += Script.parse_string("OP_2SWAP OP_2OVER")
+        out += Script([OP_2SWAP, OP_2OVER])
         out += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
 
         if take_modulo:
+            is_positive = is_input_positive and is_positive_output(fq2.mul)
             # After this, the stack is: x0*lambda, altstack = [x2*lambda, x1*lambda]
-            out += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+            out += Script([OP_TOALTSTACK, OP_TOALTSTACK])
             out += fq2.mul(
-                take_modulo=True, check_constant=False, clean_constant=clean_constant, is_constant_reused=True
+                take_modulo=True,
+                check_constant=False,
+                clean_constant=clean_constant,
+                is_constant_reused=True,
+                is_input_positive=is_input_positive,
             )
             # Batched modulo operations: pull from altstack, rotate, mod out, repeat
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+            out += reduce_n(4, is_constant_reused=is_constant_reused, is_positive=is_positive, is_constant_fetched=True)
         else:
             # After this, the stack is: (x0 * lambda) (x1 * lambda) (x2 * lamdba)
-            out += Script.parse_string("OP_2ROT OP_2ROT")
+            out += Script([OP_2ROT, OP_2ROT])
             out += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
-            out += Script.parse_string("OP_2SWAP OP_FROMALTSTACK OP_FROMALTSTACK")
+            out += Script([OP_2SWAP, OP_FROMALTSTACK, OP_FROMALTSTACK])
 
         return out
 
+    @cached_fragment
+    @bit_growth(lambda x: x, uses_instance=False)
     def negate(
         self,
         take_modulo: bool,
@@ -329,58 +376,48 @@ class Fq6:
         fq2 = self.BASE_FIELD
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         if take_modulo:
             # After this, stack is: x0 x1, altstack = [-x2]
             out += fq2.negate(take_modulo=False, check_constant=False, clean_constant=False)
-            out += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+            out += Script([OP_TOALTSTACK, OP_TOALTSTACK])
             # After this, stack is: x0, altstack = [-x2, -x1]
             out += fq2.negate(take_modulo=False, check_constant=False, clean_constant=False)
-            out += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+            out += Script([OP_TOALTSTACK, OP_TOALTSTACK])
             # After this, stack is: -x_0, altstack = [-x2,-x1]
             out += fq2.negate(
                 take_modulo=True, check_constant=False, clean_constant=clean_constant, is_constant_reused=True
             )
             # Batched modulo operations: pull from altstack, rotate, mod out, repeat
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+            out += reduce_n(4, is_constant_reused=is_constant_reused, is_constant_fetched=True)
         else:
             # After this, stack is: x_1 x_2 -x_0
-            out += Script.parse_string("OP_2ROT")
+            out += Script([OP_2ROT])
             out += fq2.negate(take_modulo=False, check_constant=False, clean_constant=False)
 
             # After this, stack is: x_2 -x_0 -x_1
-            out += Script.parse_string("OP_2ROT")
+            out += Script([OP_2ROT])
             out += fq2.negate(take_modulo=False, check_constant=False, clean_constant=False)
 
             # After this, stack is: -x_0 -x_1 -x_2
-            out += Script.parse_string("OP_2ROT")
+            out += Script([OP_2ROT])
             out += fq2.negate(take_modulo=False, check_constant=False, clean_constant=False)
 
         return out
 
+    @cached_fragment
+    @keeps_positive(is_mul_positive)
+    @bit_growth(_mul_bit_size)
     def mul(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         """Multiplication in F_q^6.
 
@@ -395,27 +432,63 @@ class Fq6:
         Variables:
             - If take_modulo is set to True, then the coordinates of the result are in Z_q; otherwise, the coordinates
             are not taken modulo q.
+            - is_input_positive: see `zkscript.util.bit_growth.keeps_positive`. The result is non-negative only if
+            `is_mul_positive()`.
         """
         # Fq2 implementation
         fq2 = self.BASE_FIELD
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
+        # After this, the stack holds the two summands of the first component,
+        # altstack = [thirdComponent,secondComponent]
+        if self.MUL_STRATEGY == "karatsuba":
+            out += self._karatsuba_mul()
+        else:
+            out += self._schoolbook_mul()
+
+        # After this, the stack is: firstComponent, altstack = [thirdComponent,secondComponent]
+        if take_modulo:
+            is_positive = is_input_positive and self.is_mul_positive()
+            out += fq2.add(
+                take_modulo=True,
+                check_constant=False,
+                clean_constant=clean_constant,
+                is_constant_reused=True,
+                is_input_positive=is_positive,
+            )
+            # Batched modulo operations: pull from altstack, rotate, mod out, repeat
+            out += reduce_n(4, is_constant_reused=is_constant_reused, is_positive=is_positive, is_constant_fetched=True)
+        else:
+            out += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
+            out += Script([OP_FROMALTSTACK] * 4)
+
+        return out
+
+    def _schoolbook_mul(self) -> Script:
+        """Schoolbook multiplication in F_q^6: nine multiplications in F_q^2.
+
+        Input parameters:
+            - Stack: q .. X Y
+            - Altstack: []
+        Output:
+            - [(y2*x1) + (x2*y1)] * xi (x0*y0), to be added to get the first component
+            - Altstack: [thirdComponent, secondComponent]
+        """
+        # Fq2 implementation
+        fq2 = self.BASE_FIELD
+
         # Computation of third component ---------------------------------------------------------
 
         # After this, the stack is: x0 x1 x2 y0 y1 y2 (x1*y1)
-        compute_third_component = Script.parse_string("OP_2OVER")  # Pick y1
+        compute_third_component = Script([OP_2OVER])  # Pick y1
         compute_third_component += pick(position=11, n_elements=2)  # Pick x1
         compute_third_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         # After this, the stack is: x0 x1 x2 y0 y1 y2 (x1*y1) (x0*y2)
-        compute_third_component += Script.parse_string("OP_2OVER")  # Pick y2
+        compute_third_component += Script([OP_2OVER])  # Pick y2
         compute_third_component += pick(position=15, n_elements=2)  # Pick x0
         compute_third_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         # After this, the stack is: x0 x1 x2 y0 y1 y2, altstack = [thirdComponent]
@@ -423,18 +496,18 @@ class Fq6:
         compute_third_component += pick(position=11, n_elements=2)  # Pick y0
         compute_third_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_third_component += fq2.add_three(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_third_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_third_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of third component ---------------------------------------------------
 
         # Computation of second component ---------------------------------------------------------
 
         # After this, the stack is: x0 x1 x2 y0 y1 y2 (y1*x0)
-        compute_second_component = Script.parse_string("OP_2OVER")  # Pick y1
+        compute_second_component = Script([OP_2OVER])  # Pick y1
         compute_second_component += pick(position=13, n_elements=2)  # Pick x0
         compute_second_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         # After this, the stack is: x0 x1 x2 y0 y1 y2 (y1*x0) (x2*y2*xi)
-        compute_second_component += Script.parse_string("OP_2OVER")  # Pick y2
+        compute_second_component += Script([OP_2OVER])  # Pick y2
         compute_second_component += pick(position=11, n_elements=2)  # Pick x2
         compute_second_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_second_component += fq2.mul_by_non_residue(
@@ -445,7 +518,7 @@ class Fq6:
         compute_second_component += pick(position=11, n_elements=2)  # Pick y0
         compute_second_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_second_component += fq2.add_three(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_second_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_second_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of second component ---------------------------------------------------
 
@@ -455,54 +528,103 @@ class Fq6:
         compute_first_component = roll(position=9, n_elements=2)  # Roll x1
         compute_first_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         # After this, the stack is: x0 y0 [(y2*x1) + (x2*y1)] * xi, altstack = [thirdComponent,secondComponent]
-        compute_first_component += Script.parse_string("OP_2SWAP")  # Roll y1
+        compute_first_component += Script([OP_2SWAP])  # Roll y1
         compute_first_component += roll(position=7, n_elements=2)  # Roll x2
         compute_first_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_first_component += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
         compute_first_component += fq2.mul_by_non_residue(take_modulo=False, check_constant=False, clean_constant=False)
         # After this, the stack is: firstComponent, altstack = [thirdComponent,secondComponent]
-        compute_first_component += Script.parse_string("OP_2ROT OP_2ROT")
+        compute_first_component += Script([OP_2ROT, OP_2ROT])
         compute_first_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
-        if take_modulo:
-            compute_first_component += fq2.add(
-                take_modulo=True, check_constant=False, clean_constant=clean_constant, is_constant_reused=True
-            )
-        else:
-            compute_first_component += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
 
         # End of computation of first component ----------------------------------------------------
 
-        if take_modulo:
-            out += compute_third_component + compute_second_component + compute_first_component
+        return compute_third_component + compute_second_component + compute_first_component
 
-            # Batched modulo operations: pull from altstack, rotate, mod out, repeat
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
-        else:
-            out += (
-                compute_third_component
-                + compute_second_component
-                + compute_first_component
-                + Script.parse_string("OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK")
-            )
+    def _karatsuba_mul(self) -> Script:
+        """Karatsuba multiplication in F_q^6: six multiplications in F_q^2.
+
+        With v_i = x_i * y_i, the components of X * Y are computed as:
+            - v0 + [(x1 + x2) * (y1 + y2) - v1 - v2] * xi
+            - (x0 + x1) * (y0 + y1) - v0 - v1 + v2 * xi
+            - (x0 + x2) * (y0 + y2) - v0 - v2 + v1
+
+        Input parameters:
+            - Stack: q .. X Y
+            - Altstack: []
+        Output:
+            - v0 [(x1 + x2) * (y1 + y2) - v1 - v2] * xi, to be added to get the first component
+            - Altstack: [thirdComponent, secondComponent]
+        """
+        # Fq2 implementation
+        fq2 = self.BASE_FIELD
+
+        # After this, the stack is: x0 x1 x2 y0 y1 y2 v0 v1 v2
+        out = Script()
+        for _ in range(3):
+            out += pick(position=11, n_elements=2)  # Pick xi
+            out += pick(position=7, n_elements=2)  # Pick yi
+            out += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
+
+        # After this, the stack is: x0 x1 x2 y0 y1 y2 v0 v1 v2, altstack = [thirdComponent]
+        out += pick(position=17, n_elements=2)  # Pick x0
+        out += pick(position=15, n_elements=2)  # Pick x2
+        out += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
+        out += pick(position=13, n_elements=2)  # Pick y0
+        out += pick(position=11, n_elements=2)  # Pick y2
+        out += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
+        out += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
+        out += pick(position=5, n_elements=2)  # Pick v1
+        out += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
+        out += pick(position=7, n_elements=2)  # Pick v0
+        out += fq2.subtract(take_modulo=False, check_constant=False, clean_constant=False)
+        out += pick(position=3, n_elements=2)  # Pick v2
+        out += fq2.subtract(take_modulo=False, check_constant=False, clean_constant=False)
+        out += Script([OP_TOALTSTACK, OP_TOALTSTACK])
+
+        # After this, the stack is: x1 x2 y1 y2 v0 v1 v2, altstack = [thirdComponent, secondComponent]
+        out += roll(position=17, n_elements=2)  # Roll x0
+        out += pick(position=17, n_elements=2)  # Pick x1
+        out += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
+        out += roll(position=13, n_elements=2)  # Roll y0
+        out += pick(position=13, n_elements=2)  # Pick y1
+        out += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
+        out += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
+        out += pick(position=3, n_elements=2)  # Pick v2
+        out += fq2.mul_by_non_residue(take_modulo=False, check_constant=False, clean_constant=False)
+        out += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
+        out += pick(position=7, n_elements=2)  # Pick v0
+        out += fq2.subtract(take_modulo=False, check_constant=False, clean_constant=False)
+        out += pick(position=5, n_elements=2)  # Pick v1
+        out += fq2.subtract(take_modulo=False, check_constant=False, clean_constant=False)
+        out += Script([OP_TOALTSTACK, OP_TOALTSTACK])
+
+        # After this, the stack is: v0 [(x1 + x2) * (y1 + y2) - v1 - v2] * xi
+        out += roll(position=13, n_elements=2)  # Roll x1
+        out += roll(position=13, n_elements=2)  # Roll x2
+        out += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
+        out += roll(position=11, n_elements=2)  # Roll y1
+        out += roll(position=11, n_elements=2)  # Roll y2
+        out += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
+        out += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
+        out += roll(position=5, n_elements=2)  # Roll v1
+        out += fq2.subtract(take_modulo=False, check_constant=False, clean_constant=False)
+        out += Script([OP_2SWAP])  # Roll v2
+        out += fq2.subtract(take_modulo=False, check_constant=False, clean_constant=False)
+        out += fq2.mul_by_non_residue(take_modulo=False, check_constant=False, clean_constant=False)
 
         return out
 
+    @cached_fragment
+    @keeps_positive(is_square_positive)
+    @bit_growth(_square_bit_size)
     def square(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         """Squaring in F_q^6.
 
@@ -516,56 +638,56 @@ class Fq6:
         Variables:
             - If take_modulo is set to True, then the coordinates of the result are in Z_q; otherwise, the coordinates
             are not taken modulo q.
+            - is_input_positive: see `zkscript.util.bit_growth.keeps_positive`. The result is non-negative only if
+            `is_square_positive()`.
         """
         # Fq2 implementation
         fq2 = self.BASE_FIELD
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
+        is_positive = is_input_positive and self.is_square_positive()
+
         # Computation third component ------------------------------------------------------------
 
         # After this, the stack is: x0 x1 x2 x1^2
-        compute_third_component = Script.parse_string("OP_2OVER")  # Pick x1
+        compute_third_component = Script([OP_2OVER])  # Pick x1
         compute_third_component += fq2.square(take_modulo=False, check_constant=False, clean_constant=False)
         # After this, the stack is: x0 x1 x2 2x2 x1^2 2x2
-        compute_third_component += Script.parse_string("OP_2OVER")  # Pick x2
-        compute_third_component += Script.parse_string("OP_2") + fq2.scalar_mul(
+        compute_third_component += Script([OP_2OVER])  # Pick x2
+        compute_third_component += Script([OP_2]) + fq2.scalar_mul(
             take_modulo=False, check_constant=False, clean_constant=False
         )
-        compute_third_component += Script.parse_string("OP_2SWAP OP_2OVER")
+        compute_third_component += Script([OP_2SWAP, OP_2OVER])
         # After this, the stack is: x0 x1 x2 2x2, altstack = [thirdComponent]
         compute_third_component += pick(position=11, n_elements=2)  # Pick x0
         compute_third_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_third_component += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_third_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_third_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of third component --------------------------------------------------
 
         # Computation of second component --------------------------------------------------------
 
         # After this, the stack is: x0 x1 2x2 x2^2
-        compute_second_component = Script.parse_string("OP_2SWAP")  # Roll x2
+        compute_second_component = Script([OP_2SWAP])  # Roll x2
         compute_second_component += fq2.square(take_modulo=False, check_constant=False, clean_constant=False)
         compute_second_component += fq2.mul_by_non_residue(
             take_modulo=False, check_constant=False, clean_constant=False
         )
         # After this, the stack is: x0 2x2 x1 x2^2 2x1*x0
-        compute_second_component += Script.parse_string("OP_2ROT OP_2SWAP OP_2OVER")
+        compute_second_component += Script([OP_2ROT, OP_2SWAP, OP_2OVER])
         compute_second_component += pick(position=9, n_elements=2)  # Pick x0
         compute_second_component += fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_second_component += Script.parse_string("OP_2") + fq2.scalar_mul(
+        compute_second_component += Script([OP_2]) + fq2.scalar_mul(
             take_modulo=False, check_constant=False, clean_constant=False
         )
         # After this, the stack is: x0 2x2 x1, altstack = [thirdComponent, secondComponent]
         compute_second_component += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_second_component += Script.parse_string("OP_TOALTSTACK OP_TOALTSTACK")
+        compute_second_component += Script([OP_TOALTSTACK, OP_TOALTSTACK])
 
         # End of computation of second component -------------------------------------------------
 
@@ -574,11 +696,15 @@ class Fq6:
         # After this, the stack is: firstComponent, altstack = [thirdComponent, secondComponent]
         compute_first_component = fq2.mul(take_modulo=False, check_constant=False, clean_constant=False)
         compute_first_component += fq2.mul_by_non_residue(take_modulo=False, check_constant=False, clean_constant=False)
-        compute_first_component += Script.parse_string("OP_2SWAP")  # Roll x0
+        compute_first_component += Script([OP_2SWAP])  # Roll x0
         compute_first_component += fq2.square(take_modulo=False, check_constant=False, clean_constant=False)
         if take_modulo:
             compute_first_component += fq2.add(
-                take_modulo=True, check_constant=False, clean_constant=clean_constant, is_constant_reused=True
+                take_modulo=True,
+                check_constant=False,
+                clean_constant=clean_constant,
+                is_constant_reused=True,
+                is_input_positive=is_positive,
             )
         else:
             compute_first_component += fq2.add(take_modulo=False, check_constant=False, clean_constant=False)
@@ -589,33 +715,27 @@ class Fq6:
             out += compute_third_component + compute_second_component + compute_first_component
 
             # Batched modulo operations: pull from altstack, rotate, mod out, repeat
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_FROMALTSTACK OP_ROT")
-            if is_constant_reused:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+            out += reduce_n(4, is_constant_reused=is_constant_reused, is_positive=is_positive, is_constant_fetched=True)
         else:
             out += (
                 compute_third_component
                 + compute_second_component
                 + compute_first_component
-                + Script.parse_string("OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK")
+                + Script([OP_FROMALTSTACK] * 4)
             )
 
         return out
 
+    @cached_fragment
+    @keeps_positive(lambda self: is_positive_output(self.BASE_FIELD.mul_by_non_residue))
+    @bit_growth(lambda self, x: max(x, output_bit_size(self.BASE_FIELD.mul_by_non_residue, x)))
     def mul_by_v(
         self,
         take_modulo: bool,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
         is_constant_reused: bool | None = None,
+        is_input_positive: bool = False,
     ) -> Script:
         """Multiplication by v in F_q^6.
 
@@ -629,48 +749,44 @@ class Fq6:
         Variables:
             - If take_modulo is set to True, then the coordinates of the result are in Z_q; otherwise, the coordinates
             are not taken modulo q.
+            - is_input_positive: see `zkscript.util.bit_growth.keeps_positive`. The result is non-negative only if
+            BASE_FIELD.mul_by_non_residue keeps values non-negative.
         """
         # Fq2 implementation
         fq2 = self.BASE_FIELD
 
         if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([self.MODULUS])
-                + Script.parse_string("OP_EQUALVERIFY")
-            )
+            out = Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([self.MODULUS]) + Script([OP_EQUALVERIFY])
         else:
             out = Script()
 
         if take_modulo:
             # After this, the stack is: x0 x1 x2*NON_RESIDUE
             out += fq2.mul_by_non_residue(
-                take_modulo=True, check_constant=False, clean_constant=False, is_constant_reused=False
+                take_modulo=True,
+                check_constant=False,
+                clean_constant=False,
+                is_constant_reused=False,
+                is_input_positive=is_input_positive,
             )
             # After this, the stack is: x1 (x2*NON_RESIDUE) x01 x00 q
-            out += Script.parse_string("OP_2ROT OP_SWAP")
-            out += Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
+            out += Script([OP_2ROT, OP_SWAP])
+            out += Script([OP_DEPTH, OP_1SUB, OP_PICK])
             # Mod out twice - after this the stack is: x1 (x2*NON_RESIDUE) x0
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_SWAP OP_ROT")
-            out += Script.parse_string("OP_OVER OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+            out += mod(is_positive=is_input_positive)
+            out += Script([OP_SWAP, OP_ROT])
+            out += mod(is_mod_on_top=False, is_constant_reused=False, is_positive=is_input_positive)
 
-            if clean_constant:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_ROLL")
-            else:
-                fetch_q = Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
+            fetch_q = Script([OP_DEPTH, OP_1SUB, OP_ROLL]) if clean_constant else Script([OP_DEPTH, OP_1SUB, OP_PICK])
 
             # Mod out twice - after this the stack is: (x2*NON_RESIDUE) x0 x1
-            out += Script.parse_string("OP_2ROT OP_SWAP")
+            out += Script([OP_2ROT, OP_SWAP])
             out += fetch_q
-            out += Script.parse_string("OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            out += Script.parse_string("OP_SWAP OP_ROT")
-            if is_constant_reused:
-                out += Script.parse_string("OP_OVER OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD")
-            else:
-                out += Script.parse_string("OP_OVER OP_MOD OP_OVER OP_ADD OP_SWAP OP_MOD")
+            out += mod(is_positive=is_input_positive)
+            out += Script([OP_SWAP, OP_ROT])
+            out += mod(is_mod_on_top=False, is_constant_reused=is_constant_reused, is_positive=is_input_positive)
         else:
             out += fq2.mul_by_non_residue(take_modulo=False, check_constant=False, clean_constant=False)
-            out += Script.parse_string("OP_2ROT OP_2ROT")
+            out += Script([OP_2ROT, OP_2ROT])
 
         return out
@@ -0,0 +1,494 @@
+from hashlib import sha256
+
+from tx_engine import Script
+from tx_engine.engine.op_codes import (
+    OP_1,
+    OP_1SUB,
+    OP_2,
+    OP_2DROP,
+    OP_2SWAP,
+    OP_4,
+    OP_16,
+    OP_ADD,
+    OP_BIN2NUM,
+    OP_CAT,
+    OP_DEPTH,
+    OP_DROP,
+    OP_DUP,
+    OP_EQUAL,
+    OP_EQUALVERIFY,
+    OP_FROMALTSTACK,
+    OP_MOD,
+    OP_MUL,
+    OP_NUM2BIN,
+    OP_PICK,
+    OP_ROLL,
+    OP_SHA256,
+    OP_SPLIT,
+    OP_SUB,
+    OP_TOALTSTACK,
+)
+
+# EC arithmetic
+from src.zkscript.elliptic_curves.ec_operations_fq import EllipticCurveFq
+from src.zkscript.elliptic_curves.ec_operations_fq_unrolled import EllipticCurveFqUnrolled, _ec_add
+from src.zkscript.util.script_builder import ScriptBuilder
+from src.zkscript.util.utility_functions import optimise_script
+from src.zkscript.util.utility_scripts import nums_to_script
+
+# The weights of the proofs 2, .., k are in [2^WEIGHT_BITS, 2^(WEIGHT_BITS + 1))
+WEIGHT_BITS = 127
+
+
+def _num2bin(n: int, size: int) -> bytes:
+    """Encode n in size bytes, as OP_NUM2BIN does (little endian, sign bit in the most significant bit)."""
+    out = bytearray(abs(n).to_bytes(size, "little"))
+    if n < 0:
+        out[-1] |= 0x80
+    return bytes(out)
+
+
+def _ec_multiply(point_p: tuple[int, int], a: int, curve_a: int, q: int):
+    """Return aP and the gradients to compute it with unrolled_multiplication (see unrolled_multiplication_input)."""
+    if a == 0:
+        return None, []
+    exp_a = [int(bit) for bit in bin(a)[2:]][::-1]
+    point_t = point_p
+    lambdas = []
+    for i in range(len(exp_a) - 2, -1, -1):
+        point_t, gradient_doubling = _ec_add(point_t, point_t, curve_a, q)
+        to_add = [[gradient_doubling]]
+        if exp_a[i] == 1:
+            point_t, gradient_addition = _ec_add(point_t, point_p, curve_a, q)
+            to_add.append([gradient_addition])
+        lambdas.append(to_add)
+    return point_t, lambdas
+
+
+class BatchGroth16:
+    def batch_groth16_weights(
+        self,
+        pubs: list[list[int]],
+        As: list[list[int]],  # noqa: N803
+        Bs: list[list[int]],  # noqa: N803
+        Cs: list[list[int]],  # noqa: N803
+    ) -> list[int]:
+        """Weights rho_1, .., rho_k of the random linear combination computed by batch_groth16_verifier.
+
+        The weights are derived from the proofs and the public statements (Fiat-Shamir):
+            - the transcript is the concatenation, for j = 1, .., k, of the coordinates of A_j, B_j, C_j and of the
+            public statements pubs[j], each encoded in n_bytes = floor((log_2(q) + 8) / 8) bytes as OP_NUM2BIN does
+            - seed = SHA256(transcript)
+            - for j = 2, .., k, rho_j = 2^127 + (h_j mod 2^127), where h_j is the number encoded (little endian,
+            unsigned) by the first 16 bytes of SHA256(seed || j), j encoded in 4 bytes
+            - rho_1 = (1 - sum_(j=2)^k rho_j) mod r, so that sum_(j=1)^k rho_j = 1 mod r
+        """
+        q = self.pairing_model.MODULUS
+        k = len(As)
+        n_bytes = (q.bit_length() + 8) // 8
+
+        transcript = b"".join(_num2bin(el, n_bytes) for j in range(k) for el in [*As[j], *Bs[j], *Cs[j], *pubs[j]])
+        seed = sha256(transcript).digest()
+
+        weights = []
+        for j in range(2, k + 1):
+            h = int.from_bytes(sha256(seed + _num2bin(j, 4)).digest()[:16], "little")
+            weights.append(2**WEIGHT_BITS + h % 2**WEIGHT_BITS)
+
+        return [(1 - sum(weights)) % self.r, *weights]
+
+    def batch_groth16_points(
+        self,
+        pubs: list[list[int]],
+        As: list[list[int]],  # noqa: N803
+        Cs: list[list[int]],  # noqa: N803
+        gamma_abc: list[list[int]],
+        weights: list[int],
+    ) -> list[list[int]]:
+        r"""Points in E(F_q) of the multi pairing computed by batch_groth16_verifier.
+
+        Return [rho_1 * A_1, .., rho_k * A_k, \sum_(j=1)^k rho_j * sum_gamma_abc_j, \sum_(j=1)^k rho_j * C_j], where
+        sum_gamma_abc_j = \sum_(i=0)^(l) a_(j,i) * gamma_abc[i]. The miller loops of these points with B_1, .., B_k,
+        -gamma, -delta are the ones whose inverse is required by batch_groth16_verifier_unlock.
+        """
+        q = self.pairing_model.MODULUS
+        r = self.r
+        curve_a = self.curve_a
+        n_pub = len(gamma_abc) - 1
+        k = len(As)
+
+        points_p = [_ec_multiply(tuple(As[j]), weights[j], curve_a, q)[0] for j in range(k)]
+
+        sum_gamma_abc = tuple(gamma_abc[0]) if any(gamma_abc[0]) else None
+        for i in range(1, n_pub + 1):
+            c_i = sum(weights[j] * pubs[j][i - 1] for j in range(k)) % r
+            multiple = _ec_multiply(tuple(gamma_abc[i]), c_i, curve_a, q)[0] if any(gamma_abc[i]) else None
+            sum_gamma_abc = _ec_add(sum_gamma_abc, multiple, curve_a, q)[0]
+        points_p.append(sum_gamma_abc)
+
+        sum_c = None
+        for j in range(k):
+            sum_c = _ec_add(sum_c, _ec_multiply(tuple(Cs[j]), weights[j], curve_a, q)[0], curve_a, q)[0]
+        points_p.append(sum_c)
+
+        return [list(point) for point in points_p]
+
+    def batch_groth16_verifier(
+        self,
+        k: int,
+        modulo_threshold: int,
+        alpha_beta: list[int],
+        minus_gamma: list[int],
+        minus_delta: list[int],
+        gamma_abc: list[list[int]],
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        reduction_cost: str = "count",
+    ) -> Script:
+        r"""Verify k Groth16 proofs (A_j,B_j,C_j) for the public statements a_(j,1), .., a_(j,l), j = 1, .., k.
+
+        The k verification equations (see groth16_verifier)
+
+            e(A_j,B_j) * e(sum_gamma_abc_j, -gamma) * e(C_j, -delta) = alpha_beta
+
+        where sum_gamma_abc_j = sum_(i=0)^(l) a_(j,i) * gamma_abc[i], are checked at once through their random linear
+        combination with weights rho_1, .., rho_k:
+
+            prod_(j=1)^k e(rho_j * A_j, B_j) * e(sum_(i=0)^(l) c_i * gamma_abc[i], -gamma) *
+            e(sum_(j=1)^k rho_j * C_j, -delta) = alpha_beta^(sum_(j=1)^k rho_j)
+
+        where c_i = sum_(j=1)^k rho_j * a_(j,i) mod r. The k + 2 miller loops are computed by multi_miller_loop, so
+        that the easy and the hard exponentiations are computed only once.
+
+        The weights are derived from the proofs and the public statements inside the script (see
+        batch_groth16_weights): rho_2, .., rho_k are 128-bit values obtained by hashing, and rho_1 is chosen so that
+        sum_(j=1)^k rho_j = 1 mod r. Hence, the right hand side is alpha_beta itself, and no exponentiation in the
+        target group is required. The weights are passed in the unlocking script, and the script checks that:
+            - the weights are the ones derived from the hash of the proofs and of the public statements
+            - the multipliers of the unrolled multiplications (see unrolled_multiplication with
+            output_multiplier=True) are rho_j for A_j and C_j, and c_i for gamma_abc[i]
+
+        Input:
+            Stack: q rho_1 .. rho_k [A_1 B_1 C_1 a_(1,1) .. a_(1,l)] .. [A_k B_k C_k a_(k,1) .. a_(k,l)]
+            inverse_miller_loop_multi_pairing lambdas_pairing
+            [rho_1,A_1] .. [rho_k,A_k] lambdas_sum_gamma_abc [c_1,gamma_abc[1]] .. [c_l,gamma_abc[l]] lambdas_sum_c
+            [rho_1,C_1] .. [rho_k,C_k]
+            Altstack: []
+        Output:
+            Verify the k ZKP equations
+
+        Here:
+            - [a,P] is the input required to execute unrolled_multiplication from EllipticCurveFqUnrolled on a and P
+            (except for P, which is either picked from the bottom of the stack or hard coded into the script)
+            - lambdas_sum_c are the gradients to compute rho_1 * C_1 + .. + rho_k * C_k, see
+            batch_groth16_verifier_unlock
+            - lambdas_sum_gamma_abc are the gradients to compute gamma_abc[0] + c_1 * gamma_abc[1] + .. +
+            c_l * gamma_abc[l], see batch_groth16_verifier_unlock
+            - lambdas_pairing are the lambdas needed to execute the function self.multi_pairing() (from the Pairing
+            class) on the pairs (rho_1 * A_1, B_1), .., (rho_k * A_k, B_k), (sum c_i * gamma_abc[i], -gamma),
+            (sum rho_j * C_j, -delta)
+
+        The reductions in the multi Miller loop are planned with the cost model reduction_cost (see
+        multi_miller_loop).
+
+        Unlike groth16_verifier, there is no max_multipliers argument: the public statements only enter the script
+        through c_1, .., c_l, which are random combinations modulo r, so bounds on the statements do not shorten the
+        multiplications c_i * gamma_abc[i], which are always unrolled for multipliers up to r. In particular, the
+        script does not restrict the size of the public statements.
+        """
+        if k < 1:
+            msg = f"The number of proofs must be positive, not {k}."
+            raise ValueError(msg)
+
+        q = self.pairing_model.MODULUS
+        r = self.r
+        N_POINTS_CURVE = self.pairing_model.N_POINTS_CURVE
+        N_POINTS_TWIST = self.pairing_model.N_POINTS_TWIST
+        n_pub = len(gamma_abc) - 1
+        n_bytes = (q.bit_length() + 8) // 8
+
+        # Elliptic curve arithmetic
+        ec_fq = EllipticCurveFq(q=q, curve_a=self.curve_a)
+        # Unrolled EC arithmetic
+        ec_fq_unrolled = EllipticCurveFqUnrolled(q=q, ec_over_fq=ec_fq)
+
+        # Positions from the bottom of the stack (q is at position 0) of the weights and of the proofs
+        n_elements_proof = 2 * N_POINTS_CURVE + N_POINTS_TWIST + n_pub
+
+        def weight(j: int) -> int:
+            return j
+
+        def point_a(j: int) -> int:
+            return 1 + k + (j - 1) * n_elements_proof
+
+        def point_b(j: int) -> int:
+            return point_a(j) + N_POINTS_CURVE
+
+        def point_c(j: int) -> int:
+            return point_b(j) + N_POINTS_TWIST
+
+        def statement(j: int, i: int) -> int:
+            return point_c(j) + N_POINTS_CURVE + i - 1
+
+        def pick_from_bottom(position: int, n_elements: int = 1) -> Script:
+            out = Script()
+            for n in range(n_elements):
+                out += Script([OP_DEPTH]) + nums_to_script([position + n + 1]) + Script([OP_SUB, OP_PICK])
+            return out
+
+        def multiply(max_multiplier: int, expected_multiplier: Script) -> Script:
+            """Compute aP, check a against the value computed by expected_multiplier, and move aP to the altstack."""
+            out = ec_fq_unrolled.unrolled_multiplication(
+                max_multiplier=max_multiplier,
+                modulo_threshold=modulo_threshold,
+                check_constant=False,
+                clean_constant=False,
+                output_multiplier=True,
+            )
+            out += expected_multiplier
+            out += Script([OP_EQUALVERIFY])
+            out += Script([OP_2SWAP, OP_2DROP])  # Drop P
+            out += Script([OP_TOALTSTACK] * N_POINTS_CURVE)
+            return out
+
+        def max_weight(j: int) -> int:
+            return r if j == 1 else 2 ** (WEIGHT_BITS + 1)
+
+        out = ScriptBuilder()
+        if check_constant:
+            out += Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([q]) + Script([OP_EQUALVERIFY])
+
+        # Check the weights --------------------------------------------------------------------------------------------
+        if k > 1:
+            # After this, the top of the stack is: SHA256(transcript)
+            for j in range(1, k + 1):
+                for n in range(n_elements_proof):
+                    out += pick_from_bottom(point_a(j) + n)
+                    out += nums_to_script([n_bytes])
+                    out += Script([OP_NUM2BIN])
+                    if j > 1 or n > 0:
+                        out += Script([OP_CAT])
+            out += Script([OP_SHA256])
+
+            # Check rho_j = 2^127 + (SHA256(seed || j)[:16] mod 2^127)
+            for j in range(2, k + 1):
+                out += Script([OP_DUP])
+                out += nums_to_script([j])
+                out += Script([OP_4, OP_NUM2BIN, OP_CAT, OP_SHA256, OP_16, OP_SPLIT, OP_DROP])
+                out += Script.parse_string("0x00")
+                out += Script([OP_CAT, OP_BIN2NUM])
+                out += nums_to_script([2**WEIGHT_BITS])
+                out += Script([OP_MOD])
+                out += nums_to_script([2**WEIGHT_BITS])
+                out += Script([OP_ADD])
+                out += pick_from_bottom(weight(j))
+                out += Script([OP_EQUALVERIFY])
+            out += Script([OP_DROP])
+
+        # Check sum_(j=1)^k rho_j = 1 mod r
+        for j in range(1, k + 1):
+            out += pick_from_bottom(weight(j))
+            if j > 1:
+                out += Script([OP_ADD])
+        out += nums_to_script([r])
+        out += Script([OP_MOD, OP_1, OP_EQUALVERIFY])
+
+        # Compute sum_(j=1)^k rho_j * C_j ------------------------------------------------------------------------------
+        # After this, the altstack is: rho_k * C_k .. rho_1 * C_1
+        for j in range(k, 0, -1):
+            out += pick_from_bottom(point_c(j), N_POINTS_CURVE)
+            out += multiply(max_weight(j), pick_from_bottom(weight(j)))
+
+        # After this, the altstack is: sum_(j=1)^k rho_j * C_j
+        out += Script([OP_FROMALTSTACK] * N_POINTS_CURVE)
+        for _ in range(2, k + 1):
+            out += Script([OP_FROMALTSTACK] * N_POINTS_CURVE)
+            out += ec_fq.point_addition_with_unknown_points(
+                take_modulo=True, check_constant=False, clean_constant=False
+            )
+        out += Script([OP_TOALTSTACK] * N_POINTS_CURVE)
+
+        # Compute sum_(i=0)^l c_i * gamma_abc[i] -----------------------------------------------------------------------
+        # After this, the altstack is: sum_(j=1)^k rho_j * C_j c_l * gamma_abc[l] .. c_1 * gamma_abc[1]
+        for i in range(n_pub, 0, -1):
+            if not any(gamma_abc[i]):
+                # c_i * gamma_abc[i] is the point at infinity
+                out += Script.parse_string(" ".join(["0x00"] * N_POINTS_CURVE))
+                out += Script([OP_TOALTSTACK] * N_POINTS_CURVE)
+                continue
+            out += nums_to_script(gamma_abc[i])
+            c_i = ScriptBuilder()
+            for j in range(1, k + 1):
+                c_i += pick_from_bottom(weight(j))
+                c_i += pick_from_bottom(statement(j, i))
+                c_i += Script([OP_MUL])
+                if j > 1:
+                    c_i += Script([OP_ADD])
+            c_i += nums_to_script([r])
+            c_i += Script([OP_MOD])
+            out += multiply(r, c_i.to_script())
+
+        # After this, the altstack is: sum_(j=1)^k rho_j * C_j sum_(i=0)^l c_i * gamma_abc[i]
+        if not any(gamma_abc[0]):
+            out += Script.parse_string(" ".join(["0x00"] * N_POINTS_CURVE))
+        else:
+            out += nums_to_script(gamma_abc[0])
+        for _ in range(n_pub):
+            out += Script([OP_FROMALTSTACK] * N_POINTS_CURVE)
+            out += ec_fq.point_addition_with_unknown_points(
+                take_modulo=True, check_constant=False, clean_constant=False
+            )
+        out += Script([OP_TOALTSTACK] * N_POINTS_CURVE)
+
+        # Compute rho_j * A_j ------------------------------------------------------------------------------------------
+        # After this, the altstack is: sum_(j=1)^k rho_j * C_j sum_(i=0)^l c_i * gamma_abc[i] rho_k * A_k .. rho_1 * A_1
+        for j in range(k, 0, -1):
+            out += pick_from_bottom(point_a(j), N_POINTS_CURVE)
+            out += multiply(max_weight(j), pick_from_bottom(weight(j)))
+
+        # After this, the stack is: q rho_1 .. rho_k [A_1 B_1 C_1 a_(1,1) .. a_(1,l)] ..
+        # [A_k B_k C_k a_(k,1) .. a_(k,l)] inverse_miller_loop_multi_pairing lambdas_pairing rho_1 * A_1 ..
+        # rho_k * A_k sum_(i=0)^l c_i * gamma_abc[i] sum_(j=1)^k rho_j * C_j
+        out += Script([OP_FROMALTSTACK] * N_POINTS_CURVE * (k + 2))
+
+        # After this, the stack is: q inverse_miller_loop_multi_pairing lambdas_pairing rho_1 * A_1 .. rho_k * A_k
+        # sum_(i=0)^l c_i * gamma_abc[i] sum_(j=1)^k rho_j * C_j B_1 .. B_k -gamma -delta
+        for j in range(1, k + 1):
+            # B_1, .., B_(j-1) have already been rolled
+            position = point_b(j) - (j - 1) * N_POINTS_TWIST + 1
+            for _ in range(N_POINTS_TWIST):
+                out += Script([OP_DEPTH]) + nums_to_script([position]) + Script([OP_SUB, OP_ROLL])
+        # Drop the weights and what is left of the proofs
+        out += Script([OP_DEPTH, OP_2, OP_SUB, OP_ROLL, OP_DROP] * (k + k * (n_elements_proof - N_POINTS_TWIST)))
+        out += nums_to_script(minus_gamma)
+        out += nums_to_script(minus_delta)
+
+        # After this, the stack is: q .. prod_(j=1)^k e(rho_j * A_j, B_j) * e(sum_(i=0)^l c_i * gamma_abc[i], -gamma) *
+        # e(sum_(j=1)^k rho_j * C_j, -delta)
+        out += self.pairing_model.multi_pairing(
+            n_pairs=k + 2,
+            modulo_threshold=modulo_threshold,
+            check_constant=False,
+            clean_constant=clean_constant,
+            reduction_cost=reduction_cost,
+        )
+
+        # After this, the top of the stack is: [prod_(j=1)^k e(rho_j * A_j, B_j) * .. ?= alpha_beta]
+        for ix, el in enumerate(alpha_beta[::-1]):
+            out += nums_to_script([el])
+            if ix != len(alpha_beta) - 1:
+                out += Script([OP_EQUALVERIFY])
+            else:
+                out += Script([OP_EQUAL])
+
+        return optimise_script(out)
+
+    def batch_groth16_verifier_unlock(
+        self,
+        pubs: list[list[int]],
+        As: list[list[int]],  # noqa: N803
+        Bs: list[list[int]],  # noqa: N803
+        Cs: list[list[int]],  # noqa: N803
+        gamma_abc: list[list[int]],
+        lambdas_exp_miller_loop: list[list[list[list[int]]]],
+        inverse_miller_loop: list[int],
+        load_q: bool = True,
+    ) -> Script:
+        """Generate unlocking script for batch_groth16_verifier.
+
+        - pubs[j]: list of public statements of the j-th proof
+        - (As[j],Bs[j],Cs[j]): j-th zk-proof, elements passed as their list of coordinates
+        - gamma_abc: the list of points given in the Common Reference String
+        - lambdas_exp_miller_loop: gradients needed to compute val * Q for Q = B_1, .., B_k, -gamma, -delta (val is the
+        value over which we compute the Miller loop), see also multi_pairing_input
+        - inverse_miller_loop: inverse of the product of the miller loops of the points returned by
+        batch_groth16_points with B_1, .., B_k, -gamma, -delta
+
+        The weights, the multiplications and the sums are computed here, see batch_groth16_weights.
+        """
+        if not len(pubs) == len(As) == len(Bs) == len(Cs) == len(lambdas_exp_miller_loop) - 2:
+            msg = "The number of public statements, proofs and lambdas do not match."
+            raise ValueError(msg)
+
+        q = self.pairing_model.MODULUS
+        r = self.r
+        curve_a = self.curve_a
+        n_pub = len(gamma_abc) - 1
+        k = len(As)
+
+        ec_fq_unrolled = EllipticCurveFqUnrolled(q=q, ec_over_fq=EllipticCurveFq(q=q, curve_a=curve_a))
+
+        weights = self.batch_groth16_weights(pubs, As, Bs, Cs)
+
+        def max_weight(j: int) -> int:
+            return r if j == 0 else 2 ** (WEIGHT_BITS + 1)
+
+        def multiplication_input(point_p: list[int], a: int, max_multiplier: int):
+            """Return aP and the input of unrolled_multiplication (without P)."""
+            multiple, lambdas = _ec_multiply(tuple(point_p), a, curve_a, q)
+            return multiple, ec_fq_unrolled.unrolled_multiplication_input(
+                point_p=[], a=a, lambdas=lambdas, max_multiplier=max_multiplier, load_modulus=False
+            )
+
+        def sum_input(points: list[tuple[int, int] | None]) -> ScriptBuilder:
+            """Return the gradients to compute the sum of points, in the order of batch_groth16_verifier."""
+            gradients = []
+            partial_sum = points[0]
+            for point in points[1:]:
+                partial_sum, gradient = _ec_add(partial_sum, point, curve_a, q)
+                if gradient is not None:
+                    gradients.append(gradient)
+            out = ScriptBuilder()
+            out.append_nums(gradients[::-1])
+            return out
+
+        out = ScriptBuilder()
+        if load_q:
+            out.append_nums([q])
+
+        # Load the weights and the proofs
+        out.append_nums(weights)
+        for j in range(k):
+            out.append_nums(As[j])
+            out.append_nums(Bs[j])
+            out.append_nums(Cs[j])
+            out.append_nums(pubs[j])
+
+        # Load z inverse
+        out.append_nums(inverse_miller_loop)
+
+        # Load lambdas
+        for i in range(len(lambdas_exp_miller_loop[0]) - 1, -1, -1):
+            for j in range(len(lambdas_exp_miller_loop[0][i]) - 1, -1, -1):
+                for lambdas in lambdas_exp_miller_loop:
+                    out.append_nums(lambdas[i][j])
+
+        # Multiplications rho_j * A_j
+        for j in range(k):
+            out += multiplication_input(As[j], weights[j], max_weight(j))[1]
+
+        # Multiplications c_i * gamma_abc[i] and their sum
+        multiples = [tuple(gamma_abc[0]) if any(gamma_abc[0]) else None]
+        multiplications = ScriptBuilder()
+        for i in range(1, n_pub + 1):
+            if not any(gamma_abc[i]):
+                multiples.append(None)
+                continue
+            c_i = sum(weights[j] * pubs[j][i - 1] for j in range(k)) % r
+            multiple, data = multiplication_input(gamma_abc[i], c_i, r)
+            multiples.append(multiple)
+            multiplications += data
+        out += sum_input(multiples)
+        out += multiplications
+
+        # Multiplications rho_j * C_j and their sum
+        multiples = []
+        multiplications = ScriptBuilder()
+        for j in range(k):
+            multiple, data = multiplication_input(Cs[j], weights[j], max_weight(j))
+            multiples.append(multiple)
+            multiplications += data
+        out += sum_input(multiples)
+        out += multiplications
+
+        return out.to_script()
@@ -1,6 +1,21 @@
+from hashlib import sha256
 from math import log2
+from pathlib import Path
 
 from tx_engine import Script
+from tx_engine.engine.op_codes import (
+    OP_0,
+    OP_1,
+    OP_1SUB,
+    OP_2DROP,
+    OP_2SWAP,
+    OP_DEPTH,
+    OP_EQUAL,
+    OP_EQUALVERIFY,
+    OP_FROMALTSTACK,
+    OP_PICK,
+    OP_TOALTSTACK,
+)
 
 # Pairing
 from src.zkscript.bilinear_pairings.model.model_definition import PairingModel
@@ -9,18 +24,26 @@ from src.zkscript.bilinear_pairings.model.model_definition import PairingModel
 # EC arithmetic
 from src.zkscript.elliptic_curves.ec_operations_fq import EllipticCurveFq
 from src.zkscript.elliptic_curves.ec_operations_fq_unrolled import EllipticCurveFqUnrolled
+from src.zkscript.groth16.model.batch_groth16 import BatchGroth16
+from src.zkscript.util.disk_cache import cache_key, load_script, store_script
+from src.zkscript.util.script_builder import ScriptBuilder
+from src.zkscript.util.script_template import ScriptTemplate
 from src.zkscript.util.utility_functions import optimise_script
 from src.zkscript.util.utility_scripts import nums_to_script, roll
 
 
-class Groth16(PairingModel):
-    def __init__(self, pairing_model, curve_a: int, r: int):
+class Groth16(BatchGroth16, PairingModel):
+    def __init__(self, pairing_model, curve_a: int, r: int, glv_beta: int | None = None, glv_lambda: int | None = None):
         # Pairing model used to instantiate Groth16
         self.pairing_model = pairing_model
         # A coefficient of the base curve over which Groth16 is instantiated
         self.curve_a = curve_a
         # The order of G1/G2/GT
         self.r = r
+        # Endomorphism (x,y) -> (glv_beta * x, y) of G1, which is the multiplication by glv_lambda (None if the curve
+        # has no such endomorphism)
+        self.glv_beta = glv_beta
+        self.glv_lambda = glv_lambda
 
     def groth16_verifier(
         self,
@@ -32,6 +55,12 @@ class Groth16(PairingModel):
         max_multipliers: list[int] | None = None,
         check_constant: bool | None = None,
         clean_constant: bool | None = None,
+        cache_dir: str | Path | None = None,
+        reduction_cost: str = "count",
+        precompute_lines: bool = False,
+        multi_scalar_multiplication: bool = False,
+        comb_width: int = 1,
+        glv: bool = False,
     ) -> Script:
         """Groth16 implementation.
 
@@ -65,10 +94,253 @@ class Groth16(PairingModel):
             and sum_(i=0)^(j-1) a_i * gamma_abc[i] to compute their sum
             - lambdas_pairing are the lambdas needed to execute the function self.triple_pairing() (from the Pairing
             class) to compute the triple pairing on the LHS of equation (*)
+
+        If cache_dir is not None, the script is looked up in (and, if missing, stored to) the on-disk cache in
+        cache_dir. The cache is content addressed: the key is the hash of the curve, the verification key,
+        modulo_threshold, max_multipliers, the flags and the library fingerprint.
+
+        The reductions in the triple Miller loop are planned with the cost model reduction_cost (see
+        triple_miller_loop).
+
+        If precompute_lines is True, minus_gamma and minus_delta are not pushed on the stack: the lines of their Miller
+        loops are precomputed and hard-coded in the script (see triple_miller_loop_with_fixed_qs), and lambdas_pairing
+        only contains the gradients needed to compute (t-1)B. The unlocking script must then be generated with
+        groth16_verifier_unlock(..., precompute_lines=True).
+
+        If multi_scalar_multiplication is True, sum_(i=0)^(l) a_i * gamma_abc[i] is computed with a single interleaved
+        multi-scalar multiplication (see unrolled_multi_scalar_multiplication in EllipticCurveFqUnrolled), which
+        shares the doublings among the public statements. The input data lambda[..] a_1 lambdas[a_1,gamma_abc[1]] ..
+        a_l lambdas[a_l,gamma_abc[l]] is then replaced by the one of the multi-scalar multiplication, and the
+        unlocking script must be generated with groth16_verifier_unlock(..., multi_scalar_multiplication=True).
+
+        If multi_scalar_multiplication is True and comb_width > 1, the multiples 2^(j*s) * gamma_abc[i] are hard-coded
+        in the script (see unrolled_fixed_base_multiplication in EllipticCurveFqUnrolled), which divides the number of
+        doublings by comb_width. The unlocking script must be generated with the same comb_width.
+
+        If glv is True (only for curves with a GLV endomorphism, such as BLS12-381, and not with
+        multi_scalar_multiplication), each a_i * gamma_abc[i] is computed with unrolled_glv_multiplication from
+        EllipticCurveFqUnrolled: a_i is split as a_i = a_i1 + glv_lambda * a_i2, and the script runs a simultaneous
+        double-and-add on gamma_abc[i] and its image under the endomorphism, checking that the split is correct. This
+        halves the number of doublings and gradients per public statement. The unlocking script must be generated with
+        groth16_verifier_unlock(..., glv=True).
         """
         q = self.pairing_model.MODULUS
+
+        if cache_dir is not None:
+            key = cache_key(
+                "groth16_verifier",
+                modulus=q,
+                curve_a=self.curve_a,
+                r=self.r,
+                modulo_threshold=modulo_threshold,
+                alpha_beta=alpha_beta,
+                minus_gamma=minus_gamma,
+                minus_delta=minus_delta,
+                gamma_abc=gamma_abc,
+                max_multipliers=max_multipliers,
+                check_constant=check_constant,
+                clean_constant=clean_constant,
+                reduction_cost=reduction_cost,
+                precompute_lines=precompute_lines,
+                multi_scalar_multiplication=multi_scalar_multiplication,
+                comb_width=comb_width,
+                glv=glv,
+            )
+            cached = load_script(cache_dir, key)
+            if cached is not None:
+                return cached
+
         N_POINTS_CURVE = self.pairing_model.N_POINTS_CURVE
         N_POINTS_TWIST = self.pairing_model.N_POINTS_TWIST
+
+        out = ScriptBuilder()
+        if check_constant:
+            out += Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([q]) + Script([OP_EQUALVERIFY])
+
+        # After this, the stack is: q .. lambdas_pairing inverse_miller_loop_triple_pairing A B C
+        # sum_(i=0)^l a_i * gamma_abc[i]
+        out += self._sum_gamma_abc(
+            modulo_threshold=modulo_threshold,
+            gamma_abc=gamma_abc,
+            max_multipliers=max_multipliers,
+            multi_scalar_multiplication=multi_scalar_multiplication,
+            comb_width=comb_width,
+            glv=glv,
+        )
+
+        # After this, the stack is: q .. lambdas_pairing inverse_miller_loop_triple_pairing A
+        # sum_(i=0)^l a_i * gamma_abc[i] C B [gamma delta]
+        out += roll(position=2 * N_POINTS_CURVE - 1, n_elements=N_POINTS_CURVE)  # Roll C
+        out += roll(position=2 * N_POINTS_CURVE + N_POINTS_TWIST - 1, n_elements=N_POINTS_TWIST)  # Roll B
+        if not precompute_lines:
+            out += nums_to_script(minus_gamma)
+            out += nums_to_script(minus_delta)
+
+        # After this, the stack is: q .. e(A,B) * e(sum_(i=0)^(l) a_i * gamma_abc[i], gamma) * e(C, delta)
+        out += self.pairing_model.triple_pairing(
+            modulo_threshold=modulo_threshold,
+            check_constant=False,
+            clean_constant=clean_constant,
+            reduction_cost=reduction_cost,
+            point_q2=minus_gamma if precompute_lines else None,
+            point_q3=minus_delta if precompute_lines else None,
+        )
+
+        # After this, the top of the stack is:
+        # [e(A,B) * e(sum_(i=0)^(l) a_i * gamma_abc[i], gamma) * e(C, delta) ?= alpha_beta]
+        for ix, el in enumerate(alpha_beta[::-1]):
+            out += nums_to_script([el])
+            if ix != len(alpha_beta) - 1:
+                out += Script([OP_EQUALVERIFY])
+            else:
+                out += Script([OP_EQUAL])
+
+        out = optimise_script(out)
+
+        if cache_dir is not None:
+            store_script(cache_dir, key, out)
+
+        return out
+
+    def groth16_verifier_with_residue_witness(
+        self,
+        modulo_threshold: int,
+        alpha: list[int],
+        minus_beta: list[int],
+        minus_gamma: list[int],
+        minus_delta: list[int],
+        gamma_abc: list[list[int]],
+        max_multipliers: list[int] | None = None,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        reduction_cost: str = "count",
+        multi_scalar_multiplication: bool = False,
+        comb_width: int = 1,
+        glv: bool = False,
+    ) -> Script:
+        """Groth16 implementation with a residue witness, without final exponentiation.
+
+        The verification equation of groth16_verifier is turned into:
+
+            e(A,B) * e(C, - delta) * e(sum_(i=0)^(l) a_i * gamma_abc[i], - gamma) * e(alpha, - beta) = 1
+
+        which is checked with multi_pairing_with_residue_witness: the unlocking script supplies a residue witness c
+        (and, if required by the curve, a scaling factor w) such that the product of the four Miller loops times w is
+        c^lambda. The easy and the hard exponentiations are not computed. As alpha_beta cannot be turned into a Miller
+        loop output, the pair (alpha, - beta) is added to the multi Miller loop.
+
+        Input:
+            Stack: q [w] [c] c^-1 lambdas_pairing A B C
+            lambda[sum_(i=0)^(l-1) a_i * gamma_abc[i], a_l * gamma_abc[l]] ..
+            lambda[gamma_abc[0], a_1 * gamma_abc[1]] a_1 lambdas[a_1,gamma_abc[1]] ..
+            a_l lambdas[a_l,gamma_abc[l]]
+            Altstack: []
+        Output:
+            Verify ZKP equation
+
+        Here, lambdas_pairing are the gradients needed to execute multi_miller_loop on the pairs (A,B), (C,-delta),
+        (sum_(i=0)^(l) a_i * gamma_abc[i], -gamma), (alpha, -beta), and the other inputs (and the flag
+        multi_scalar_multiplication, comb_width and glv) are as in groth16_verifier.
+        """
+        q = self.pairing_model.MODULUS
+        N_POINTS_CURVE = self.pairing_model.N_POINTS_CURVE
+        N_POINTS_TWIST = self.pairing_model.N_POINTS_TWIST
+        N_ELEMENTS_MILLER_OUTPUT = self.pairing_model.N_ELEMENTS_MILLER_OUTPUT
+
+        out = ScriptBuilder()
+        if check_constant:
+            out += Script([OP_DEPTH, OP_1SUB, OP_PICK]) + nums_to_script([q]) + Script([OP_EQUALVERIFY])
+
+        # After this, the stack is: q .. lambdas_pairing A B C sum_(i=0)^l a_i * gamma_abc[i]
+        out += self._sum_gamma_abc(
+            modulo_threshold=modulo_threshold,
+            gamma_abc=gamma_abc,
+            max_multipliers=max_multipliers,
+            multi_scalar_multiplication=multi_scalar_multiplication,
+            comb_width=comb_width,
+            glv=glv,
+        )
+
+        # After this, the stack is: q .. lambdas_pairing A C sum_(i=0)^l a_i * gamma_abc[i] alpha B -delta -gamma -beta
+        out += nums_to_script(alpha)
+        out += roll(position=3 * N_POINTS_CURVE + N_POINTS_TWIST - 1, n_elements=N_POINTS_TWIST)  # Roll B
+        out += nums_to_script(minus_delta)
+        out += nums_to_script(minus_gamma)
+        out += nums_to_script(minus_beta)
+
+        # After this, the stack is: q .. miller(A,B) * .. * miller(alpha,-beta) * w * c^(m-q)
+        out += self.pairing_model.multi_pairing_with_residue_witness(
+            n_pairs=4,
+            modulo_threshold=modulo_threshold,
+            check_constant=False,
+            clean_constant=clean_constant,
+            reduction_cost=reduction_cost,
+        )
+
+        # After this, the top of the stack is: [miller(A,B) * .. * miller(alpha,-beta) * w * c^(m-q) ?= 1]
+        one = [1] + [0] * (N_ELEMENTS_MILLER_OUTPUT - 1)
+        for ix, el in enumerate(one[::-1]):
+            out += nums_to_script([el])
+            if ix != len(one) - 1:
+                out += Script([OP_EQUALVERIFY])
+            else:
+                out += Script([OP_EQUAL])
+
+        return optimise_script(out)
+
+    def _check_glv(self, glv: bool, multi_scalar_multiplication: bool):
+        """Check that the GLV multiplication can be used with the given flags."""
+        if not glv:
+            return
+        if self.glv_beta is None or self.glv_lambda is None:
+            msg = "The GLV multiplication is not available: the curve has no GLV endomorphism."
+            raise ValueError(msg)
+        if multi_scalar_multiplication:
+            msg = "The GLV multiplication cannot be combined with the multi-scalar multiplication."
+            raise ValueError(msg)
+
+    def _multi_scalar_multiplication_points(
+        self, gamma_abc: list[list[int]], max_multipliers: list[int] | None = None
+    ) -> tuple[list[int], list[list[int]], list[int]]:
+        """Return the indices, points and max multipliers of the multi-scalar multiplication computing sum_gamma_abc.
+
+        gamma_abc[0] is multiplied by a_0 = 1, and the points at infinity are left out. gamma_abc[0] is the last point,
+        so that it is in a group of its own if the other groups are full (see unrolled_multi_scalar_multiplication).
+        The max multipliers are strict upper bounds (see unrolled_fixed_base_multiplication), so they are one more than
+        the max values of the public statements.
+        """
+        indices = [i for i in [*range(1, len(gamma_abc)), 0] if any(gamma_abc[i])]
+        points = [gamma_abc[i] for i in indices]
+        multipliers = [
+            2 if i == 0 else self.r if max_multipliers is None else max_multipliers[i - 1] + 1 for i in indices
+        ]
+        return indices, points, multipliers
+
+    def _sum_gamma_abc(
+        self,
+        modulo_threshold: int,
+        gamma_abc: list[list[int]],
+        max_multipliers: list[int] | None = None,
+        multi_scalar_multiplication: bool = False,
+        comb_width: int = 1,
+        glv: bool = False,
+    ) -> Script:
+        """Compute sum_(i=0)^(l) a_i * gamma_abc[i], with gamma_abc hard-coded in the script.
+
+        Input:
+            Stack: q .. lambda[sum_(i=0)^(l-1) a_i * gamma_abc[i], a_l * gamma_abc[l]] ..
+            lambda[gamma_abc[0], a_1 * gamma_abc[1]] a_1 lambdas[a_1,gamma_abc[1]] .. a_l lambdas[a_l,gamma_abc[l]]
+            Altstack: []
+        Output:
+            sum_(i=0)^(l) a_i * gamma_abc[i]
+
+        See groth16_verifier for the meaning of the inputs. If multi_scalar_multiplication is True, the input is the
+        one of unrolled_fixed_base_multiplication for the points returned by _multi_scalar_multiplication_points. If
+        glv is True, a_i lambdas[a_i,gamma_abc[i]] is the input of unrolled_glv_multiplication (except for
+        gamma_abc[i]) if gamma_abc[i] is not the point at infinity.
+        """
+        q = self.pairing_model.MODULUS
+        N_POINTS_CURVE = self.pairing_model.N_POINTS_CURVE
         n_pub = len(gamma_abc) - 1
 
         # Elliptic curve arithmetic
@@ -76,19 +348,24 @@ class Groth16(PairingModel):
         # Unrolled EC arithmetic
         ec_fq_unrolled = EllipticCurveFqUnrolled(q=q, ec_over_fq=ec_fq)
 
-        if check_constant:
-            out = (
-                Script.parse_string("OP_DEPTH OP_1SUB OP_PICK")
-                + nums_to_script([q])
-                + Script.parse_string("OP_EQUALVERIFY")
+        self._check_glv(glv=glv, multi_scalar_multiplication=multi_scalar_multiplication)
+
+        if multi_scalar_multiplication:
+            _, points, multipliers = self._multi_scalar_multiplication_points(gamma_abc, max_multipliers)
+            return ec_fq_unrolled.unrolled_fixed_base_multiplication(
+                points=points,
+                max_multipliers=multipliers,
+                modulo_threshold=modulo_threshold,
+                check_constant=False,
+                clean_constant=False,
+                comb_width=comb_width,
             )
-        else:
-            out = Script()
+
+        out = ScriptBuilder()
 
         """
         After this:
-            - the stack is: q .. inverse_miller_loop_triple_pairing lambdas_pairing A B C
-            lambda[sum_(i=0)^(l-1) a_i * gamma_abc[i], a_l * gamma_abc[l]] ..
+            - the stack is: q .. lambda[sum_(i=0)^(l-1) a_i * gamma_abc[i], a_l * gamma_abc[l]] ..
             lambda[gamma_abc[0], a_1 * gamma_abc[1]] gamma_abc[0]
             - the altstack: a_l * gamma_abc[l] ... a_1 * gamma_abc[1]
         """
@@ -101,45 +378,113 @@ class Groth16(PairingModel):
                 out += nums_to_script(gamma_abc[i])
             if i > 0:
                 max_multiplier = self.r if max_multipliers is None else max_multipliers[i - 1]
-                out += ec_fq_unrolled.unrolled_multiplication(
-                    max_multiplier=max_multiplier,
-                    modulo_threshold=modulo_threshold,
-                    check_constant=False,
-                    clean_constant=False,
-                )
-                out += Script.parse_string("OP_2SWAP OP_2DROP")  # Drop gamma_abc[i]
-                out += Script.parse_string(" ".join(["OP_TOALTSTACK"] * N_POINTS_CURVE))
-
-        # After this, the stack is: q .. lambdas_pairing inverse_miller_loop_triple_pairing A B C
-        # sum_(i=0)^l a_i * gamma_abc[i]
+                if glv and any(gamma_abc[i]):
+                    out += ec_fq_unrolled.unrolled_glv_multiplication(
+                        max_multiplier=max_multiplier,
+                        modulo_threshold=modulo_threshold,
+                        beta=self.glv_beta,
+                        eigenvalue=self.glv_lambda,
+                        check_constant=False,
+                        clean_constant=False,
+                    )
+                else:
+                    out += ec_fq_unrolled.unrolled_multiplication(
+                        max_multiplier=max_multiplier,
+                        modulo_threshold=modulo_threshold,
+                        check_constant=False,
+                        clean_constant=False,
+                    )
+                out += Script([OP_2SWAP, OP_2DROP])  # Drop gamma_abc[i]
+                out += Script([OP_TOALTSTACK] * N_POINTS_CURVE)
+
+        # After this, the stack is: q .. sum_(i=0)^l a_i * gamma_abc[i]
         for _i in range(n_pub):
-            out += Script.parse_string(" ".join(["OP_FROMALTSTACK"] * N_POINTS_CURVE))
+            out += Script([OP_FROMALTSTACK] * N_POINTS_CURVE)
             out += ec_fq.point_addition_with_unknown_points(
                 take_modulo=True, check_constant=False, clean_constant=False
             )
 
-        # After this, the stack is: q .. lambdas_pairing inverse_miller_loop_triple_pairing A
-        # sum_(i=0)^l a_i * gamma_abc[i] C B gamma delta
-        out += roll(position=2 * N_POINTS_CURVE - 1, n_elements=N_POINTS_CURVE)  # Roll C
-        out += roll(position=2 * N_POINTS_CURVE + N_POINTS_TWIST - 1, n_elements=N_POINTS_TWIST)  # Roll B
-        out += nums_to_script(minus_gamma)
-        out += nums_to_script(minus_delta)
+        return out.to_script()
 
-        # After this, the stack is: q .. e(A,B) * e(sum_(i=0)^(l) a_i * gamma_abc[i], gamma) * e(C, delta)
-        out += self.pairing_model.triple_pairing(
-            modulo_threshold=modulo_threshold, check_constant=False, clean_constant=clean_constant
+    def groth16_verifier_template(
+        self,
+        modulo_threshold: int,
+        n_pub: int,
+        max_multipliers: list[int] | None = None,
+        check_constant: bool | None = None,
+        clean_constant: bool | None = None,
+        reduction_cost: str = "count",
+    ) -> ScriptTemplate:
+        """Verification-key independent template of the Groth16 locking script.
+
+        The locking script returned by `groth16_verifier` depends on the verification key only through the pushes of
+        alpha_beta, minus_gamma, minus_delta and gamma_abc. The template is built once per curve, n_pub,
+        modulo_threshold, max_multipliers and flags by generating the script with placeholder values, and locking
+        scripts for actual verification keys are then obtained with `groth16_verifier_from_template`, which only
+        splices the pushes of the constants into the template.
+
+        The slots are named alpha_beta[i], minus_gamma[i], minus_delta[i] and gamma_abc[i][j].
+        """
+        q = self.pairing_model.MODULUS
+
+        def placeholder(name: str) -> int:
+            return int.from_bytes(sha256(b"groth16_verifier_template " + name.encode()).digest(), "big") % q
+
+        alpha_beta = [placeholder(f"alpha_beta[{i}]") for i in range(self.pairing_model.N_ELEMENTS_MILLER_OUTPUT)]
+        minus_gamma = [placeholder(f"minus_gamma[{i}]") for i in range(self.pairing_model.N_POINTS_TWIST)]
+        minus_delta = [placeholder(f"minus_delta[{i}]") for i in range(self.pairing_model.N_POINTS_TWIST)]
+        gamma_abc = [
+            [placeholder(f"gamma_abc[{i}][{j}]") for j in range(self.pairing_model.N_POINTS_CURVE)]
+            for i in range(n_pub + 1)
+        ]
+
+        script = self.groth16_verifier(
+            modulo_threshold=modulo_threshold,
+            alpha_beta=alpha_beta,
+            minus_gamma=minus_gamma,
+            minus_delta=minus_delta,
+            gamma_abc=gamma_abc,
+            max_multipliers=max_multipliers,
+            check_constant=check_constant,
+            clean_constant=clean_constant,
+            reduction_cost=reduction_cost,
         )
 
-        # After this, the top of the stack is:
-        # [e(A,B) * e(sum_(i=0)^(l) a_i * gamma_abc[i], gamma) * e(C, delta) ?= alpha_beta]
-        for ix, el in enumerate(alpha_beta[::-1]):
-            out += nums_to_script([el])
-            if ix != len(alpha_beta) - 1:
-                out += Script.parse_string("OP_EQUALVERIFY")
-            else:
-                out += Script.parse_string("OP_EQUAL")
+        placeholders = {f"alpha_beta[{i}]": value for i, value in enumerate(alpha_beta)}
+        placeholders |= {f"minus_gamma[{i}]": value for i, value in enumerate(minus_gamma)}
+        placeholders |= {f"minus_delta[{i}]": value for i, value in enumerate(minus_delta)}
+        placeholders |= {
+            f"gamma_abc[{i}][{j}]": value for i, point in enumerate(gamma_abc) for j, value in enumerate(point)
+        }
 
-        return optimise_script(out)
+        return ScriptTemplate(script=script, placeholders=placeholders)
+
+    def groth16_verifier_from_template(
+        self,
+        template: ScriptTemplate,
+        alpha_beta: list[int],
+        minus_gamma: list[int],
+        minus_delta: list[int],
+        gamma_abc: list[list[int]],
+    ) -> Script:
+        """Groth16 locking script for the verification key (alpha_beta, minus_gamma, minus_delta, gamma_abc).
+
+        The template must have been generated by `groth16_verifier_template` with n_pub = len(gamma_abc) - 1. The
+        returned script is the same as the one returned by `groth16_verifier` with the same arguments.
+        """
+        values = {f"alpha_beta[{i}]": value for i, value in enumerate(alpha_beta)}
+        values |= {f"minus_gamma[{i}]": value for i, value in enumerate(minus_gamma)}
+        values |= {f"minus_delta[{i}]": value for i, value in enumerate(minus_delta)}
+        for i, point in enumerate(gamma_abc):
+            for j, value in enumerate(point):
+                # The point at infinity is encoded as 0x00 0x00 (see groth16_verifier)
+                values[f"gamma_abc[{i}][{j}]"] = value if any(point) else b"\x00"
+
+        if set(values) != set(template.slots):
+            msg = "The verification key does not match the template (wrong number of public statements or curve)."
+            raise ValueError(msg)
+
+        return template.instantiate(values)
 
     def groth16_verifier_unlock(
         self,
@@ -155,6 +500,11 @@ class Groth16(PairingModel):
         lambdas_multiplications: list[int],
         max_multipliers: list[int] | None = None,
         load_q=True,
+        precompute_lines: bool = False,
+        gamma_abc: list[list[int]] | None = None,
+        multi_scalar_multiplication: bool = False,
+        comb_width: int = 1,
+        glv: bool = False,
     ) -> Script:
         r"""Generate unlocking script for groth16_verifier.
 
@@ -171,43 +521,190 @@ class Groth16(PairingModel):
         - lambdas_multiplications: list of gradients, the element at position i is the list of gradients to compute
         pub[i] * gamma_abc[i], 0 <= i <= n_pub - 1
         - max_multipliers[i]: upper bound for public statement pub[i]
+        - precompute_lines: if True, the unlocking script is the one for groth16_verifier(..., precompute_lines=True),
+        which hard-codes the lines of -gamma and -delta: lambdas_minus_gamma_exp_miller_loop and
+        lambdas_minus_delta_exp_miller_loop are not loaded (and can be None)
+        - multi_scalar_multiplication: if True, the unlocking script is the one for
+        groth16_verifier(..., multi_scalar_multiplication=True): the gradients of the multi-scalar multiplication are
+        computed from gamma_abc (which is then required), and lamdbas_partial_sums and lambdas_multiplications are not
+        loaded (and can be None)
+        - comb_width: the width of the combs used by groth16_verifier(..., multi_scalar_multiplication=True)
+        - glv: if True, the unlocking script is the one for groth16_verifier(..., glv=True): the gradients of the GLV
+        multiplications are computed from gamma_abc (which is then required), and lambdas_multiplications is not
+        loaded (and can be None)
         """
         q = self.pairing_model.MODULUS
-        r = self.r
-        n_pub = len(pub)
 
         # Lambdas for the pairing
         lambdas = []
         lambdas.append(lambdas_B_exp_miller_loop)
-        lambdas.append(lambdas_minus_gamma_exp_miller_loop)
-        lambdas.append(lambdas_minus_delta_exp_miller_loop)
+        if not precompute_lines:
+            lambdas.append(lambdas_minus_gamma_exp_miller_loop)
+            lambdas.append(lambdas_minus_delta_exp_miller_loop)
 
-        out = nums_to_script([q]) if load_q else Script()
+        out = ScriptBuilder()
+        if load_q:
+            out.append_nums([q])
 
         # Load z inverse
-        out += nums_to_script(inverse_miller_loop)
+        out.append_nums(inverse_miller_loop)
 
         # Load lambdas
         for i in range(len(lambdas[0]) - 1, -1, -1):
             for j in range(len(lambdas[0][i]) - 1, -1, -1):
-                for k in range(3):
-                    out += nums_to_script(lambdas[k][i][j])
+                for lambdas_k in lambdas:
+                    out.append_nums(lambdas_k[i][j])
 
         # Load A, B, C
-        out += nums_to_script(A)
-        out += nums_to_script(B)
-        out += nums_to_script(C)
+        out.append_nums(A)
+        out.append_nums(B)
+        out.append_nums(C)
+
+        out += self._sum_gamma_abc_unlock(
+            pub=pub,
+            lamdbas_partial_sums=lamdbas_partial_sums,
+            lambdas_multiplications=lambdas_multiplications,
+            max_multipliers=max_multipliers,
+            gamma_abc=gamma_abc,
+            multi_scalar_multiplication=multi_scalar_multiplication,
+            comb_width=comb_width,
+            glv=glv,
+        )
+
+        return out.to_script()
+
+    def groth16_verifier_with_residue_witness_unlock(
+        self,
+        pub: list[int],
+        A: list[int],  # noqa: N803
+        B: list[int],  # noqa: N803
+        C: list[int],  # noqa: N803
+        lambdas_B_exp_miller_loop: list[list[list[int]]],  # noqa: N803
+        lambdas_minus_delta_exp_miller_loop: list[list[list[int]]],
+        lambdas_minus_gamma_exp_miller_loop: list[list[list[int]]],
+        lambdas_minus_beta_exp_miller_loop: list[list[list[int]]],
+        residue_witness_inverse: list[int],
+        lamdbas_partial_sums: list[int],
+        lambdas_multiplications: list[int],
+        residue_witness: list[int] | None = None,
+        scaling_factor: list[int] | None = None,
+        max_multipliers: list[int] | None = None,
+        load_q=True,
+        gamma_abc: list[list[int]] | None = None,
+        multi_scalar_multiplication: bool = False,
+        comb_width: int = 1,
+        glv: bool = False,
+    ) -> Script:
+        """Generate unlocking script for groth16_verifier_with_residue_witness.
+
+        - lambdas_minus_beta_exp_miller_loop: gradients needed to compute val * (-beta)
+        - residue_witness_inverse, residue_witness, scaling_factor: the inverse of the residue witness c, c and the
+        scaling factor w for the product of the Miller loops of the pairs (A,B), (C,-delta),
+        (sum_(i=0)^(l) a_i * gamma_abc[i], -gamma), (alpha, -beta) (see multi_pairing_with_residue_witness)
+        The other inputs are as in groth16_verifier_unlock.
+        """
+        q = self.pairing_model.MODULUS
+
+        # Lambdas for the pairing
+        lambdas = [
+            lambdas_B_exp_miller_loop,
+            lambdas_minus_delta_exp_miller_loop,
+            lambdas_minus_gamma_exp_miller_loop,
+            lambdas_minus_beta_exp_miller_loop,
+        ]
+
+        out = ScriptBuilder()
+        if load_q:
+            out.append_nums([q])
+
+        # Load w, c and c^-1
+        out += self.pairing_model.residue_witness_input(
+            residue_witness_inverse=residue_witness_inverse,
+            residue_witness=residue_witness,
+            scaling_factor=scaling_factor,
+        )
+
+        # Load lambdas
+        for i in range(len(lambdas[0]) - 1, -1, -1):
+            for j in range(len(lambdas[0][i]) - 1, -1, -1):
+                for lambdas_k in lambdas:
+                    out.append_nums(lambdas_k[i][j])
+
+        # Load A, B, C
+        out.append_nums(A)
+        out.append_nums(B)
+        out.append_nums(C)
+
+        out += self._sum_gamma_abc_unlock(
+            pub=pub,
+            lamdbas_partial_sums=lamdbas_partial_sums,
+            lambdas_multiplications=lambdas_multiplications,
+            max_multipliers=max_multipliers,
+            gamma_abc=gamma_abc,
+            multi_scalar_multiplication=multi_scalar_multiplication,
+            comb_width=comb_width,
+            glv=glv,
+        )
+
+        return out.to_script()
+
+    def _sum_gamma_abc_unlock(
+        self,
+        pub: list[int],
+        lamdbas_partial_sums: list[int],
+        lambdas_multiplications: list[int],
+        max_multipliers: list[int] | None = None,
+        gamma_abc: list[list[int]] | None = None,
+        multi_scalar_multiplication: bool = False,
+        comb_width: int = 1,
+        glv: bool = False,
+    ) -> Script:
+        """Generate the unlocking script for _sum_gamma_abc (see groth16_verifier_unlock for the inputs)."""
+        r = self.r
+        n_pub = len(pub)
+
+        self._check_glv(glv=glv, multi_scalar_multiplication=multi_scalar_multiplication)
+
+        if multi_scalar_multiplication or glv:
+            if gamma_abc is None:
+                msg = "gamma_abc is required to generate the unlocking script of the multi-scalar/GLV multiplication."
+                raise ValueError(msg)
+            q = self.pairing_model.MODULUS
+            ec_fq_unrolled = EllipticCurveFqUnrolled(q=q, ec_over_fq=EllipticCurveFq(q=q, curve_a=self.curve_a))
+
+        if multi_scalar_multiplication:
+            indices, points, multipliers = self._multi_scalar_multiplication_points(gamma_abc, max_multipliers)
+            scalars = [1, *pub]
+            return ec_fq_unrolled.unrolled_fixed_base_multiplication_input(
+                points=points,
+                scalars=[scalars[i] for i in indices],
+                max_multipliers=multipliers,
+                comb_width=comb_width,
+                load_modulus=False,
+            )
+
+        out = ScriptBuilder()
 
         # Partial sums
         for i in range(n_pub):
-            out += nums_to_script(lamdbas_partial_sums[i])
+            out.append_nums(lamdbas_partial_sums[i])
 
         # Multiplications pub[i] * gamma_abc[i]
         for i in range(n_pub):
             M = int(log2(r)) if max_multipliers is None else int(log2(max_multipliers[i]))
 
-            if pub[i] == 0:
-                out += Script.parse_string("OP_1") + Script.parse_string(" ".join(["OP_0", "OP_0"] * M))
+            if glv and any(gamma_abc[i + 1]):
+                out += ec_fq_unrolled.unrolled_glv_multiplication_input(
+                    point_p=gamma_abc[i + 1],
+                    a=pub[i],
+                    max_multiplier=r if max_multipliers is None else max_multipliers[i],
+                    beta=self.glv_beta,
+                    eigenvalue=self.glv_lambda,
+                    load_modulus=False,
+                    load_point=False,
+                )
+            elif pub[i] == 0 or glv:  # If glv, gamma_abc[i + 1] is the point at infinity, and so is the product
+                out += [OP_1] + [OP_0, OP_0] * M
             else:
                 # Binary expansion of pub[i]
                 exp_pub_i = [int(bin(pub[i])[j]) for j in range(2, len(bin(pub[i])))][::-1]
@@ -215,19 +712,19 @@ class Groth16(PairingModel):
                 N = len(exp_pub_i) - 1
 
                 # Marker marker_a_equal_zero
-                out += Script.parse_string("OP_0")
+                out += [OP_0]
 
                 # Load the lambdas and the markers
                 for j in range(len(lambdas_multiplications[i]) - 1, -1, -1):
                     if exp_pub_i[-j - 2] == 1:
-                        out += nums_to_script(lambdas_multiplications[i][j][1]) + Script.parse_string("OP_1")
-                        out += nums_to_script(lambdas_multiplications[i][j][0]) + Script.parse_string("OP_1")
+                        out.append_nums(lambdas_multiplications[i][j][1])
+                        out += [OP_1]
+                        out.append_nums(lambdas_multiplications[i][j][0])
+                        out += [OP_1]
                     else:
-                        out += (
-                            Script.parse_string("OP_0 OP_0")
-                            + nums_to_script(lambdas_multiplications[i][j][0])
-                            + Script.parse_string("OP_1")
-                        )
-                out += Script.parse_string(" ".join(["OP_0 OP_0"] * (M - N)))
+                        out += [OP_0, OP_0]
+                        out.append_nums(lambdas_multiplications[i][j][0])
+                        out += [OP_1]
+                out += [OP_0, OP_0] * (M - N)
 
-        return out
+        return out.to_script()
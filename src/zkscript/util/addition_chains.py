@@ -0,0 +1,239 @@
+"""Search of short addition chains for the fixed exponents of the final exponentiations.
+
+An addition chain for e is a list of steps `(i, j, sign)`. Step k computes the exponent e_(k+1) = e_i + sign * e_j,
+where e_0 = 1, 0 <= i, j <= k and sign is 1 or -1. The chain computes e if its last exponent is e. Read
+multiplicatively, step k computes f^(e_(k+1)) as f^(e_i) * f^(e_j) (a square if i = j) or f^(e_i) * f^(-e_j), which
+is cheap for f in the cyclotomic subgroup, where f^(-1) is the cyclotomic inverse. Intermediate powers can be used
+any number of times.
+
+The chains are searched offline with search_addition_chain (see benchmarks/addition_chains.py), and the results are
+checked in the parameters of the curves.
+"""
+
+from collections.abc import Sequence
+
+# A step (i, j, sign) of an addition chain
+Step = tuple[int, int, int]
+
+
+def addition_chain_value(chain: Sequence[Step]) -> int:
+    """Return the exponent computed by `chain`."""
+    exponents = [1]
+    for i, j, sign in chain:
+        if sign not in (1, -1) or i >= len(exponents) or j >= len(exponents):
+            msg = f"Invalid step of an addition chain: {(i, j, sign)}"
+            raise ValueError(msg)
+        exponents.append(exponents[i] + sign * exponents[j])
+    return exponents[-1]
+
+
+def addition_chain_operations(chain: Sequence[Step]) -> tuple[int, int, int]:
+    """Return the number of squarings, multiplications and inversions needed to evaluate `chain`."""
+    n_squares = sum(1 for i, j, sign in chain if i == j and sign == 1)
+    n_inverses = sum(1 for _, _, sign in chain if sign == -1)
+    return n_squares, len(chain) - n_squares, n_inverses
+
+
+def addition_chain_cost(chain: Sequence[Step], square_cost: float, mul_cost: float, inverse_cost: float) -> float:
+    """Return the cost of evaluating `chain` if squarings, multiplications and inversions cost as given."""
+    n_squares, n_muls, n_inverses = addition_chain_operations(chain)
+    return n_squares * square_cost + n_muls * mul_cost + n_inverses * inverse_cost
+
+
+def odd_powers_chain(odd_powers: set[int], square_cost: float, mul_cost: float) -> list[Step]:
+    """Return a short addition chain whose exponents include every element of `odd_powers`.
+
+    The exponents of the chain are increasing, and the cheapest between the following chains is returned:
+        - the chain 1, 2, 3, 5, .., max(odd_powers) adding 2 at every step
+        - the chain computing the elements of `odd_powers` in increasing order, each as the sum of two exponents
+        already computed if possible, otherwise as the sum of the largest exponent already computed and the
+        difference, which is computed first in the same way
+    """
+    targets = sorted(power for power in odd_powers if power > 1)
+    if not targets:
+        return []
+
+    ladder = [(0, 0, 1), (0, 1, 1)] + [(k, 1, 1) for k in range(2, (targets[-1] - 1) // 2 + 1)]
+
+    greedy = []
+    exponents = [1]
+
+    def compute(target: int) -> None:
+        if target in exponents:
+            return
+        index = {exponent: k for k, exponent in enumerate(exponents)}
+        for k, exponent in enumerate(exponents):
+            if target - exponent in index:
+                greedy.append((k, index[target - exponent], 1))
+                exponents.append(target)
+                return
+        largest = max(exponent for exponent in exponents if exponent < target)
+        compute(target - largest)
+        greedy.append((exponents.index(largest), exponents.index(target - largest), 1))
+        exponents.append(target)
+
+    for target in targets:
+        compute(target)
+
+    return min(ladder, greedy, key=lambda chain: addition_chain_cost(chain, square_cost, mul_cost, 0))
+
+
+def optimal_recoding(
+    e: int, digit_set: set[int], square_cost: float, mul_cost: float, inverse_cost: float
+) -> list[int]:
+    """Return the cheapest signed-digit representation of e > 0 with digits in `digit_set`.
+
+    The representation digits = [d_0, .., d_(l-1)] is such that e = sum_i d_i 2^i, with every non-zero d_i such that
+    abs(d_i) is in `digit_set`, and d_(l-1) in `digit_set`. f^e is then computed from the powers f^d for d in
+    `digit_set` with l - 1 squarings, one multiplication for every non-zero digit apart from the last one and one
+    inversion for every negative digit. The representation minimising the resulting cost is computed by dynamic
+    programming on the bit position i and the difference c between the value left to represent and e >> i.
+
+    Args:
+        e (int): The exponent, e > 0.
+        digit_set (set[int]): The odd digits allowed, 1 must be in `digit_set`.
+        square_cost (float): The cost of a squaring.
+        mul_cost (float): The cost of a multiplication.
+        inverse_cost (float): The cost of an inversion.
+
+    Returns:
+        The list of digits, little endian.
+
+    """
+    digits = sorted(digit_set)
+    signed_digits = digits + [-digit for digit in digits]
+    bound = max(digits) + 1
+    infinity = float("inf")
+    n_bits = e.bit_length()
+
+    def step_cost(digit: int) -> float:
+        return mul_cost + (inverse_cost if digit < 0 else 0)
+
+    # Cost and choice for the values 1 <= v <= bound, which are the values left to represent at the positions i with
+    # e >> i = 0. Only the digits d > -v are considered, so that the value left after d is smaller than v
+    small = {}
+    for v in range(1, bound + 1):
+        if v in digit_set:
+            small[v] = (0, None)
+        elif v % 2 == 0:
+            small[v] = (small[v // 2][0] + square_cost, 0)
+        else:
+            small[v] = min(
+                ((small[(v - d) // 2][0] + square_cost + step_cost(d), d) for d in signed_digits if -v < d < v),
+                default=(infinity, None),
+            )
+
+    # best[i][c] is the cost and the choice for the value (e >> i) + c
+    best = [{} for _ in range(n_bits)]
+
+    def lookup(i: int, v: int) -> float:
+        if v <= 0:
+            return infinity
+        if e >> i == 0:
+            return small[v][0]
+        return best[i][v - (e >> i)][0]
+
+    for i in range(n_bits - 1, -1, -1):
+        for c in range(-bound, bound + 1):
+            v = (e >> i) + c
+            if v <= 0:
+                best[i][c] = (infinity, None)
+            elif v in digit_set:
+                best[i][c] = (0, None)
+            elif v % 2 == 0:
+                best[i][c] = (lookup(i + 1, v // 2) + square_cost, 0)
+            else:
+                best[i][c] = min(
+                    ((lookup(i + 1, (v - d) // 2) + square_cost + step_cost(d), d) for d in signed_digits),
+                    default=(infinity, None),
+                )
+
+    recoding = []
+    i, v = 0, e
+    while True:
+        choice = small[v][1] if e >> i == 0 else best[i][v - (e >> i)][1]
+        if choice is None:
+            recoding.append(v)
+            return recoding
+        recoding.append(choice)
+        v = (v - choice) // 2
+        i += 1
+
+
+def recoding_chain(table: list[Step], digits: list[int]) -> list[Step]:
+    """Return the addition chain evaluating the signed-digit representation `digits` from the powers in `table`.
+
+    Args:
+        table (list[Step]): An addition chain whose exponents include the absolute values of the non-zero digits.
+        digits (list[int]): The digits, little endian.
+
+    Returns:
+        The chain made of the steps of `table` followed by the squarings and multiplications evaluating `digits`
+        from the most significant one.
+
+    """
+    exponents = [1]
+    for i, j, sign in table:
+        exponents.append(exponents[i] + sign * exponents[j])
+    index = {exponent: k for k, exponent in enumerate(exponents)}
+
+    chain = list(table)
+    current = index[digits[-1]]
+    for digit in digits[-2::-1]:
+        chain.append((current, current, 1))
+        current = len(chain)
+        if digit != 0:
+            chain.append((current, index[abs(digit)], 1 if digit > 0 else -1))
+            current = len(chain)
+    return chain
+
+
+def search_addition_chain(
+    e: int, square_cost: float, mul_cost: float, inverse_cost: float, max_width: int = 8
+) -> list[Step]:
+    """Search a cheap addition chain for e > 0.
+
+    For every width 2 <= w <= max_width, the digits are first allowed to be all the odd numbers smaller than
+    2^(w-1), and e is recoded with optimal_recoding. Then, the digits which are not used are removed, and so are,
+    one at a time, those whose removal does not increase the cost. The cost of a candidate is the cost of
+    odd_powers_chain for its digits plus the cost of the recoding. The cheapest candidate is returned.
+
+    Args:
+        e (int): The exponent, e > 0.
+        square_cost (float): The cost of a squaring.
+        mul_cost (float): The cost of a multiplication.
+        inverse_cost (float): The cost of an inversion.
+        max_width (int): The largest width considered.
+
+    Returns:
+        The addition chain, see the documentation of the module for the format.
+
+    """
+    if e <= 0:
+        msg = f"The exponent must be positive: {e}"
+        raise ValueError(msg)
+
+    def candidate(digit_set: set[int]) -> tuple[list[Step], set[int]]:
+        digits = optimal_recoding(e, digit_set, square_cost, mul_cost, inverse_cost)
+        used = {abs(digit) for digit in digits if digit != 0} | {1}
+        return recoding_chain(odd_powers_chain(used, square_cost, mul_cost), digits), used
+
+    def cost(chain: list[Step]) -> float:
+        return addition_chain_cost(chain, square_cost, mul_cost, inverse_cost)
+
+    best_chain = None
+    for width in range(2, max_width + 1):
+        # The digits which are not used are removed straight away
+        chain, digit_set = candidate(set(range(1, 2 ** (width - 1), 2)))
+        improved = True
+        while improved:
+            improved = False
+            for digit in sorted(digit_set - {1}, reverse=True):
+                reduced_chain, used = candidate(digit_set - {digit})
+                if cost(reduced_chain) <= cost(chain):
+                    digit_set, chain, improved = used, reduced_chain, True
+                    break
+        if best_chain is None or cost(chain) < cost(best_chain):
+            best_chain = chain
+
+    return best_chain
@@ -0,0 +1,124 @@
+"""Machine-readable bounds on the size of the values computed by the arithmetic scripts.
+
+The bit size of a value x is a real number s such that |x| <= 2^s. Every arithmetic method of the field and elliptic
+curve classes is decorated with `bit_growth`, which attaches to the method a function computing, from the bit sizes of
+the inputs, the bit size of the values computed by the method when no modular reduction takes place. The bound covers
+the output as well as every intermediate value of the computation, so it can be compared directly against a threshold
+to decide whether the reduction can be skipped.
+
+The methods whose unreduced outputs are non-negative whenever their inputs are non-negative are also decorated with
+`keeps_positive`. The sign matters for the reductions: OP_MOD returns a remainder with the sign of the dividend, so
+reducing a value of unknown sign costs two OP_MOD, while reducing a non-negative value costs one.
+
+Example:
+    >>> fq2 = Fq2(q=q, non_residue=-1)
+    >>> output_bit_size(fq2.mul, 381, 381)
+    763.0
+    >>> is_positive_output(fq2.mul)
+    False
+
+"""
+
+from collections.abc import Callable
+from math import log2
+from typing import Any
+
+
+def log2_sum(*sizes: float) -> float:
+    """Return the bit size of the sum of values of bit sizes `sizes`, i.e., log2(sum(2^size for size in sizes))."""
+    top = max(sizes)
+    return top + log2(sum(2 ** (size - top) for size in sizes))
+
+
+def bit_growth(bound: Callable[..., float], *, uses_instance: bool = True):
+    """Attach the bit-growth bound `bound` to the decorated method.
+
+    Args:
+        bound (Callable[..., float]): Function called as `bound(self, *input_sizes)`, or as `bound(*input_sizes)` if
+            `uses_instance` is `False`, where `input_sizes` are the bit sizes of the inputs of the method (one size per
+            input, every coordinate of the input being bounded by the same size), in the order in which they are on
+            the stack, from the bottom. It returns the bit size of the values computed by the method if no modular
+            reduction takes place.
+        uses_instance (bool): Whether `bound` depends on the instance the method is bound to (e.g., through the
+            non-residue or the base field).
+
+    Note:
+        The decorator must be applied below `cached_fragment`, which copies the attribute to the memoised method.
+
+    """
+
+    def decorator(method):
+        method.bit_growth = bound if uses_instance else lambda _instance, *input_sizes: bound(*input_sizes)
+        return method
+
+    return decorator
+
+
+def output_bit_size(method, *input_sizes: float, take_modulo: bool = False) -> float:
+    """Return the bit size of the output of `method` on inputs of bit sizes `input_sizes`.
+
+    Args:
+        method: A bound method decorated with `bit_growth`, e.g., `fq2.mul`.
+        *input_sizes (float): The bit sizes of the inputs of the method.
+        take_modulo (bool): If `True`, the output is reduced modulo the modulus of the instance `method` is bound to.
+
+    Returns:
+        The bit size of the output of the method. If `take_modulo` is `False`, the bound also covers the intermediate
+        values of the computation.
+
+    """
+    if take_modulo:
+        return log2(method.__self__.MODULUS)
+    try:
+        bound = method.bit_growth
+    except AttributeError:
+        msg = f"{method.__qualname__} does not declare a bit-growth bound."
+        raise ValueError(msg) from None
+    return bound(method.__self__, *input_sizes)
+
+
+def keeps_positive(predicate: bool | Callable[[Any], bool]):
+    """Attach to the decorated method the predicate telling whether the method keeps values non-negative.
+
+    Args:
+        predicate (bool | Callable[[Any], bool]): Function called as `predicate(self)`, or a constant if the answer
+            does not depend on the instance the method is bound to. It returns `True` if, whenever the coordinates of
+            all the inputs of the method are non-negative, so are the coordinates of its output when no modular
+            reduction takes place.
+
+    The decorated methods take the keyword argument `is_input_positive`. If it is set to `True`, the coordinates of
+    the inputs are assumed to be non-negative, and the coordinates of the result which are then known to be
+    non-negative (all of them if `predicate` holds) are reduced with a single OP_MOD when `take_modulo` is `True`.
+    The other coordinates are reduced with two OP_MOD, as when `is_input_positive` is `False`.
+
+    Note:
+        The decorator must be applied below `cached_fragment`, which copies the attribute to the memoised method.
+
+    """
+
+    def decorator(method):
+        method.keeps_positive = predicate if callable(predicate) else lambda _instance: predicate
+        return method
+
+    return decorator
+
+
+def is_positive_output(method) -> bool:
+    """Return `True` if the output of `method` is non-negative whenever its inputs are.
+
+    Args:
+        method: A bound method, e.g., `fq2.mul`. Methods which are not decorated with `keeps_positive` are assumed not
+            to keep values non-negative.
+
+    """
+    predicate = getattr(method, "keeps_positive", None)
+    return predicate is not None and predicate(method.__self__)
+
+
+def positive_input_kwargs(method, is_input_positive: bool) -> dict[str, bool]:
+    """Return the keyword arguments telling `method` whether the coordinates of its inputs are non-negative.
+
+    Only the methods decorated with `keeps_positive` take the argument `is_input_positive`, an empty dictionary is
+    returned for the other ones.
+    """
+    return {"is_input_positive": is_input_positive} if hasattr(method, "keeps_positive") else {}
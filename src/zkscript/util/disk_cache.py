@@ -0,0 +1,78 @@
+import hashlib
+import json
+import os
+import tempfile
+from functools import cache
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+
+from tx_engine import Script
+
+SCRIPT_FILE_EXTENSION = ".script"
+
+
+@cache
+def library_fingerprint() -> str:
+    """Return a fingerprint of the code generating the scripts.
+
+    The fingerprint is the hash of the zkscript source files together with the version of tx_engine, so that cached
+    scripts are invalidated whenever the code generating them changes, even without a version bump.
+    """
+    h = hashlib.sha256()
+    try:
+        h.update(version("tx_engine").encode())
+    except PackageNotFoundError:
+        h.update(b"tx_engine-unknown")
+    root = Path(__file__).resolve().parent.parent
+    for path in sorted(root.rglob("*.py")):
+        h.update(path.relative_to(root).as_posix().encode())
+        h.update(path.read_bytes())
+    return h.hexdigest()
+
+
+def cache_key(name: str, **inputs) -> str:
+    """Return the content address of the script generated by `name` with the inputs `inputs`.
+
+    Args:
+        name (str): The name of the generating function.
+        **inputs: The inputs the script depends on. They must be JSON serialisable (ints, bools, None, lists).
+
+    Returns:
+        The hex digest identifying the script.
+
+    """
+    payload = json.dumps({"name": name, "library": library_fingerprint(), "inputs": inputs}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def load_script(cache_dir: str | Path, key: str) -> Script | None:
+    """Load the script with address `key` from `cache_dir`, or return None if it is not cached."""
+    path = Path(cache_dir) / (key + SCRIPT_FILE_EXTENSION)
+    try:
+        return Script(path.read_bytes())
+    except FileNotFoundError:
+        return None
+
+
+def store_script(cache_dir: str | Path, key: str, script: Script) -> Path:
+    """Store `script` in `cache_dir` under the address `key`.
+
+    The file is written to a temporary location and then moved, so that concurrent readers never see a partially
+    written script.
+
+    Returns:
+        The path of the stored script.
+
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    path = cache_dir / (key + SCRIPT_FILE_EXTENSION)
+    fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(script.raw_serialize())
+        Path(tmp).replace(path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return path
@@ -0,0 +1,148 @@
+from collections import OrderedDict
+from functools import wraps
+
+from tx_engine import Script
+
+
+class ScriptCache:
+    """LRU cache for script fragments.
+
+    Attributes:
+        maxsize (int): Maximum number of fragments kept in the cache. If 0, the cache is disabled.
+        hits (int): Number of lookups that found the fragment in the cache.
+        misses (int): Number of lookups that had to generate the fragment.
+        uncacheable (int): Number of calls whose arguments could not be hashed, and were therefore not cached.
+
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.uncacheable = 0
+
+    def __len__(self) -> int:
+        """Return the number of fragments in the cache."""
+        return len(self._entries)
+
+    def get(self, key) -> Script | None:
+        """Return the fragment stored under `key`, or None. The entry is marked as most recently used."""
+        fragment = self._entries.get(key)
+        if fragment is not None:
+            self._entries.move_to_end(key)
+        return fragment
+
+    def put(self, key, fragment: Script):
+        """Store `fragment` under `key`, evicting the least recently used entry if the cache is full."""
+        self._entries[key] = fragment
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Empty the cache and reset the statistics."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.uncacheable = 0
+
+    def cache_info(self) -> dict:
+        """Return the statistics of the cache."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "uncacheable": self.uncacheable,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
+
+
+# Cache shared by all the field, line function and Miller output classes
+FRAGMENT_CACHE = ScriptCache()
+
+
+class FragmentCacheable:
+    """Base class of the classes whose methods are decorated with `cached_fragment`.
+
+    The snapshot of the configuration of an instance (see `_instance_state`) is computed once and memoised on the
+    instance. Setting an UPPERCASE attribute of any instance invalidates every memoised snapshot, as the instance may be
+    nested in the configuration of other ones (e.g., the base field FQ2 of an Fq4 instance). Configurations rarely
+    change after construction, so the cache lookups almost never walk the attributes.
+    """
+
+    _state_generation = 0
+
+    def __setattr__(self, name: str, value):
+        """Set the attribute `name`, invalidating the memoised snapshots if it is part of the configuration."""
+        if name.isupper():
+            FragmentCacheable._state_generation += 1
+        super().__setattr__(name, value)
+
+    def configuration_state(self) -> tuple:
+        """Return the snapshot of the configuration of the instance, computed once per configuration change."""
+        memo = vars(self).get("_fragment_state")
+        if memo is None or memo[0] != FragmentCacheable._state_generation:
+            memo = (FragmentCacheable._state_generation, _instance_state(self, set()))
+            vars(self)["_fragment_state"] = memo
+        return memo[1]
+
+
+def _instance_state(instance, seen: set[int]) -> tuple:
+    """Return a hashable snapshot of the configuration of `instance`.
+
+    The configuration of an object is made of its UPPERCASE attributes (e.g., MODULUS, MUL_STRATEGY or the base field
+    FQ2), and the objects among them are snapshotted recursively. Lists (e.g., GAMMAS_FROBENIUS) are taken by identity,
+    so they can be replaced but not modified in place.
+    """
+    seen.add(id(instance))
+    state = []
+    for key, value in vars(instance).items():
+        if not key.isupper():
+            continue
+        if isinstance(value, list):
+            state.append((key, id(value)))
+        elif hasattr(value, "__dict__") and not isinstance(value, type) and id(value) not in seen:
+            state.append((key, _instance_state(value, seen)))
+        else:
+            state.append((key, value))
+    return tuple(state)
+
+
+def cached_fragment(method):
+    """Memoise a method returning a script fragment.
+
+    The fragment is keyed on the class and the state of the instance, the method and the arguments of the call
+    (i.e., take_modulo, check_constant, clean_constant, is_constant_reused and any extra argument). The state is a
+    snapshot of the UPPERCASE attributes of the instance and of the fields it is built on, so that changing an
+    attribute such as MUL_STRATEGY after the first call does not return stale fragments, and instances with the same
+    configuration share their fragments. The cache holds no reference to the instances. The caller always receives a
+    fresh copy of the cached fragment, so modifying it in place (e.g., with `append_pushdata`) does not corrupt the
+    cache.
+    """
+    name = method.__qualname__
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        cache = FRAGMENT_CACHE
+        if cache.maxsize == 0:
+            return method(self, *args, **kwargs)
+
+        state = self.configuration_state() if isinstance(self, FragmentCacheable) else _instance_state(self, set())
+        key = (type(self), state, name, args, tuple(sorted(kwargs.items())))
+        try:
+            fragment = cache.get(key)
+        except TypeError:
+            cache.uncacheable += 1
+            return method(self, *args, **kwargs)
+
+        if fragment is None:
+            cache.misses += 1
+            fragment = method(self, *args, **kwargs)
+            cache.put(key, fragment)
+        else:
+            cache.hits += 1
+
+        return Script() + fragment
+
+    return wrapper
@@ -0,0 +1,201 @@
+"""Opcode-level peephole optimiser for Bitcoin scripts."""
+
+import re
+
+from tx_engine import Script
+from tx_engine.engine.op_codes import (
+    OP_0,
+    OP_1,
+    OP_2,
+    OP_2DROP,
+    OP_2DUP,
+    OP_2SWAP,
+    OP_DROP,
+    OP_DUP,
+    OP_FROMALTSTACK,
+    OP_OVER,
+    OP_PICK,
+    OP_PUSHDATA1,
+    OP_PUSHDATA2,
+    OP_ROLL,
+    OP_ROT,
+    OP_SWAP,
+    OP_TOALTSTACK,
+)
+
+# Each rule is: name -> (pattern, replacement), where pattern and replacement are sequences of opcodes.
+# Every rule must strictly shrink the script, which guarantees that the rewriting terminates.
+DEFAULT_RULES = {
+    "TOALTSTACK FROMALTSTACK": ((OP_TOALTSTACK, OP_FROMALTSTACK), ()),
+    "FROMALTSTACK TOALTSTACK": ((OP_FROMALTSTACK, OP_TOALTSTACK), ()),
+    "SWAP SWAP": ((OP_SWAP, OP_SWAP), ()),
+    "DUP DROP": ((OP_DUP, OP_DROP), ()),
+    "ROT ROT ROT": ((OP_ROT, OP_ROT, OP_ROT), ()),
+    "2SWAP 2SWAP": ((OP_2SWAP, OP_2SWAP), ()),
+    "0 PICK": ((OP_0, OP_PICK), (OP_DUP,)),
+    "1 PICK": ((OP_1, OP_PICK), (OP_OVER,)),
+    "0 ROLL": ((OP_0, OP_ROLL), ()),
+    "1 ROLL": ((OP_1, OP_ROLL), (OP_SWAP,)),
+    "2 ROLL": ((OP_2, OP_ROLL), (OP_ROT,)),
+    "OVER OVER": ((OP_OVER, OP_OVER), (OP_2DUP,)),
+    "DROP DROP": ((OP_DROP, OP_DROP), (OP_2DROP,)),
+}
+
+# Opcodes pushing data: 0x01-0x4b, OP_PUSHDATA1, OP_PUSHDATA2, OP_PUSHDATA4
+_PUSH_OPCODE = re.compile(b"[\\x01-\\x4e]")
+
+
+def _segments(raw: bytes):
+    """Split a serialised script into runs of opcodes and data pushes.
+
+    Yields pairs (is_push, chunk). Runs of opcodes never contain data, so they can be searched byte-wise.
+    """
+    i = 0
+    n = len(raw)
+    while i < n:
+        match = _PUSH_OPCODE.search(raw, i)
+        j = n if match is None else match.start()
+        if j > i:
+            yield False, raw[i:j]
+        if j == n:
+            return
+        op = raw[j]
+        if op < OP_PUSHDATA1:
+            end = j + 1 + op
+        elif op == OP_PUSHDATA1:
+            end = j + 2 + raw[j + 1]
+        elif op == OP_PUSHDATA2:
+            end = j + 3 + int.from_bytes(raw[j + 1 : j + 3], "little")
+        else:
+            end = j + 5 + int.from_bytes(raw[j + 1 : j + 5], "little")
+        if end > n:
+            msg = f"Truncated data push at byte {j}."
+            raise ValueError(msg)
+        yield True, raw[j:end]
+        i = end
+
+
+def tokenise(raw: bytes) -> list[int | bytes]:
+    """Split a serialised script into its commands.
+
+    Opcodes are returned as ints, data pushes are returned as bytes objects containing the push opcode, the length
+    prefix (if any) and the data.
+    """
+    tokens = []
+    for is_push, chunk in _segments(raw):
+        if is_push:
+            tokens.append(chunk)
+        else:
+            tokens.extend(chunk)
+    return tokens
+
+
+def detokenise(tokens: list[int | bytes]) -> bytes:
+    """Serialise a list of commands produced by `tokenise`."""
+    out = bytearray()
+    for token in tokens:
+        if token.__class__ is int:
+            out.append(token)
+        else:
+            out += token
+    return bytes(out)
+
+
+class PeepholeOptimiser:
+    """Peephole optimiser working on the commands of a script.
+
+    Conceptually, the optimiser scans the script from left to right, keeping the already optimised commands on a
+    stack. Every time a command is pushed, the rules whose pattern ends with that command are checked against the top
+    of the stack. If a rule matches, the pattern is popped and the replacement is fed back into the input, so that
+    rewrites cascade (e.g., `OP_SWAP OP_1 OP_ROLL` becomes `OP_SWAP OP_SWAP` and then nothing).
+
+    A single scan reaches a fixed point: commands below the top of the stack are never modified, so every window of
+    the output has been checked against the rules when its last command was pushed.
+
+    For speed, runs of opcodes are searched for rule patterns in bulk, and only the positions where a pattern ends
+    (plus the few commands following a rewrite) are checked one by one. Data pushes are never matched by the rules.
+
+    Attributes:
+        rules (dict): The rules used by the optimiser, in the format name -> (pattern, replacement).
+        hits (dict): For every rule, the number of times the rule has been applied since the last reset.
+
+    """
+
+    def __init__(self, rules: dict | None = None):
+        self.rules = DEFAULT_RULES if rules is None else rules
+        self._rules_by_last = {}
+        for name, (pattern, replacement) in self.rules.items():
+            if len(pattern) == 0 or len(replacement) >= len(pattern):
+                msg = f"Rule {name} must replace a non-empty pattern with a shorter sequence."
+                raise ValueError(msg)
+            self._rules_by_last.setdefault(pattern[-1], []).append((name, len(pattern), bytes(pattern), replacement))
+        self._max_length = max(len(pattern) for pattern, _ in self.rules.values())
+        # Lookahead, so that overlapping occurrences are all found
+        self._pattern_finder = re.compile(
+            b"(?=" + b"|".join(re.escape(bytes(pattern)) for pattern, _ in self.rules.values()) + b")"
+        )
+        self._lengths = sorted({len(pattern) for pattern, _ in self.rules.values()})
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset the rule hit counters."""
+        self.hits = dict.fromkeys(self.rules, 0)
+
+    def _push_opcode(self, out: bytearray, barrier: int, op: int) -> bool:
+        """Push `op` on top of `out` and apply the first matching rule. Return whether a rule was applied."""
+        out.append(op)
+        for name, length, pattern, replacement in self._rules_by_last.get(op, ()):
+            if len(out) - barrier >= length and out[-length:] == pattern:
+                del out[-length:]
+                self.hits[name] += 1
+                for replacement_op in replacement:
+                    self._push_opcode(out, barrier, replacement_op)
+                return True
+        return False
+
+    def _optimise_run(self, out: bytearray, barrier: int, run: bytes):
+        """Push the run of opcodes `run` on top of `out`, applying the rules."""
+        ends = sorted(
+            {
+                match.start() + length - 1
+                for match in self._pattern_finder.finditer(run)
+                for length in self._lengths
+                if match.start() + length <= len(run)
+            }
+        )
+        n = len(run)
+        i = 0
+        k = 0
+        to_check = 0
+        while i < n:
+            if to_check > 0:
+                # After a rewrite, the top of the stack has changed: the next commands are checked one by one
+                to_check -= 1
+                if self._push_opcode(out, barrier, run[i]):
+                    to_check = self._max_length - 1
+                i += 1
+                continue
+            while k < len(ends) and ends[k] < i:
+                k += 1
+            if k == len(ends):
+                out += run[i:]
+                return
+            j = ends[k]
+            out += run[i:j]
+            if self._push_opcode(out, barrier, run[j]):
+                to_check = self._max_length - 1
+            i = j + 1
+
+    def optimise_bytes(self, raw: bytes) -> bytes:
+        """Apply the rules to a serialised script until a fixed point is reached."""
+        out = bytearray()
+        for is_push, chunk in _segments(raw):
+            if is_push:
+                out += chunk
+            else:
+                self._optimise_run(out, len(out), chunk)
+        return bytes(out)
+
+    def optimise(self, script) -> Script:
+        """Return the optimised version of `script` (a `Script` or a `ScriptBuilder`)."""
+        return Script(list(self.optimise_bytes(script.raw_serialize())))
@@ -0,0 +1,106 @@
+"""Planning of the modular reductions of values growing along a loop."""
+
+from collections.abc import Callable, Sequence
+
+from tx_engine import Script
+from tx_engine.engine.op_codes import OP_MOD
+
+from src.zkscript.util.peephole import tokenise
+
+# The cost models for the reductions:
+#   - "count": every reduction costs 1, i.e., the number of reductions is minimised
+#   - "mod": a reduction costs the number of OP_MOD it adds to the script
+#   - "size": a reduction costs the number of bytes it adds to the script
+REDUCTION_COSTS = ("count", "mod", "size")
+
+
+def script_cost(script: Script, cost: str) -> int:
+    """Return the cost of `script` in the cost model `cost` ("mod" or "size")."""
+    if cost == "size":
+        return len(script.raw_serialize())
+    if cost == "mod":
+        return sum(1 for token in tokenise(bytes(script.raw_serialize())) if token == OP_MOD)
+    msg = f"Unknown script cost: {cost}"
+    raise ValueError(msg)
+
+
+def fragment_reduction_cost(fragment: Callable[[bool], Script], cost: str) -> int:
+    """Return the cost of reducing in `fragment` in the cost model `cost`.
+
+    Args:
+        fragment (Callable[[bool], Script]): Function returning the fragment carrying out the reduction, called as
+            `fragment(take_modulo)`.
+        cost (str): The cost model, one of REDUCTION_COSTS.
+
+    Returns:
+        The difference between the cost of the fragment with and without reduction.
+
+    """
+    if cost == "count":
+        return 1
+    return script_cost(fragment(True), cost) - script_cost(fragment(False), cost)
+
+
+def plan_reductions(
+    growth: Sequence[Callable[[float], float]],
+    modulo_threshold: int,
+    initial_size: float,
+    reset_size: float,
+    costs: Sequence[float] | None = None,
+) -> list[bool]:
+    """Choose the steps of a loop at which a value is reduced, minimising the total cost of the reductions.
+
+    The value starts with bit size `initial_size`. At step k, the value is either reduced, in which case its size
+    becomes `reset_size`, or left unreduced, in which case its size becomes `growth[k](size)`. The latter is only
+    allowed if `growth[k](size) <= modulo_threshold`.
+
+    The plan is computed by dynamic programming on the step of the last reduction: the best plan after a reduction at
+    step j is the cheapest among reducing next at any step r such that the value does not overflow in between, or not
+    reducing any more. Among the plans of minimal cost, the one reducing as late as possible is returned. With unit
+    costs, this is the plan obtained by reducing only when the value would otherwise overflow.
+
+    Args:
+        growth (Sequence[Callable[[float], float]]): The bit size of the value after step k as a function of its size
+            before step k, assuming no reduction takes place.
+        modulo_threshold (int): The maximum bit size the value is allowed to have.
+        initial_size (float): The bit size of the value before the first step.
+        reset_size (float): The bit size of the value after a reduction.
+        costs (Sequence[float] | None): The cost of reducing at step k. If None, every reduction costs 1.
+
+    Returns:
+        The list `plan` such that plan[k] is True if the value is reduced at step k.
+
+    """
+    n_steps = len(growth)
+    if costs is None:
+        costs = [1] * n_steps
+
+    def first_overflow(start: int, size: float) -> int:
+        # First step from start at which the value must be reduced, or n_steps if there is none
+        for k in range(start, n_steps):
+            size = growth[k](size)
+            if size > modulo_threshold:
+                return k
+        return n_steps
+
+    # best[j + 1] is the minimal cost of the steps after a reduction at step j (j = -1 is the start of the loop),
+    # next_reduction[j + 1] the step of the following reduction in the optimal plan (None if there is none)
+    best = [0.0] * (n_steps + 1)
+    next_reduction = [None] * (n_steps + 1)
+    for j in range(n_steps - 1, -2, -1):
+        last = first_overflow(j + 1, initial_size if j == -1 else reset_size)
+        best_cost, best_step = (0.0, None) if last == n_steps else (float("inf"), None)
+        for r in range(min(last, n_steps - 1), j, -1):
+            candidate = costs[r] + best[r + 1]
+            if candidate < best_cost:
+                best_cost, best_step = candidate, r
+        best[j + 1] = best_cost
+        next_reduction[j + 1] = best_step
+
+    plan = [False] * n_steps
+    step = next_reduction[0]
+    while step is not None:
+        plan[step] = True
+        step = next_reduction[step + 1]
+
+    return plan
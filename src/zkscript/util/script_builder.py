@@ -0,0 +1,66 @@
+from collections.abc import Iterable
+
+from tx_engine import Script
+
+from src.zkscript.util.utility_scripts import append_pushdata, nums_to_bytes
+
+
+class ScriptBuilder:
+    """Accumulator for building long scripts.
+
+    Concatenating two instances of `Script` copies both of them, so building a script of n fragments with
+    `out += fragment` costs O(n^2). The builder keeps the serialised script in a bytearray, appends in amortised O(1)
+    and converts to `Script` only once, when `to_script` is called.
+
+    The builder supports the same `+=` syntax as `Script`, so it can be used as a drop-in accumulator:
+
+        out = ScriptBuilder()
+        out += Script([OP_DUP])
+        out += [OP_ADD, OP_MOD]
+        return out.to_script()
+    """
+
+    def __init__(self, script: Script | None = None):
+        self._data = bytearray()
+        if script is not None:
+            self._data += script.raw_serialize()
+
+    def __iadd__(self, other):
+        """Append `other` to the builder.
+
+        `other` can be a `Script`, a `ScriptBuilder`, a list of opcodes or the bytes of a serialised script.
+        """
+        if isinstance(other, Script):
+            self._data += other.raw_serialize()
+        elif isinstance(other, ScriptBuilder):
+            self._data += other._data
+        elif isinstance(other, list | tuple | bytes | bytearray):
+            self._data += bytes(other)
+        else:
+            msg = f"Cannot append object of type {type(other)} to a ScriptBuilder."
+            raise TypeError(msg)
+        return self
+
+    def __len__(self) -> int:
+        """Length in bytes of the script built so far."""
+        return len(self._data)
+
+    def append_opcodes(self, *opcodes: int):
+        """Append the opcodes `opcodes` to the builder."""
+        self._data += bytes(opcodes)
+
+    def append_pushdata(self, data: bytes):
+        """Append an instruction pushing `data` to the stack, with the same encoding as `Script.append_pushdata`."""
+        append_pushdata(self._data, data)
+
+    def append_nums(self, nums: Iterable[int]):
+        """Append the minimally encoded pushes of the numbers in `nums`, as in `nums_to_script`."""
+        nums_to_bytes(nums, self._data)
+
+    def raw_serialize(self) -> bytes:
+        """Return the serialised script built so far."""
+        return bytes(self._data)
+
+    def to_script(self) -> Script:
+        """Return the script built so far as a `Script`."""
+        return Script(list(self._data))
@@ -0,0 +1,311 @@
+"""Static statistics of Bitcoin scripts: size, opcode counts and stack depths."""
+
+from collections.abc import Sequence
+
+from tx_engine import Script
+from tx_engine.engine.op_codes import (
+    OP_0,
+    OP_0NOTEQUAL,
+    OP_1,
+    OP_1ADD,
+    OP_1NEGATE,
+    OP_1SUB,
+    OP_2DIV,
+    OP_2DROP,
+    OP_2DUP,
+    OP_2MUL,
+    OP_2OVER,
+    OP_2ROT,
+    OP_2SWAP,
+    OP_3DUP,
+    OP_16,
+    OP_ABS,
+    OP_ADD,
+    OP_AND,
+    OP_BIN2NUM,
+    OP_BOOLAND,
+    OP_BOOLOR,
+    OP_CAT,
+    OP_CHECKSIG,
+    OP_CHECKSIGVERIFY,
+    OP_CODESEPARATOR,
+    OP_DEPTH,
+    OP_DIV,
+    OP_DROP,
+    OP_DUP,
+    OP_ELSE,
+    OP_ENDIF,
+    OP_EQUAL,
+    OP_EQUALVERIFY,
+    OP_FROMALTSTACK,
+    OP_GREATERTHAN,
+    OP_GREATERTHANOREQUAL,
+    OP_HASH160,
+    OP_HASH256,
+    OP_IF,
+    OP_INVERT,
+    OP_LESSTHAN,
+    OP_LESSTHANOREQUAL,
+    OP_LSHIFT,
+    OP_MAX,
+    OP_MIN,
+    OP_MOD,
+    OP_MUL,
+    OP_NEGATE,
+    OP_NIP,
+    OP_NOP,
+    OP_NOT,
+    OP_NOTIF,
+    OP_NUM2BIN,
+    OP_NUMEQUAL,
+    OP_NUMEQUALVERIFY,
+    OP_NUMNOTEQUAL,
+    OP_OR,
+    OP_OVER,
+    OP_PICK,
+    OP_RETURN,
+    OP_RIPEMD160,
+    OP_ROLL,
+    OP_ROT,
+    OP_RSHIFT,
+    OP_SHA1,
+    OP_SHA256,
+    OP_SIZE,
+    OP_SPLIT,
+    OP_SUB,
+    OP_SWAP,
+    OP_TOALTSTACK,
+    OP_TUCK,
+    OP_VERIFY,
+    OP_WITHIN,
+    OP_XOR,
+)
+
+from src.zkscript.util.peephole import tokenise
+
+# Stack effect of the opcodes: opcode -> (number of elements read, number of elements left in their place).
+# The elements read are taken from the top of the stack. Data pushes, OP_PICK, OP_ROLL, the altstack and the
+# conditionals are handled separately.
+STACK_EFFECTS = {
+    OP_NOP: (0, 0),
+    OP_CODESEPARATOR: (0, 0),
+    OP_RETURN: (0, 0),
+    OP_DEPTH: (0, 1),
+    OP_DUP: (1, 2),
+    OP_OVER: (2, 3),
+    OP_2DUP: (2, 4),
+    OP_3DUP: (3, 6),
+    OP_2OVER: (4, 6),
+    OP_DROP: (1, 0),
+    OP_2DROP: (2, 0),
+    OP_NIP: (2, 1),
+    OP_TUCK: (2, 3),
+    OP_SWAP: (2, 2),
+    OP_ROT: (3, 3),
+    OP_2SWAP: (4, 4),
+    OP_2ROT: (6, 6),
+    OP_SIZE: (1, 2),
+    OP_SPLIT: (2, 2),
+    OP_WITHIN: (3, 1),
+    OP_VERIFY: (1, 0),
+    OP_EQUALVERIFY: (2, 0),
+    OP_NUMEQUALVERIFY: (2, 0),
+    OP_CHECKSIGVERIFY: (2, 0),
+    OP_CHECKSIG: (2, 1),
+    **dict.fromkeys(
+        (
+            OP_1ADD,
+            OP_1SUB,
+            OP_2MUL,
+            OP_2DIV,
+            OP_NEGATE,
+            OP_ABS,
+            OP_NOT,
+            OP_0NOTEQUAL,
+            OP_INVERT,
+            OP_BIN2NUM,
+            OP_RIPEMD160,
+            OP_SHA1,
+            OP_SHA256,
+            OP_HASH160,
+            OP_HASH256,
+        ),
+        (1, 1),
+    ),
+    **dict.fromkeys(
+        (
+            OP_ADD,
+            OP_SUB,
+            OP_MUL,
+            OP_DIV,
+            OP_MOD,
+            OP_LSHIFT,
+            OP_RSHIFT,
+            OP_BOOLAND,
+            OP_BOOLOR,
+            OP_NUMEQUAL,
+            OP_NUMNOTEQUAL,
+            OP_LESSTHAN,
+            OP_GREATERTHAN,
+            OP_LESSTHANOREQUAL,
+            OP_GREATERTHANOREQUAL,
+            OP_MIN,
+            OP_MAX,
+            OP_EQUAL,
+            OP_AND,
+            OP_OR,
+            OP_XOR,
+            OP_CAT,
+            OP_NUM2BIN,
+        ),
+        (2, 1),
+    ),
+}
+
+# The metrics returned by `script_statistics`
+METRICS = ("size", "opcodes", "op_mul", "op_mod", "max_stack_depth", "max_altstack_depth")
+
+
+def _push_value(token: int | bytes) -> int | None:
+    """Return the number pushed by `token`, or None if `token` does not push a number."""
+    if token.__class__ is int:
+        if token == OP_0:
+            return 0
+        if token == OP_1NEGATE:
+            return -1
+        if OP_1 <= token <= OP_16:
+            return token - OP_1 + 1
+        return None
+    # Skip the push opcode and the length prefix
+    header = {0x4C: 2, 0x4D: 3, 0x4E: 5}.get(token[0], 1)
+    data = token[header:]
+    if not data:
+        return 0
+    value = int.from_bytes(data[:-1] + bytes([data[-1] & 0x7F]), "little")
+    return -value if data[-1] & 0x80 else value
+
+
+def _is_push(token: int | bytes) -> bool:
+    return token.__class__ is not int or token in (OP_0, OP_1NEGATE) or OP_1 <= token <= OP_16
+
+
+def script_statistics(script: Script) -> dict[str, int]:
+    """Compute the static statistics of `script`.
+
+    The stack depths are computed by abstract interpretation of the script, without executing it. The script is
+    assumed to be a fragment consuming some elements already on the stack: the stack is assumed to initially contain
+    exactly the number of elements the script reads. OP_PICK and OP_ROLL are taken into account only when their
+    argument is pushed by the previous command; the two branches of a conditional are interpreted separately, and
+    the depth after the conditional is the largest of the two.
+
+    Args:
+        script (Script): The script to analyse.
+
+    Returns:
+        A dictionary with keys:
+            - `size`: the size of the script in bytes.
+            - `opcodes`: the number of commands of the script (every data push counts as one command).
+            - `op_mul`: the number of OP_MUL in the script.
+            - `op_mod`: the number of OP_MOD in the script.
+            - `max_stack_depth`: the maximum number of elements on the main stack during the execution.
+            - `max_altstack_depth`: the maximum number of elements on the altstack during the execution.
+
+    Raises:
+        ValueError: If the script contains an opcode whose stack effect is not known.
+
+    """
+    raw = bytes(script.raw_serialize())
+    tokens = tokenise(raw)
+
+    # Heights are relative to the initial height of the stack, the lowest height reached gives the number of
+    # elements the script consumes
+    height, lowest, highest = 0, 0, 0
+    alt_height, alt_highest = 0, 0
+    # For every open conditional: (height at OP_IF, altstack height at OP_IF, heights at the end of the branches)
+    branches = []
+    previous = None
+    for token in tokens:
+        if _is_push(token):
+            height += 1
+        elif token in (OP_PICK, OP_ROLL):
+            height -= 1
+            position = _push_value(previous) if previous is not None and _is_push(previous) else None
+            if position is not None:
+                lowest = min(lowest, height - position - 1)
+            if token == OP_ROLL:
+                height -= 1
+            height += 1
+        elif token == OP_TOALTSTACK:
+            height -= 1
+            alt_height += 1
+        elif token == OP_FROMALTSTACK:
+            height += 1
+            alt_height -= 1
+        elif token in (OP_IF, OP_NOTIF):
+            height -= 1
+            branches.append((height, alt_height, []))
+        elif token == OP_ELSE:
+            start, alt_start, ends = branches[-1]
+            ends.append((height, alt_height))
+            height, alt_height = start, alt_start
+        elif token == OP_ENDIF:
+            start, alt_start, ends = branches.pop()
+            ends.append((height, alt_height))
+            if len(ends) == 1:
+                # No OP_ELSE: the conditional may be skipped
+                ends.append((start, alt_start))
+            height = max(end[0] for end in ends)
+            alt_height = max(end[1] for end in ends)
+        elif token in STACK_EFFECTS:
+            n_read, n_left = STACK_EFFECTS[token]
+            lowest = min(lowest, height - n_read)
+            height += n_left - n_read
+        else:
+            msg = f"Unknown stack effect for opcode {token:#04x}."
+            raise ValueError(msg)
+        lowest = min(lowest, height)
+        highest = max(highest, height)
+        alt_highest = max(alt_highest, alt_height)
+        previous = token
+
+    return {
+        "size": len(raw),
+        "opcodes": len(tokens),
+        "op_mul": sum(1 for token in tokens if token == OP_MUL),
+        "op_mod": sum(1 for token in tokens if token == OP_MOD),
+        "max_stack_depth": highest - lowest,
+        "max_altstack_depth": alt_highest,
+    }
+
+
+def compare_statistics(
+    current: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    tolerance: float = 0.0,
+    metrics: Sequence[str] | None = None,
+    absolute_tolerance: float = 0.0,
+) -> list[str]:
+    """Compare the statistics `current` against `baseline` and return the regressions.
+
+    Args:
+        current (dict[str, dict[str, float]]): The statistics of each component, as component -> metric -> value.
+        baseline (dict[str, dict[str, float]]): The reference statistics, in the same format.
+        tolerance (float): The relative increase of a metric which is not considered a regression, e.g., 0.05 for 5%.
+        metrics (Sequence[str] | None): The metrics to compare. If None, all the metrics are compared.
+        absolute_tolerance (float): The absolute increase of a metric which is not considered a regression, e.g., to
+            ignore the noise in the measurement of short generation times.
+
+    Returns:
+        The list of the regressions, in the format `component: metric baseline -> current`. Components and metrics
+        missing from one of the two dictionaries are ignored.
+
+    """
+    regressions = []
+    for component, values in current.items():
+        reference = baseline.get(component, {})
+        for metric, value in values.items():
+            if metric not in reference or (metrics is not None and metric not in metrics):
+                continue
+            if value > reference[metric] * (1 + tolerance) + absolute_tolerance:
+                regressions.append(f"{component}: {metric} {reference[metric]} -> {value}")
+    return regressions
@@ -0,0 +1,91 @@
+from tx_engine import Script
+
+from src.zkscript.util.peephole import tokenise
+from src.zkscript.util.script_builder import ScriptBuilder
+from src.zkscript.util.utility_scripts import nums_to_script
+
+
+class ScriptTemplate:
+    """Script with slots for constants, which can be filled in without regenerating the script.
+
+    The template is obtained from a script generated with placeholder values: every placeholder must be pushed
+    exactly once in the script. The template stores the bytes between the pushes of the placeholders (the segments)
+    and the byte offsets of the slots, so that a script for new constants is obtained by concatenating the segments
+    with the pushes of the new constants.
+
+    Attributes:
+        segments (list[bytes]): The bytes between the slots. There are len(slots) + 1 segments.
+        slots (list[str]): The names of the slots, in the order in which they appear in the script.
+        offsets (dict[str, int]): The byte offset of each slot in the script generated with the placeholders.
+
+    """
+
+    def __init__(self, script: Script, placeholders: dict[str, int]):
+        """Build the template from `script`, generated with the values `placeholders`.
+
+        Args:
+            script (Script): The script generated with the placeholder values.
+            placeholders (dict[str, int]): The placeholder value of each slot. The placeholders must be distinct, and
+                their pushes must not appear anywhere else in the script.
+
+        """
+        pushes = {}
+        for name, value in placeholders.items():
+            push = bytes(nums_to_script([value]).raw_serialize())
+            if push in pushes:
+                msg = f"Placeholders {pushes[push]} and {name} have the same value."
+                raise ValueError(msg)
+            pushes[push] = name
+
+        self.segments = []
+        self.slots = []
+        self.offsets = {}
+
+        segment = bytearray()
+        offset = 0
+        for token in tokenise(bytes(script.raw_serialize())):
+            if token.__class__ is int:
+                segment.append(token)
+                offset += 1
+                continue
+            name = pushes.get(token)
+            if name is None:
+                segment += token
+            else:
+                if name in self.offsets:
+                    msg = f"Placeholder {name} is pushed more than once."
+                    raise ValueError(msg)
+                self.segments.append(bytes(segment))
+                self.slots.append(name)
+                self.offsets[name] = offset
+                segment = bytearray()
+            offset += len(token)
+        self.segments.append(bytes(segment))
+
+        missing = set(placeholders) - set(self.offsets)
+        if missing:
+            msg = f"Placeholders {sorted(missing)} do not appear in the script."
+            raise ValueError(msg)
+
+    def instantiate(self, values: dict[str, int | bytes]) -> Script:
+        r"""Return the script with the slots filled by `values`.
+
+        Args:
+            values (dict[str, int | bytes]): The value of each slot. Integers are pushed as numbers (as in
+                `nums_to_script`), bytes are pushed as raw data (e.g., b"\x00" for the coordinates of the point at
+                infinity).
+
+        Returns:
+            The instantiated script.
+
+        """
+        out = ScriptBuilder()
+        for segment, name in zip(self.segments, self.slots, strict=False):
+            out += segment
+            value = values[name]
+            if isinstance(value, bytes):
+                out.append_pushdata(value)
+            else:
+                out += nums_to_script([value])
+        out += self.segments[-1]
+        return out.to_script()
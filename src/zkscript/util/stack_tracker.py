@@ -0,0 +1,161 @@
+"""Symbolic model of the stack and the altstack, used to compute the positions of pick and roll automatically."""
+
+from collections.abc import Sequence
+
+from tx_engine import Script
+from tx_engine.engine.op_codes import OP_DROP, OP_FROMALTSTACK, OP_TOALTSTACK
+
+from src.zkscript.util.utility_scripts import pick, roll
+
+
+class StackTracker:
+    """Symbolic model of the stack and the altstack, made of named slots.
+
+    A slot is a group of consecutive stack elements representing a single value, e.g., a point or an element of a
+    field extension. The tracker only models the slots the script accesses: the elements below the lowest slot are
+    never touched. Instead of hand-computing the positions of the values on the stack, a generator asks the tracker
+    to bring a value to the top of the stack (by copying or moving it) and to record the effect of the operations it
+    appends to the script:
+
+        stack = StackTracker([("P", 2), ("Q", 4)])
+        out += stack.pick("Q")                      # stack: P Q Q
+        out += stack.roll("P")                      # stack: Q Q P
+        out += line_eval(...)
+        stack.apply(["Q", "P"], [("ev", 12)])       # stack: Q ev
+
+    Names need not be unique: a lookup always returns the slot with the given name closest to the top of the stack,
+    i.e., the cheapest one to access.
+
+    Attributes:
+        stack (list[tuple[str, int]]): The slots on the stack, from the bottom, as pairs (name, number of elements).
+        altstack (list[tuple[str, int]]): The slots on the altstack, from the bottom.
+
+    """
+
+    def __init__(self, slots: Sequence[tuple[str, int]] = ()):
+        """Initialise the tracker with the slots `slots` on the stack, listed from the bottom."""
+        self.stack = list(slots)
+        self.altstack = []
+
+    def __len__(self) -> int:
+        """Return the number of elements on the stack, in the slots modelled by the tracker."""
+        return sum(n_elements for _, n_elements in self.stack)
+
+    def names(self) -> list[str]:
+        """Return the names of the slots on the stack, from the bottom."""
+        return [name for name, _ in self.stack]
+
+    def _locate(self, names: Sequence[str]) -> tuple[int, int, int]:
+        """Locate the adjacent slots `names` (listed from the bottom) closest to the top of the stack.
+
+        Returns:
+            The index of the first slot in `self.stack`, the position of its deepest element (counting from 0 at the
+            top of the stack) and the total number of elements in the slots.
+
+        """
+        if not names:
+            msg = "At least one slot must be given."
+            raise ValueError(msg)
+        stack = self.stack
+        names = list(names)
+        n_slots = len(names)
+        above = 0
+        for index in range(len(stack) - n_slots, -1, -1):
+            # Cheap check on the first slot before comparing the whole window
+            if stack[index][0] == names[0]:
+                window = stack[index : index + n_slots]
+                if [name for name, _ in window] == names:
+                    n_elements = sum(size for _, size in window)
+                    return index, above + n_elements - 1, n_elements
+            above += stack[index + n_slots - 1][1]
+        msg = f"Slots {list(names)} are not adjacent on the stack {self.names()}."
+        raise ValueError(msg)
+
+    def position(self, name: str) -> int:
+        """Return the position of the deepest element of the slot `name`, counting from 0 at the top of the stack."""
+        return self._locate([name])[1]
+
+    def push(self, name: str, n_elements: int):
+        """Record that a slot `name` of `n_elements` elements has been pushed on the stack."""
+        self.stack.append((name, n_elements))
+
+    def pick(self, *names: str) -> Script:
+        """Copy the adjacent slots `names` (listed from the bottom) to the top of the stack.
+
+        Returns:
+            The script copying the slots, with the cheapest opcodes available (see `pick`).
+
+        """
+        index, position, n_elements = self._locate(names)
+        self.stack += self.stack[index : index + len(names)]
+        return pick(position=position, n_elements=n_elements)
+
+    def roll(self, *names: str) -> Script:
+        """Move the adjacent slots `names` (listed from the bottom) to the top of the stack.
+
+        Returns:
+            The script moving the slots, with the cheapest opcodes available (see `roll`). If the slots are already at
+            the top of the stack, the script is empty.
+
+        """
+        index, position, n_elements = self._locate(names)
+        if index + len(names) == len(self.stack):
+            return Script()
+        slots = self.stack[index : index + len(names)]
+        del self.stack[index : index + len(names)]
+        self.stack += slots
+        return roll(position=position, n_elements=n_elements)
+
+    def apply(self, inputs: Sequence[str], outputs: Sequence[tuple[str, int]]):
+        """Record an operation consuming the slots `inputs` at the top of the stack and pushing the slots `outputs`.
+
+        Args:
+            inputs (Sequence[str]): The names of the slots consumed by the operation, listed from the bottom. They must
+                be the slots at the top of the stack.
+            outputs (Sequence[tuple[str, int]]): The slots produced by the operation, listed from the bottom, as pairs
+                (name, number of elements).
+
+        """
+        n_inputs = len(inputs)
+        top = [name for name, _ in self.stack[len(self.stack) - n_inputs :]] if n_inputs else []
+        if top != list(inputs):
+            msg = f"The operation consumes {list(inputs)}, but the top of the stack is {top}."
+            raise ValueError(msg)
+        del self.stack[len(self.stack) - n_inputs :]
+        self.stack += outputs
+
+    def rename(self, name: str, new_name: str):
+        """Rename the slot `name` closest to the top of the stack to `new_name`."""
+        index, _, _ = self._locate([name])
+        self.stack[index] = (new_name, self.stack[index][1])
+
+    def drop(self, *names: str) -> Script:
+        """Remove the slots `names` (listed from the bottom) from the stack, moving them to the top first if needed."""
+        out = self.roll(*names)
+        n_elements = self._locate(names)[2]
+        self.apply(names, [])
+        return out + Script([OP_DROP] * n_elements)
+
+    def to_altstack(self, name: str) -> Script:
+        """Move the slot `name`, which must be at the top of the stack, to the altstack."""
+        n_elements = self.stack[-1][1] if self.stack else 0
+        self.apply([name], [])
+        self.altstack.append((name, n_elements))
+        return Script([OP_TOALTSTACK] * n_elements)
+
+    def from_altstack(self, name: str | None = None) -> Script:
+        """Move the slot at the top of the altstack to the stack.
+
+        Args:
+            name (str | None): If given, the name the slot at the top of the altstack must have.
+
+        """
+        if not self.altstack:
+            msg = "The altstack is empty."
+            raise ValueError(msg)
+        if name is not None and self.altstack[-1][0] != name:
+            msg = f"The top of the altstack is {self.altstack[-1][0]}, not {name}."
+            raise ValueError(msg)
+        slot = self.altstack.pop()
+        self.stack.append(slot)
+        return Script([OP_FROMALTSTACK] * slot[1])
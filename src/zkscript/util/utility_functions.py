@@ -1,12 +1,22 @@
 from tx_engine import Script
 
+from src.zkscript.util.peephole import PeepholeOptimiser
+from src.zkscript.util.script_builder import ScriptBuilder
 
-def optimise_script(script: Script) -> Script:
-    """Optimise a script by removing redundant operations."""
-    patterns = ["OP_TOALTSTACK OP_FROMALTSTACK", "OP_FROMALTSTACK OP_TOALTSTACK"]
 
-    optimise_script = script.to_string()
-    for pattern in patterns:
-        optimised_script = optimise_script.replace(pattern, "")
+def optimise_script(script: Script | ScriptBuilder, optimiser: PeepholeOptimiser | None = None) -> Script:
+    """Optimise a script by removing redundant operations.
 
-    return Script.parse_string(optimised_script)
+    Args:
+        script (Script | ScriptBuilder): The script to optimise.
+        optimiser (PeepholeOptimiser | None): The optimiser to use. If None, a PeepholeOptimiser with the default
+            rules is used. Pass an optimiser explicitly to customise the rules or to read the rule hit counts.
+
+    Returns:
+        The optimised script.
+
+    """
+    if optimiser is None:
+        optimiser = PeepholeOptimiser()
+
+    return optimiser.optimise(script)
@@ -1,8 +1,11 @@
-from tx_engine import Script, encode_num
+from collections.abc import Iterable, Sequence
+
+from tx_engine import Script
 from tx_engine.engine.op_codes import (
     OP_0,
     OP_1,
     OP_1NEGATE,
+    OP_1SUB,
     OP_2,
     OP_2DUP,
     OP_2OVER,
@@ -22,12 +25,20 @@ from tx_engine.engine.op_codes import (
     OP_14,
     OP_15,
     OP_16,
+    OP_ADD,
+    OP_DEPTH,
     OP_DUP,
+    OP_FROMALTSTACK,
+    OP_MOD,
     OP_OVER,
     OP_PICK,
+    OP_PUSHDATA1,
+    OP_PUSHDATA2,
+    OP_PUSHDATA4,
     OP_ROLL,
     OP_ROT,
     OP_SWAP,
+    OP_TUCK,
 )
 
 patterns_to_pick = {
@@ -86,10 +97,7 @@ def pick(position: int, n_elements: int) -> Script:
     elif position in op_range:
         out += Script([op_range_to_opccode[position], OP_PICK] * n_elements)
     else:
-        num_encoded = encode_num(position)
-        for _ in range(n_elements):
-            out.append_pushdata(num_encoded)
-            out += Script([OP_PICK])
+        out += Script(list((nums_to_bytes([position]) + bytes([OP_PICK])) * n_elements))
 
     return out
 
@@ -112,21 +120,141 @@ def roll(position: int, n_elements: int) -> Script:
     elif position in op_range:
         out += Script([op_range_to_opccode[position], OP_ROLL] * n_elements)
     else:
-        num_encoded = encode_num(position)
-        for _ in range(n_elements):
-            out.append_pushdata(num_encoded)
-            out += Script([OP_ROLL])
+        out += Script(list((nums_to_bytes([position]) + bytes([OP_ROLL])) * n_elements))
 
     return out
 
 
-def nums_to_script(nums: list[int]) -> Script:
-    """Take a list of number and return the script pushing those numbers to the stack."""
-    out = Script()
+def mod(is_mod_on_top: bool = True, is_constant_reused: bool = True, is_positive: bool = False) -> Script:
+    """Reduce the element x on top of the stack modulo q.
+
+    OP_MOD returns a remainder with the sign of the dividend, so the remainder of a possibly negative x is normalised
+    as ((x % q) + q) % q. If x is known to be non-negative, a single OP_MOD is enough.
+
+    Input parameters:
+        - Stack: .. x q if is_mod_on_top, .. q x otherwise
+        - Altstack: []
+    Output:
+        - .. q (x % q) if is_constant_reused, .. (x % q) otherwise
+
+    Example:
+        is_mod_on_top = True, is_constant_reused = True, is_positive = False -->
+            OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD
+        is_mod_on_top = True, is_constant_reused = True, is_positive = True --> OP_TUCK OP_MOD
+        is_mod_on_top = False, is_constant_reused = False, is_positive = True --> OP_SWAP OP_MOD
+
+    """
+    if is_positive:
+        if is_constant_reused:
+            return Script([OP_TUCK, OP_MOD] if is_mod_on_top else [OP_OVER, OP_MOD])
+        return Script([OP_MOD] if is_mod_on_top else [OP_SWAP, OP_MOD])
+
+    out = Script([OP_TUCK, OP_MOD] if is_mod_on_top else [OP_OVER, OP_MOD])
+    out += Script([OP_OVER, OP_ADD, OP_OVER, OP_MOD] if is_constant_reused else [OP_OVER, OP_ADD, OP_SWAP, OP_MOD])
+    return out
+
+
+def reduce_n(
+    n: int,
+    clean_constant: bool | None = None,
+    is_constant_reused: bool | None = None,
+    is_positive: bool | Sequence[bool] = False,
+    is_constant_fetched: bool = False,
+) -> Script:
+    """Reduce n elements modulo q, fetching q only once.
+
+    The elements are reduced one at a time with `mod`, and q is kept just below the last reduced element, so that
+    moving to the next element only costs OP_FROMALTSTACK OP_ROT.
+
+    Input parameters:
+        - Stack: q .. x_0, or .. q y if is_constant_fetched
+        - Altstack: [x_(n-1), .., x_1], or [x_(n-1), .., x_0] if is_constant_fetched
+    Output:
+        - .. (x_0 % q) .. (x_(n-2) % q) q (x_(n-1) % q) if is_constant_reused, .. (x_0 % q) .. (x_(n-1) % q)
+        otherwise. If is_constant_fetched, y is left below (x_0 % q).
+    Variables:
+        - clean_constant: whether q is rolled (True) or picked (False) from the bottom of the stack. It is ignored
+        if is_constant_fetched.
+        - is_positive: whether the elements are known to be non-negative, either one value for all of them or one
+        value per element (x_0 first), see `mod`.
+        - is_constant_fetched: whether q is already on the stack, as left by a reduction with is_constant_reused set
+        to True.
+
+    Example:
+        n = 2, clean_constant = False, is_constant_reused = False, is_positive = [False, True] -->
+            OP_DEPTH OP_1SUB OP_PICK OP_TUCK OP_MOD OP_OVER OP_ADD OP_OVER OP_MOD OP_FROMALTSTACK OP_ROT OP_MOD
+
+    """
+    if isinstance(is_positive, bool):
+        is_positive = [is_positive] * n
+    if n < 1 or len(is_positive) != n:
+        msg = f"Invalid number of elements to reduce: {n}, with signs {is_positive}"
+        raise ValueError(msg)
+
+    out = Script() if is_constant_fetched else Script([OP_DEPTH, OP_1SUB, OP_ROLL if clean_constant else OP_PICK])
+    for i, is_element_positive in enumerate(is_positive):
+        if i > 0 or is_constant_fetched:
+            out += Script([OP_FROMALTSTACK, OP_ROT])
+        out += mod(is_constant_reused=is_constant_reused or i < n - 1, is_positive=is_element_positive)
+    return out
+
+
+def append_pushdata(out: bytearray, data: bytes):
+    """Append to `out` the serialised instruction pushing `data` to the stack.
+
+    The encoding is the same as the one of `Script.append_pushdata`.
+    """
+    length = len(data)
+    if length == 0:
+        out.append(OP_0)
+        return
+    if length < OP_PUSHDATA1:
+        out.append(length)
+    elif length <= 0xFF:  # noqa: PLR2004
+        out.append(OP_PUSHDATA1)
+        out.append(length)
+    elif length <= 0xFFFF:  # noqa: PLR2004
+        out.append(OP_PUSHDATA2)
+        out += length.to_bytes(2, "little")
+    else:
+        out.append(OP_PUSHDATA4)
+        out += length.to_bytes(4, "little")
+    out += data
+
+
+def nums_to_bytes(nums: Iterable[int], out: bytearray | None = None) -> bytearray:
+    """Write the serialised script pushing the numbers in `nums` to the stack into `out`.
+
+    The numbers are minimally encoded: the numbers in op_range are pushed with the corresponding opcodes, the others
+    with pushdata instructions (the encoding is the same as the one of `tx_engine.encode_num`). All the pushes are
+    written into a single bytearray, without creating intermediate scripts.
+
+    Args:
+        nums (Iterable[int]): The numbers to push.
+        out (bytearray | None): The bytearray to which the pushes are appended. If None, a new bytearray is created.
+
+    Returns:
+        The bytearray `out`.
+
+    """
+    if out is None:
+        out = bytearray()
     for n in nums:
         if n in op_range:
-            out += Script([op_range_to_opccode[n]])
-        else:
-            out.append_pushdata(encode_num(n))
+            out.append(op_range_to_opccode[n])
+            continue
+        abs_n = -n if n < 0 else n
+        data = bytearray(abs_n.to_bytes((abs_n.bit_length() + 7) // 8, "little"))
+        # The most significant bit of the last byte is the sign bit
+        if data[-1] & 0x80:
+            data.append(0x80 if n < 0 else 0x00)
+        elif n < 0:
+            data[-1] |= 0x80
+        append_pushdata(out, data)
 
     return out
+
+
+def nums_to_script(nums: list[int]) -> Script:
+    """Take a list of number and return the script pushing those numbers to the stack."""
+    return Script(list(nums_to_bytes(nums)))
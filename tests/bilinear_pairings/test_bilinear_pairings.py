@@ -29,6 +29,8 @@ from src.zkscript.bilinear_pairings.bls12_381.line_functions import line_functio
 from src.zkscript.bilinear_pairings.bls12_381.miller_output_operations import (
     miller_output_ops as miller_output_ops_bls12_381,
 )
+from src.zkscript.bilinear_pairings.bls12_381.parameters import exp_miller_loop as exp_miller_loop_bls12_381
+from src.zkscript.bilinear_pairings.bls12_381.parameters import u as u_bls12_381
 from src.zkscript.bilinear_pairings.mnt4_753.final_exponentiation import (
     final_exponentiation as final_exponentiation_mnt4_753,
 )
@@ -37,8 +39,27 @@ from src.zkscript.bilinear_pairings.mnt4_753.miller_output_operations import (
     miller_output_ops as miller_output_ops_mnt4_753,
 )
 from src.zkscript.bilinear_pairings.mnt4_753.mnt4_753 import mnt4_753
+from src.zkscript.bilinear_pairings.mnt4_753.parameters import exp_miller_loop as exp_miller_loop_mnt4_753
+from src.zkscript.bilinear_pairings.mnt4_753.parameters import (
+    exp_miller_loop_chain as exp_miller_loop_chain_mnt4_753,
+)
+from src.zkscript.bilinear_pairings.model.cyclotomic_exponentiation import sliding_window_digits
+from src.zkscript.util.addition_chains import addition_chain_operations, addition_chain_value, search_addition_chain
 from src.zkscript.util.utility_scripts import nums_to_script
-from tests.bilinear_pairings.util import check_constant, generate_unlock, generate_verify, save_scripts
+from tests.bilinear_pairings.util import (
+    check_constant,
+    generate_unlock,
+    generate_verify,
+    residue_witness,
+    save_scripts,
+)
+
+# The (modulo_threshold, reduction_cost) pairs with which the reductions of the Miller loops are planned
+REDUCTION_SETTINGS = [(1, "count"), (200 * 8, "count"), (200 * 8, "mod")]
+
+# The final exponentiation of BLS12-381 does not use an addition chain (the recoding of exp_miller_loop is cheaper), so
+# the chain tested for BLS12-381 is the binary one
+exp_miller_loop_chain_bls12_381 = search_addition_chain(abs(u_bls12_381), 1, 1, 1, max_width=2)
 
 
 @dataclass
@@ -65,9 +86,13 @@ class Bls12381:
     ix_line_eval_times_eval_times_eval = list(range(12))
     ix_line_eval_times_eval_times_eval_times_eval = list(range(12))
     ix_miller_output = list(range(12))
+    # Field of the output of the Miller loop, and indices of the scaling factor (in Fq6) in its elements
+    miller_output_field = Fq12Cubic
+    ix_scaling_factor = [0, 1, 8, 9, 6, 7]
     # Parameters of the curve
     exp_miller_loop = bls12_381_curve.exp_miller_loop
     val_miller_loop = bls12_381_curve.val_miller_loop
+    exp_miller_loop_chain = exp_miller_loop_chain_bls12_381
     # Define filename for saving scripts
     filename = "bls12_381"
 
@@ -2133,9 +2158,13 @@ class Mnt4753:
     ix_line_eval_times_eval_times_eval = list(range(4))
     ix_line_eval_times_eval_times_eval_times_eval = list(range(4))
     ix_miller_output = list(range(4))
+    # Field of the output of the Miller loop, and indices of the scaling factor in its elements (not needed)
+    miller_output_field = Fq4
+    ix_scaling_factor = []
     # Parameters of the curve
     exp_miller_loop = mnt4_753_curve.exp_miller_loop
     val_miller_loop = mnt4_753_curve.val_miller_loop
+    exp_miller_loop_chain = exp_miller_loop_chain_mnt4_753
     # Define filename for saving scripts
     filename = "mnt4_753"
 
@@ -3047,6 +3076,36 @@ def test_line_evaluation(
         save_scripts(str(lock), str(unlock), save_to_json_folder, config.filename, "line_evaluation")
 
 
+@pytest.mark.parametrize("clean_constant", [True, False])
+@pytest.mark.parametrize("is_constant_reused", [True, False])
+@pytest.mark.parametrize(
+    ("config", "point_p", "point_q", "lam", "expected"), generate_test_cases("test_line_evaluation")
+)
+def test_line_evaluation_fixed_q(
+    config, point_p, point_q, lam, expected, clean_constant, is_constant_reused, save_to_json_folder
+):
+    unlock = nums_to_script([config.q])
+    unlock += generate_unlock(point_p)
+
+    # Check correct evaluation
+    lock = config.test_script_line_functions.line_evaluation_fixed_q(
+        gradient=lam.to_list(),
+        point_q=point_q.to_list(),
+        take_modulo=True,
+        check_constant=True,
+        clean_constant=clean_constant,
+        is_constant_reused=is_constant_reused,
+    )
+    if is_constant_reused:
+        lock += check_constant(config.q)
+    lock += generate_verify(expected, config.ix_line_evaluation)
+
+    verify_script(lock, unlock, clean_constant)
+
+    if save_to_json_folder and clean_constant and not is_constant_reused:
+        save_scripts(str(lock), str(unlock), save_to_json_folder, config.filename, "line_evaluation_fixed_q")
+
+
 @pytest.mark.parametrize("clean_constant", [True, False])
 @pytest.mark.parametrize("is_constant_reused", [True, False])
 @pytest.mark.parametrize(("config", "x", "y", "expected"), generate_test_cases("test_line_eval_times_eval"))
@@ -3260,11 +3319,91 @@ def test_hard_exponentiation(config, f, expected, clean_constant, save_to_json_f
         save_scripts(str(lock), str(unlock), save_to_json_folder, config.filename, "test_hard_exponentiation")
 
 
+@pytest.mark.parametrize("mode", [None, "pick_on_demand", "sliding_window", "chain"])
+@pytest.mark.parametrize(
+    ("config", "f"),
+    [
+        (config, test_data["f"])
+        for config in [Bls12381, Mnt4753]
+        for test_data in config.test_data["test_hard_exponentiation"]
+    ],
+)
+def test_cyclotomic_exponentiation(config, f, mode, save_to_json_folder):
+    e = sum(digit * 2**i for i, digit in enumerate(config.exp_miller_loop))
+    # f is in the cyclotomic subgroup, where the inverse is the conjugate
+    expected = f.power(e) if e > 0 else f.power(-e).conjugate()
+
+    unlock = nums_to_script([config.q])
+    unlock += generate_unlock(f, config.ix_miller_output)
+
+    if mode is None:
+        arguments = {}
+    elif mode == "chain":
+        arguments = {"chain": config.exp_miller_loop_chain}
+    else:
+        arguments = {mode: True}
+    lock = config.test_script_final_exponentiation.cyclotomic_exponentiation(
+        exp_e=config.exp_miller_loop,
+        take_modulo=True,
+        modulo_threshold=1,
+        check_constant=True,
+        clean_constant=True,
+        **arguments,
+    )
+    lock += generate_verify(expected, config.ix_miller_output)
+
+    verify_script(lock, unlock, True)
+
+    if save_to_json_folder:
+        save_scripts(
+            str(lock), str(unlock), save_to_json_folder, config.filename, f"test_cyclotomic_exponentiation_{mode}"
+        )
+
+
+@pytest.mark.parametrize(
+    "exp_e", [exp_miller_loop_bls12_381, exp_miller_loop_mnt4_753, [1, 0, -1, 1], [-1, 1, 1, 1, 0, 1]]
+)
+def test_sliding_window_digits(exp_e):
+    e = sum(digit * 2**i for i, digit in enumerate(exp_e))
+    width, digits = sliding_window_digits(exp_e)
+    assert sum(digit * 2**i for i, digit in enumerate(digits)) == abs(e)
+    assert digits[-1] > 0
+    assert all(digit % 2 == 1 and abs(digit) < 2 ** (width - 1) for digit in digits if digit != 0)
+
+
+@pytest.mark.parametrize(
+    ("exp_e", "chain"),
+    [
+        (exp_miller_loop_bls12_381, exp_miller_loop_chain_bls12_381),
+        (exp_miller_loop_mnt4_753, exp_miller_loop_chain_mnt4_753),
+    ],
+)
+def test_exp_miller_loop_chain(exp_e, chain):
+    e = sum(digit * 2**i for i, digit in enumerate(exp_e))
+    assert addition_chain_value(chain) == abs(e)
+    # The chain does not need more multiplications than the sliding-window recoding
+    width, digits = sliding_window_digits(exp_e)
+    n_squares, n_muls, _ = addition_chain_operations(chain)
+    assert n_squares <= len(digits) - 1
+    assert n_muls <= sum(digit != 0 for digit in digits) - 1 + (2 ** (width - 2) if width > 2 else 0)
+
+
+@pytest.mark.parametrize(("modulo_threshold", "reduction_cost"), REDUCTION_SETTINGS)
 @pytest.mark.parametrize("clean_constant", [True, False])
 @pytest.mark.parametrize(
     ("config", "point_p", "point_q", "q_times_val_miller_loop", "expected"), generate_test_cases("test_miller_loop")
 )
-def test_miller_loop(config, point_p, point_q, q_times_val_miller_loop, expected, clean_constant, save_to_json_folder):
+def test_miller_loop(
+    config,
+    point_p,
+    point_q,
+    q_times_val_miller_loop,
+    expected,
+    clean_constant,
+    modulo_threshold,
+    reduction_cost,
+    save_to_json_folder,
+):
     lambdas_q_exp_miller_loop = [[s.to_list() for s in el] for el in point_q.get_lambdas(config.exp_miller_loop)]
 
     unlock = config.test_script_pairing.miller_loop_input_data(
@@ -3273,7 +3412,10 @@ def test_miller_loop(config, point_p, point_q, q_times_val_miller_loop, expected
 
     # Check correct evaluation
     lock = config.test_script_pairing.miller_loop(
-        modulo_threshold=1, check_constant=True, clean_constant=clean_constant
+        modulo_threshold=modulo_threshold,
+        check_constant=True,
+        clean_constant=clean_constant,
+        reduction_cost=reduction_cost,
     )
     lock += generate_verify(expected, config.ix_miller_output)
     lock += Script.parse_string("OP_VERIFY")
@@ -3281,7 +3423,7 @@ def test_miller_loop(config, point_p, point_q, q_times_val_miller_loop, expected
 
     verify_script(lock, unlock, clean_constant)
 
-    if save_to_json_folder and clean_constant:
+    if save_to_json_folder and clean_constant and modulo_threshold == 1:
         save_scripts(str(lock), str(unlock), save_to_json_folder, config.filename, "test_miller_loop")
 
 
@@ -3318,9 +3460,12 @@ def test_single_pairing(config, point_p, point_q, miller_output_inverse, expecte
         save_scripts(str(lock), str(unlock), save_to_json_folder, config.filename, "test_single_pairing")
 
 
+@pytest.mark.parametrize(("modulo_threshold", "reduction_cost"), REDUCTION_SETTINGS)
 @pytest.mark.parametrize("clean_constant", [True, False])
 @pytest.mark.parametrize(("config", "point_p", "point_q", "expected"), generate_test_cases("test_triple_miller_loop"))
-def test_triple_miller_loop(config, point_p, point_q, expected, clean_constant, save_to_json_folder):
+def test_triple_miller_loop(
+    config, point_p, point_q, expected, clean_constant, modulo_threshold, reduction_cost, save_to_json_folder
+):
     lambdas = [[[s.to_list() for s in el] for el in point_q[i].get_lambdas(config.exp_miller_loop)] for i in range(3)]
 
     unlock = config.test_script_pairing.triple_miller_loop_input(
@@ -3337,16 +3482,65 @@ def test_triple_miller_loop(config, point_p, point_q, expected, clean_constant,
 
     # Check correct evaluation
     lock = config.test_script_pairing.triple_miller_loop(
-        modulo_threshold=1, check_constant=True, clean_constant=clean_constant
+        modulo_threshold=modulo_threshold,
+        check_constant=True,
+        clean_constant=clean_constant,
+        reduction_cost=reduction_cost,
     )
     lock += generate_verify(expected)
 
     verify_script(lock, unlock, clean_constant)
 
-    if save_to_json_folder and clean_constant:
+    if save_to_json_folder and clean_constant and modulo_threshold == 1:
         save_scripts(str(lock), str(unlock), save_to_json_folder, config.filename, "test_triple_miller_loop")
 
 
+@pytest.mark.parametrize(
+    ("config", "point_q"),
+    [(config, point_q) for config, _, point_q, _ in generate_test_cases("test_triple_miller_loop")],
+)
+def test_miller_loop_lines(config, point_q):
+    for q in point_q:
+        lambdas = [[s.to_list() for s in el] for el in q.get_lambdas(config.exp_miller_loop)]
+        lines = config.test_script_pairing.miller_loop_lines(q.to_list())
+        assert [[gradient for gradient, _ in iteration] for iteration in lines] == lambdas
+
+
+@pytest.mark.parametrize(("modulo_threshold", "reduction_cost"), REDUCTION_SETTINGS)
+@pytest.mark.parametrize("clean_constant", [True, False])
+@pytest.mark.parametrize(("config", "point_p", "point_q", "expected"), generate_test_cases("test_triple_miller_loop"))
+def test_triple_miller_loop_with_fixed_qs(
+    config, point_p, point_q, expected, clean_constant, modulo_threshold, reduction_cost, save_to_json_folder
+):
+    lambdas = [[s.to_list() for s in el] for el in point_q[0].get_lambdas(config.exp_miller_loop)]
+
+    unlock = config.test_script_pairing.triple_miller_loop_with_fixed_qs_input(
+        point_p1=point_p[0].to_list(),
+        point_p2=point_p[1].to_list(),
+        point_p3=point_p[2].to_list(),
+        point_q1=point_q[0].to_list(),
+        lambdas_q1_exp_miller_loop=lambdas,
+    )
+
+    # Check correct evaluation
+    lock = config.test_script_pairing.triple_miller_loop_with_fixed_qs(
+        modulo_threshold=modulo_threshold,
+        point_q2=point_q[1].to_list(),
+        point_q3=point_q[2].to_list(),
+        check_constant=True,
+        clean_constant=clean_constant,
+        reduction_cost=reduction_cost,
+    )
+    lock += generate_verify(expected)
+
+    verify_script(lock, unlock, clean_constant)
+
+    if save_to_json_folder and clean_constant and modulo_threshold == 1:
+        save_scripts(
+            str(lock), str(unlock), save_to_json_folder, config.filename, "test_triple_miller_loop_with_fixed_qs"
+        )
+
+
 @pytest.mark.parametrize("clean_constant", [True, False])
 @pytest.mark.parametrize(
     ("config", "point_p", "point_q", "miller_output_inverse", "expected"), generate_test_cases("test_triple_pairing")
@@ -3377,3 +3571,105 @@ def test_triple_pairing(config, point_p, point_q, miller_output_inverse, expecte
 
     if save_to_json_folder and clean_constant:
         save_scripts(str(lock), str(unlock), save_to_json_folder, config.filename, "test_triple_pairing")
+
+
+@pytest.mark.parametrize(("modulo_threshold", "reduction_cost"), REDUCTION_SETTINGS)
+@pytest.mark.parametrize("clean_constant", [True, False])
+@pytest.mark.parametrize(("config", "point_p", "point_q", "expected"), generate_test_cases("test_triple_miller_loop"))
+def test_multi_miller_loop(
+    config, point_p, point_q, expected, clean_constant, modulo_threshold, reduction_cost, save_to_json_folder
+):
+    lambdas = [[[s.to_list() for s in el] for el in q.get_lambdas(config.exp_miller_loop)] for q in point_q]
+
+    unlock = config.test_script_pairing.multi_miller_loop_input(
+        points_p=[p.to_list() for p in point_p],
+        points_q=[q.to_list() for q in point_q],
+        lambdas_exp_miller_loop=lambdas,
+    )
+
+    # Check correct evaluation
+    lock = config.test_script_pairing.multi_miller_loop(
+        n_pairs=len(point_p),
+        modulo_threshold=modulo_threshold,
+        check_constant=True,
+        clean_constant=clean_constant,
+        reduction_cost=reduction_cost,
+    )
+    lock += generate_verify(expected)
+
+    verify_script(lock, unlock, clean_constant)
+
+    if save_to_json_folder and clean_constant and modulo_threshold == 1:
+        save_scripts(str(lock), str(unlock), save_to_json_folder, config.filename, "test_multi_miller_loop")
+
+
+@pytest.mark.parametrize("clean_constant", [True, False])
+@pytest.mark.parametrize(
+    ("config", "point_p", "point_q", "miller_output_inverse", "expected"), generate_test_cases("test_triple_pairing")
+)
+def test_multi_pairing(config, point_p, point_q, miller_output_inverse, expected, clean_constant, save_to_json_folder):
+    lambdas = [[[s.to_list() for s in el] for el in q.get_lambdas(config.exp_miller_loop)] for q in point_q]
+
+    unlock = config.test_script_pairing.multi_pairing_input(
+        points_p=[p.to_list() for p in point_p],
+        points_q=[q.to_list() for q in point_q],
+        lambdas_exp_miller_loop=lambdas,
+        miller_output_inverse=miller_output_inverse.to_list(),
+    )
+
+    # Check correct evaluation
+    lock = config.test_script_pairing.multi_pairing(
+        n_pairs=len(point_p), modulo_threshold=1, check_constant=True, clean_constant=clean_constant
+    )
+    lock += generate_verify(expected)
+
+    verify_script(lock, unlock, clean_constant)
+
+    if save_to_json_folder and clean_constant:
+        save_scripts(str(lock), str(unlock), save_to_json_folder, config.filename, "test_multi_pairing")
+
+
+@pytest.mark.parametrize("clean_constant", [True, False])
+@pytest.mark.parametrize(
+    ("config", "point_p", "point_q"),
+    [(config, point_p, point_q) for config, point_p, point_q, _, _ in generate_test_cases("test_triple_pairing")],
+)
+def test_multi_pairing_with_residue_witness(config, point_p, point_q, clean_constant, save_to_json_folder):
+    # e(P1,Q1) * e(-P1,Q1) * e(P2,Q2) * e(-P2,Q2) = 1
+    points_p = [point_p[0].to_list(), (-point_p[0]).to_list(), point_p[1].to_list(), (-point_p[1]).to_list()]
+    points_q = [point_q[0].to_list(), point_q[0].to_list(), point_q[1].to_list(), point_q[1].to_list()]
+    lambdas = [[[s.to_list() for s in el] for el in q.get_lambdas(config.exp_miller_loop)] for q in point_q[:2]]
+    lambdas = [lambdas[0], lambdas[0], lambdas[1], lambdas[1]]
+
+    # Compute the output of the Miller loop and the residue witness
+    context = Context(
+        script=config.test_script_pairing.multi_miller_loop_input(points_p, points_q, lambdas)
+        + config.test_script_pairing.multi_miller_loop(
+            n_pairs=len(points_p), modulo_threshold=1, check_constant=True, clean_constant=False
+        )
+    )
+    assert context.evaluate()
+    miller_output = config.miller_output_field.from_list(context.get_stack()[1:])
+    witness, witness_inverse, scaling_factor = residue_witness(miller_output, config.q, config.exp_miller_loop)
+
+    unlock = config.test_script_pairing.multi_pairing_with_residue_witness_input(
+        points_p=points_p,
+        points_q=points_q,
+        lambdas_exp_miller_loop=lambdas,
+        residue_witness_inverse=witness_inverse.to_list(),
+        residue_witness=witness.to_list(),
+        scaling_factor=[scaling_factor.to_list()[i] for i in config.ix_scaling_factor],
+    )
+
+    # Check correct evaluation
+    lock = config.test_script_pairing.multi_pairing_with_residue_witness(
+        n_pairs=len(points_p), modulo_threshold=1, check_constant=True, clean_constant=clean_constant
+    )
+    lock += generate_verify(config.miller_output_field.from_list([1] + [0] * (len(config.ix_miller_output) - 1)))
+
+    verify_script(lock, unlock, clean_constant)
+
+    if save_to_json_folder and clean_constant:
+        save_scripts(
+            str(lock), str(unlock), save_to_json_folder, config.filename, "test_multi_pairing_with_residue_witness"
+        )
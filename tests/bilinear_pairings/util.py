@@ -1,4 +1,5 @@
 import json
+from math import gcd
 from pathlib import Path
 from typing import Optional
 
@@ -52,3 +53,34 @@ def save_scripts(lock, unlock, save_to_json_folder, filename, test_name):
 
         with json_file.open("w") as f:
             json.dump(data, f, indent=4)
+
+
+def power(x, exponent: int):
+    """Compute x^exponent by square and multiply, for exponent > 0."""
+    out = None
+    while exponent > 0:
+        if exponent & 1:
+            out = x if out is None else out * x
+        x = x * x
+        exponent >>= 1
+    return out
+
+
+def residue_witness(miller_output, q: int, exp_miller_loop: list[int]):
+    """Compute the residue witness c, its inverse and the scaling factor w for multi_pairing_with_residue_witness.
+
+    miller_output is the output f of a Miller loop such that f^((q^k-1)/r) = 1. Write lambda = q - m, with
+    m = sum_i exp_miller_loop[i] * 2^i, and q^k - 1 = A * B, where A is made of the primes dividing lambda and B is
+    coprime to lambda. Then, w = f_A^-1 and c = f_B^(1/lambda), where f = f_A * f_B is the decomposition of f with
+    respect to A and B, satisfy f * w = c^lambda.
+    """
+    n = q ** len(miller_output.to_list()) - 1
+    lam = q - sum(el * 2**i for i, el in enumerate(exp_miller_loop))
+
+    a, b = 1, n
+    while (d := gcd(b, lam)) > 1:
+        a, b = a * d, b // d
+
+    scaling_factor = power(miller_output, (-b * pow(b, -1, a)) % n)
+    witness = power(miller_output, a * pow(a, -1, b) * pow(lam, -1, b) % n)
+    return witness, power(witness, n - 1), scaling_factor
@@ -1,3 +1,4 @@
+import random
 from dataclasses import dataclass
 
 import pytest
@@ -10,8 +11,9 @@ from tx_engine.engine.op_codes import OP_1, OP_DROP, OP_VERIFY
 
 from src.zkscript.elliptic_curves.ec_operations_fq import EllipticCurveFq
 from src.zkscript.elliptic_curves.ec_operations_fq2 import EllipticCurveFq2
-from src.zkscript.elliptic_curves.ec_operations_fq_unrolled import EllipticCurveFqUnrolled
+from src.zkscript.elliptic_curves.ec_operations_fq_unrolled import EllipticCurveFqUnrolled, wnaf
 from src.zkscript.fields.fq2 import Fq2 as Fq2ScriptModel
+from src.zkscript.util.bit_growth import output_bit_size
 from src.zkscript.util.utility_scripts import nums_to_script
 from tests.elliptic_curves.util import generate_unlock, generate_verify, save_scripts
 
@@ -44,6 +46,9 @@ class Secp256k1:
         y=Fq_k1(70716735503538187278140999937647087780607401911659658020223121861184446029572),
     )
     a = 64046112301879843941239178948101222343000413030798872646069227448863068996094
+    # Endomorphism (x,y) -> (glv_beta * x, y), which is the multiplication by glv_lambda
+    glv_beta = 0x7AE96A2B657C07106E64479EAC3434E99CF0497512F58995C1396C28719501EE
+    glv_lambda = 0x5363AD4CC05C30E0A5261C028812645A122E22EA20816678DF02967C1B23BD72
     test_data = {
         "test_addition": [{"point_p": P, "point_q": Q, "positions": None, "expected": P + Q}],
         "test_doubling": [{"point_p": P, "positions": None, "expected": P + P}],
@@ -380,6 +385,191 @@ def test_multiplication_unrolled(config, point_p, a, expected, save_to_json_fold
         save_scripts(str(lock), str(unlock), save_to_json_folder, config.filename, "unrolled multiplication")
 
 
+@pytest.mark.parametrize("output_multiplier", [False, True])
+@pytest.mark.parametrize("width", [2, 3, 5])
+@pytest.mark.parametrize(("config", "point_p", "a", "expected"), generate_test_cases("test_multiplication_unrolled"))
+def test_naf_multiplication_unrolled(config, point_p, a, expected, width, output_multiplier, save_to_json_folder):
+    unlock = config.test_script_unrolled.unrolled_naf_multiplication_input(
+        point_p=point_p.to_list(),
+        a=a,
+        max_multiplier=config.order,
+        width=width,
+        load_modulus=True,
+    )
+
+    lock = config.test_script_unrolled.unrolled_naf_multiplication(
+        max_multiplier=config.order,
+        modulo_threshold=1,
+        check_constant=True,
+        clean_constant=True,
+        output_multiplier=output_multiplier,
+        width=width,
+    )
+    if output_multiplier:
+        lock += nums_to_script([a]) + Script.parse_string("OP_EQUALVERIFY")
+    lock += generate_verify(expected, degree=config.degree) + Script.parse_string("OP_VERIFY")
+    lock += generate_verify(point_p, degree=config.degree)
+
+    context = Context(script=unlock + lock)
+    assert context.evaluate()
+    assert len(context.get_stack()) == 1
+    assert len(context.get_altstack()) == 0
+
+    if save_to_json_folder:
+        save_scripts(str(lock), str(unlock), save_to_json_folder, config.filename, "unrolled naf multiplication")
+
+
+@pytest.mark.parametrize("output_multiplier", [False, True])
+@pytest.mark.parametrize("scalar_index", [0, 1, 2, 3])
+@pytest.mark.parametrize("config", [Secp256k1])
+def test_glv_multiplication_unrolled(config, scalar_index, output_multiplier, save_to_json_folder):
+    a = [config.a, 0, 1, config.order - 1][scalar_index]
+    expected = config.P.multiply(a)
+
+    unlock = config.test_script_unrolled.unrolled_glv_multiplication_input(
+        point_p=config.P.to_list(),
+        a=a,
+        max_multiplier=config.order,
+        beta=config.glv_beta,
+        eigenvalue=config.glv_lambda,
+        load_modulus=True,
+    )
+
+    lock = config.test_script_unrolled.unrolled_glv_multiplication(
+        max_multiplier=config.order,
+        modulo_threshold=1,
+        beta=config.glv_beta,
+        eigenvalue=config.glv_lambda,
+        check_constant=True,
+        clean_constant=True,
+        output_multiplier=output_multiplier,
+    )
+    if output_multiplier:
+        lock += nums_to_script([a]) + Script.parse_string("OP_EQUALVERIFY")
+    lock += generate_verify(expected, degree=config.degree) + Script.parse_string("OP_VERIFY")
+    lock += generate_verify(config.P, degree=config.degree)
+
+    context = Context(script=unlock + lock)
+    assert context.evaluate()
+    assert len(context.get_stack()) == 1
+    assert len(context.get_altstack()) == 0
+
+    if save_to_json_folder:
+        save_scripts(str(lock), str(unlock), save_to_json_folder, config.filename, "unrolled glv multiplication")
+
+
+def test_wnaf():
+    for width in [2, 3, 4, 5]:
+        for a in [0, 1, 2, 7, 255, 2**64 + 3, Secp256k1.a]:
+            digits = wnaf(a, width)
+            assert sum(digit * 2**i for i, digit in enumerate(digits)) == a
+            assert all(digit % 2 == 1 and abs(digit) < 2 ** (width - 1) for digit in digits if digit != 0)
+            non_zero = [i for i, digit in enumerate(digits) if digit != 0]
+            assert all(j - i >= width for i, j in zip(non_zero, non_zero[1:]))
+
+
+@pytest.mark.parametrize("max_group_size", [1, 2, 4])
+@pytest.mark.parametrize("scalars_index", [0, 1, 2])
+@pytest.mark.parametrize("config", [Secp256k1, Secp256r1])
+def test_multi_scalar_multiplication_unrolled(config, scalars_index, max_group_size, save_to_json_folder):
+    points = [config.P, config.Q, config.generator]
+    scalars = [[config.a, 0, 3], [0, 0, 0], [1, config.a, config.order - 1]][scalars_index]
+    expected = config.point_at_infinity
+    for point, scalar in zip(points, scalars):
+        expected += point.multiply(scalar)
+
+    unlock = config.test_script_unrolled.unrolled_multi_scalar_multiplication_input(
+        points=[point.to_list() for point in points],
+        scalars=scalars,
+        max_multipliers=[config.order] * len(points),
+        max_group_size=max_group_size,
+        load_modulus=True,
+    )
+
+    lock = config.test_script_unrolled.unrolled_multi_scalar_multiplication(
+        points=[point.to_list() for point in points],
+        max_multipliers=[config.order] * len(points),
+        modulo_threshold=1,
+        check_constant=True,
+        clean_constant=True,
+        max_group_size=max_group_size,
+    )
+    lock += generate_verify(expected, degree=config.degree)
+
+    context = Context(script=unlock + lock)
+    assert context.evaluate()
+    assert len(context.get_stack()) == 1
+    assert len(context.get_altstack()) == 0
+
+    if save_to_json_folder:
+        save_scripts(
+            str(lock), str(unlock), save_to_json_folder, config.filename, "unrolled multi-scalar multiplication"
+        )
+
+
+@pytest.mark.parametrize("comb_width", [1, 4, 8])
+@pytest.mark.parametrize("scalars_index", [0, 1, 2])
+@pytest.mark.parametrize("config", [Secp256k1, Secp256r1])
+def test_fixed_base_multiplication_unrolled(config, scalars_index, comb_width, save_to_json_folder):
+    points = [config.P, config.generator]
+    scalars = [[config.a, 3], [0, 0], [1, config.order - 1]][scalars_index]
+    expected = config.point_at_infinity
+    for point, scalar in zip(points, scalars):
+        expected += point.multiply(scalar)
+
+    unlock = config.test_script_unrolled.unrolled_fixed_base_multiplication_input(
+        points=[point.to_list() for point in points],
+        scalars=scalars,
+        max_multipliers=[config.order] * len(points),
+        comb_width=comb_width,
+        load_modulus=True,
+    )
+
+    lock = config.test_script_unrolled.unrolled_fixed_base_multiplication(
+        points=[point.to_list() for point in points],
+        max_multipliers=[config.order] * len(points),
+        modulo_threshold=1,
+        check_constant=True,
+        clean_constant=True,
+        comb_width=comb_width,
+    )
+    lock += generate_verify(expected, degree=config.degree)
+
+    context = Context(script=unlock + lock)
+    assert context.evaluate()
+    assert len(context.get_stack()) == 1
+    assert len(context.get_altstack()) == 0
+
+    if save_to_json_folder:
+        save_scripts(str(lock), str(unlock), save_to_json_folder, config.filename, "unrolled fixed-base multiplication")
+
+
+@pytest.mark.parametrize("comb_width", [2, 4])
+@pytest.mark.parametrize("config", [Secp256k1, Secp256r1])
+def test_fixed_base_multiplication_unrolled_scalar_out_of_range(config, comb_width):
+    # The digits of a = order + 2 are valid digits, but a is not smaller than max_multiplier
+    a = config.order + 2
+    spacing = -(-(config.order - 1).bit_length() // comb_width)
+    teeth = [config.generator.multiply(2 ** (j * spacing)).to_list() for j in range(comb_width)]
+    digits = [(a >> (j * spacing)) % 2**spacing for j in range(comb_width)]
+
+    unlock = config.test_script_unrolled.unrolled_multi_scalar_multiplication_input(
+        points=teeth, scalars=digits, max_multipliers=[2 ** (spacing - 1)] * comb_width, load_modulus=True
+    )
+
+    lock = config.test_script_unrolled.unrolled_fixed_base_multiplication(
+        points=[config.generator.to_list()],
+        max_multipliers=[config.order],
+        modulo_threshold=1,
+        check_constant=True,
+        clean_constant=True,
+        comb_width=comb_width,
+    )
+
+    context = Context(script=unlock + lock)
+    assert not context.evaluate()
+
+
 @pytest.mark.parametrize(("config", "point_p", "expected"), generate_test_cases("test_negation"))
 def test_negation(config, point_p, expected, save_to_json_folder):
     unlock = nums_to_script([config.modulus])
@@ -395,3 +585,43 @@ def test_negation(config, point_p, expected, save_to_json_folder):
 
     if save_to_json_folder:
         save_scripts(str(lock), str(unlock), save_to_json_folder, config.filename, "point negation")
+
+
+def lift(elements, bit_size, modulus, rng):
+    # Random representatives of the elements, with absolute value at most 2^bit_size
+    k_max = 2**bit_size // modulus - 1
+    return [el + rng.randint(-k_max, k_max) * modulus for el in elements]
+
+
+@pytest.mark.parametrize("bit_size", [256, 300])
+@pytest.mark.parametrize("config", [Secp256k1, Secp256r1, Secp256k1Extension, Secp256r1Extension])
+def test_bit_growth(config, bit_size):
+    rng = random.Random(0)  # noqa: S311
+    point_p, point_q = config.P, config.Q
+    operations = [
+        ("point_addition", [point_p.get_lambda(point_q), point_p, point_q]),
+        ("point_doubling", [point_p.get_lambda(point_p), point_p]),
+    ]
+    if config.degree == 1:
+        operations.append(("point_addition_with_unknown_points", [point_p.get_lambda(point_q), point_p, point_q]))
+    else:
+        operations.append(("point_negation", [point_p]))
+
+    for operation, inputs in operations:
+        method = getattr(config.test_script, operation)
+        bound = output_bit_size(method, *[bit_size] * len(inputs))
+
+        for _ in range(10):
+            unlock = nums_to_script([config.modulus])
+            for el in inputs:
+                unlock += nums_to_script(lift(el.to_list(), bit_size, config.modulus, rng))
+
+            lock = method(take_modulo=False, check_constant=False, clean_constant=False)
+            lock += nums_to_script([1])
+
+            context = Context(script=unlock + lock)
+            assert context.evaluate()
+            assert len(context.get_altstack()) == 0
+
+            output = context.get_stack()[1:-1]
+            assert all(abs(x) <= 2**bound for x in output)
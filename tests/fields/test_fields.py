@@ -1,3 +1,4 @@
+import random
 from dataclasses import dataclass
 
 import pytest
@@ -18,6 +19,7 @@ from src.zkscript.fields.fq6_3_over_2 import Fq6 as Fq6ScriptModel
 from src.zkscript.fields.fq6_3_over_2 import fq6_for_towering
 from src.zkscript.fields.fq12_2_over_3_over_2 import Fq12 as Fq12Script
 from src.zkscript.fields.fq12_3_over_2_over_2 import Fq12Cubic as Fq12CubicScript
+from src.zkscript.util.bit_growth import output_bit_size
 from src.zkscript.util.utility_scripts import nums_to_script
 from tests.fields.util import check_constant, generate_unlock, generate_verify, save_scripts
 
@@ -31,9 +33,25 @@ class Fq2ResidueMinusOne:
     Fq2 = quadratic_extension_from_base_field_and_non_residue(base_field=Fq, non_residue=non_residue)
     # Define script run in tests
     test_script = Fq2Script(q=q, non_residue=non_residue.to_list()[0])
+    # Define script run in tests with the Karatsuba multiplication
+    karatsuba_script = Fq2Script(q=q, non_residue=non_residue.to_list()[0], mul_strategy="karatsuba")
     # Define filename for saving scripts
     filename = "fq2_non_residue_is_minus_one"
 
+    # Methods checked against their bit-growth bound: method -> (number of elements of each input, extra arguments)
+    bit_growth_methods = {
+        "add": ([2, 2], {}),
+        "subtract": ([2, 2], {}),
+        "negate": ([2], {}),
+        "scalar_mul": ([2, 1], {}),
+        "mul": ([2, 2], {}),
+        "square": ([2], {}),
+        "add_three": ([2, 2, 2], {}),
+        "conjugate": ([2], {}),
+        "mul_by_u": ([2], {}),
+        "mul_by_one_plus_u": ([2], {}),
+    }
+
     test_data = {
         "test_addition": [{"x": Fq2(Fq(5), Fq(10)), "y": Fq2(Fq(2), Fq(10)), "expected": Fq2(Fq(7), Fq(1))}],
         "test_subtraction": [{"x": Fq2(Fq(5), Fq(10)), "y": Fq2(Fq(2), Fq(10)), "expected": Fq2(Fq(3), Fq(0))}],
@@ -63,9 +81,25 @@ class Fq2ResidueNotMinusOne:
     Fq2 = quadratic_extension_from_base_field_and_non_residue(base_field=Fq, non_residue=non_residue)
     # Define script run in tests
     test_script = Fq2Script(q=q, non_residue=non_residue.to_list()[0])
+    # Define script run in tests with the Karatsuba multiplication
+    karatsuba_script = Fq2Script(q=q, non_residue=non_residue.to_list()[0], mul_strategy="karatsuba")
     # Define filename for saving scripts
     filename = "fq2_non_residue_is_not_minus_one"
 
+    # Methods checked against their bit-growth bound: method -> (number of elements of each input, extra arguments)
+    bit_growth_methods = {
+        "add": ([2, 2], {}),
+        "subtract": ([2, 2], {}),
+        "negate": ([2], {}),
+        "scalar_mul": ([2, 1], {}),
+        "mul": ([2, 2], {}),
+        "square": ([2], {}),
+        "add_three": ([2, 2, 2], {}),
+        "conjugate": ([2], {}),
+        "mul_by_u": ([2], {}),
+        "mul_by_one_plus_u": ([2], {}),
+    }
+
     test_data = {
         "test_addition": [{"x": Fq2(Fq(5), Fq(10)), "y": Fq2(Fq(2), Fq(10)), "expected": Fq2(Fq(7), Fq(1))}],
         "test_subtraction": [{"x": Fq2(Fq(5), Fq(10)), "y": Fq2(Fq(2), Fq(10)), "expected": Fq2(Fq(3), Fq(0))}],
@@ -104,9 +138,29 @@ class Fq4:
         gammas_frobenius.append(NON_RESIDUE_FQ2.power((q**j - 1) // 2).to_list())
     # Define script run in tests
     test_script = Fq4Script(q=q, base_field=fq2_script, gammas_frobenius=gammas_frobenius)
+    # Define script run in tests with the Karatsuba multiplication
+    karatsuba_fq2_script = Fq2Script(q=q, non_residue=NON_RESIDUE.to_list()[0], mul_strategy="karatsuba")
+    karatsuba_script = Fq4Script(
+        q=q, base_field=karatsuba_fq2_script, gammas_frobenius=gammas_frobenius, mul_strategy="karatsuba"
+    )
     # Define filename for saving scripts
     filename = "fq4"
 
+    # Methods checked against their bit-growth bound: method -> (number of elements of each input, extra arguments)
+    bit_growth_methods = {
+        "add": ([4, 4], {}),
+        "fq_scalar_mul": ([4, 1], {}),
+        "scalar_mul": ([4, 2], {}),
+        "mul": ([4, 4], {}),
+        "square": ([4], {}),
+        "add_three": ([4, 4, 4], {}),
+        "frobenius_odd": ([4], {"n": 1}),
+        "frobenius_even": ([4], {"n": 2}),
+        "mul_by_u": ([4], {}),
+        "conjugate": ([4], {}),
+        "cyclotomic_square": ([4], {}),
+    }
+
     test_data = {
         "test_addition": [
             {
@@ -180,6 +234,16 @@ class Fq4:
                 "expected": Fq4(Fq2(Fq(1), Fq(1)), Fq2(Fq(2), Fq(3))).conjugate(),
             }
         ],
+        "test_cyclotomic_square": [
+            {
+                "x": Fq4(Fq2(Fq(1), Fq(1)), Fq2(Fq(2), Fq(3))).power(q**2 - 1),
+                "expected": Fq4(Fq2(Fq(1), Fq(1)), Fq2(Fq(2), Fq(3))).power(2 * (q**2 - 1)),
+            },
+            {
+                "x": Fq4.identity(),
+                "expected": Fq4.identity(),
+            },
+        ],
     }
 
 
@@ -203,9 +267,17 @@ class Fq2Over2ResidueEqualU:
         gammas_frobenius.append(NON_RESIDUE_FQ2.power((q**j - 1) // 2).to_list())
     # Define script run in tests
     test_script = Fq2Over2ResidueEqualUScript(q=q, base_field=fq2_script, gammas_frobenius=gammas_frobenius)
+    # Define script run in tests with the Karatsuba multiplication
+    karatsuba_fq2_script = Fq4.karatsuba_fq2_script  # Same modulus and non-residue as the Fq4 configuration
+    karatsuba_script = Fq2Over2ResidueEqualUScript(
+        q=q, base_field=karatsuba_fq2_script, gammas_frobenius=gammas_frobenius, mul_strategy="karatsuba"
+    )
     # Define filename for saving scripts
     filename = "fq2_over_2_residue_equal_u"
 
+    # Methods checked against their bit-growth bound: method -> (number of elements of each input, extra arguments)
+    bit_growth_methods = {"mul": ([4, 4], {}), "square": ([4], {}), "cyclotomic_square": ([4], {})}
+
     test_data = {
         "test_square": [
             {
@@ -231,6 +303,16 @@ class Fq2Over2ResidueEqualU:
                 "expected": Fq2Over2ResidueEqualU.u() * Fq2Over2ResidueEqualU.u(),
             },
         ],
+        "test_cyclotomic_square": [
+            {
+                "x": Fq2Over2ResidueEqualU(Fq2(Fq(1), Fq(1)), Fq2(Fq(2), Fq(3))).power(q**2 - 1),
+                "expected": Fq2Over2ResidueEqualU(Fq2(Fq(1), Fq(1)), Fq2(Fq(2), Fq(3))).power(2 * (q**2 - 1)),
+            },
+            {
+                "x": Fq2Over2ResidueEqualU(Fq2(Fq(18), Fq(18)), Fq2(Fq(12), Fq(13))).power(q**2 - 1),
+                "expected": Fq2Over2ResidueEqualU(Fq2(Fq(18), Fq(18)), Fq2(Fq(12), Fq(13))).power(2 * (q**2 - 1)),
+            },
+        ],
     }
 
 
@@ -249,9 +331,24 @@ class Fq6ThreeOverTwo:
     fq2_script = Fq2Script(q=q, non_residue=NON_RESIDUE.to_list()[0])
     # Define script run in tests
     test_script = Fq6Script(q=q, base_field=fq2_script)
+    # Define script run in tests with the Karatsuba multiplication
+    karatsuba_fq2_script = Fq2Script(q=q, non_residue=NON_RESIDUE.to_list()[0], mul_strategy="karatsuba")
+    karatsuba_script = Fq6Script(q=q, base_field=karatsuba_fq2_script, mul_strategy="karatsuba")
     # Define filename for saving scripts
     filename = "fq6_3_over_2"
 
+    # Methods checked against their bit-growth bound: method -> (number of elements of each input, extra arguments)
+    bit_growth_methods = {
+        "add": ([6, 6], {}),
+        "subtract": ([6, 6], {}),
+        "fq_scalar_mul": ([6, 1], {}),
+        "scalar_mul": ([6, 2], {}),
+        "negate": ([6], {}),
+        "mul": ([6, 6], {}),
+        "square": ([6], {}),
+        "mul_by_v": ([6], {}),
+    }
+
     test_data = {
         "test_addition": [
             {
@@ -338,9 +435,29 @@ class Fq12TwoOverThreeOverTwo:
         gammas_frobenius.append(inner_list)
     # Define script run in tests
     test_script = Fq12Script(q=q, fq2=fq2_script, fq6=fq6_script, gammas_frobenius=gammas_frobenius)
+    # Define script run in tests with the Karatsuba multiplication
+    karatsuba_fq2_script = Fq6ThreeOverTwo.karatsuba_fq2_script  # Same modulus and non-residue as the Fq6 configuration
+    karatsuba_fq6_script = Fq6Script(q=q, base_field=karatsuba_fq2_script, mul_strategy="karatsuba")
+    karatsuba_script = Fq12Script(
+        q=q,
+        fq2=karatsuba_fq2_script,
+        fq6=karatsuba_fq6_script,
+        gammas_frobenius=gammas_frobenius,
+        mul_strategy="karatsuba",
+    )
     # Define filename for saving scripts
     filename = "fq12_2_over_3_over_2"
 
+    # Methods checked against their bit-growth bound: method -> (number of elements of each input, extra arguments)
+    bit_growth_methods = {
+        "mul": ([12, 12], {}),
+        "square": ([12], {}),
+        "conjugate": ([12], {}),
+        "frobenius_odd": ([12], {"n": 1}),
+        "frobenius_even": ([12], {"n": 2}),
+        "cyclotomic_square": ([12], {}),
+    }
+
     test_data = {
         "test_mul": [
             {
@@ -422,6 +539,18 @@ class Fq12TwoOverThreeOverTwo:
                 ).frobenius(3),
             }
         ],
+        "test_cyclotomic_square": [
+            {
+                "x": Fq12(
+                    Fq6(Fq2(Fq(1), Fq(1)), Fq2(Fq(2), Fq(3)), Fq2(Fq(7), Fq(11))),
+                    Fq6(Fq2(Fq(5), Fq(3)), Fq2(Fq(8), Fq(17)), Fq2(Fq(15), Fq(6))),
+                ).power((q**6 - 1) * (q**2 + 1)),
+                "expected": Fq12(
+                    Fq6(Fq2(Fq(1), Fq(1)), Fq2(Fq(2), Fq(3)), Fq2(Fq(7), Fq(11))),
+                    Fq6(Fq2(Fq(5), Fq(3)), Fq2(Fq(8), Fq(17)), Fq2(Fq(15), Fq(6))),
+                ).power(2 * (q**6 - 1) * (q**2 + 1)),
+            }
+        ],
     }
 
 
@@ -449,6 +578,9 @@ class Fq12ThreeOverTwoOverTwo:
     # Define filename for saving scripts
     filename = "fq12_3_over_2_over_2"
 
+    # Methods checked against their bit-growth bound: method -> (number of elements of each input, extra arguments)
+    bit_growth_methods = {"mul": ([12, 12], {}), "square": ([12], {})}
+
     test_data = {
         "test_mul": [
             {
@@ -632,6 +764,54 @@ def test_mul(config, x, y, expected, clean_constant, is_constant_reused, save_to
         save_scripts(str(lock), str(unlock), save_to_json_folder, config.filename, "multiplication")
 
 
+@pytest.mark.parametrize("clean_constant", [True, False])
+@pytest.mark.parametrize("is_constant_reused", [True, False])
+@pytest.mark.parametrize(
+    ("config", "x", "y", "expected"),
+    [test_case for test_case in generate_test_cases("test_mul") if hasattr(test_case[0], "karatsuba_script")],
+)
+def test_mul_karatsuba(config, x, y, expected, clean_constant, is_constant_reused):
+    unlock = nums_to_script([config.q])
+    unlock += generate_unlock(x)
+    unlock += generate_unlock(y)
+
+    lock = config.karatsuba_script.mul(
+        take_modulo=True, check_constant=True, clean_constant=clean_constant, is_constant_reused=is_constant_reused
+    )
+    if is_constant_reused:
+        lock += check_constant(config.q)
+    lock += generate_verify(expected)
+
+    verify_script(lock, unlock, clean_constant)
+
+
+@pytest.mark.parametrize("clean_constant", [True, False])
+@pytest.mark.parametrize("is_constant_reused", [True, False])
+@pytest.mark.parametrize(("config", "x", "y", "expected"), generate_test_cases("test_mul"))
+def test_mul_positive_input(config, x, y, expected, clean_constant, is_constant_reused):
+    unlock = nums_to_script([config.q])
+    unlock += generate_unlock(x)
+    unlock += generate_unlock(y)
+
+    lock = config.test_script.mul(
+        take_modulo=True,
+        check_constant=True,
+        clean_constant=clean_constant,
+        is_constant_reused=is_constant_reused,
+        is_input_positive=True,
+    )
+    if is_constant_reused:
+        lock += check_constant(config.q)
+    lock += generate_verify(expected)
+
+    verify_script(lock, unlock, clean_constant)
+
+
+def test_unknown_mul_strategy():
+    with pytest.raises(ValueError, match="Unknown multiplication strategy"):
+        Fq2Script(q=19, non_residue=-1, mul_strategy="toom_cook")
+
+
 @pytest.mark.parametrize("clean_constant", [True, False])
 @pytest.mark.parametrize("is_constant_reused", [True, False])
 @pytest.mark.parametrize(("config", "x", "expected"), generate_test_cases("test_square"))
@@ -652,6 +832,47 @@ def test_square(config, x, expected, clean_constant, is_constant_reused, save_to
         save_scripts(str(lock), str(unlock), save_to_json_folder, config.filename, "square")
 
 
+@pytest.mark.parametrize("clean_constant", [True, False])
+@pytest.mark.parametrize("is_constant_reused", [True, False])
+@pytest.mark.parametrize(("config", "x", "expected"), generate_test_cases("test_square"))
+def test_square_positive_input(config, x, expected, clean_constant, is_constant_reused):
+    unlock = nums_to_script([config.q])
+    unlock += generate_unlock(x)
+
+    lock = config.test_script.square(
+        take_modulo=True,
+        check_constant=True,
+        clean_constant=clean_constant,
+        is_constant_reused=is_constant_reused,
+        is_input_positive=True,
+    )
+    if is_constant_reused:
+        lock += check_constant(config.q)
+    lock += generate_verify(expected)
+
+    verify_script(lock, unlock, clean_constant)
+
+
+@pytest.mark.parametrize("clean_constant", [True, False])
+@pytest.mark.parametrize("is_constant_reused", [True, False])
+@pytest.mark.parametrize(("config", "x", "expected"), generate_test_cases("test_cyclotomic_square"))
+def test_cyclotomic_square(config, x, expected, clean_constant, is_constant_reused, save_to_json_folder):
+    unlock = nums_to_script([config.q])
+    unlock += generate_unlock(x)
+
+    lock = config.test_script.cyclotomic_square(
+        take_modulo=True, check_constant=True, clean_constant=clean_constant, is_constant_reused=is_constant_reused
+    )
+    if is_constant_reused:
+        lock += check_constant(config.q)
+    lock += generate_verify(expected)
+
+    verify_script(lock, unlock, clean_constant)
+
+    if save_to_json_folder and clean_constant and not is_constant_reused:
+        save_scripts(str(lock), str(unlock), save_to_json_folder, config.filename, "cyclotomic square")
+
+
 @pytest.mark.parametrize("clean_constant", [True, False])
 @pytest.mark.parametrize("is_constant_reused", [True, False])
 @pytest.mark.parametrize(("config", "x", "y", "z", "expected"), generate_test_cases("test_add_three"))
@@ -834,3 +1055,61 @@ def test_frobenius_cube(config, x, expected, clean_constant, is_constant_reused,
 
     if save_to_json_folder and clean_constant and not is_constant_reused:
         save_scripts(str(lock), str(unlock), save_to_json_folder, config.filename, "frobenius cube")
+
+
+def generate_bit_growth_test_cases():
+    configurations = [
+        Fq2ResidueMinusOne,
+        Fq2ResidueNotMinusOne,
+        Fq4,
+        Fq2Over2ResidueEqualU,
+        Fq6ThreeOverTwo,
+        Fq12TwoOverThreeOverTwo,
+        Fq12ThreeOverTwoOverTwo,
+    ]
+    return [
+        (config, method, n_elements, kwargs)
+        for config in configurations
+        for method, (n_elements, kwargs) in config.bit_growth_methods.items()
+    ]
+
+
+def generate_karatsuba_bit_growth_test_cases():
+    return [
+        (config, method, n_elements, kwargs)
+        for config, method, n_elements, kwargs in generate_bit_growth_test_cases()
+        if method == "mul" and hasattr(config, "karatsuba_script")
+    ]
+
+
+def verify_bit_growth(config, script_method, n_elements, kwargs, bit_size):
+    rng = random.Random(0)  # noqa: S311
+    bound = output_bit_size(script_method, *[bit_size] * len(n_elements))
+
+    for _ in range(10):
+        unlock = nums_to_script([config.q])
+        for n in n_elements:
+            x = [rng.choice([-1, 1]) * rng.randint(2 ** (bit_size - 1), 2**bit_size) for _ in range(n)]
+            unlock += nums_to_script(x)
+
+        lock = script_method(take_modulo=False, check_constant=False, clean_constant=False, **kwargs)
+        lock += nums_to_script([1])
+
+        context = Context(script=unlock + lock)
+        assert context.evaluate()
+        assert len(context.get_altstack()) == 0
+
+        output = context.get_stack()[1:-1]
+        assert all(abs(x) <= 2**bound for x in output)
+
+
+@pytest.mark.parametrize("bit_size", [8, 64])
+@pytest.mark.parametrize(("config", "method", "n_elements", "kwargs"), generate_bit_growth_test_cases())
+def test_bit_growth(config, method, n_elements, kwargs, bit_size):
+    verify_bit_growth(config, getattr(config.test_script, method), n_elements, kwargs, bit_size)
+
+
+@pytest.mark.parametrize("bit_size", [8, 64])
+@pytest.mark.parametrize(("config", "method", "n_elements", "kwargs"), generate_karatsuba_bit_growth_test_cases())
+def test_bit_growth_karatsuba(config, method, n_elements, kwargs, bit_size):
+    verify_bit_growth(config, getattr(config.karatsuba_script, method), n_elements, kwargs, bit_size)
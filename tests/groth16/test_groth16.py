@@ -3,12 +3,19 @@ from dataclasses import dataclass
 from pathlib import Path
 
 import pytest
+from elliptic_curves.fields.cubic_extension import cubic_extension_from_base_field_and_non_residue
+from elliptic_curves.fields.quadratic_extension import quadratic_extension_from_base_field_and_non_residue
+from elliptic_curves.instantiations.bls12_381.bls12_381 import NON_RESIDUE_FQ2 as NON_RESIDUE_FQ2_BLS12_381
+from elliptic_curves.instantiations.bls12_381.bls12_381 import NON_RESIDUE_FQ4 as NON_RESIDUE_FQ4_BLS12_381
+from elliptic_curves.instantiations.bls12_381.bls12_381 import Fq2 as Fq2_bls12_381
 from elliptic_curves.instantiations.bls12_381.bls12_381 import bls12_381 as bls12_381_curve
+from elliptic_curves.instantiations.mnt4_753.mnt4_753 import Fq4 as Fq4_mnt4_753
 from elliptic_curves.instantiations.mnt4_753.mnt4_753 import mnt4_753 as mnt4_753_curve
 from tx_engine import Context
 
 from src.zkscript.groth16.bls12_381.bls12_381 import bls12_381
 from src.zkscript.groth16.mnt4_753.mnt4_753 import mnt4_753
+from tests.bilinear_pairings.util import residue_witness
 
 
 @dataclass
@@ -84,6 +91,15 @@ class Bls12381:
 
     test_script = bls12_381
 
+    # Field of the output of the Miller loop (Fq12Cubic), and indices of the scaling factor (in Fq6) in its elements
+    Fq4 = quadratic_extension_from_base_field_and_non_residue(
+        base_field=Fq2_bls12_381, non_residue=NON_RESIDUE_FQ2_BLS12_381
+    )
+    miller_output_field = cubic_extension_from_base_field_and_non_residue(
+        base_field=Fq4, non_residue=Fq4.from_list(NON_RESIDUE_FQ4_BLS12_381)
+    )
+    ix_scaling_factor = [0, 1, 8, 9, 6, 7]
+
     filename = "bls12_381"
 
 
@@ -160,6 +176,10 @@ class Mnt4753:
 
     test_script = mnt4_753
 
+    # Field of the output of the Miller loop, and indices of the scaling factor in its elements (not needed)
+    miller_output_field = Fq4_mnt4_753
+    ix_scaling_factor = []
+
     filename = "mnt4_753"
 
 
@@ -208,3 +228,292 @@ def test_groth16(test_script, vk, alpha_beta, groth16_proof, filename, save_to_j
 
     if save_to_json_folder:
         save_scripts(str(lock), str(unlock), save_to_json_folder, filename, "groth16")
+
+
+@pytest.mark.parametrize(
+    ("test_script", "vk", "alpha_beta", "groth16_proof", "filename"),
+    [
+        (Bls12381.test_script, Bls12381.vk, Bls12381.alpha_beta, Bls12381.groth16_proof, Bls12381.filename),
+        (Mnt4753.test_script, Mnt4753.vk, Mnt4753.alpha_beta, Mnt4753.groth16_proof, Mnt4753.filename),
+    ],
+)
+def test_groth16_precomputed_lines(test_script, vk, alpha_beta, groth16_proof, filename, save_to_json_folder):
+    unlock = test_script.groth16_verifier_unlock(**groth16_proof, precompute_lines=True)
+
+    lock = test_script.groth16_verifier(
+        modulo_threshold=1,
+        alpha_beta=alpha_beta.to_list(),
+        minus_gamma=(-vk["gamma"]).to_list(),
+        minus_delta=(-vk["delta"]).to_list(),
+        gamma_abc=[s.to_list() for s in vk["gamma_abc"]],
+        check_constant=True,
+        clean_constant=True,
+        precompute_lines=True,
+    )
+
+    context = Context(script=unlock + lock)
+    assert context.evaluate()
+    assert len(context.get_stack()) == 1
+    assert len(context.get_altstack()) == 0
+
+    if save_to_json_folder:
+        save_scripts(str(lock), str(unlock), save_to_json_folder, filename, "groth16_precomputed_lines")
+
+
+@pytest.mark.parametrize(
+    ("test_script", "vk", "alpha_beta", "groth16_proof", "filename"),
+    [
+        (Bls12381.test_script, Bls12381.vk, Bls12381.alpha_beta, Bls12381.groth16_proof, Bls12381.filename),
+        (Mnt4753.test_script, Mnt4753.vk, Mnt4753.alpha_beta, Mnt4753.groth16_proof, Mnt4753.filename),
+    ],
+)
+@pytest.mark.parametrize("comb_width", [1, 4])
+def test_groth16_multi_scalar_multiplication(
+    test_script, vk, alpha_beta, groth16_proof, filename, comb_width, save_to_json_folder
+):
+    gamma_abc = [s.to_list() for s in vk["gamma_abc"]]
+
+    unlock = test_script.groth16_verifier_unlock(
+        **groth16_proof, gamma_abc=gamma_abc, multi_scalar_multiplication=True, comb_width=comb_width
+    )
+
+    lock = test_script.groth16_verifier(
+        modulo_threshold=1,
+        alpha_beta=alpha_beta.to_list(),
+        minus_gamma=(-vk["gamma"]).to_list(),
+        minus_delta=(-vk["delta"]).to_list(),
+        gamma_abc=gamma_abc,
+        check_constant=True,
+        clean_constant=True,
+        multi_scalar_multiplication=True,
+        comb_width=comb_width,
+    )
+
+    context = Context(script=unlock + lock)
+    assert context.evaluate()
+    assert len(context.get_stack()) == 1
+    assert len(context.get_altstack()) == 0
+
+    if save_to_json_folder:
+        save_scripts(
+            str(lock), str(unlock), save_to_json_folder, filename, f"groth16_multi_scalar_multiplication_{comb_width}"
+        )
+
+
+@pytest.mark.parametrize(
+    ("test_script", "vk", "alpha_beta", "groth16_proof", "filename"),
+    [
+        (Bls12381.test_script, Bls12381.vk, Bls12381.alpha_beta, Bls12381.groth16_proof, Bls12381.filename),
+    ],
+)
+def test_groth16_glv(test_script, vk, alpha_beta, groth16_proof, filename, save_to_json_folder):
+    gamma_abc = [s.to_list() for s in vk["gamma_abc"]]
+
+    unlock = test_script.groth16_verifier_unlock(**groth16_proof, gamma_abc=gamma_abc, glv=True)
+
+    lock = test_script.groth16_verifier(
+        modulo_threshold=1,
+        alpha_beta=alpha_beta.to_list(),
+        minus_gamma=(-vk["gamma"]).to_list(),
+        minus_delta=(-vk["delta"]).to_list(),
+        gamma_abc=gamma_abc,
+        check_constant=True,
+        clean_constant=True,
+        glv=True,
+    )
+
+    context = Context(script=unlock + lock)
+    assert context.evaluate()
+    assert len(context.get_stack()) == 1
+    assert len(context.get_altstack()) == 0
+
+    if save_to_json_folder:
+        save_scripts(str(lock), str(unlock), save_to_json_folder, filename, "groth16_glv")
+
+
+def test_groth16_glv_not_available():
+    vk = Mnt4753.vk
+    with pytest.raises(ValueError, match="no GLV endomorphism"):
+        Mnt4753.test_script.groth16_verifier(
+            modulo_threshold=1,
+            alpha_beta=Mnt4753.alpha_beta.to_list(),
+            minus_gamma=(-vk["gamma"]).to_list(),
+            minus_delta=(-vk["delta"]).to_list(),
+            gamma_abc=[s.to_list() for s in vk["gamma_abc"]],
+            glv=True,
+        )
+
+
+@pytest.mark.parametrize(
+    ("test_script", "vk", "alpha_beta"),
+    [
+        (Bls12381.test_script, Bls12381.vk, Bls12381.alpha_beta),
+        (Mnt4753.test_script, Mnt4753.vk, Mnt4753.alpha_beta),
+    ],
+)
+def test_groth16_verifier_cache(test_script, vk, alpha_beta, tmp_path):
+    kwargs = {
+        "modulo_threshold": 1,
+        "alpha_beta": alpha_beta.to_list(),
+        "minus_gamma": (-vk["gamma"]).to_list(),
+        "minus_delta": (-vk["delta"]).to_list(),
+        "gamma_abc": [s.to_list() for s in vk["gamma_abc"]],
+        "check_constant": True,
+        "clean_constant": True,
+    }
+
+    lock = test_script.groth16_verifier(**kwargs)
+    stored = test_script.groth16_verifier(cache_dir=tmp_path, **kwargs)
+    loaded = test_script.groth16_verifier(cache_dir=tmp_path, **kwargs)
+
+    assert len(list(tmp_path.iterdir())) == 1
+    assert stored.raw_serialize() == lock.raw_serialize()
+    assert loaded.raw_serialize() == lock.raw_serialize()
+
+
+@pytest.mark.parametrize(
+    ("test_script", "vk", "alpha_beta"),
+    [
+        (Bls12381.test_script, Bls12381.vk, Bls12381.alpha_beta),
+        (Mnt4753.test_script, Mnt4753.vk, Mnt4753.alpha_beta),
+    ],
+)
+def test_groth16_verifier_template(test_script, vk, alpha_beta):
+    kwargs = {
+        "alpha_beta": alpha_beta.to_list(),
+        "minus_gamma": (-vk["gamma"]).to_list(),
+        "minus_delta": (-vk["delta"]).to_list(),
+        "gamma_abc": [s.to_list() for s in vk["gamma_abc"]],
+    }
+
+    template = test_script.groth16_verifier_template(
+        modulo_threshold=1, n_pub=len(vk["gamma_abc"]) - 1, check_constant=True, clean_constant=True
+    )
+    lock = test_script.groth16_verifier(modulo_threshold=1, check_constant=True, clean_constant=True, **kwargs)
+
+    assert test_script.groth16_verifier_from_template(template, **kwargs).raw_serialize() == lock.raw_serialize()
+
+
+@pytest.mark.parametrize(
+    ("test_script", "vk", "alpha_beta", "groth16_proof", "filename"),
+    [
+        (Bls12381.test_script, Bls12381.vk, Bls12381.alpha_beta, Bls12381.groth16_proof, Bls12381.filename),
+        (Mnt4753.test_script, Mnt4753.vk, Mnt4753.alpha_beta, Mnt4753.groth16_proof, Mnt4753.filename),
+    ],
+)
+def test_batch_groth16(test_script, vk, alpha_beta, groth16_proof, filename, save_to_json_folder):
+    # With a single proof, the weight is 1 and the pairs of the multi pairing are the ones of groth16_verifier
+    unlock = test_script.batch_groth16_verifier_unlock(
+        pubs=[groth16_proof["pub"]],
+        As=[groth16_proof["A"]],
+        Bs=[groth16_proof["B"]],
+        Cs=[groth16_proof["C"]],
+        gamma_abc=[s.to_list() for s in vk["gamma_abc"]],
+        lambdas_exp_miller_loop=[
+            groth16_proof["lambdas_B_exp_miller_loop"],
+            groth16_proof["lambdas_minus_gamma_exp_miller_loop"],
+            groth16_proof["lambdas_minus_delta_exp_miller_loop"],
+        ],
+        inverse_miller_loop=groth16_proof["inverse_miller_loop"],
+    )
+
+    lock = test_script.batch_groth16_verifier(
+        k=1,
+        modulo_threshold=1,
+        alpha_beta=alpha_beta.to_list(),
+        minus_gamma=(-vk["gamma"]).to_list(),
+        minus_delta=(-vk["delta"]).to_list(),
+        gamma_abc=[s.to_list() for s in vk["gamma_abc"]],
+        check_constant=True,
+        clean_constant=True,
+    )
+
+    context = Context(script=unlock + lock)
+    assert context.evaluate()
+    assert len(context.get_stack()) == 1
+    assert len(context.get_altstack()) == 0
+
+    if save_to_json_folder:
+        save_scripts(str(lock), str(unlock), save_to_json_folder, filename, "batch_groth16")
+
+
+@pytest.mark.parametrize(
+    ("test_script", "groth16_proof"),
+    [
+        (Bls12381.test_script, Bls12381.groth16_proof),
+        (Mnt4753.test_script, Mnt4753.groth16_proof),
+    ],
+)
+@pytest.mark.parametrize("k", [1, 2, 5])
+def test_batch_groth16_weights(test_script, groth16_proof, k):
+    pubs = [[*groth16_proof["pub"][:-1], j] for j in range(k)]
+    weights = test_script.batch_groth16_weights(
+        pubs=pubs, As=[groth16_proof["A"]] * k, Bs=[groth16_proof["B"]] * k, Cs=[groth16_proof["C"]] * k
+    )
+
+    assert len(weights) == k
+    assert sum(weights) % test_script.r == 1
+    assert all(2**127 <= weight < 2**128 for weight in weights[1:])
+    assert len(set(weights)) == k
+
+
+@pytest.mark.parametrize("config", [Bls12381, Mnt4753])
+def test_groth16_with_residue_witness(config, save_to_json_folder):
+    test_script, vk, groth16_proof = config.test_script, config.vk, config.groth16_proof
+    exp_miller_loop = test_script.pairing_model.exp_miller_loop
+
+    # Pairs (A,B), (C,-delta), (sum_gamma_abc,-gamma), (alpha,-beta)
+    points_p = [groth16_proof["A"], groth16_proof["C"], config.sum_gamma_abc.to_list(), vk["alpha"].to_list()]
+    points_q = [groth16_proof["B"], (-vk["delta"]).to_list(), (-vk["gamma"]).to_list(), (-vk["beta"]).to_list()]
+    lambdas = [
+        groth16_proof["lambdas_B_exp_miller_loop"],
+        groth16_proof["lambdas_minus_delta_exp_miller_loop"],
+        groth16_proof["lambdas_minus_gamma_exp_miller_loop"],
+        [[s.to_list() for s in el] for el in (-vk["beta"]).get_lambdas(exp_miller_loop)],
+    ]
+
+    # Compute the output of the Miller loop and the residue witness
+    context = Context(
+        script=test_script.pairing_model.multi_miller_loop_input(points_p, points_q, lambdas)
+        + test_script.pairing_model.multi_miller_loop(
+            n_pairs=4, modulo_threshold=1, check_constant=True, clean_constant=False
+        )
+    )
+    assert context.evaluate()
+    miller_output = config.miller_output_field.from_list(context.get_stack()[1:])
+    witness, witness_inverse, scaling_factor = residue_witness(miller_output, config.q, exp_miller_loop)
+
+    unlock = test_script.groth16_verifier_with_residue_witness_unlock(
+        pub=groth16_proof["pub"],
+        A=groth16_proof["A"],
+        B=groth16_proof["B"],
+        C=groth16_proof["C"],
+        lambdas_B_exp_miller_loop=lambdas[0],
+        lambdas_minus_delta_exp_miller_loop=lambdas[1],
+        lambdas_minus_gamma_exp_miller_loop=lambdas[2],
+        lambdas_minus_beta_exp_miller_loop=lambdas[3],
+        residue_witness_inverse=witness_inverse.to_list(),
+        lamdbas_partial_sums=groth16_proof["lamdbas_partial_sums"],
+        lambdas_multiplications=groth16_proof["lambdas_multiplications"],
+        residue_witness=witness.to_list(),
+        scaling_factor=[scaling_factor.to_list()[i] for i in config.ix_scaling_factor],
+    )
+
+    lock = test_script.groth16_verifier_with_residue_witness(
+        modulo_threshold=1,
+        alpha=vk["alpha"].to_list(),
+        minus_beta=(-vk["beta"]).to_list(),
+        minus_gamma=(-vk["gamma"]).to_list(),
+        minus_delta=(-vk["delta"]).to_list(),
+        gamma_abc=[s.to_list() for s in vk["gamma_abc"]],
+        check_constant=True,
+        clean_constant=True,
+    )
+
+    context = Context(script=unlock + lock)
+    assert context.evaluate()
+    assert len(context.get_stack()) == 1
+    assert len(context.get_altstack()) == 0
+
+    if save_to_json_folder:
+        save_scripts(str(lock), str(unlock), save_to_json_folder, config.filename, "groth16_with_residue_witness")
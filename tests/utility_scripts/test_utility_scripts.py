@@ -1,7 +1,52 @@
+import gc
+import weakref
+from math import log2
+
 import pytest
-from tx_engine import Context, Script
+from tx_engine import Context, Script, encode_num
+from tx_engine.engine.op_codes import (
+    OP_1,
+    OP_3,
+    OP_5,
+    OP_6,
+    OP_ADD,
+    OP_DROP,
+    OP_DUP,
+    OP_ELSE,
+    OP_ENDIF,
+    OP_FROMALTSTACK,
+    OP_IF,
+    OP_MOD,
+    OP_MUL,
+    OP_SWAP,
+    OP_TOALTSTACK,
+)
 
-from src.zkscript.util.utility_scripts import nums_to_script, pick, roll
+from src.zkscript.util.addition_chains import (
+    addition_chain_operations,
+    addition_chain_value,
+    odd_powers_chain,
+    optimal_recoding,
+    search_addition_chain,
+)
+from src.zkscript.util.bit_growth import (
+    bit_growth,
+    is_positive_output,
+    keeps_positive,
+    log2_sum,
+    output_bit_size,
+    positive_input_kwargs,
+)
+from src.zkscript.util.disk_cache import cache_key, load_script, store_script
+from src.zkscript.util.fragment_cache import FRAGMENT_CACHE, FragmentCacheable, cached_fragment
+from src.zkscript.util.peephole import PeepholeOptimiser, detokenise, tokenise
+from src.zkscript.util.reduction_planner import plan_reductions
+from src.zkscript.util.script_builder import ScriptBuilder
+from src.zkscript.util.script_statistics import compare_statistics, script_statistics
+from src.zkscript.util.script_template import ScriptTemplate
+from src.zkscript.util.stack_tracker import StackTracker
+from src.zkscript.util.utility_functions import optimise_script
+from src.zkscript.util.utility_scripts import mod, nums_to_bytes, nums_to_script, pick, reduce_n, roll
 
 
 def generate_verify(z) -> Script:
@@ -66,3 +111,456 @@ def test_pick(position, n_elements, stack, expected):
 
     assert context.evaluate()
     assert len(context.get_altstack()) == 0
+
+
+@pytest.mark.parametrize("is_mod_on_top", [True, False])
+@pytest.mark.parametrize("is_constant_reused", [True, False])
+@pytest.mark.parametrize(("x", "is_positive"), [(0, False), (45, False), (-45, False), (-19, False), (45, True)])
+def test_mod(x, is_positive, is_mod_on_top, is_constant_reused):
+    q = 19
+    unlock = nums_to_script([x, q] if is_mod_on_top else [q, x])
+
+    lock = mod(is_mod_on_top=is_mod_on_top, is_constant_reused=is_constant_reused, is_positive=is_positive)
+    lock += generate_verify([q, x % q] if is_constant_reused else [x % q])
+
+    context = Context(script=unlock + lock)
+
+    assert context.evaluate()
+
+
+def test_mod_size():
+    assert len(mod(is_positive=True).raw_serialize()) == 2
+    assert len(mod(is_constant_reused=False, is_positive=True).raw_serialize()) == 1
+    assert len(mod().raw_serialize()) == 6
+
+
+@pytest.mark.parametrize("clean_constant", [True, False])
+@pytest.mark.parametrize("is_constant_reused", [True, False])
+@pytest.mark.parametrize(
+    ("xs", "is_positive"),
+    [
+        ([-45], False),
+        ([45, -45], False),
+        ([45, -45, 0, -19, 30], [True, False, True, False, True]),
+        ([3, 45, 19], True),
+    ],
+)
+def test_reduce_n(xs, is_positive, clean_constant, is_constant_reused):
+    q = 19
+    n = len(xs)
+    reduced = [x % q for x in xs]
+    expected = [*reduced[:-1], q, reduced[-1]] if is_constant_reused else reduced
+
+    unlock = nums_to_script([q, *xs])
+    lock = Script([OP_TOALTSTACK] * (n - 1))
+    lock += reduce_n(n, clean_constant, is_constant_reused, is_positive=is_positive)
+    lock += generate_verify(expected)
+
+    context = Context(script=unlock + lock)
+
+    assert context.evaluate()
+
+    # The constant is already on the stack, below the element y = 7 which is left untouched
+    unlock = nums_to_script(xs) + Script([OP_TOALTSTACK] * n) + nums_to_script([q, 7])
+    lock = reduce_n(n, is_constant_reused=is_constant_reused, is_positive=is_positive, is_constant_fetched=True)
+    lock += generate_verify([7, *expected])
+
+    context = Context(script=unlock + lock)
+
+    assert context.evaluate()
+
+
+def test_reduce_n_invalid_input():
+    with pytest.raises(ValueError, match="Invalid number of elements to reduce"):
+        reduce_n(0, clean_constant=True, is_constant_reused=False)
+    with pytest.raises(ValueError, match="Invalid number of elements to reduce"):
+        reduce_n(3, clean_constant=True, is_constant_reused=False, is_positive=[True, False])
+
+
+@pytest.mark.parametrize(
+    ("script", "expected"),
+    [
+        ("OP_TOALTSTACK OP_FROMALTSTACK OP_FROMALTSTACK OP_TOALTSTACK OP_ADD", "OP_ADD"),
+        ("OP_SWAP OP_1 OP_ROLL OP_0 OP_PICK OP_DROP", ""),
+        ("OP_ROT OP_ROT OP_2 OP_ROLL OP_1 OP_PICK OP_OVER", "OP_2DUP"),
+        ("OP_DUP OP_DROP OP_DROP OP_DROP", "OP_2DROP"),
+        ("OP_2SWAP 0x7c7c OP_2SWAP", "OP_2SWAP 0x7c7c OP_2SWAP"),
+    ],
+)
+def test_optimise_script(script, expected):
+    optimised = optimise_script(Script.parse_string(script))
+    assert optimised.raw_serialize() == Script.parse_string(expected).raw_serialize()
+
+
+def test_optimise_script_preserves_semantics():
+    stack = list(range(10))
+    lock = Script.parse_string("OP_1 OP_ROLL OP_0 OP_PICK OP_DROP OP_TOALTSTACK OP_FROMALTSTACK OP_2 OP_ROLL OP_SWAP")
+    lock += Script.parse_string("OP_SWAP OP_OVER OP_OVER OP_DROP OP_DROP")
+    expected = [0, 1, 2, 3, 4, 5, 6, 9, 8, 7]
+
+    optimiser = PeepholeOptimiser()
+    optimised = optimise_script(lock, optimiser)
+
+    assert len(optimised.raw_serialize()) < len(lock.raw_serialize())
+    assert optimiser.hits["1 ROLL"] == 1
+    assert optimiser.hits["SWAP SWAP"] == 1
+
+    for script in (lock, optimised):
+        context = Context(script=nums_to_script(stack) + script + generate_verify(expected))
+        assert context.evaluate()
+        assert len(context.get_altstack()) == 0
+
+
+@pytest.mark.parametrize("n", [1, 75, 76, 255, 256, 70000])
+def test_tokenise(n):
+    script = Script.parse_string("OP_DUP")
+    script.append_pushdata(bytes([OP_SWAP] * n))
+    script += Script.parse_string("OP_SWAP OP_SWAP")
+
+    tokens = tokenise(script.raw_serialize())
+
+    assert len(tokens) == 4
+    assert detokenise(tokens) == script.raw_serialize()
+    assert optimise_script(script).raw_serialize() == script.raw_serialize()[:-2]
+
+
+@pytest.mark.parametrize("data", [b"", b"\x00", b"\x01", bytes(75), bytes(76), bytes(255), bytes(256), bytes(70000)])
+def test_script_builder_pushdata(data):
+    expected = Script()
+    expected.append_pushdata(data)
+
+    builder = ScriptBuilder()
+    builder.append_pushdata(data)
+
+    assert builder.raw_serialize() == expected.raw_serialize()
+
+
+def test_script_builder():
+    expected = nums_to_script([1, 2, 3]) + Script.parse_string("OP_ADD OP_ADD OP_6 OP_EQUAL")
+
+    builder = ScriptBuilder(nums_to_script([1]))
+    builder += nums_to_script([2])
+    builder += [OP_3]
+    builder += Script.parse_string("OP_ADD").raw_serialize()
+    builder.append_opcodes(OP_ADD, OP_6)
+    other = ScriptBuilder()
+    other += Script.parse_string("OP_EQUAL")
+    builder += other
+
+    assert len(builder) == len(expected.raw_serialize())
+    assert builder.to_script().raw_serialize() == expected.raw_serialize()
+    assert Context(script=builder.to_script()).evaluate()
+
+
+class DummyField(FragmentCacheable):
+    MODULUS = 19
+
+    def __init__(self):
+        self.calls = 0
+
+    @cached_fragment
+    @keeps_positive(True)
+    @bit_growth(lambda x, y: log2_sum(x, y), uses_instance=False)
+    def add(self, take_modulo: bool = False, is_input_positive: bool = False) -> Script:
+        out = Script([OP_ADD])
+        if take_modulo:
+            out += nums_to_script([self.MODULUS]) + mod(is_constant_reused=False, is_positive=is_input_positive)
+        return out
+
+    @cached_fragment
+    def fragment(self, n_elements: int, take_modulo: bool = False) -> Script:
+        self.calls += 1
+        out = pick(position=n_elements, n_elements=n_elements)
+        if take_modulo:
+            out += Script.parse_string("OP_MOD")
+        return out
+
+
+def test_fragment_cache():
+    FRAGMENT_CACHE.clear()
+    field = DummyField()
+
+    first = field.fragment(3, take_modulo=True)
+    second = field.fragment(3, take_modulo=True)
+    assert field.calls == 1
+    assert first.raw_serialize() == second.raw_serialize()
+    assert FRAGMENT_CACHE.cache_info()["hits"] == 1
+    assert FRAGMENT_CACHE.cache_info()["misses"] == 1
+
+    # Fragments are copies: modifying them does not corrupt the cache
+    first.append_pushdata(b"\x01\x02")
+    assert field.fragment(3, take_modulo=True).raw_serialize() == second.raw_serialize()
+
+    field.fragment(3, take_modulo=False)
+    assert field.calls == 2
+    FRAGMENT_CACHE.clear()
+
+
+def test_fragment_cache_tracks_instance_state():
+    FRAGMENT_CACHE.clear()
+    field = DummyField()
+
+    field.MODULUS = 19
+    first = field.add(take_modulo=True)
+    field.MODULUS = 23
+    second = field.add(take_modulo=True)
+    assert first.raw_serialize() != second.raw_serialize()
+    assert FRAGMENT_CACHE.cache_info()["misses"] == 2
+
+    field.MODULUS = 19
+    assert field.add(take_modulo=True).raw_serialize() == first.raw_serialize()
+    assert FRAGMENT_CACHE.cache_info()["hits"] == 1
+
+    # Changing a nested configuration invalidates the memoised state of the instances built on it
+    base = DummyField()
+    field.BASE_FIELD = base
+    field.add(take_modulo=True)
+    base.MODULUS = 23
+    field.add(take_modulo=True)
+    assert FRAGMENT_CACHE.cache_info()["misses"] == 4
+    FRAGMENT_CACHE.clear()
+
+
+def test_fragment_cache_does_not_keep_instances_alive():
+    FRAGMENT_CACHE.clear()
+    field = DummyField()
+    field.fragment(3)
+    reference = weakref.ref(field)
+    del field
+    gc.collect()
+    assert reference() is None
+
+    # Instances with the same configuration share their fragments
+    DummyField().fragment(3)
+    assert FRAGMENT_CACHE.cache_info()["hits"] == 1
+    FRAGMENT_CACHE.clear()
+
+
+def test_fragment_cache_eviction():
+    FRAGMENT_CACHE.clear()
+    maxsize = FRAGMENT_CACHE.maxsize
+    FRAGMENT_CACHE.maxsize = 2
+    field = DummyField()
+
+    field.fragment(1)
+    field.fragment(2)
+    field.fragment(1)
+    field.fragment(3)  # Evicts field.fragment(2), the least recently used
+    assert len(FRAGMENT_CACHE) == 2
+    field.fragment(1)
+    assert field.calls == 3
+    field.fragment(2)
+    assert field.calls == 4
+
+    FRAGMENT_CACHE.maxsize = 0
+    field.fragment(1)
+    assert field.calls == 5
+
+    FRAGMENT_CACHE.maxsize = maxsize
+    FRAGMENT_CACHE.clear()
+
+
+def test_disk_cache(tmp_path):
+    script = nums_to_script([1, 2**100, -5]) + Script.parse_string("OP_ADD OP_DROP")
+
+    key = cache_key("test", a=[1, 2], b=None, c=True)
+    assert key == cache_key("test", c=True, b=None, a=[1, 2])
+    assert key != cache_key("test", a=[1, 2], b=None, c=False)
+    assert key != cache_key("other", a=[1, 2], b=None, c=True)
+
+    assert load_script(tmp_path, key) is None
+    store_script(tmp_path, key, script)
+    assert load_script(tmp_path, key).raw_serialize() == script.raw_serialize()
+
+    empty_key = cache_key("test")
+    store_script(tmp_path, empty_key, Script())
+    assert load_script(tmp_path, empty_key).raw_serialize() == b""
+
+
+def test_script_template():
+    placeholders = {"x": 2**200 + 1, "y": 2**200 + 2}
+
+    def generate(x, y):
+        return (
+            nums_to_script([x]) + Script.parse_string("OP_ADD") + nums_to_script([y, 5]) + Script.parse_string("OP_MUL")
+        )
+
+    template = ScriptTemplate(generate(**placeholders), placeholders)
+    assert template.slots == ["x", "y"]
+    assert template.offsets == {"x": 0, "y": 28}
+
+    for x, y in [(7, 3), (0, -1), (2**300, 17)]:
+        assert template.instantiate({"x": x, "y": y}).raw_serialize() == generate(x, y).raw_serialize()
+
+    assert template.instantiate({"x": b"\x00", "y": 1}).raw_serialize() == bytes([1, 0, OP_ADD, OP_1, OP_5, OP_MUL])
+
+    with pytest.raises(ValueError, match="do not appear"):
+        ScriptTemplate(generate(**placeholders), {**placeholders, "z": 2**200 + 3})
+
+
+@pytest.mark.parametrize(
+    "nums",
+    [
+        [],
+        list(range(-1, 17)),
+        [17, -17, 127, 128, -128, 255, -255, 256, 2**31, -(2**31)],
+        [2**600 + 12345, -(2**600), 2**759 - 1, -(2**759 - 1)],
+    ],
+)
+def test_nums_to_bytes(nums):
+    expected = Script()
+    for n in nums:
+        if n in range(-1, 17):
+            expected += Script.parse_string("OP_1NEGATE" if n == -1 else str(n))
+        else:
+            expected.append_pushdata(encode_num(n))
+
+    assert nums_to_bytes(nums) == expected.raw_serialize()
+    assert nums_to_script(nums).raw_serialize() == expected.raw_serialize()
+
+    builder = ScriptBuilder()
+    builder.append_nums(nums)
+    assert builder.raw_serialize() == expected.raw_serialize()
+
+
+def greedy_reductions(growth, modulo_threshold, initial_size, reset_size):
+    plan = []
+    size = initial_size
+    for step in growth:
+        if step(size) > modulo_threshold:
+            plan.append(True)
+            size = reset_size
+        else:
+            plan.append(False)
+            size = step(size)
+    return plan
+
+
+@pytest.mark.parametrize("modulo_threshold", [10, 20, 50, 100, 1000])
+@pytest.mark.parametrize("increments", [[1] * 30, [3, 7] * 15, [i % 5 for i in range(40)], [9, 1, 1, 1] * 10])
+def test_plan_reductions_unit_costs(modulo_threshold, increments):
+    growth = [lambda size, increment=increment: 2 * size + increment for increment in increments]
+    expected = greedy_reductions(growth, modulo_threshold, 1, 1)
+    assert plan_reductions(growth, modulo_threshold, 1, 1) == expected
+
+
+def test_plan_reductions_costs():
+    growth = [lambda size: size + 1] * 12
+    # Greedily, the value is reduced at steps 4 and 9
+    assert plan_reductions(growth, 5, 1, 1) == [i in (4, 9) for i in range(12)]
+    # Reducing at odd steps is cheaper, so the plan reduces one step earlier
+    costs = [1 if i % 2 else 3 for i in range(12)]
+    assert plan_reductions(growth, 5, 1, 1, costs=costs) == [i in (3, 7) for i in range(12)]
+
+
+@pytest.mark.parametrize("digit_set", [{1}, {1, 3}, {1, 5, 7}, {1, 3, 5, 7, 9, 11, 13, 15}])
+@pytest.mark.parametrize("e", [1, 7, 105, 2**64 - 1, 0xD201000000010000, 3**100])
+def test_optimal_recoding(e, digit_set):
+    digits = optimal_recoding(e, digit_set, 2, 3, 1)
+    assert sum(digit * 2**i for i, digit in enumerate(digits)) == e
+    assert digits[-1] in digit_set
+    assert all(abs(digit) in digit_set for digit in digits if digit != 0)
+    chain = odd_powers_chain(digit_set, 2, 3)
+    exponents = {addition_chain_value(chain[:k]) for k in range(len(chain) + 1)}
+    assert digit_set <= exponents
+
+
+@pytest.mark.parametrize("e", [1, 2, 3, 7, 105, 2**64 - 1, 0xD201000000010000, 3**100])
+def test_search_addition_chain(e):
+    chain = search_addition_chain(e, 2, 3, 1, max_width=5)
+    assert addition_chain_value(chain) == e
+    n_squares, n_muls, n_inverses = addition_chain_operations(chain)
+    # The chain is not more expensive than the binary expansion of e
+    assert 2 * n_squares + 3 * n_muls + n_inverses <= 2 * (e.bit_length() - 1) + 3 * (e.bit_count() - 1)
+
+    with pytest.raises(ValueError, match="Invalid step"):
+        addition_chain_value([(0, 0, 1), (2, 0, 1)])
+    with pytest.raises(ValueError, match="must be positive"):
+        search_addition_chain(0, 2, 3, 1)
+
+
+def test_bit_growth():
+    assert log2_sum(10) == 10
+    assert log2_sum(3, 3) == 4
+    assert log2_sum(5, 3, 3) == log2(2**5 + 2**3 + 2**3)
+
+    field = DummyField()
+    # The bound survives the memoisation of the method
+    assert output_bit_size(field.add, 5, 7) == log2(2**5 + 2**7)
+    assert output_bit_size(field.add, 5, 7, take_modulo=True) == log2(DummyField.MODULUS)
+    with pytest.raises(ValueError, match="does not declare a bit-growth bound"):
+        output_bit_size(field.fragment, 5)
+
+
+def test_keeps_positive():
+    field = DummyField()
+    # The predicate survives the memoisation of the method
+    assert is_positive_output(field.add)
+    assert not is_positive_output(field.fragment)
+    assert positive_input_kwargs(field.add, True) == {"is_input_positive": True}
+    assert positive_input_kwargs(field.fragment, True) == {}
+
+    unlock = nums_to_script([11, 13])
+    lock = field.add(take_modulo=True, **positive_input_kwargs(field.add, True)) + generate_verify([5])
+    assert len(lock.raw_serialize()) < len((field.add(take_modulo=True) + generate_verify([5])).raw_serialize())
+    context = Context(script=unlock + lock)
+    assert context.evaluate()
+
+
+@pytest.mark.parametrize(
+    ("script", "expected"),
+    [
+        (Script([OP_ADD]), {"size": 1, "opcodes": 1, "op_mul": 0, "op_mod": 0, "max_stack_depth": 2}),
+        (nums_to_script([2, 3, 5]) + Script([OP_MUL, OP_MOD]), {"op_mul": 1, "op_mod": 1, "max_stack_depth": 3}),
+        # The pick reads the element at depth 20, so the stack holds at least 21 elements plus the argument
+        (pick(position=20, n_elements=1), {"size": 3, "opcodes": 2, "max_stack_depth": 22}),
+        (roll(position=300, n_elements=2), {"size": 8, "opcodes": 4, "max_stack_depth": 302}),
+        (Script([OP_DUP, OP_TOALTSTACK, OP_DUP, OP_TOALTSTACK, OP_FROMALTSTACK]), {"max_altstack_depth": 2}),
+        (Script([OP_IF, OP_DUP, OP_DUP, OP_ELSE, OP_DROP, OP_ENDIF]), {"max_stack_depth": 3}),
+        (Script([OP_IF, OP_DROP, OP_ENDIF, OP_DUP]), {"max_stack_depth": 2}),
+    ],
+)
+def test_script_statistics(script, expected):
+    statistics = script_statistics(script)
+    for metric, value in expected.items():
+        assert statistics[metric] == value
+
+
+def test_compare_statistics():
+    baseline = {"a": {"size": 100, "generation_time": 1.0}, "b": {"size": 10}}
+    current = {"a": {"size": 104, "generation_time": 1.2}, "b": {"size": 9}, "c": {"size": 1}}
+    assert compare_statistics(current, baseline) == ["a: size 100 -> 104", "a: generation_time 1.0 -> 1.2"]
+    assert compare_statistics(current, baseline, tolerance=0.05) == ["a: generation_time 1.0 -> 1.2"]
+    assert compare_statistics(current, baseline, metrics=["size"]) == ["a: size 100 -> 104"]
+    assert compare_statistics(current, baseline, metrics=["generation_time"], absolute_tolerance=0.5) == []
+
+
+def test_stack_tracker():
+    stack = StackTracker([("a", 2), ("b", 3), ("c", 1), ("d", 2)])
+    unlock = nums_to_script([1, 2, 3, 4, 5, 6, 7, 8])
+
+    lock = stack.pick("b")
+    lock += stack.roll("a")
+    assert stack.roll("a") == Script()
+    lock += stack.to_altstack("a")
+    lock += stack.roll("c", "d")
+    # The copy of b closest to the top is dropped
+    assert stack.position("b") == 5
+    lock += stack.drop("b")
+    lock += stack.from_altstack("a")
+    assert stack.names() == ["b", "c", "d", "a"]
+    assert len(stack) == 8
+    lock += generate_verify([3, 4, 5, 6, 7, 8, 1, 2])
+
+    context = Context(script=unlock + lock)
+    assert context.evaluate()
+    assert len(context.get_altstack()) == 0
+
+    stack.apply(["d", "a"], [("e", 1)])
+    assert stack.names() == ["b", "c", "e"]
+    with pytest.raises(ValueError, match="consumes"):
+        stack.apply(["c"], [])
+    with pytest.raises(ValueError, match="not adjacent"):
+        stack.pick("b", "e")
+    with pytest.raises(ValueError, match="altstack is empty"):
+        stack.from_altstack()